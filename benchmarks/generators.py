@@ -0,0 +1,100 @@
+"""
+Генераторы синтетических JSON-документов для бенчмарков
+
+Четыре формы документа: широкий (массив однотипных объектов), глубокий
+(вложенные объекты), документ с длинными строками и таблица чисел.
+"""
+import random
+
+from core.codec import JsonNumber
+
+# Параметр размера для каждой формы: число записей / глубина / число строк
+SIZES = {
+    "tiny": {"wide": 100, "deep": 20, "long_strings": 10, "numbers": 100},
+    "small": {"wide": 2_000, "deep": 100, "long_strings": 50, "numbers": 2_000},
+    "medium": {"wide": 20_000, "deep": 300, "long_strings": 200, "numbers": 20_000},
+    "large": {"wide": 100_000, "deep": 500, "long_strings": 1_000, "numbers": 100_000},
+}
+
+
+def wide(count: int, seed: int = 42):
+    """Массив однотипных записей, как в выгрузках метрик и логов"""
+    rnd = random.Random(seed)
+    return {
+        "items": [
+            {
+                "id": i,
+                "name": f"item_{i}",
+                "active": i % 3 == 0,
+                "score": round(rnd.random() * 1000, 3),
+                "tags": ["alpha", "beta"] if i % 2 else [],
+                "owner": None if i % 5 == 0 else {"login": f"user{i % 97}", "level": i % 7},
+            }
+            for i in range(count)
+        ]
+    }
+
+
+def deep(depth: int):
+    """Цепочка вложенных объектов заданной глубины"""
+    root = {"level": 0}
+    current = root
+    for i in range(1, depth):
+        current["nested"] = {"level": i, "label": f"level_{i}"}
+        current = current["nested"]
+    return root
+
+
+def long_strings(count: int, length: int = 10_000, seed: int = 7):
+    """Объект с несколькими очень длинными строковыми значениями"""
+    rnd = random.Random(seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyz АБВГДЕЁЖЗИЙ 0123456789"
+    base = "".join(rnd.choice(alphabet) for _ in range(length))
+    # Сдвиги одной случайной строки: значения различаются, а генерация быстрая
+    return {
+        f"text_{i}": base[i % length:] + base[:i % length]
+        for i in range(count)
+    }
+
+
+def numbers(count: int, seed: int = 11):
+    """Выгрузка метрик: строки с ценами и долями с фиксированным числом знаков
+    (12.50, 0.100), которые нельзя переписывать как 12.5"""
+    rnd = random.Random(seed)
+    return [
+        {
+            "ts": 1_700_000_000 + i,
+            "price": JsonNumber(f"{rnd.randrange(100, 100_000) / 100:.2f}"),
+            "ratio": JsonNumber(f"{rnd.random():.3f}"),
+            "volume": rnd.randrange(1, 10_000),
+            "delta": round(rnd.uniform(-1, 1), 6),
+        }
+        for i in range(count)
+    ]
+
+
+SHAPES = {
+    "wide": wide,
+    "deep": deep,
+    "long_strings": long_strings,
+    "numbers": numbers,
+}
+
+
+def generate(shape: str, size: str):
+    """Создает документ заданной формы и размера"""
+    return SHAPES[shape](SIZES[size][shape])
+
+
+def count_nodes(data) -> int:
+    """Число узлов документа (для нормировки результатов)"""
+    count = 0
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        count += 1
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+    return count
@@ -0,0 +1,455 @@
+"""
+Набор бенчмарков горячих путей редактора
+
+Запуск (без окна, платформа offscreen):
+    python -m benchmarks.run_benchmarks --sizes small medium
+    python -m benchmarks.run_benchmarks --compare bench_results/<commit>.json
+
+Результаты сохраняются в JSON (по умолчанию bench_results/<commit>.json),
+чтобы сравнивать производительность между коммитами.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QTextDocument
+
+from benchmarks.generators import SHAPES, SIZES, generate, count_nodes
+from core import codec
+from core.node_store import ROOT as ROOT_NODE
+
+# Порог замедления, после которого сравнение считается регрессией
+REGRESSION_THRESHOLD = 1.25
+
+
+class BenchmarkCase:
+    """Один измеряемый сценарий: подготовка (не измеряется) и замер"""
+
+    def __init__(self, name: str, setup: Callable, run: Callable):
+        self.name = name
+        self.setup = setup
+        self.run = run
+
+
+CASES: Dict[str, BenchmarkCase] = {}
+
+
+def benchmark(name: str, setup: Optional[Callable] = None):
+    """Регистрирует функцию замера; setup(ctx) готовит состояние для каждого повтора"""
+    def decorator(func):
+        CASES[name] = BenchmarkCase(name, setup or (lambda ctx: ctx), func)
+        return func
+    return decorator
+
+
+class Context:
+    """Общие объекты для замеров одного документа"""
+
+    def __init__(self, data):
+        from main import JsonEditor
+        self.data = data
+        # Точная запись: числа формы numbers сохраняют свой вид (12.50)
+        self.text = codec.dumps(data, indent=2, exact=True)
+        self.editor = JsonEditor()
+        self.editor.text_edit.setPlainText(self.text)
+        self.editor.validation_timer.stop()
+
+    def close(self):
+        self.editor.is_modified = False
+        self.editor.close()
+        self.editor.deleteLater()
+
+
+def _fresh_parse(ctx):
+    """Сбрасывает кэш разбора, чтобы замер включал json.loads"""
+    ctx.editor.current_document.parsed_revision = -1
+    return ctx
+
+
+def _fresh_tree(ctx):
+    """Сбрасывает кэш разбора и дерево: одинаковые данные дерево не перестраивает"""
+    _fresh_parse(ctx)
+    ctx.editor.tree_widget.clear()
+    return ctx
+
+
+def _restore_text(ctx):
+    _fresh_parse(ctx)
+    ctx.editor.text_edit.setPlainText(ctx.text)
+    ctx.editor.validation_timer.stop()
+    return ctx
+
+
+def _tree_selection(ctx):
+    from widgets.json_tree_widget import JsonTreeWidget
+    tree = ctx.editor.tree_widget
+    if tree.topLevelItemCount() == 0:
+        tree.load_json(ctx.data)
+    # Последний лист дерева — худший случай для поиска n-го вхождения
+    item = tree.topLevelItem(tree.topLevelItemCount() - 1)
+    tree.fill_page(item)
+    while item.childCount():
+        item = item.child(item.childCount() - 1)
+        tree.fill_page(item)
+    tree.setCurrentItem(item)
+    node = tree.item_node(item)
+    leaf = tree.nodes.leaf(node)
+    return ctx, node, leaf.occurrence if leaf is not None else 0
+
+
+def _loaded_tree(ctx):
+    tree = ctx.editor.tree_widget
+    if tree.topLevelItemCount() == 0:
+        tree.load_json(ctx.data)
+    return tree
+
+
+def _search_dialog(ctx):
+    from dialogs.search_dialog import SearchReplaceDialog
+    if not hasattr(ctx, "search_dialog"):
+        ctx.search_dialog = SearchReplaceDialog(ctx.editor)
+    return ctx
+
+
+def _export_dialog(ctx):
+    from dialogs.export_dialog import ExportDialog
+    if not hasattr(ctx, "export_dialog"):
+        ctx.export_dialog = ExportDialog({}, ctx.editor)
+    return ctx
+
+
+@benchmark("tree.load_json", setup=_fresh_tree)
+def bench_tree_load(ctx):
+    ctx.editor.tree_widget.load_json(ctx.data)
+
+
+def _last_page(ctx):
+    tree = _loaded_tree(ctx)
+    pages = [tree.topLevelItem(tree.topLevelItemCount() - 1)]
+    while pages[-1].childCount() and not tree.is_page(pages[-1]):
+        pages.append(pages[-1].child(pages[-1].childCount() - 1))
+    if tree.is_page(pages[-1]):
+        # Страница создается заново в каждом повторе
+        pages[-1].takeChildren()
+    return tree, pages[-1]
+
+
+@benchmark("tree.fill_page", setup=_last_page)
+def bench_fill_page(state):
+    tree, page = state
+    tree.fill_page(page)
+
+
+def _table_sort(ctx):
+    """Построение индекса сортировки по первому столбцу самого длинного
+    массива верхнего уровня (в текущем потоке, без QThread)"""
+    from widgets.json_table_model import SortWorker, sample_columns
+    arrays = [ctx.data] if isinstance(ctx.data, list) else [
+        v for v in (ctx.data.values() if isinstance(ctx.data, dict) else ()) if isinstance(v, list)]
+    rows = max(arrays, key=len, default=[])
+    columns = sample_columns(rows)
+    return SortWorker(rows, 0, columns[0] if columns else None)
+
+
+@benchmark("table.sort", setup=_table_sort)
+def bench_table_sort(worker):
+    worker.run()
+
+
+def _unfolded(ctx):
+    folding = ctx.editor.current_document.folding
+    folding.unfold_all()
+    return folding
+
+
+@benchmark("folding.fold_to_level", setup=_unfolded)
+def bench_fold_to_level(folding):
+    # Области второго уровня ищутся по индексу скобок, без просмотра текста
+    folding.fold_to_level(1)
+
+
+@benchmark("brackets.match", setup=lambda ctx: ctx.editor.current_document.bracket_matcher)
+def bench_bracket_match(matcher):
+    # Скобка корня: парная ей — в последней строке документа
+    matcher.match(0)
+
+
+def _last_value(ctx):
+    document = ctx.editor.text_edit.document()
+    # Конец документа: скобки и запятые до позиции дальше всего от начала
+    return ctx.editor.current_document.path_resolver, document.characterCount() - 3
+
+
+@benchmark("breadcrumbs.resolve", setup=_last_value)
+def bench_breadcrumbs_resolve(state):
+    resolver, position = state
+    resolver.resolve(position)
+
+
+@benchmark("tree.load_json.unchanged", setup=lambda ctx: (_loaded_tree(ctx), ctx.data))
+def bench_tree_load_unchanged(state):
+    # Те же данные: хэш содержимого совпадает, дерево не перестраивается
+    tree, data = state
+    tree.load_json(data)
+
+
+def _reset_hashes(ctx):
+    tree = _loaded_tree(ctx)
+    tree.nodes.reset_hashes()
+    return tree
+
+
+@benchmark("nodes.subtree_hash", setup=_reset_hashes)
+def bench_subtree_hash(tree):
+    tree.nodes.subtree_hash(ROOT_NODE)
+
+
+def _edited_leaf(ctx):
+    tree = _loaded_tree(ctx)
+    tree.nodes.subtree_hash(ROOT_NODE)
+    # Последний лист: пересчет идет по всей цепочке его предков
+    node, leaf = next(reversed(tree.nodes.leaves()))
+    return tree, node, leaf.text, leaf.value_hash
+
+
+@benchmark("nodes.rehash_after_edit", setup=_edited_leaf)
+def bench_rehash_after_edit(state):
+    tree, node, text, value_hash = state
+    tree.nodes.update_leaf(node, text, value_hash)
+    tree.nodes.subtree_hash(ROOT_NODE)
+
+
+@benchmark("highlighter.full_pass", setup=lambda ctx: QTextDocument(ctx.text))
+def bench_highlighter(document):
+    from widgets.syntax_highlighter import JsonSyntaxHighlighter
+    JsonSyntaxHighlighter(document).rehighlight()
+
+
+@benchmark("editor.auto_validate", setup=_fresh_tree)
+def bench_auto_validate(ctx):
+    ctx.editor.auto_validate()
+
+
+@benchmark("editor.format_json", setup=_restore_text)
+def bench_format(ctx):
+    ctx.editor.format_json()
+
+
+@benchmark("editor.minify_json", setup=_restore_text)
+def bench_minify(ctx):
+    ctx.editor.minify_json()
+
+
+@benchmark("editor.on_tree_item_selected", setup=_tree_selection)
+def bench_tree_selected(state):
+    ctx, node, occurrence = state
+    ctx.editor.on_tree_item_selected(node, occurrence)
+
+
+@benchmark("search.count_occurrences", setup=_search_dialog)
+def bench_search_count(ctx):
+    ctx.search_dialog.count_occurrences(ctx.editor.text_edit, "1")
+
+
+@benchmark("export.xml", setup=_export_dialog)
+def bench_export_xml(ctx):
+    ctx.export_dialog.json_to_xml(ctx.data)
+
+
+@benchmark("export.yaml", setup=_export_dialog)
+def bench_export_yaml(ctx):
+    ctx.export_dialog.json_to_yaml(ctx.data)
+
+
+@benchmark("format.exact")
+def bench_format_exact(ctx):
+    codec.dumps(codec.loads(ctx.text, exact=True), indent=2, exact=True)
+
+
+@benchmark("format.decimal")
+def bench_format_decimal(ctx):
+    # Прежний обходной путь без потерь — Decimal; default=str записывает числа
+    # строками, поэтому замер — нижняя граница его стоимости
+    from decimal import Decimal
+    json.dumps(json.loads(ctx.text, parse_float=Decimal), indent=2, default=str, ensure_ascii=False)
+
+
+# Схема, обходящая весь документ: любой тип, потомки проверяются ею же
+_WALK_SCHEMA = {
+    "type": ["object", "array", "string", "number", "boolean", "null"],
+    "items": {"$ref": "#"},
+    "additionalProperties": {"$ref": "#"},
+}
+
+
+def _schema_state(ctx):
+    """Схема, запомнившая проверку документа, и копия документа с правкой последнего листа"""
+    from core.schema import CompiledSchema
+    if not hasattr(ctx, "schema_edited"):
+        ctx.schema_data = codec.loads(ctx.text)
+        edited = codec.loads(ctx.text)
+        parent, key, value = None, None, edited
+        while isinstance(value, (dict, list)) and value:
+            parent = value
+            key = next(reversed(value)) if isinstance(value, dict) else len(value) - 1
+            value = parent[key]
+        if parent is not None:
+            parent[key] = "edited"
+        ctx.schema_edited = edited
+    schema = CompiledSchema(_WALK_SCHEMA)
+    schema.validate(ctx.schema_data)
+    return schema, ctx.schema_edited
+
+
+@benchmark("schema.validate", setup=_schema_state)
+def bench_schema_validate(state):
+    schema, data = state
+    schema.validate(data, reuse=False)
+
+
+@benchmark("schema.revalidate", setup=_schema_state)
+def bench_schema_revalidate(state):
+    # Неизмененные ветви верхних уровней берутся из памяти прошлой проверки
+    schema, data = state
+    schema.validate(data)
+
+
+def _register_codec_cases():
+    """Разбор и запись каждой установленной библиотекой JSON (codec.<операция>.<библиотека>)"""
+    for name in codec.available_backends():
+        backend = codec.get_codec(name)
+        benchmark(f"codec.loads.{name}")(lambda ctx, backend=backend: backend.loads(ctx.text))
+        benchmark(f"codec.dumps.{name}")(lambda ctx, backend=backend: backend.dumps(ctx.data, indent=2))
+        benchmark(f"codec.minify.{name}")(lambda ctx, backend=backend: backend.dumps(ctx.data, compact=True))
+
+
+_register_codec_cases()
+
+
+def _measure(case: BenchmarkCase, ctx, repeat: int, measure_memory: bool) -> dict:
+    timings = []
+    peak = None
+    for _ in range(repeat):
+        state = case.setup(ctx)
+        if measure_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        case.run(state)
+        timings.append(time.perf_counter() - started)
+        if measure_memory:
+            current_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            peak = max(peak or 0, current_peak)
+    result = {"min": min(timings), "median": statistics.median(timings)}
+    if peak is not None:
+        result["peak_kb"] = peak // 1024
+    return result
+
+
+def run_benchmarks(shapes: Optional[List[str]] = None, sizes: Optional[List[str]] = None,
+                   cases: Optional[List[str]] = None, repeat: int = 3,
+                   measure_memory: bool = False, log=print) -> dict:
+    """Выполняет бенчмарки и возвращает результаты в виде словаря"""
+    app = QApplication.instance() or QApplication([])
+    from unittest.mock import patch
+    results = []
+    # Модальные окна (например, ошибки) в бенчмарках не показываем
+    with patch("PyQt5.QtWidgets.QMessageBox.information"), \
+         patch("PyQt5.QtWidgets.QMessageBox.warning"):
+        for size in sizes or ["small"]:
+            for shape in shapes or list(SHAPES):
+                data = generate(shape, size)
+                ctx = Context(data)
+                nodes = count_nodes(data)
+                for name in cases or list(CASES):
+                    measured = _measure(CASES[name], ctx, repeat, measure_memory)
+                    entry = {"case": name, "shape": shape, "size": size, "nodes": nodes,
+                             "bytes": len(ctx.text.encode("utf-8")), **measured}
+                    results.append(entry)
+                    if log:
+                        log(f"{name:32} {shape:13} {size:7} {measured['median'] * 1000:10.2f} мс")
+                ctx.close()
+                app.processEvents()
+    return {"meta": _metadata(), "results": results}
+
+
+def _metadata() -> dict:
+    from PyQt5.QtCore import QT_VERSION_STR
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "qt": QT_VERSION_STR,
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, timeout=10,
+        ).stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def compare(old: dict, new: dict, threshold: float = REGRESSION_THRESHOLD) -> List[dict]:
+    """Сравнивает медианы; возвращает сценарии, замедлившиеся больше порога"""
+    key = lambda r: (r["case"], r["shape"], r["size"])
+    baseline = {key(r): r for r in old["results"]}
+    regressions = []
+    for result in new["results"]:
+        before = baseline.get(key(result))
+        if before is None or before["median"] <= 0:
+            continue
+        ratio = result["median"] / before["median"]
+        if ratio > threshold:
+            regressions.append({**result, "baseline": before["median"], "ratio": ratio})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки JSON Editor Pro")
+    parser.add_argument("--sizes", nargs="+", default=["small"], choices=list(SIZES))
+    parser.add_argument("--shapes", nargs="+", default=list(SHAPES), choices=list(SHAPES))
+    parser.add_argument("--cases", nargs="+", choices=list(CASES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--memory", action="store_true", help="замерять пик памяти (tracemalloc)")
+    parser.add_argument("--output", help="файл результатов (по умолчанию bench_results/<commit>.json)")
+    parser.add_argument("--compare", help="файл с результатами для сравнения")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.shapes, args.sizes, args.cases, args.repeat, args.memory)
+    output = Path(args.output) if args.output else ROOT / "bench_results" / f"{report['meta']['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Результаты сохранены: {output}")
+
+    if args.compare:
+        old = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(old, report)
+        for r in regressions:
+            print(f"РЕГРЕССИЯ {r['case']} {r['shape']} {r['size']}: "
+                  f"{r['baseline'] * 1000:.2f} -> {r['median'] * 1000:.2f} мс (x{r['ratio']:.2f})")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
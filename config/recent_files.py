@@ -0,0 +1,150 @@
+"""
+Модуль кэша сведений о недавних файлах
+
+Проверка существования и размера файлов выполняется в фоновом потоке:
+на сетевых дисках os.stat может занимать секунды. Меню строится сразу из
+кэша, недоступные файлы помечаются устаревшими, а не удаляются из списка.
+"""
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from config.settings import settings_manager
+
+# Не перепроверяем файл чаще, чем раз в указанное число секунд
+RECHECK_INTERVAL = 30.0
+
+
+class RecentFileInfo:
+    """Сведения о недавнем файле"""
+
+    __slots__ = ("path", "exists", "size", "mtime", "open_seconds", "checked_at")
+
+    def __init__(self, path: str, exists: Optional[bool] = None, size: Optional[int] = None,
+                 mtime: Optional[float] = None, open_seconds: Optional[float] = None,
+                 checked_at: float = 0.0):
+        self.path = path
+        self.exists = exists          # None — еще не проверялся
+        self.size = size
+        self.mtime = mtime
+        self.open_seconds = open_seconds
+        self.checked_at = checked_at
+
+    @property
+    def stale(self) -> bool:
+        """Файл не найден при последней проверке"""
+        return self.exists is False
+
+    def to_dict(self) -> dict:
+        return {"exists": self.exists, "size": self.size, "mtime": self.mtime,
+                "open_seconds": self.open_seconds}
+
+
+def format_size(size: Optional[int]) -> str:
+    """Размер файла в человекочитаемом виде"""
+    if size is None:
+        return "?"
+    for unit in ("Б", "КБ", "МБ"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "Б" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} ГБ"
+
+
+class RecentFilesCache(QObject):
+    """Кэш сведений о недавних файлах с фоновым обновлением"""
+
+    # Испускается в GUI-потоке после завершения фоновой проверки
+    updated = pyqtSignal()
+
+    def __init__(self, settings=None, parent=None):
+        super().__init__(parent)
+        self.settings = settings if settings is not None else settings_manager
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pending: Optional[list] = None
+        self._entries: Dict[str, RecentFileInfo] = {}
+        self._load()
+
+    def _load(self):
+        """Читает сохраненные сведения из настроек"""
+        raw = self.settings.get("recent_files_info", "") or ""
+        try:
+            stored = json.loads(raw) if raw else {}
+        except (TypeError, ValueError):
+            stored = {}
+        for path, values in stored.items():
+            self._entries[path] = RecentFileInfo(path, **{
+                k: values.get(k) for k in ("exists", "size", "mtime", "open_seconds")
+            })
+
+    def save(self, paths: Iterable[str]):
+        """Сохраняет сведения только для файлов из текущего списка"""
+        with self._lock:
+            data = {p: self._entries[p].to_dict() for p in paths if p in self._entries}
+        self.settings.set("recent_files_info", json.dumps(data, ensure_ascii=False))
+
+    def info(self, path: str) -> RecentFileInfo:
+        """Сведения из кэша без обращения к диску"""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                entry = self._entries[path] = RecentFileInfo(path)
+            return entry
+
+    def record_open(self, path: str, seconds: float, size: Optional[int] = None):
+        """Запоминает длительность открытия файла"""
+        entry = self.info(path)
+        with self._lock:
+            entry.open_seconds = seconds
+            entry.exists = True
+            if size is not None:
+                entry.size = size
+            entry.checked_at = time.monotonic()
+
+    def is_refreshing(self) -> bool:
+        return self._thread is not None
+
+    def refresh(self, paths: Iterable[str], force: bool = False):
+        """Запускает фоновую проверку файлов (не блокирует GUI)"""
+        now = time.monotonic()
+        todo = [p for p in paths
+                if force or now - self.info(p).checked_at >= RECHECK_INTERVAL]
+        if not todo:
+            return
+        with self._lock:
+            if self.is_refreshing():
+                # Проверка уже идет — выполним новую по ее завершении
+                self._pending = todo
+                return
+            self._thread = threading.Thread(target=self._check, args=(todo,), daemon=True)
+            self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None):
+        """Ожидает завершения фоновой проверки"""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _check(self, paths):
+        while paths:
+            for path in paths:
+                try:
+                    st = os.stat(path)
+                    values = (True, st.st_size, st.st_mtime)
+                except OSError:
+                    values = (False, None, None)
+                with self._lock:
+                    entry = self._entries.setdefault(path, RecentFileInfo(path))
+                    entry.exists = values[0]
+                    if values[0]:
+                        entry.size, entry.mtime = values[1], values[2]
+                    entry.checked_at = time.monotonic()
+            with self._lock:
+                paths, self._pending = self._pending, None
+                if not paths:
+                    self._thread = None
+        self.updated.emit()
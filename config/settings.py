@@ -1,112 +1,198 @@
 """
 Модуль для управления настройками приложения с использованием QSettings
+
+Значения хранятся в памяти; изменения записываются на диск пакетно —
+по таймеру после серии изменений или при завершении приложения.
 """
+import atexit
 from typing import Dict, Any, List
-from PyQt5.QtCore import QSettings
+from PyQt5.QtCore import QSettings, QTimer, QCoreApplication, QThread
+
+# Виды значений схемы настроек
+STR = "str"
+INT = "int"
+BOOL = "bool"
+GEOMETRY = "geometry"    # словарь x/y/width/height, хранится подключами
+INT_LIST = "int_list"    # список чисел через запятую
+STR_LIST = "str_list"    # список строк через "|"
+
+# Задержка пакетной записи изменений на диск
+FLUSH_DELAY_MS = 2000
 
 
 class SettingsManager:
     """Менеджер настроек приложения с использованием QSettings"""
-    
-    def __init__(self):
-        self.settings = QSettings("JSONEditorPro", "Settings")
-        self.default_settings = {
-            "font_family": "Consolas",
-            "font_size": 12,
-            "text_color": "#000000",
-            "background_color": "#ffffff",
-            "auto_validate": True,
-            "validation_delay": 500,
-            "window_geometry": {
-                "width": 1400,
-                "height": 800,
-                "x": 100,
-                "y": 100
-            },
-            "splitter_sizes": [700, 300],
-            "recent_files": [],
-            "max_recent_files": 10
-        }
-    
-    def get(self, key: str, default=None):
-        """Получает значение настройки"""
-        if default is None:
-            default = self.default_settings.get(key)
-        
-        # Специальная обработка для сложных типов
-        if key == "window_geometry":
+
+    # Схема: ключ -> (вид значения, значение по умолчанию)
+    SCHEMA = {
+        "font_family": (STR, "Consolas"),
+        "font_size": (INT, 12),
+        "text_color": (STR, "#000000"),
+        "background_color": (STR, "#ffffff"),
+        "auto_validate": (BOOL, True),
+        "validation_delay": (INT, 500),
+        "auto_validate_max_kb": (INT, 5120),
+        "window_geometry": (GEOMETRY, {
+            "width": 1400,
+            "height": 800,
+            "x": 100,
+            "y": 100
+        }),
+        "splitter_sizes": (INT_LIST, [700, 300]),
+        "recent_files": (STR_LIST, []),
+        "recent_files_info": (STR, ""),
+        "max_recent_files": (INT, 10),
+        "memory_budget_mb": (INT, 512),
+        "instrumentation_enabled": (BOOL, False),
+        "schema_associations": (STR, ""),
+        "autosave_enabled": (BOOL, True),
+        "autosave_interval_sec": (INT, 30),
+        "json_backend": (STR, "auto"),
+        "show_minimap": (BOOL, True),
+    }
+
+    def __init__(self, settings: QSettings = None):
+        self.settings = settings if settings is not None else QSettings("JSONEditorPro", "Settings")
+        self.default_settings = {key: default for key, (_, default) in self.SCHEMA.items()}
+        # Кэш прочитанных значений и ключи, ожидающие записи на диск
+        self._values: Dict[str, Any] = {}
+        self._dirty = set()
+        self._flush_timer = None
+        self.flush_delay_ms = FLUSH_DELAY_MS
+        atexit.register(self.flush)
+
+    @staticmethod
+    def _copy(value):
+        """Изменяемые значения отдаем копией, чтобы не портить кэш"""
+        if isinstance(value, dict):
+            return dict(value)
+        if isinstance(value, list):
+            return list(value)
+        return value
+
+    def _read(self, key: str, kind: str, default):
+        """Читает и преобразует значение из QSettings"""
+        if kind == GEOMETRY:
             return {
-                "x": self.settings.value("window_geometry/x", self.default_settings["window_geometry"]["x"], int),
-                "y": self.settings.value("window_geometry/y", self.default_settings["window_geometry"]["y"], int),
-                "width": self.settings.value("window_geometry/width", self.default_settings["window_geometry"]["width"], int),
-                "height": self.settings.value("window_geometry/height", self.default_settings["window_geometry"]["height"], int)
+                name: self.settings.value(f"window_geometry/{name}", default[name], int)
+                for name in ("x", "y", "width", "height")
             }
-        elif key == "splitter_sizes":
-            sizes_str = self.settings.value("splitter_sizes", "")
+        if kind == INT_LIST:
+            sizes_str = self.settings.value(key, "")
             if sizes_str:
                 try:
                     return [int(x) for x in sizes_str.split(",")]
                 except ValueError:
-                    return self.default_settings["splitter_sizes"]
-            return self.default_settings["splitter_sizes"]
-        elif key == "recent_files":
-            files_str = self.settings.value("recent_files", "")
-            if files_str:
-                return files_str.split("|") if files_str else []
-            return []
-        elif key in ["auto_validate"]:
+                    pass
+            return list(default)
+        if kind == STR_LIST:
+            files_str = self.settings.value(key, "")
+            return files_str.split("|") if files_str else []
+        if kind == BOOL:
             return self.settings.value(key, default, bool)
-        elif key in ["font_size", "validation_delay", "max_recent_files"]:
+        if kind == INT:
             return self.settings.value(key, default, int)
-        else:
-            return self.settings.value(key, default)
-    
-    def set(self, key: str, value: Any):
-        """Устанавливает значение настройки"""
-        # Специальная обработка для сложных типов
-        if key == "window_geometry":
-            if isinstance(value, dict):
-                self.settings.setValue("window_geometry/x", value.get("x", 100))
-                self.settings.setValue("window_geometry/y", value.get("y", 100))
-                self.settings.setValue("window_geometry/width", value.get("width", 1400))
-                self.settings.setValue("window_geometry/height", value.get("height", 800))
-        elif key == "splitter_sizes":
-            if isinstance(value, list):
-                self.settings.setValue("splitter_sizes", ",".join(map(str, value)))
-        elif key == "recent_files":
-            if isinstance(value, list):
-                self.settings.setValue("recent_files", "|".join(value))
+        return self.settings.value(key, default)
+
+    def _write(self, key: str, value: Any):
+        """Преобразует и записывает значение в QSettings"""
+        kind = self.SCHEMA[key][0] if key in self.SCHEMA else None
+        if kind == GEOMETRY:
+            defaults = self.default_settings["window_geometry"]
+            for name in ("x", "y", "width", "height"):
+                self.settings.setValue(f"window_geometry/{name}", value.get(name, defaults[name]))
+        elif kind == INT_LIST:
+            self.settings.setValue(key, ",".join(map(str, value)))
+        elif kind == STR_LIST:
+            self.settings.setValue(key, "|".join(value))
         else:
             self.settings.setValue(key, value)
-        
-        # Синхронизируем настройки
-        self.settings.sync()
-    
+
+    def get(self, key: str, default=None):
+        """Получает значение настройки (без обращения к диску после первого чтения)"""
+        if key not in self._values:
+            if key in self.SCHEMA:
+                kind, schema_default = self.SCHEMA[key]
+                self._values[key] = self._read(key, kind, schema_default)
+            else:
+                return self.settings.value(key, default)
+        return self._copy(self._values[key])
+
+    def set(self, key: str, value: Any):
+        """Устанавливает значение настройки; запись на диск откладывается"""
+        if key in self.SCHEMA:
+            kind = self.SCHEMA[key][0]
+            if kind == GEOMETRY and not isinstance(value, dict):
+                return
+            if kind in (INT_LIST, STR_LIST) and not isinstance(value, list):
+                return
+        self._values[key] = self._copy(value)
+        self._dirty.add(key)
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        """Запускает таймер пакетной записи (только в GUI-потоке с event loop)"""
+        app = QCoreApplication.instance()
+        if app is None or QThread.currentThread() is not app.thread():
+            return
+        if self._flush_timer is None:
+            self._flush_timer = QTimer()
+            self._flush_timer.setSingleShot(True)
+            self._flush_timer.timeout.connect(self.flush)
+            # Пока объекты Qt живы, записываем изменения при выходе из цикла событий
+            app.aboutToQuit.connect(self.flush)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start(self.flush_delay_ms)
+
+    def has_pending_changes(self) -> bool:
+        return bool(self._dirty)
+
+    def flush(self):
+        """Записывает накопленные изменения на диск одним sync"""
+        if self._flush_timer is not None:
+            try:
+                self._flush_timer.stop()
+            except RuntimeError:
+                # При завершении (atexit) таймер уже удален вместе с приложением
+                self._flush_timer = None
+        if not self._dirty:
+            return
+        try:
+            for key in sorted(self._dirty):
+                self._write(key, self._values[key])
+            self.settings.sync()
+        except RuntimeError:
+            # QSettings уже удален при завершении интерпретатора — писать некуда
+            return
+        self._dirty.clear()
+
     def add_recent_file(self, file_path: str):
         """Добавляет файл в список недавних"""
         recent_files = self.get_recent_files()
         if file_path in recent_files:
             recent_files.remove(file_path)
         recent_files.insert(0, file_path)
-        
+
         max_files = self.get("max_recent_files", 10)
         recent_files = recent_files[:max_files]
-        
+
         self.set("recent_files", recent_files)
-    
+
     def get_recent_files(self) -> List[str]:
         """Получает список недавних файлов"""
         return self.get("recent_files", [])
-    
+
     def clear_recent_files(self):
         """Очищает список недавних файлов"""
         self.set("recent_files", [])
-    
+
     def reset_to_defaults(self):
         """Сбрасывает настройки к значениям по умолчанию"""
+        self._values.clear()
+        self._dirty.clear()
         self.settings.clear()
         self.settings.sync()
-    
+
     def get_all_settings(self) -> Dict[str, Any]:
         """Получает все настройки"""
         result = {}
@@ -117,5 +203,3 @@ class SettingsManager:
 
 # Глобальный экземпляр менеджера настроек
 settings_manager = SettingsManager()
-
-
@@ -0,0 +1,93 @@
+"""
+Модуль атомарного сохранения файлов
+
+Текст записывается частями во временный файл в том же каталоге, сбрасывается
+на диск (fsync) и только затем заменяет исходный файл через os.replace.
+Сбой посреди записи оставляет прежний файл нетронутым.
+"""
+import os
+import tempfile
+from typing import Callable, Optional
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from core.instrumentation import instrumentation
+
+# Размер части текста, записываемой за один раз (символы)
+CHUNK_CHARS = 1 << 20
+
+
+def atomic_write_text(path, text: str, progress: Optional[Callable[[int, int], None]] = None,
+                      encoding: str = "utf-8", chunk_chars: int = CHUNK_CHARS):
+    """Атомарно записывает текст в файл; progress(записано, всего) вызывается после каждой части"""
+    path = os.fspath(path)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding=encoding) as f:
+            total = len(text)
+            for start in range(0, total, chunk_chars):
+                f.write(text[start:start + chunk_chars])
+                if progress is not None:
+                    progress(min(start + chunk_chars, total), total)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            # Права нового файла — как у заменяемого
+            os.chmod(temp_path, os.stat(path).st_mode & 0o7777)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(directory)
+
+
+def _fsync_directory(directory: str):
+    """Сбрасывает на диск запись каталога о замене файла (где это поддерживается)"""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    try:
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class SaveWorker(QThread):
+    """Фоновое атомарное сохранение снимка текста"""
+
+    progress = pyqtSignal(int, int)
+    saved = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, path, text: str, parent=None):
+        super().__init__(parent)
+        self.path = os.fspath(path)
+        self.text = text
+        self._percent = -1
+
+    def _report(self, written: int, total: int):
+        # Сигнал только при изменении процента, чтобы не засыпать очередь событий
+        percent = written * 100 // total if total else 100
+        if percent != self._percent:
+            self._percent = percent
+            self.progress.emit(written, total)
+
+    def run(self):
+        try:
+            with instrumentation.timed("save"):
+                atomic_write_text(self.path, self.text, self._report)
+        except (OSError, ValueError) as e:
+            self.failed.emit(str(e))
+            return
+        finally:
+            self.text = None
+        self.saved.emit(self.path)
@@ -0,0 +1,394 @@
+"""
+Модуль автосохранения: журнал правок для восстановления после сбоя
+
+Каждая правка (сигнал QTextDocument.contentsChange) записывается в журнал
+документа как (позиция, удалено символов, вставленный текст), поэтому
+стоимость автосохранения зависит от размера правки, а не документа.
+
+Журнал строится поверх базы: исходного файла (пока он не изменился на
+диске), пустого документа или снимка текста. Когда журнал разрастается,
+снимок текста записывается в фоне и начинается новое поколение журнала;
+старые поколения удаляются после записи снимка. При сбое во время записи
+снимка восстановление идет от предыдущего поколения через оба журнала.
+
+Файлы сессии помечены pid и защищены QLockFile: после аварийного завершения
+блокировка устаревает, и следующий запуск предлагает восстановить документы.
+"""
+import glob
+import itertools
+import json
+import os
+import re
+from typing import List, Optional
+
+from PyQt5.QtCore import QLockFile, QStandardPaths, QThread
+from PyQt5.QtGui import QTextCursor, QTextDocument
+
+# Правки крупнее этого числа символов не копируются в журнал: вместо них
+# записывается снимок всего текста (загрузка файла, форматирование)
+MAX_DELTA_CHARS = 1 << 20
+# Журнал сжимается в снимок, когда превышает долю размера базы (но не меньше порога)
+COMPACT_MIN_BYTES = 1 << 20
+COMPACT_RATIO = 0.5
+
+_SESSION_LOCK = re.compile(r"^session-(\d+-\d+)\.lock$")
+_session_numbers = itertools.count(1)
+
+
+def default_directory() -> str:
+    """Каталог журналов автосохранения в данных приложения"""
+    base = QStandardPaths.writableLocation(QStandardPaths.AppLocalDataLocation)
+    return os.path.join(base or os.path.expanduser("~"), "autosave")
+
+
+def _paragraphs_to_newlines(text: str) -> str:
+    # QTextCursor.selectedText() разделяет блоки символом U+2029
+    return text.replace("\u2029", "\n")
+
+
+class SnapshotWorker(QThread):
+    """Фоновая атомарная запись снимка текста"""
+
+    def __init__(self, path: str, text: str, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.text = text
+        self.error: Optional[str] = None
+
+    def run(self):
+        from core.atomic_save import atomic_write_text
+        try:
+            atomic_write_text(self.path, self.text)
+        except (OSError, ValueError) as e:
+            self.error = str(e)
+        finally:
+            self.text = None
+
+
+class DocumentJournal:
+    """Журнал правок одного документа"""
+
+    def __init__(self, directory: str, name: str, document: QTextDocument):
+        self.directory = directory
+        self.name = name
+        self.document = document
+        self.generation = 0
+        self.file_path: Optional[str] = None
+        # Правки, еще не записанные на диск
+        self.pending: List[list] = []
+        self.journal_bytes = 0
+        self.base_chars = 0
+        self.needs_snapshot = False
+        self.snapshot_worker: Optional[SnapshotWorker] = None
+        # Потоки снимков живут, пока не обработан сигнал их завершения
+        self._workers: List[SnapshotWorker] = []
+        self._header_written = False
+        self._header = {}
+        self._length = document.characterCount() - 1
+        # contentsChange испускается только у документа с разметкой (у QTextEdit она есть всегда)
+        document.documentLayout()
+        document.contentsChange.connect(self.on_contents_change)
+
+    def _path(self, generation: int, suffix: str) -> str:
+        return os.path.join(self.directory, f"{self.name}.{generation}.{suffix}")
+
+    # --- запись правок ---
+    def on_contents_change(self, position: int, removed: int, added: int):
+        length = self.document.characterCount() - 1
+        # Qt может включать в счетчики завершающий разделитель блока: обрезаем по длине текста
+        removed = min(removed, self._length - position)
+        added = min(added, length - position)
+        consistent = self._length - removed + added == length
+        self._length = length
+        if self.needs_snapshot:
+            return
+        if not consistent or added > MAX_DELTA_CHARS:
+            self.needs_snapshot = True
+            self.pending = []
+            return
+        text = ""
+        if added:
+            cursor = QTextCursor(self.document)
+            cursor.setPosition(position)
+            cursor.setPosition(position + added, QTextCursor.KeepAnchor)
+            text = _paragraphs_to_newlines(cursor.selectedText())
+        last = self.pending[-1] if self.pending else None
+        if last is not None and removed == 0 and position == last[0] + len(last[2]):
+            # Набор подряд: продолжаем предыдущую правку
+            last[2] += text
+        else:
+            self.pending.append([position, removed, text])
+
+    def reset(self, file_path=None):
+        """Новая база: сохраненный файл (или пустой документ); прежние поколения удаляются"""
+        self._wait_snapshot()
+        self._remove_generations(self.generation + 1)
+        self.generation += 1
+        self.file_path = os.fspath(file_path) if file_path else None
+        self.pending = []
+        self.needs_snapshot = False
+        self._length = self.document.characterCount() - 1
+        self.base_chars = self._length
+        self.journal_bytes = 0
+        self._header = {"file": self.file_path, "base": "empty"}
+        if self.file_path:
+            try:
+                st = os.stat(self.file_path)
+                self._header.update(base="file", mtime_ns=st.st_mtime_ns, size=st.st_size)
+            except OSError:
+                self.needs_snapshot = True
+        if self._length and not self.file_path:
+            self.needs_snapshot = True
+        self._header_written = False
+
+    def is_dirty(self) -> bool:
+        return bool(self.pending) or self.needs_snapshot
+
+    def flush(self):
+        """Дописывает накопленные правки в журнал; при необходимости начинает сжатие"""
+        if self.needs_snapshot:
+            self.compact()
+            return
+        self._append_pending()
+        if self.journal_bytes > max(COMPACT_MIN_BYTES, self.base_chars * COMPACT_RATIO):
+            self.compact()
+
+    def _append_pending(self):
+        if not self.pending and self._header_written:
+            return
+        lines = []
+        if not self._header_written:
+            lines.append(json.dumps(self._header, ensure_ascii=False))
+        lines.extend(json.dumps(delta, ensure_ascii=False) for delta in self.pending)
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+        with open(self._path(self.generation, "journal"), "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self._header_written = True
+        self.pending = []
+        self.journal_bytes += len(data)
+
+    def compact(self):
+        """Начинает новое поколение от снимка текста; снимок пишется в фоне"""
+        if self.snapshot_worker is not None and self.snapshot_worker.isRunning():
+            return
+        # Если прежний журнал полон, от него можно восстановиться, пока пишется снимок
+        continues = not self.needs_snapshot
+        if continues:
+            self._append_pending()
+        self.generation += 1
+        self.pending = []
+        self.needs_snapshot = False
+        self.journal_bytes = 0
+        self._length = self.document.characterCount() - 1
+        self.base_chars = self._length
+        self._header = {"file": self.file_path, "base": "snapshot", "continues": continues}
+        self._header_written = False
+        self._append_pending()
+        generation = self.generation
+        worker = SnapshotWorker(self._path(generation, "snapshot"), self.document.toPlainText())
+        worker.finished.connect(lambda: self._on_snapshot_written(worker, generation))
+        self.snapshot_worker = worker
+        self._workers.append(worker)
+        worker.start()
+
+    def _on_snapshot_written(self, worker: SnapshotWorker, generation: int):
+        if self.snapshot_worker is worker:
+            self.snapshot_worker = None
+        if worker in self._workers:
+            self._workers.remove(worker)
+        if worker.error is None:
+            self._remove_generations(generation)
+
+    def _wait_snapshot(self):
+        if self.snapshot_worker is not None:
+            self.snapshot_worker.wait()
+            self.snapshot_worker = None
+
+    def _remove_generations(self, below: int):
+        for path in glob.glob(os.path.join(glob.escape(self.directory), glob.escape(self.name) + ".*")):
+            generation = path[len(os.path.join(self.directory, self.name)) + 1:].split(".")[0]
+            if generation.isdigit() and int(generation) < below:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def discard(self):
+        """Удаляет журнал (документ закрыт или сохранен без дальнейших правок)"""
+        try:
+            self.document.contentsChange.disconnect(self.on_contents_change)
+        except TypeError:
+            pass
+        self._wait_snapshot()
+        self._remove_generations(1 << 62)
+
+
+class RecoveredDocument:
+    """Документ из журнала завершившейся аварийно сессии"""
+
+    def __init__(self, directory: str, name: str):
+        self.directory = directory
+        self.name = name
+        self.generations = sorted(
+            int(g) for g in {p.rsplit(".", 2)[-2] for p in self._files()} if g.isdigit()
+        )
+        self.file_path: Optional[str] = None
+        self.error: Optional[str] = None
+
+    def _files(self):
+        return glob.glob(os.path.join(glob.escape(self.directory), glob.escape(self.name) + ".*.*"))
+
+    def _path(self, generation: int, suffix: str) -> str:
+        return os.path.join(self.directory, f"{self.name}.{generation}.{suffix}")
+
+    @staticmethod
+    def _read_journal(path: str):
+        """Заголовок и правки журнала; оборванная последняя строка отбрасывается"""
+        header, deltas = None, []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if header is None:
+                        header = record
+                    else:
+                        deltas.append(record)
+        except OSError:
+            pass
+        return header, deltas
+
+    def _base_text(self, generation: int, header) -> Optional[str]:
+        base = header.get("base") if header else "snapshot"
+        if base == "empty":
+            return ""
+        if base == "file":
+            path = header.get("file")
+            try:
+                st = os.stat(path)
+                if st.st_mtime_ns != header.get("mtime_ns") or st.st_size != header.get("size"):
+                    return None
+                with open(path, "r", encoding="utf-8") as f:
+                    return f.read()
+            except (OSError, TypeError, ValueError):
+                return None
+        try:
+            with open(self._path(generation, "snapshot"), "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def replay(self, document: QTextDocument) -> bool:
+        """Восстанавливает текст в документ: база последнего целого поколения и журналы после нее"""
+        for index in range(len(self.generations) - 1, -1, -1):
+            generation = self.generations[index]
+            header, _ = self._read_journal(self._path(generation, "journal"))
+            base = self._base_text(generation, header)
+            if base is None:
+                if header is None or not header.get("continues"):
+                    # Предыдущее поколение неполно: восстановиться от него нельзя
+                    break
+                continue
+            undo = document.isUndoRedoEnabled()
+            document.setUndoRedoEnabled(False)
+            try:
+                document.setPlainText(base)
+                cursor = QTextCursor(document)
+                for later in self.generations[index:]:
+                    later_header, deltas = self._read_journal(self._path(later, "journal"))
+                    if later_header and later_header.get("file"):
+                        self.file_path = later_header["file"]
+                    for position, removed, text in deltas:
+                        cursor.setPosition(position)
+                        cursor.setPosition(position + removed, QTextCursor.KeepAnchor)
+                        cursor.insertText(text)
+            finally:
+                document.setUndoRedoEnabled(undo)
+            return True
+        self.error = "Исходный файл изменен, а снимок текста не сохранен"
+        return False
+
+    def remove(self):
+        for path in self._files():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class AutosaveSession:
+    """Журналы документов одного запуска редактора"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or default_directory()
+        os.makedirs(self.directory, exist_ok=True)
+        self.key = f"{os.getpid()}-{next(_session_numbers)}"
+        self.lock_path = os.path.join(self.directory, f"session-{self.key}.lock")
+        self.lock = QLockFile(self.lock_path)
+        self.lock.tryLock(0)
+        self.journals: List[DocumentJournal] = []
+        self._numbers = itertools.count(1)
+        # Захваченные блокировки завершившихся сессий (снимаются после разбора их журналов)
+        self._orphan_locks: List[QLockFile] = []
+
+    def journal_for(self, document: QTextDocument, file_path=None) -> DocumentJournal:
+        journal = DocumentJournal(self.directory, f"{self.key}-{next(self._numbers)}", document)
+        journal.reset(file_path)
+        self.journals.append(journal)
+        return journal
+
+    def remove_journal(self, journal: DocumentJournal):
+        journal.discard()
+        if journal in self.journals:
+            self.journals.remove(journal)
+
+    def flush(self):
+        """Записывает накопленные правки всех документов"""
+        for journal in self.journals:
+            if journal.is_dirty():
+                try:
+                    journal.flush()
+                except OSError:
+                    pass
+
+    def close(self):
+        """Чистое завершение: журналы больше не нужны"""
+        for journal in list(self.journals):
+            self.remove_journal(journal)
+        self.lock.unlock()
+
+    def orphaned_documents(self) -> List[RecoveredDocument]:
+        """Документы сессий, завершившихся без очистки (их блокировка свободна)"""
+        found = []
+        names = set()
+        for entry in os.listdir(self.directory):
+            match = _SESSION_LOCK.match(entry)
+            if match and match.group(1) != self.key:
+                lock = QLockFile(os.path.join(self.directory, entry))
+                # Устаревшей считается только блокировка завершившегося процесса, не старая
+                lock.setStaleLockTime(0)
+                if lock.tryLock(0):
+                    names.add(match.group(1))
+                    self._orphan_locks.append(lock)
+        if not names:
+            return found
+        documents = set()
+        for entry in os.listdir(self.directory):
+            parts = entry.split(".")
+            session = parts[0].rsplit("-", 1)[0]
+            if len(parts) == 3 and session in names:
+                documents.add(parts[0])
+        found = [RecoveredDocument(self.directory, name) for name in sorted(documents)]
+        return [doc for doc in found if doc.generations]
+
+    def remove_orphans(self, documents: List[RecoveredDocument]):
+        """Удаляет журналы завершившихся сессий и их файлы блокировки"""
+        for doc in documents:
+            doc.remove()
+        for lock in self._orphan_locks:
+            lock.unlock()
+        self._orphan_locks = []
@@ -0,0 +1,349 @@
+"""
+Модуль индекса скобок документа
+
+Для каждой строки (блока QTextDocument) хранятся глубина вложенности на ее
+конце и наименьшая глубина внутри нее, включая глубину в начале строки.
+Значения записывает построчная проверка синтаксиса в том же проходе, где
+считается состояние лексера; при вставке и удалении строк массивы
+сдвигаются (memmove), текст при этом не просматривается.
+
+Область, которую открывает строка, заканчивается на первой следующей строке,
+где глубина опускается до наименьшей глубины открывающей строки. Такая строка
+ищется по пирамиде минимумов: уровень k хранит минимумы групп по FANOUT
+элементов уровня k - 1. Минимумы пересчитываются лениво — только те, через
+которые проходит поиск, — поэтому поиск стоит O(FANOUT · log n) даже сразу
+после вставки строк в начало большого документа.
+
+Та же пирамида ищет парную скобку внутри строки (LinePairs): для строки
+минифицированного файла в сотни мегабайт поиск не просматривает ее целиком.
+
+Индекс разделителей (MarkIndex) устроен так же, но для запятых и ключей: по
+строке — наименьший уровень разделителя и их число на этом уровне. Группы
+пирамиды помнят число элементов со своим минимумом, поэтому номер элемента
+массива (число запятых его уровня до позиции) считается за O(FANOUT · log n).
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterator, List, Optional, Tuple
+
+# Число элементов уровня пирамиды под одним элементом следующего уровня
+FANOUT = 64
+
+
+class BracketIndex:
+    """Глубины вложенности скобок по строкам документа"""
+
+    def __init__(self, count: int = 0):
+        # Глубина на конце строки и наименьшая глубина в строке
+        self.ends = array("i", bytes(4 * count))
+        self.lows = array("i", bytes(4 * count))
+        # Уровни пирамиды минимумов (начиная с первого) и признаки их актуальности
+        self._levels: List[array] = []
+        self._valid: List[bytearray] = []
+        # Диапазон строк, записанных после последнего поиска
+        self._stale_from = 0
+        self._stale_to = count
+        self._resize(0)
+
+    @classmethod
+    def of_levels(cls, levels: array) -> "BracketIndex":
+        """Индекс по готовому массиву уровней (наименьшая глубина равна конечной)"""
+        index = cls()
+        index.lows = index.ends = levels
+        index._stale_to = len(levels)
+        index._resize(0)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.lows)
+
+    # --- запись ---
+    def set(self, line: int, low: int, end: int):
+        """Глубины строки line, посчитанные проверкой синтаксиса"""
+        self.lows[line] = low
+        self.ends[line] = end
+        if line < self._stale_from:
+            self._stale_from = line
+        if line >= self._stale_to:
+            self._stale_to = line + 1
+
+    def shift(self, line: int, delta: int):
+        """Вставка (delta > 0) или удаление (delta < 0) строк начиная с line"""
+        self._flush()
+        # Строки за концом индекса вставляются в его конец
+        line = min(line, len(self.lows))
+        if delta > 0:
+            zeros = array("i", bytes(4 * delta))
+            self.lows[line:line] = zeros
+            self.ends[line:line] = zeros
+        else:
+            del self.lows[line:line - delta]
+            del self.ends[line:line - delta]
+        self._resize(line)
+
+    def _resize(self, line: int):
+        """Подгоняет уровни пирамиды под число строк; минимумы групп начиная с
+        группы строки line считаются устаревшими"""
+        count = len(self.lows)
+        levels, valid = [], []
+        size, k = count, 0
+        while size > FANOUT:
+            size = -(-size // FANOUT)
+            line //= FANOUT
+            level = self._levels[k] if k < len(self._levels) else array("i")
+            flags = self._valid[k] if k < len(self._valid) else bytearray()
+            del level[line:]
+            del flags[line:]
+            level.extend(array("i", bytes(4 * (size - len(level)))))
+            flags.extend(bytes(size - len(flags)))
+            levels.append(level)
+            valid.append(flags)
+            k += 1
+        self._levels = levels
+        self._valid = valid
+
+    def _flush(self):
+        """Сбрасывает минимумы групп, в которые попали записанные строки"""
+        start, stop = self._stale_from, self._stale_to
+        if start >= stop:
+            return
+        for flags in self._valid:
+            start //= FANOUT
+            stop = (stop - 1) // FANOUT + 1
+            flags[start:stop] = bytes(stop - start)
+        self._stale_from = len(self.lows)
+        self._stale_to = 0
+
+    def _entry(self, k: int, j: int) -> int:
+        """Элемент j уровня k пирамиды (уровень 0 — сами строки)"""
+        if k == 0:
+            return self.lows[j]
+        flags = self._valid[k - 1]
+        level = self._levels[k - 1]
+        if not flags[j]:
+            if k == 1:
+                level[j] = min(self.lows[j * FANOUT:(j + 1) * FANOUT])
+            else:
+                below = len(self._levels[k - 2])
+                level[j] = min(self._entry(k - 1, i)
+                               for i in range(j * FANOUT, min((j + 1) * FANOUT, below)))
+            flags[j] = 1
+        return level[j]
+
+    def _size(self, k: int) -> int:
+        return len(self.lows) if k == 0 else len(self._levels[k - 1])
+
+    # --- поиск ---
+    def find_low(self, start: int, limit: int) -> Optional[int]:
+        """Первая строка с номером >= start, где глубина опускается до limit"""
+        self._flush()
+        k, j = 0, start
+        while j < self._size(k):
+            end = min((j // FANOUT + 1) * FANOUT, self._size(k))
+            for i in range(j, end):
+                if self._entry(k, i) <= limit:
+                    # Спуск к строке: в группе найденного минимума он есть
+                    while k:
+                        k -= 1
+                        i *= FANOUT
+                        while self._entry(k, i) > limit:
+                            i += 1
+                    return i
+            if end == self._size(k):
+                break
+            k, j = k + 1, end // FANOUT
+        return None
+
+    def find_low_before(self, stop: int, limit: int) -> Optional[int]:
+        """Последняя строка с номером < stop, где глубина опускается до limit"""
+        self._flush()
+        k, j = 0, stop - 1
+        while j >= 0:
+            begin = j - j % FANOUT
+            for i in range(j, begin - 1, -1):
+                if self._entry(k, i) <= limit:
+                    while k:
+                        k -= 1
+                        i = min(i * FANOUT + FANOUT, self._size(k)) - 1
+                        while self._entry(k, i) > limit:
+                            i -= 1
+                    return i
+            if k == len(self._levels):
+                break
+            k, j = k + 1, begin // FANOUT - 1
+        return None
+
+    # --- области ---
+    def start_depth(self, line: int) -> int:
+        return self.ends[line - 1] if line > 0 else 0
+
+    def opens(self, line: int) -> bool:
+        """Открывает ли строка область, не закрытую в ней же"""
+        return self.ends[line] > self.lows[line]
+
+    def region_end(self, line: int) -> Optional[int]:
+        """Строка, закрывающая область строки line; None — область не закрыта"""
+        return self.find_low(line + 1, self.lows[line])
+
+    def region_starts(self, level: int) -> Iterator[int]:
+        """Строки, открывающие области уровня level (уровень 1 — корень):
+        перебираются только строки, где глубина опускается ниже level"""
+        line = self.find_low(0, level - 1)
+        while line is not None:
+            if self.ends[line] >= level:
+                yield line
+            line = self.find_low(line + 1, level - 1)
+
+
+class LinePairs:
+    """Парные скобки одной строки из LineLexer.lex(pairs=...): позиции, уровни
+    и вид скобки. Уровень открывающей — глубина после нее, закрывающей — до
+    нее, поэтому у скобок одной пары он одинаков, а между ними — больше"""
+
+    def __init__(self, text: str, pairs: List[Tuple[int, int]]):
+        self.columns = array("q", [column for column, _ in pairs])
+        self.brackets = "".join(text[column] for column, _ in pairs)
+        self.levels = BracketIndex.of_levels(array("i", [level for _, level in pairs]))
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def find(self, column: int) -> Optional[int]:
+        """Номер парной скобки в позиции column; None — там ее нет (строка, непарная)"""
+        i = bisect_left(self.columns, column)
+        return i if i < len(self.columns) and self.columns[i] == column else None
+
+    def level(self, i: int) -> int:
+        return self.levels.lows[i]
+
+    def is_open(self, i: int) -> bool:
+        return self.brackets[i] in "[{"
+
+    def first_at_most(self, start: int, level: int) -> Optional[int]:
+        """Первая скобка с номером >= start и уровнем не выше level"""
+        return self.levels.find_low(start, level)
+
+    def last_at_most(self, stop: int, level: int) -> Optional[int]:
+        """Последняя скобка с номером < stop и уровнем не выше level"""
+        return self.levels.find_low_before(stop, level)
+
+
+# Уровень строки без разделителей: выше любого настоящего уровня
+NO_MARK = 2 ** 31 - 1
+
+
+class MarkIndex(BracketIndex):
+    """Разделители (запятые и ключи) по строкам документа: в lows — наименьший
+    уровень разделителя строки (уровень — глубина контейнера, которому он
+    принадлежит), в ends — число разделителей на этом уровне"""
+
+    def __init__(self, count: int = 0):
+        # Число элементов с минимумом группы по уровням пирамиды
+        self._counts: List[array] = []
+        super().__init__(count)
+        self.lows = array("i", [NO_MARK]) * count
+
+    @classmethod
+    def of_levels(cls, levels: array) -> "MarkIndex":
+        """Индекс по уровням отдельных разделителей (у каждого число 1)"""
+        index = super().of_levels(levels)
+        index.ends = array("i", [1]) * len(levels)
+        return index
+
+    def shift(self, line: int, delta: int):
+        line = min(line, len(self.lows))
+        super().shift(line, delta)
+        if delta > 0:
+            # Новые строки без разделителей, пока проверка их не запишет
+            self.lows[line:line + delta] = array("i", [NO_MARK]) * delta
+
+    def _resize(self, line: int):
+        super()._resize(line)
+        counts = []
+        for k, level in enumerate(self._levels):
+            count = self._counts[k] if k < len(self._counts) else array("i")
+            del count[len(level):]
+            count.extend(array("i", bytes(4 * (len(level) - len(count)))))
+            counts.append(count)
+        self._counts = counts
+
+    def _entry(self, k: int, j: int) -> int:
+        if k == 0:
+            return self.lows[j]
+        flags = self._valid[k - 1]
+        if not flags[j]:
+            low, count = NO_MARK, 0
+            for i in range(j * FANOUT, min((j + 1) * FANOUT, self._size(k - 1))):
+                value = self._entry(k - 1, i)
+                if value < low:
+                    low, count = value, self._count(k - 1, i)
+                elif value == low:
+                    count += self._count(k - 1, i)
+            self._levels[k - 1][j] = low
+            self._counts[k - 1][j] = count
+            flags[j] = 1
+        return self._levels[k - 1][j]
+
+    def _count(self, k: int, j: int) -> int:
+        """Число элементов с минимумом у элемента j уровня k (минимум уже посчитан)"""
+        return self.ends[j] if k == 0 else self._counts[k - 1][j]
+
+    def count_at(self, start: int, stop: int, level: int) -> int:
+        """Число разделителей уровня level в строках [start, stop). Разделителей
+        ниже level там быть не должно (строки внутри одного контейнера)"""
+        self._flush()
+        total, k = 0, 0
+        while start < stop:
+            if k == len(self._levels):
+                # Верхний уровень: не больше FANOUT элементов
+                for i in range(start, stop):
+                    if self._entry(k, i) == level:
+                        total += self._count(k, i)
+                break
+            while start < stop and start % FANOUT:
+                if self._entry(k, start) == level:
+                    total += self._count(k, start)
+                start += 1
+            while start < stop and stop % FANOUT:
+                stop -= 1
+                if self._entry(k, stop) == level:
+                    total += self._count(k, stop)
+            start //= FANOUT
+            stop //= FANOUT
+            k += 1
+        return total
+
+
+class LineMarks:
+    """Разделители одной строки из LineLexer.lex(marks=...): позиции, уровни и
+    вид (запятая или кавычка ключа)"""
+
+    def __init__(self, text: str, marks: List[Tuple[int, int]]):
+        self.columns = array("q", [column for column, _ in marks])
+        self.kinds = "".join(text[column] for column, _ in marks)
+        self.levels = MarkIndex.of_levels(array("i", [level for _, level in marks]))
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def before(self, column: int) -> int:
+        """Число разделителей левее column"""
+        return bisect_left(self.columns, column)
+
+    def after(self, column: int) -> int:
+        """Номер первого разделителя правее column"""
+        return bisect_right(self.columns, column)
+
+    def level(self, i: int) -> int:
+        return self.levels.lows[i]
+
+    def is_key(self, i: int) -> bool:
+        return self.kinds[i] == '"'
+
+    def count_at(self, start: int, stop: int, level: int) -> int:
+        """Число разделителей уровня level с номерами в [start, stop)"""
+        return self.levels.count_at(start, stop, level)
+
+    def last_at_most(self, stop: int, level: int) -> Optional[int]:
+        """Последний разделитель с номером < stop и уровнем не выше level"""
+        return self.levels.find_low_before(stop, level)
@@ -0,0 +1,375 @@
+"""
+Модуль разбора и сериализации JSON с выбором быстрой библиотеки
+
+Если установлена одна из быстрых библиотек (orjson, ujson, simdjson), разбор
+и сериализация выполняются ею, иначе — стандартным модулем json. Результат
+всегда совпадает со стандартным модулем: данные, которые быстрая библиотека
+представляет иначе (целые больше 64 бит, NaN и бесконечности, одиночные
+суррогаты, другая запись чисел с плавающей точкой), обрабатываются json.
+Ошибки разбора — json.JSONDecodeError с позицией, как у json.loads.
+
+Точный режим (exact=True) сохраняет запись чисел: дробное число, которое
+repr(float) записал бы иначе (1.10, 1E5, 0.1000000000000000055511), становится
+JsonNumber — float с исходным текстом, — и записывается этим текстом.
+"""
+import functools
+import importlib
+import json
+import re
+from json.encoder import encode_basestring
+from typing import Callable, Dict, List, Optional
+
+from core.walk import walk, ENTER, LEAVE
+
+# Порядок предпочтения: orjson быстрее всех и в разборе, и в сериализации;
+# simdjson выигрывает при ленивом доступе, а полное построение объектов Python
+# у него медленнее ujson
+PREFERENCE = ("orjson", "ujson", "simdjson")
+AUTO = "auto"
+STDLIB = "json"
+
+# Числа, которые быстрые библиотеки читают иначе, чем json: целые больше 64 бит
+# (становятся float или отвергаются) и переполнение float (1e400). Текст ищется
+# в UTF-8 с цифрами, замененными на 0: 19 цифр подряд или трехзначный порядок
+_DIGITS_AS_ZERO = bytes.maketrans(b"123456789", b"000000000")
+_RISKY_NUMBERS = (b"0" * 19, b"e000", b"E000", b"e+000", b"E+000")
+# Признаки дробных чисел в том же тексте; без них точный режим не нужен
+_FRACTION_MARKERS = (b"0.", b"0e", b"0E")
+# orjson записывает числа вне [1e-4, 1e16) иначе, чем repr (1e16 вместо 1e+16,
+# 0.00001 вместо 1e-05); такие числа (и похожий текст в строках) — через json
+_EXPONENT = re.compile(r"e[-\d]")
+_SMALL_FRACTION = "0.0000"
+# orjson не записывает JsonNumber; default заменяет его строкой с NUL и записью
+# числа, а после проверки вывода такие строки заменяются самой записью
+_NUMBER_MARK = "\x00"
+_MARKED_NUMBER = re.compile(r'"\\u0000([-+.0-9eE]+)"')
+
+
+def _version(module) -> tuple:
+    parts = []
+    for part in getattr(module, "__version__", "0").split("."):
+        digits = re.match(r"\d*", part).group()
+        parts.append(int(digits or 0))
+    return tuple(parts)
+
+
+class NonFiniteFloat(float):
+    """NaN и бесконечности из текста. Подкласс float быстрые библиотеки не
+    сериализуют, и запись уходит в json, который выводит NaN/Infinity, а не null."""
+    __slots__ = ()
+
+
+class JsonNumber(float):
+    """Дробное число, запись которого отличается от repr(float): значение
+    и исходный текст. Во всем остальном — обычный float."""
+    __slots__ = ("literal",)
+
+    def __new__(cls, literal: str):
+        number = float.__new__(cls, literal)
+        number.literal = literal
+        return number
+
+
+def _parse_float(text: str) -> float:
+    value = float(text)
+    # Переполнение (1e400) дает бесконечность
+    return value if value - value == 0 else NonFiniteFloat(value)
+
+
+def exact_float(text: str, _new=float.__new__) -> float:
+    """Число из записи дробного числа JSON: float или JsonNumber, если repr
+    записал бы его иначе"""
+    value = float(text)
+    # Обычно запись совпадает с repr, и число остается простым float
+    if value.__repr__() == text:
+        return value
+    # Без вызова JsonNumber.__new__: функция вызывается для каждого числа
+    number = _new(JsonNumber, value)
+    number.literal = text
+    return number
+
+
+def _scan(text: str):
+    """Текст в UTF-8, признак чисел, которые быстрая библиотека прочтет не так,
+    как json, и признак дробных чисел"""
+    data = text.encode("utf-8", "surrogatepass")
+    digits = data.translate(_DIGITS_AS_ZERO)
+    return (data, any(marker in digits for marker in _RISKY_NUMBERS),
+            any(marker in digits for marker in _FRACTION_MARKERS))
+
+
+def _exact_loads(text: str):
+    return json.loads(text, parse_float=exact_float, parse_constant=NonFiniteFloat)
+
+
+def _float_text(value: float) -> str:
+    if value.__class__ is JsonNumber:
+        return value.literal
+    if value != value:
+        return "NaN"
+    if value - value != 0:
+        return "Infinity" if value > 0 else "-Infinity"
+    return float.__repr__(value)
+
+
+def _scalar_text(value) -> str:
+    if isinstance(value, str):
+        return encode_basestring(value)
+    if value is None:
+        return "null"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if isinstance(value, int):
+        return int.__repr__(value)
+    if isinstance(value, float):
+        return _float_text(value)
+    raise TypeError(f"Object of type {value.__class__.__name__} is not JSON serializable")
+
+
+def dumps_exact(data, indent: Optional[int] = None, compact: bool = False) -> str:
+    """Запись как у json.dumps(ensure_ascii=False), но JsonNumber — исходным текстом.
+    Обход без рекурсии, поэтому глубина документа не ограничена."""
+    if not isinstance(data, (dict, list)):
+        return _scalar_text(data)
+    item_separator = "," if compact or indent is not None else ", "
+    key_separator = ":" if compact else ": "
+    parts = ["{" if isinstance(data, dict) else "["]
+    # Для каждого открытого контейнера: еще не было ни одного элемента
+    empty = [True]
+    for event, key, value, depth in walk(data):
+        if event == LEAVE:
+            if not empty.pop() and indent is not None:
+                parts.append("\n" + " " * (indent * depth))
+            parts.append("}" if isinstance(value, dict) else "]")
+            continue
+        if empty[-1]:
+            empty[-1] = False
+        else:
+            parts.append(item_separator)
+        if indent is not None:
+            parts.append("\n" + " " * (indent * depth))
+        if isinstance(key, str):
+            parts.append(encode_basestring(key))
+            parts.append(key_separator)
+        if event == ENTER:
+            parts.append("{" if isinstance(value, dict) else "[")
+            empty.append(True)
+        else:
+            parts.append(_scalar_text(value))
+    if not empty[0] and indent is not None:
+        parts.append("\n")
+    parts.append("}" if isinstance(data, dict) else "]")
+    return "".join(parts)
+
+
+def _stdlib_loads(text: str, risky: bool):
+    """json.loads, отмечающий NaN и бесконечности как NonFiniteFloat"""
+    # parse_float вызывается для каждого числа и замедляет разбор, поэтому
+    # подключается, только если в тексте возможно переполнение
+    if risky:
+        return json.loads(text, parse_float=_parse_float, parse_constant=NonFiniteFloat)
+    return json.loads(text, parse_constant=NonFiniteFloat)
+
+
+class Codec:
+    """Стандартный модуль json; подклассы подключают быстрые библиотеки"""
+
+    name = STDLIB
+    # Быстрая каноническая запись для сравнения (ключи по порядку, без пробелов)
+    # или None; json с sort_keys медленнее поузлового хэширования
+    canonical: Optional[Callable] = None
+    # То же, но ключи в порядке документа: записи различаются при перестановке
+    # ключей (по ней дерево решает, перестраиваться ли)
+    ordered_canonical: Optional[Callable] = None
+
+    def loads(self, text: str, exact: bool = False):
+        """Разбор текста; exact — сохранять запись дробных чисел (JsonNumber)"""
+        if exact and _scan(text)[2]:
+            return _exact_loads(text)
+        return json.loads(text)
+
+    def dumps(self, data, indent: Optional[int] = None, compact: bool = False,
+              exact: bool = False) -> str:
+        """Текст JSON без экранирования не-ASCII символов (ensure_ascii=False).
+        indent — отступ многострочной записи, compact — запись без пробелов;
+        по умолчанию — одна строка с пробелами после запятых и двоеточий.
+        exact — JsonNumber записываются исходным текстом."""
+        if exact:
+            return dumps_exact(data, indent, compact)
+        if compact:
+            return json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+        return json.dumps(data, indent=indent, ensure_ascii=False)
+
+
+class _FastCodec(Codec):
+    """Быстрый разбор с возвратом к json, если результат может отличаться"""
+
+    def __init__(self, module):
+        self.module = module
+
+    def _fast_loads(self, data: bytes):
+        raise NotImplementedError
+
+    def loads(self, text: str, exact: bool = False):
+        data, risky, fractions = _scan(text)
+        if exact and fractions:
+            return _exact_loads(text)
+        if not risky:
+            try:
+                return self._fast_loads(data)
+            except (ValueError, TypeError):
+                # Некорректный текст, NaN, суррогаты: json разберет или
+                # сообщит ошибку с позицией
+                pass
+        return _stdlib_loads(text, risky)
+
+
+class _OrjsonCodec(_FastCodec):
+    name = "orjson"
+
+    # До 3.9.15 orjson не ограничивает глубину при разборе и падает (segfault)
+    # на глубоко вложенных документах; старые версии используются только для записи
+    SAFE_LOADS_VERSION = (3, 9, 15)
+
+    def __init__(self, module):
+        super().__init__(module)
+        self.safe_loads = _version(module) >= self.SAFE_LOADS_VERSION
+        # TypeError для NonFiniteFloat, JsonNumber, больших целых и глубины больше 255
+        self.canonical = functools.partial(module.dumps, option=module.OPT_SORT_KEYS)
+        self.ordered_canonical = module.dumps
+
+    def loads(self, text: str, exact: bool = False):
+        if self.safe_loads:
+            return super().loads(text, exact)
+        _, risky, fractions = _scan(text)
+        if exact and fractions:
+            return _exact_loads(text)
+        return _stdlib_loads(text, risky)
+
+    def _fast_loads(self, data: bytes):
+        return self.module.loads(data)
+
+    def dumps(self, data, indent: Optional[int] = None, compact: bool = False,
+              exact: bool = False) -> str:
+        # orjson пишет либо без пробелов, либо с отступом 2; запись в одну
+        # строку с пробелами совпадает с ними только у скаляров.
+        # JsonNumber — подкласс float, и orjson его не записывает: точный режим
+        # переходит к dumps_exact, только если такие числа есть
+        if compact or indent == 2 or not isinstance(data, (dict, list)):
+            option = self.module.OPT_INDENT_2 if indent == 2 else 0
+            marked = []
+            try:
+                if exact:
+                    text = self.module.dumps(data, option=option,
+                                             default=lambda value: self._mark_number(value, marked))
+                else:
+                    text = self.module.dumps(data, option=option)
+                text = text.decode("utf-8")
+            except TypeError:
+                # Целые больше 64 бит, суррогаты, NonFiniteFloat, JsonNumber
+                # без точного режима, глубина больше 255
+                text = None
+            if text is not None and _SMALL_FRACTION not in text and _EXPONENT.search(text) is None:
+                if not marked:
+                    return text
+                text, count = _MARKED_NUMBER.subn(r"\1", text)
+                # Другое число замен — в данных есть строки, похожие на метку
+                if count == len(marked):
+                    return text
+        return super().dumps(data, indent, compact, exact)
+
+    @staticmethod
+    def _mark_number(value, marked: list) -> str:
+        if value.__class__ is not JsonNumber:
+            raise TypeError
+        marked.append(value)
+        return _NUMBER_MARK + value.literal
+
+
+class _UjsonCodec(_FastCodec):
+    name = "ujson"
+
+    def _fast_loads(self, data: bytes):
+        # Без precise_float ujson округляет некоторые числа иначе, чем json
+        return self.module.loads(data, precise_float=True)
+
+
+class _SimdjsonCodec(_FastCodec):
+    name = "simdjson"
+
+    def _fast_loads(self, data: bytes):
+        return self.module.loads(data)
+
+
+_CODEC_CLASSES = {
+    "orjson": _OrjsonCodec,
+    "ujson": _UjsonCodec,
+    "simdjson": _SimdjsonCodec,
+}
+
+
+def _create(name: str) -> Optional[Codec]:
+    if name == STDLIB:
+        return Codec()
+    try:
+        module = importlib.import_module(name)
+    except ImportError:
+        return None
+    return _CODEC_CLASSES[name](module)
+
+
+def available_backends() -> List[str]:
+    """Установленные библиотеки в порядке предпочтения; json — всегда последний"""
+    return [name for name in PREFERENCE if _create(name) is not None] + [STDLIB]
+
+
+_cache: Dict[str, Codec] = {}
+
+
+def get_codec(name: str = AUTO) -> Codec:
+    """Кодек по имени библиотеки; AUTO — лучшая из установленных.
+    Неизвестная или не установленная библиотека заменяется выбором AUTO."""
+    codec = _cache.get(name)
+    if codec is None:
+        requested = (name,) if name in _CODEC_CLASSES or name == STDLIB else ()
+        for candidate in requested + PREFERENCE + (STDLIB,):
+            codec = _create(candidate)
+            if codec is not None:
+                break
+        _cache[name] = codec
+    return codec
+
+
+_codec: Optional[Codec] = None
+
+
+def set_backend(name: str = AUTO) -> Codec:
+    """Выбирает библиотеку для loads/dumps модуля; возвращает выбранный кодек"""
+    global _codec
+    _codec = get_codec(name)
+    return _codec
+
+
+def current() -> Codec:
+    if _codec is None:
+        set_backend()
+    return _codec
+
+
+def loads(text: str, exact: bool = False):
+    return current().loads(text, exact)
+
+
+def dumps(data, indent: Optional[int] = None, compact: bool = False, exact: bool = False) -> str:
+    return current().dumps(data, indent, compact, exact)
+
+
+def parse_literal(text: str):
+    """Значение, введенное при правке: JSON-литерал (с сохранением записи
+    чисел) или, если текст не JSON, сама строка"""
+    try:
+        return loads(text, exact=True)
+    except (ValueError, RecursionError):
+        return text
@@ -0,0 +1,295 @@
+"""
+Модуль поиска по файлам каталога (find in files)
+
+Поддерживает три режима запроса: обычный текст, регулярное выражение и
+структурный путь ключа (например ``servers.*.port`` или ``items[*].id``).
+Файлы обрабатываются пулом процессов, результаты кэшируются по mtime файла.
+"""
+import fnmatch
+import json
+import multiprocessing
+import os
+import re
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+MODE_LITERAL = "literal"
+MODE_REGEX = "regex"
+MODE_KEY_PATH = "key_path"
+
+# Максимум совпадений, возвращаемых для одного файла
+MAX_MATCHES_PER_FILE = 1000
+# Меньше этого числа файлов ищем в текущем процессе: запуск пула дороже
+IN_PROCESS_THRESHOLD = 8
+
+
+class SearchQuery(NamedTuple):
+    """Параметры поискового запроса"""
+    text: str
+    mode: str = MODE_LITERAL
+    case_sensitive: bool = False
+
+
+class SearchMatch(NamedTuple):
+    """Одно совпадение в файле (line = 0, если строка неизвестна)"""
+    line: int
+    column: int
+    text: str
+
+
+def parse_key_path(expression: str) -> List:
+    """Разбирает путь ключа вида ``a.b[0].*`` / ``**.name`` в список сегментов"""
+    expression = expression.strip()
+    if expression.startswith("$"):
+        expression = expression[1:].lstrip(".")
+    segments = []
+    for part in re.finditer(r'([^.\[\]]+)|\[(\*|\d+)\]', expression):
+        name, index = part.group(1), part.group(2)
+        if name is not None:
+            segments.append(name)
+        elif index == "*":
+            segments.append("*")
+        else:
+            segments.append(int(index))
+    return segments
+
+
+def match_key_path(data, segments: Sequence) -> List[Tuple[list, object]]:
+    """Возвращает пары (путь, значение) для узлов, подходящих под сегменты"""
+    results = []
+    seen = set()
+    stack = [(data, [], 0)]
+    while stack:
+        value, path, seg_i = stack.pop()
+        if seg_i == len(segments):
+            key = tuple(path)
+            if key not in seen:
+                seen.add(key)
+                results.append((path, value))
+            continue
+        segment = segments[seg_i]
+        if isinstance(value, dict):
+            children = value.items()
+        elif isinstance(value, list):
+            children = enumerate(value)
+        else:
+            children = ()
+        if segment == "**":
+            # Ноль уровней или спуск на уровень с тем же сегментом
+            stack.append((value, path, seg_i + 1))
+            for k, child in children:
+                stack.append((child, path + [k], seg_i))
+            continue
+        for k, child in children:
+            if segment == "*" or k == segment or (isinstance(k, int) and str(k) == segment):
+                stack.append((child, path + [k], seg_i + 1))
+    results.reverse()
+    return results
+
+
+def _search_text(content: str, query: SearchQuery) -> List[SearchMatch]:
+    """Поиск текста или регулярного выражения по всему тексту файла; позиции
+    совпадений переводятся в строки, так что шаблон может захватывать перевод
+    строки (совпадение относится к строке, где оно начинается)"""
+    flags = 0 if query.case_sensitive else re.IGNORECASE
+    if query.mode == MODE_REGEX:
+        regex = re.compile(query.text, flags | re.MULTILINE)
+    else:
+        # Быстрая предварительная проверка; без учета регистра ее делает само
+        # выражение: lower() и IGNORECASE сравнивают некоторые буквы по-разному
+        if query.case_sensitive and query.text not in content:
+            return []
+        regex = re.compile(re.escape(query.text), flags)
+
+    matches = []
+    line_starts = None
+    for m in regex.finditer(content):
+        if line_starts is None:
+            line_starts = [0] + [nl.end() for nl in re.finditer("\n", content)]
+        line_no = bisect_right(line_starts, m.start())
+        start = line_starts[line_no - 1]
+        end = content.find("\n", start)
+        line = content[start:end if end >= 0 else len(content)]
+        matches.append(SearchMatch(line_no, m.start() - start + 1, line.strip()[:200]))
+        if len(matches) >= MAX_MATCHES_PER_FILE:
+            break
+    return matches
+
+
+def _search_structure(content: str, query: SearchQuery) -> List[SearchMatch]:
+    """Структурный поиск по пути ключа"""
+    try:
+        data = json.loads(content)
+    except (json.JSONDecodeError, RecursionError):
+        return []
+    matches = []
+    for path, value in match_key_path(data, parse_key_path(query.text)):
+        rendered = json.dumps(value, ensure_ascii=False)
+        if len(rendered) > 200:
+            rendered = rendered[:197] + "..."
+        matches.append(SearchMatch(0, 0, f"{path} = {rendered}"))
+        if len(matches) >= MAX_MATCHES_PER_FILE:
+            break
+    return matches
+
+
+def search_file(path: str, query: SearchQuery) -> List[SearchMatch]:
+    """Ищет совпадения в одном файле"""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        content = f.read()
+    if query.mode == MODE_KEY_PATH:
+        return _search_structure(content, query)
+    return _search_text(content, query)
+
+
+def _search_file_task(args) -> Tuple[str, List[SearchMatch], Optional[str]]:
+    """Задача для пула процессов: (путь, совпадения, ошибка)"""
+    path, query = args
+    try:
+        return path, search_file(path, query), None
+    except (OSError, re.error) as e:
+        return path, [], str(e)
+
+
+def iter_candidate_files(root: str, include: Sequence[str] = ("*.json",),
+                         exclude: Sequence[str] = (),
+                         max_size: Optional[int] = None) -> Iterator[Tuple[str, os.stat_result]]:
+    """Обходит каталог и возвращает (путь, stat) файлов, прошедших фильтры"""
+    def excluded(rel_path: str, name: str) -> bool:
+        return any(fnmatch.fnmatch(name, p) or fnmatch.fnmatch(rel_path, p) for p in exclude)
+
+    for dir_path, dir_names, file_names in os.walk(root):
+        rel_dir = os.path.relpath(dir_path, root)
+        # Отсекаем исключенные каталоги, чтобы не спускаться в них
+        dir_names[:] = sorted(
+            d for d in dir_names
+            if not excluded(os.path.normpath(os.path.join(rel_dir, d)), d)
+        )
+        for name in sorted(file_names):
+            rel_path = os.path.normpath(os.path.join(rel_dir, name))
+            if include and not any(fnmatch.fnmatch(name, p) for p in include):
+                continue
+            if excluded(rel_path, name):
+                continue
+            full_path = os.path.join(dir_path, name)
+            try:
+                st = os.stat(full_path)
+            except OSError:
+                continue
+            if max_size is not None and st.st_size > max_size:
+                continue
+            yield full_path, st
+
+
+class SearchCache:
+    """Кэш результатов поиска: запрос -> {путь: (mtime_ns, размер, совпадения)}"""
+
+    def __init__(self, max_queries: int = 16):
+        self.max_queries = max_queries
+        self._entries: "OrderedDict[SearchQuery, Dict[str, tuple]]" = OrderedDict()
+
+    def get(self, query: SearchQuery, path: str, st: os.stat_result) -> Optional[List[SearchMatch]]:
+        files = self._entries.get(query)
+        if files is None:
+            return None
+        self._entries.move_to_end(query)
+        entry = files.get(path)
+        if entry is None or entry[0] != st.st_mtime_ns or entry[1] != st.st_size:
+            return None
+        return entry[2]
+
+    def put(self, query: SearchQuery, path: str, st: os.stat_result, matches: List[SearchMatch]):
+        files = self._entries.get(query)
+        if files is None:
+            files = self._entries[query] = {}
+            while len(self._entries) > self.max_queries:
+                self._entries.popitem(last=False)
+        self._entries.move_to_end(query)
+        files[path] = (st.st_mtime_ns, st.st_size, matches)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class DirectorySearch:
+    """Поиск по каталогу с потоковой выдачей результатов через callback"""
+
+    def __init__(self, root: str, query: SearchQuery,
+                 include: Sequence[str] = ("*.json",), exclude: Sequence[str] = (),
+                 max_size: Optional[int] = None, cache: Optional[SearchCache] = None,
+                 workers: Optional[int] = None):
+        self.root = root
+        self.query = query
+        self.include = tuple(include)
+        self.exclude = tuple(exclude)
+        self.max_size = max_size
+        self.cache = cache if cache is not None else search_cache
+        self.workers = workers
+        self.files_scanned = 0
+        self.cache_hits = 0
+        self.errors: List[Tuple[str, str]] = []
+
+    def run(self, on_result: Callable[[str, List[SearchMatch]], None],
+            is_cancelled: Callable[[], bool] = lambda: False,
+            on_progress: Optional[Callable[[int, int], None]] = None) -> int:
+        """Выполняет поиск, возвращает число файлов с совпадениями"""
+        if self.query.mode == MODE_REGEX:
+            re.compile(self.query.text)  # Ошибка шаблона — сразу вызывающему коду
+
+        files = list(iter_candidate_files(self.root, self.include, self.exclude, self.max_size))
+        total = len(files)
+        found = 0
+        pending = []
+        for path, st in files:
+            cached = self.cache.get(self.query, path, st)
+            if cached is None:
+                pending.append((path, st))
+                continue
+            self.cache_hits += 1
+            self.files_scanned += 1
+            if cached:
+                found += 1
+                on_result(path, cached)
+        if on_progress:
+            on_progress(self.files_scanned, total)
+
+        stats = dict(pending)
+        for path, matches, error in self._execute([p for p, _ in pending], is_cancelled):
+            self.files_scanned += 1
+            if error is not None:
+                self.errors.append((path, error))
+            else:
+                self.cache.put(self.query, path, stats[path], matches)
+                if matches:
+                    found += 1
+                    on_result(path, matches)
+            if on_progress:
+                on_progress(self.files_scanned, total)
+        return found
+
+    def _execute(self, paths: List[str], is_cancelled: Callable[[], bool]):
+        """Выдает результаты по мере готовности (в процессе или через пул)"""
+        if len(paths) < IN_PROCESS_THRESHOLD:
+            for path in paths:
+                if is_cancelled():
+                    return
+                yield _search_file_task((path, self.query))
+            return
+
+        # spawn: форк процесса с запущенными потоками Qt небезопасен
+        context = multiprocessing.get_context("spawn")
+        executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        try:
+            futures = [executor.submit(_search_file_task, (path, self.query)) for path in paths]
+            for future in as_completed(futures):
+                if is_cancelled():
+                    return
+                yield future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Глобальный кэш результатов поиска
+search_cache = SearchCache()
@@ -0,0 +1,179 @@
+"""
+Модуль отслеживания изменений открытых файлов другими программами
+
+QFileSystemWatcher сообщает об изменении файла; по размеру и хэшу последних
+байтов известной части файла определяется, дописан ли файл в конец (журналы,
+JSON Lines) или переписан целиком. Для дописанного файла читается только
+новый хвост — до последнего перевода строки, чтобы не отдавать недописанную
+запись. В режиме слежения («tail -f») файлы дополнительно опрашиваются по
+таймеру: уведомления о частых дозаписях могут приходить с задержкой или
+теряться.
+"""
+import hashlib
+import os
+from typing import Dict, NamedTuple, Optional
+
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+# Сколько байтов перед концом известной части сверяется при проверке дозаписи
+TAIL_CHECK_BYTES = 4096
+# Задержка обработки уведомлений (запись обычно приходит несколькими событиями)
+DEBOUNCE_MS = 100
+# Период опроса файлов в режиме слежения
+POLL_INTERVAL_MS = 500
+
+APPENDED = "appended"
+MODIFIED = "modified"
+DELETED = "deleted"
+
+
+class FileChange(NamedTuple):
+    """Изменение файла: вид и (для дозаписи) новый текст"""
+    path: str
+    kind: str
+    text: str = ""
+
+
+class _Known(NamedTuple):
+    """Известное состояние файла: размер прочитанной части, mtime, хэш ее хвоста"""
+    size: Optional[int]
+    mtime_ns: int
+    digest: bytes
+
+
+def _tail_digest(f, end: int) -> bytes:
+    start = max(0, end - TAIL_CHECK_BYTES)
+    f.seek(start)
+    return hashlib.blake2b(f.read(end - start), digest_size=16).digest()
+
+
+def _snapshot(path: str) -> _Known:
+    try:
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            return _Known(st.st_size, st.st_mtime_ns, _tail_digest(f, st.st_size))
+    except OSError:
+        return _Known(None, 0, b"")
+
+
+class FileWatcher(QObject):
+    """Следит за открытыми файлами и сообщает о дозаписи, изменении и удалении"""
+
+    fileChanged = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._schedule)
+        self._known: Dict[str, _Known] = {}
+        self._suspended = set()
+        self._followed = set()
+        self._pending = set()
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.timeout.connect(self._check_pending)
+        self._poll = QTimer(self)
+        self._poll.timeout.connect(self._poll_followed)
+
+    @staticmethod
+    def _key(path) -> str:
+        return os.path.abspath(os.fspath(path))
+
+    def watch(self, path):
+        """Начинает следить за файлом; текущее содержимое считается известным,
+        пауза после собственной записи снимается"""
+        path = self._key(path)
+        self._known[path] = _snapshot(path)
+        self._suspended.discard(path)
+        if path not in self._watcher.files() and os.path.exists(path):
+            self._watcher.addPath(path)
+
+    def unwatch(self, path):
+        path = self._key(path)
+        self._known.pop(path, None)
+        self._suspended.discard(path)
+        self.set_follow(path, False)
+        if path in self._watcher.files():
+            self._watcher.removePath(path)
+
+    def is_watched(self, path) -> bool:
+        return self._key(path) in self._known
+
+    def suspend(self, path):
+        """Не сообщать об изменениях файла (редактор сам записывает его)"""
+        self._suspended.add(self._key(path))
+
+    def refresh(self, path):
+        """Запоминает текущее состояние файла после собственной записи и снимает паузу"""
+        path = self._key(path)
+        self._suspended.discard(path)
+        if path in self._known:
+            self.watch(path)
+
+    def set_follow(self, path, enabled: bool):
+        """Режим слежения: опрос файла по таймеру в дополнение к уведомлениям"""
+        path = self._key(path)
+        if enabled:
+            self._followed.add(path)
+        else:
+            self._followed.discard(path)
+        if self._followed and not self._poll.isActive():
+            self._poll.start(POLL_INTERVAL_MS)
+        elif not self._followed:
+            self._poll.stop()
+
+    def is_followed(self, path) -> bool:
+        return self._key(path) in self._followed
+
+    def _schedule(self, path: str):
+        self._pending.add(path)
+        self._debounce.start(DEBOUNCE_MS)
+
+    def _check_pending(self):
+        pending, self._pending = self._pending, set()
+        for path in pending:
+            self._emit_change(path)
+
+    def _poll_followed(self):
+        for path in list(self._followed):
+            self._emit_change(path)
+
+    def _emit_change(self, path: str):
+        change = self.check(path)
+        # После замены файла (os.replace) наблюдение за путем снимается: возобновляем
+        if path in self._known and path not in self._watcher.files() and os.path.exists(path):
+            self._watcher.addPath(path)
+        if change is not None:
+            self.fileChanged.emit(change)
+
+    def check(self, path) -> Optional[FileChange]:
+        """Сравнивает файл с известным состоянием; возвращает изменение или None"""
+        path = self._key(path)
+        known = self._known.get(path)
+        if known is None or path in self._suspended:
+            return None
+        try:
+            f = open(path, "rb")
+        except OSError:
+            if known.size is None:
+                return None
+            self._known[path] = _Known(None, 0, b"")
+            return FileChange(path, DELETED)
+        with f:
+            st = os.fstat(f.fileno())
+            if known.size is not None and st.st_mtime_ns == known.mtime_ns and st.st_size == known.size:
+                return None
+            if known.size is not None and st.st_size > known.size \
+                    and _tail_digest(f, known.size) == known.digest:
+                f.seek(known.size)
+                data = f.read(st.st_size - known.size)
+                # Отдаем только законченные строки; недописанная придет со следующей записью
+                end = data.rfind(b"\n") + 1
+                if end == 0:
+                    return None
+                size = known.size + end
+                self._known[path] = _Known(size, st.st_mtime_ns, _tail_digest(f, size))
+                text = data[:end].decode("utf-8", errors="replace").replace("\r\n", "\n")
+                return FileChange(path, APPENDED, text)
+            self._known[path] = _Known(st.st_size, st.st_mtime_ns, _tail_digest(f, st.st_size))
+        return FileChange(path, MODIFIED)
@@ -0,0 +1,197 @@
+"""
+Модуль инструментирования: замеры длительности основных операций
+
+Сбор включается явно (настройка instrumentation_enabled или панель
+«Производительность»). В выключенном состоянии timed() возвращает общий
+пустой контекстный менеджер, поэтому накладные расходы — одна проверка флага.
+"""
+import cProfile
+import io
+import json
+import pstats
+import sys
+import time
+import tracemalloc
+from typing import Dict, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Границы корзин гистограммы в миллисекундах (последняя — «больше»)
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class _NullTimer:
+    """Пустой контекстный менеджер для выключенного сбора"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Histogram:
+    """Счетчик и гистограмма длительностей одной операции"""
+
+    __slots__ = ("count", "total", "last", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+        ms = seconds * 1000
+        for i, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "last_ms": round(self.last * 1000, 3),
+            "mean_ms": round(self.mean * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "total_ms": round(self.total * 1000, 3),
+            "histogram_ms": {
+                **{f"<={b}": n for b, n in zip(HISTOGRAM_BOUNDS_MS, self.buckets)},
+                f">{HISTOGRAM_BOUNDS_MS[-1]}": self.buckets[-1],
+            },
+        }
+
+
+class _Timer:
+    __slots__ = ("owner", "name", "started")
+
+    def __init__(self, owner, name):
+        self.owner = owner
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.owner.record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Instrumentation:
+    """Сбор метрик операций редактора"""
+
+    def __init__(self):
+        self.enabled = False
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+        self.last_operation: Optional[str] = None
+        self._profiler: Optional[cProfile.Profile] = None
+        self.profile_report = ""
+        self._tracemalloc_owned = False
+
+    def timed(self, name: str):
+        """Контекстный менеджер замера: with instrumentation.timed("parse"): ..."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def record(self, name: str, seconds: float):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.add(seconds)
+        self.last_operation = name
+
+    def increment(self, name: str, amount: int = 1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self):
+        self.histograms.clear()
+        self.counters.clear()
+        self.last_operation = None
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+
+    # --- cProfile ---
+    def is_profiling(self) -> bool:
+        return self._profiler is not None
+
+    def start_profiling(self):
+        if self._profiler is None:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop_profiling(self, limit: int = 30) -> str:
+        """Останавливает cProfile и возвращает отчет по суммарному времени"""
+        if self._profiler is None:
+            return self.profile_report
+        self._profiler.disable()
+        stream = io.StringIO()
+        pstats.Stats(self._profiler, stream=stream).sort_stats("cumulative").print_stats(limit)
+        self._profiler = None
+        self.profile_report = stream.getvalue()
+        return self.profile_report
+
+    # --- tracemalloc ---
+    def is_tracing_memory(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start_memory_tracing(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracemalloc_owned = True
+
+    def stop_memory_tracing(self):
+        if self._tracemalloc_owned and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._tracemalloc_owned = False
+
+    def peak_memory_kb(self) -> Optional[int]:
+        """Пик памяти: по tracemalloc, если он включен, иначе пиковый RSS процесса"""
+        if tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()[1] // 1024
+        if resource is not None:
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # ru_maxrss в Linux — в килобайтах, в macOS — в байтах
+            return peak // 1024 if sys.platform == "darwin" else peak
+        return None
+
+    # --- экспорт ---
+    def snapshot(self) -> dict:
+        return {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "operations": {name: h.to_dict() for name, h in sorted(self.histograms.items())},
+            "counters": dict(self.counters),
+            "peak_memory_kb": self.peak_memory_kb(),
+            "memory_source": "tracemalloc" if tracemalloc.is_tracing() else "rusage",
+            "profile": self.profile_report,
+        }
+
+    def export_json(self, path: str):
+        """Сохраняет метрики в JSON для приложения к отчету об ошибке"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2, ensure_ascii=False)
+
+
+# Глобальный экземпляр сборщика метрик
+instrumentation = Instrumentation()
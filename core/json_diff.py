@@ -0,0 +1,426 @@
+"""
+Модуль структурного сравнения двух JSON-документов
+
+Сравнение идет сверху вниз и пропускает поддеревья с равными хэшами за O(1).
+Хэш поддерева считается по требованию и запоминается: это хэш канонической
+записи (быстрая библиотека JSON) или, если ее нет, хэш дерева Меркла из хэшей
+потомков. У объектов порядок ключей не важен. Заново хэшируются только
+различающиеся ветви, поэтому время определяется размером изменений.
+
+Элементы массивов сопоставляются по ключу идентичности (например, "id"),
+затем по равному содержимому, остальные — по порядку. Элементы, сменившие
+порядок, и поддеревья, перенесенные под другой путь, отмечаются как MOVED.
+"""
+from bisect import bisect_left
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from core import codec
+from core.instrumentation import instrumentation
+
+# Виды изменений
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+MOVED = "moved"
+
+# Как часто проверяется флаг отмены (в сравненных парах)
+CANCEL_CHECK_INTERVAL = 4096
+
+_OBJECT_TAG = 5
+_ARRAY_TAG = 6
+
+
+class Change(NamedTuple):
+    """Изменение: вид, пути слева и справа (None, если значения нет) и значения"""
+    kind: str
+    left_path: Optional[Tuple]
+    right_path: Optional[Tuple]
+    left: Any = None
+    right: Any = None
+
+
+class DiffResult(NamedTuple):
+    """Изменения в порядке документа; compared — сравненных пар узлов,
+    skipped — пропущенных одинаковых поддеревьев"""
+    changes: List[Change]
+    compared: int
+    skipped: int
+
+
+def format_path(path) -> str:
+    """Путь в виде $.items[3].name"""
+    if path is None:
+        return ""
+    return "$" + "".join(f"[{p}]" if isinstance(p, int) else f".{p}" for p in path)
+
+
+def _leaf_hash(value) -> int:
+    # Тип входит в хэш: 1, 1.0 и True в Python равны, а в JSON различны
+    return hash((value, value.__class__))
+
+
+def _flat_hash(container, types: tuple) -> Optional[int]:
+    """Хэш контейнера без вложенных объектов и массивов, посчитанный целиком
+    на уровне C; None, если вложенные контейнеры есть"""
+    if dict in types or list in types:
+        return None
+    if container.__class__ is dict:
+        return hash((_OBJECT_TAG, frozenset(zip(container.keys(), container.values(), types))))
+    return hash((_ARRAY_TAG, tuple(container), types))
+
+
+class SubtreeHasher:
+    """Хэши поддеревьев одного документа, посчитанные по требованию и
+    запомненные по id контейнера (документ должен жить, пока жив хэшер).
+
+    Хэш контейнера — хэш канонической записи codec (один вызов C на поддерево),
+    а если запись недоступна или отказала (глубина, NaN, большие целые) — хэш
+    Меркла из хэшей потомков. Выбор зависит только от содержимого, поэтому
+    равные поддеревья двух документов получают равные хэши."""
+
+    def __init__(self, canonical: Optional[Callable] = None):
+        self.canonical = canonical
+        self.hashes: Dict[int, int] = {}
+
+    def __call__(self, value) -> int:
+        if value.__class__ is dict or value.__class__ is list:
+            value_hash = self.hashes.get(id(value))
+            return value_hash if value_hash is not None else self._merkle(value)
+        return _leaf_hash(value)
+
+    def many(self, values: list) -> List[int]:
+        """Хэши элементов массива. Элемент, который каноническая запись принимает
+        (в том числе скаляр), хэшируется по записи — весь массив одним проходом
+        на уровне C; остальные — как при вызове хэшера"""
+        canonical = self.canonical
+        if canonical is not None:
+            try:
+                return list(map(hash, map(canonical, values)))
+            except (TypeError, ValueError):
+                pass
+        result = []
+        for value in values:
+            value_hash = None
+            if canonical is not None:
+                try:
+                    value_hash = hash(canonical(value))
+                except (TypeError, ValueError):
+                    pass
+            result.append(value_hash if value_hash is not None else self(value))
+        return result
+
+    def _known(self, container) -> Optional[int]:
+        """Хэш из кэша, канонической записи или контейнера из одних скаляров"""
+        hashes = self.hashes
+        value_hash = hashes.get(id(container))
+        if value_hash is not None:
+            return value_hash
+        if self.canonical is not None:
+            try:
+                value_hash = hash(self.canonical(container))
+            except (TypeError, ValueError):
+                value_hash = None
+        if value_hash is None:
+            values = container.values() if container.__class__ is dict else container
+            value_hash = _flat_hash(container, tuple(map(type, values)))
+        if value_hash is not None:
+            hashes[id(container)] = value_hash
+        return value_hash
+
+    def _merkle(self, root) -> int:
+        """Хэш Меркла без рекурсии: потомки считаются раньше родителя. Кадр:
+        (контейнер, итератор потомков, значения, типы, ключ в родителе), где
+        вложенные контейнеры в значениях заменены их хэшами — так хэш совпадает
+        с посчитанным сразу для контейнера из одних скаляров"""
+        value_hash = self._known(root)
+        if value_hash is not None:
+            return value_hash
+        stack = [(root, _children(root), [], [], None)]
+        while stack:
+            container, children, values, types, _ = stack[-1]
+            if container.__class__ is dict:
+                for key, value in children:
+                    cls = value.__class__
+                    if cls is dict or cls is list:
+                        child = value
+                        value = self._known(child)
+                        if value is None:
+                            stack.append((child, _children(child), [], [], key))
+                            break
+                    values.append((key, value, cls))
+                else:
+                    self._finish(stack, hash((_OBJECT_TAG, frozenset(values))))
+            else:
+                for value in children:
+                    cls = value.__class__
+                    if cls is dict or cls is list:
+                        child = value
+                        value = self._known(child)
+                        if value is None:
+                            stack.append((child, _children(child), [], [], None))
+                            break
+                    values.append(value)
+                    types.append(cls)
+                else:
+                    self._finish(stack, hash((_ARRAY_TAG, tuple(values), tuple(types))))
+        return self.hashes[id(root)]
+
+    def _finish(self, stack: list, value_hash: int):
+        """Снимает посчитанный контейнер со стека и передает хэш родителю"""
+        container, _, _, _, key = stack.pop()
+        self.hashes[id(container)] = value_hash
+        if stack:
+            parent, _, values, types, _ = stack[-1]
+            if parent.__class__ is dict:
+                values.append((key, value_hash, container.__class__))
+            else:
+                values.append(value_hash)
+                types.append(container.__class__)
+
+
+def _children(container):
+    return iter(container.items()) if container.__class__ is dict else iter(container)
+
+
+def _identity(value, identity_key: Optional[str]):
+    if identity_key is None or not isinstance(value, dict):
+        return None
+    identity = value.get(identity_key)
+    if identity is None or isinstance(identity, (dict, list)):
+        return None
+    return _leaf_hash(identity)
+
+
+def _stable_pairs(pairs: List[Tuple[int, int]]) -> set:
+    """Пары (i, j), образующие наибольшую возрастающую по j подпоследовательность
+    при упорядочении по i: эти элементы не сдвигались друг относительно друга"""
+    tails: List[int] = []
+    tail_pairs: List[int] = []
+    previous: List[int] = []
+    for n, (_, j) in enumerate(pairs):
+        pos = bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_pairs.append(n)
+        else:
+            tails[pos] = j
+            tail_pairs[pos] = n
+        previous.append(tail_pairs[pos - 1] if pos else -1)
+    stable = set()
+    n = tail_pairs[-1] if tail_pairs else -1
+    while n != -1:
+        stable.add(pairs[n])
+        n = previous[n]
+    return stable
+
+
+def match_arrays(left: list, right: list, left_hashes: List[int], right_hashes: List[int],
+                 identity_key: Optional[str] = None, free_left: Optional[List[int]] = None,
+                 free_right: Optional[List[int]] = None):
+    """Сопоставляет элементы двух массивов по хэшам элементов (SubtreeHasher.many).
+
+    Возвращает (пары (i, j), несопоставленные индексы слева, справа). Сначала
+    по ключу идентичности, затем по равному содержимому; оставшиеся элементы
+    без ключа идентичности сопоставляются по порядку. free_left и free_right
+    ограничивают сопоставление частью индексов (по умолчанию — все)."""
+    pairs = []
+    free_left = list(range(len(left))) if free_left is None else free_left
+    free_right = list(range(len(right))) if free_right is None else free_right
+    if identity_key is not None:
+        by_identity = {}
+        for i in free_left:
+            identity = _identity(left[i], identity_key)
+            if identity is not None:
+                by_identity.setdefault(identity, i)
+        unmatched_right = []
+        for j in free_right:
+            i = by_identity.pop(_identity(right[j], identity_key), None)
+            if i is None:
+                unmatched_right.append(j)
+            else:
+                pairs.append((i, j))
+        matched = {i for i, _ in pairs}
+        free_left = [i for i in free_left if i not in matched]
+        free_right = unmatched_right
+
+    by_hash = defaultdict(deque)
+    for i in free_left:
+        by_hash[left_hashes[i]].append(i)
+    unmatched_right = []
+    for j in free_right:
+        candidates = by_hash.get(right_hashes[j])
+        if candidates:
+            pairs.append((candidates.popleft(), j))
+        else:
+            unmatched_right.append(j)
+    matched = {i for i, _ in pairs}
+    free_left = [i for i in free_left if i not in matched]
+    free_right = unmatched_right
+
+    # По порядку — только элементы без идентичности: разные id — разные сущности
+    positional_left = [i for i in free_left if _identity(left[i], identity_key) is None]
+    positional_right = [j for j in free_right if _identity(right[j], identity_key) is None]
+    positional = list(zip(positional_left, positional_right))
+    pairs.extend(positional)
+    paired_left = {i for i, _ in positional}
+    paired_right = {j for _, j in positional}
+    pairs.sort()
+    return (pairs, [i for i in free_left if i not in paired_left],
+            [j for j in free_right if j not in paired_right])
+
+
+def _common_ends(left_hashes: List[int], right_hashes: List[int]) -> Tuple[int, int]:
+    """Длины общего начала и общего конца двух массивов (по хэшам элементов)"""
+    limit = min(len(left_hashes), len(right_hashes))
+    prefix = 0
+    while prefix < limit and left_hashes[prefix] == right_hashes[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and left_hashes[-1 - suffix] == right_hashes[-1 - suffix]:
+        suffix += 1
+    return prefix, suffix
+
+
+def _path(cell) -> Tuple:
+    """Путь из связного списка (родитель, ключ): общий префикс путей не копируется,
+    поэтому на глубоких документах сравнение остается линейным"""
+    keys = []
+    while cell is not None:
+        cell, key = cell
+        keys.append(key)
+    keys.reverse()
+    return tuple(keys)
+
+
+def diff(left, right, identity_key: Optional[str] = None,
+         is_cancelled: Optional[Callable[[], bool]] = None) -> Optional[DiffResult]:
+    """Структурное сравнение документов; None, если сравнение отменено"""
+    canonical = codec.current().canonical
+    left_hash = SubtreeHasher(canonical)
+    right_hash = SubtreeHasher(canonical)
+    changes: List[Change] = []
+    compared = skipped = 0
+    # Стек действий в обратном порядке: пара для сравнения или готовое изменение
+    stack: List[Union[Change, tuple]] = [(left, right, None, None)]
+    while stack:
+        action = stack.pop()
+        if isinstance(action, Change):
+            changes.append(action)
+            continue
+        compared += 1
+        if is_cancelled is not None and compared % CANCEL_CHECK_INTERVAL == 0 and is_cancelled():
+            return None
+        a, b, a_cell, b_cell = action
+        if left_hash(a) == right_hash(b):
+            skipped += 1
+            continue
+        actions: List[Union[Change, tuple]] = []
+        if isinstance(a, dict) and isinstance(b, dict):
+            for key, value in a.items():
+                if key in b:
+                    actions.append((value, b[key], (a_cell, key), (b_cell, key)))
+                else:
+                    actions.append(Change(REMOVED, _path((a_cell, key)), None, value, None))
+            for key, value in b.items():
+                if key not in a:
+                    actions.append(Change(ADDED, None, _path((b_cell, key)), None, value))
+        elif isinstance(a, list) and isinstance(b, list):
+            a_hashes, b_hashes = left_hash.many(a), right_hash.many(b)
+            # Совпадающие начало и конец (обычная правка затрагивает середину)
+            # пропускаются без сопоставления
+            prefix, suffix = _common_ends(a_hashes, b_hashes)
+            skipped += prefix + suffix
+            a_end, b_end = len(a) - suffix, len(b) - suffix
+            pairs, removed, added = match_arrays(
+                a, b, a_hashes, b_hashes, identity_key,
+                list(range(prefix, a_end)), list(range(prefix, b_end)))
+            for i in removed:
+                actions.append(Change(REMOVED, _path((a_cell, i)), None, a[i], None))
+            stable = _stable_pairs(pairs)
+            by_right = {j: i for i, j in pairs}
+            for j in range(prefix, b_end):
+                i = by_right.get(j)
+                if i is None:
+                    actions.append(Change(ADDED, None, _path((b_cell, j)), None, b[j]))
+                    continue
+                if (i, j) not in stable:
+                    actions.append(Change(MOVED, _path((a_cell, i)), _path((b_cell, j)), a[i], b[j]))
+                if a_hashes[i] == b_hashes[j]:
+                    skipped += 1
+                else:
+                    actions.append((a[i], b[j], (a_cell, i), (b_cell, j)))
+        else:
+            actions.append(Change(CHANGED, _path(a_cell), _path(b_cell), a, b))
+        stack.extend(reversed(actions))
+    return DiffResult(_detect_relocations(changes, left_hash, right_hash), compared, skipped)
+
+
+def _detect_relocations(changes: List[Change], left_hash, right_hash) -> List[Change]:
+    """Объединяет удаленное и добавленное поддерево с равным хэшем в перенос"""
+    removed = defaultdict(deque)
+    for n, change in enumerate(changes):
+        if change.kind == REMOVED and isinstance(change.left, (dict, list)) and change.left:
+            removed[left_hash(change.left)].append(n)
+    if not removed:
+        return changes
+    # Номер добавления -> номер удаления того же поддерева
+    relocated = {}
+    for n, change in enumerate(changes):
+        if change.kind == ADDED and isinstance(change.right, (dict, list)) and change.right:
+            candidates = removed.get(right_hash(change.right))
+            if candidates:
+                relocated[n] = candidates.popleft()
+    if not relocated:
+        return changes
+    sources = set(relocated.values())
+    result = []
+    for n, change in enumerate(changes):
+        if n in sources:
+            continue
+        if n in relocated:
+            source = changes[relocated[n]]
+            change = Change(MOVED, source.left_path, change.right_path, source.left, change.right)
+        result.append(change)
+    return result
+
+
+def _load(source: Union[str, Path]):
+    from core.json_lexer import loads
+    if isinstance(source, Path):
+        source = source.read_text(encoding="utf-8")
+    return loads(source)
+
+
+class DiffWorker(QThread):
+    """Фоновое сравнение. Источник — путь к файлу (Path) или текст документа."""
+
+    diffed = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, left: Union[str, Path], right: Union[str, Path],
+                 identity_key: Optional[str] = None, parent=None):
+        super().__init__(parent)
+        self.left = left
+        self.right = right
+        self.identity_key = identity_key
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        try:
+            with instrumentation.timed("diff.load"):
+                left = _load(self.left)
+                right = _load(self.right)
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            self.failed.emit(str(e))
+            return
+        with instrumentation.timed("diff"):
+            result = diff(left, right, self.identity_key, lambda: self._cancelled)
+        if result is not None:
+            self.diffed.emit(result)
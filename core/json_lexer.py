@@ -0,0 +1,520 @@
+"""
+Модуль построчной проверки синтаксиса JSON
+
+Состояние лексера на конце строки — стек открытых скобок и ожидаемый
+следующий элемент — кодируется одним целым числом. Это число хранится в
+блоке QTextDocument, поэтому после правки достаточно перепроверить строки
+от измененной до той, где состояние совпадет с прежним.
+
+Стеки хранятся общими префиксами (родитель + скобка), поэтому память не
+зависит квадратично от глубины вложенности.
+"""
+import json
+import re
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+from core import codec
+
+# Что ожидается следующим
+EXPECT_VALUE = 0             # значение (начало документа, после ':' или ',' в массиве)
+EXPECT_VALUE_OR_CLOSE = 1    # значение или ']' (сразу после '[')
+EXPECT_KEY = 2               # ключ (после ',' в объекте)
+EXPECT_KEY_OR_CLOSE = 3      # ключ или '}' (сразу после '{')
+EXPECT_COLON = 4             # ':' после ключа
+EXPECT_COMMA_OR_CLOSE = 5    # ',' или закрывающая скобка после значения
+EXPECT_END = 6               # документ закончен, допустимы только пробелы
+
+_EXPECT_BITS = 3
+_EXPECT_MASK = (1 << _EXPECT_BITS) - 1
+
+# Состояние начала документа: пустой стек, ожидается значение
+START_STATE = 0
+
+_EXPECT_MESSAGES = {
+    EXPECT_VALUE: "Ожидается значение",
+    EXPECT_VALUE_OR_CLOSE: "Ожидается значение или ']'",
+    EXPECT_KEY: "Ожидается ключ в кавычках",
+    EXPECT_KEY_OR_CLOSE: "Ожидается ключ в кавычках или '}'",
+    EXPECT_COLON: "Ожидается ':'",
+    EXPECT_COMMA_OR_CLOSE: "Ожидается ',' или закрывающая скобка",
+    EXPECT_END: "Лишние данные после конца JSON",
+}
+
+# Пробелы перед токеном поглощаются тем же совпадением (пробелы в конце строки
+# не совпадают ни с чем и пропускаются finditer)
+_TOKEN = re.compile(r'''
+    [ \t\r\n]*
+    (?:
+    (?P<str>"[^"\\]*(?:\\.[^"\\]*)*(?:(?P<closed>")|\\?$))
+  | (?P<lit>(?:true|false|null|NaN|Infinity|-Infinity)(?![\w$]))
+  | (?P<num>-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?(?![\w.+-]))
+  | (?P<punct>[{}\[\]:,])
+  | (?P<bad>[^ \t\r\n"{}\[\]:,]+)
+    )
+''', re.VERBOSE)
+
+# Строка без недопустимых escape-последовательностей и управляющих символов
+_STRICT_STRING = re.compile(r'"[^"\\\x00-\x1f]*(?:\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4})[^"\\\x00-\x1f]*)*"')
+
+
+class LineError(NamedTuple):
+    """Ошибка в строке: позиция и длина фрагмента в символах"""
+    column: int
+    length: int
+    message: str
+
+
+class LineLexer:
+    """Проверка синтаксиса JSON по строкам с целочисленным состоянием"""
+
+    def __init__(self):
+        # Узлы стеков: 0 — пустой стек; для остальных родитель и скобка
+        self._parents = [0]
+        self._brackets = [""]
+        self._depths = [0]
+        self._nodes = {}
+
+    # --- состояние ---
+    @staticmethod
+    def expect_of(state: int) -> int:
+        return state & _EXPECT_MASK
+
+    def depth_of(self, state: int) -> int:
+        return self._depths[state >> _EXPECT_BITS]
+
+    def is_complete(self, state: int) -> bool:
+        """Документ в этом состоянии завершен корректно"""
+        return state == EXPECT_END
+
+    @staticmethod
+    def is_blank(state: int) -> bool:
+        """До этого места не встретилось ни одного значения"""
+        return state == START_STATE
+
+    def _push(self, node: int, bracket: str) -> int:
+        key = (node, bracket)
+        child = self._nodes.get(key)
+        if child is None:
+            child = self._nodes[key] = len(self._parents)
+            self._parents.append(node)
+            self._brackets.append(bracket)
+            self._depths.append(self._depths[node] + 1)
+        return child
+
+    # --- разбор строки ---
+    def lex(self, text: str, state: int = START_STATE, builder=None,
+            pairs: Optional[list] = None, marks: Optional[list] = None) -> Tuple[int, List[LineError]]:
+        """Проверяет строку; возвращает состояние на ее конце и найденные ошибки.
+
+        После ошибки разбор восстанавливается так, как если бы пропущенный
+        символ был на месте (запятая, двоеточие, закрывающая скобка), поэтому
+        одна опечатка дает одну ошибку. builder (если задан) получает ключи и
+        значения для построения частичного дерева, pairs — пары (позиция,
+        уровень) парных скобок строки: уровень открывающей — глубина после нее,
+        закрывающей — глубина до нее, так что у скобок одной пары он равен;
+        marks — пары (позиция, глубина контейнера) запятых и строковых ключей."""
+        node = state >> _EXPECT_BITS
+        expect = state & _EXPECT_MASK
+        errors = []
+        parents = self._parents
+        brackets = self._brackets
+        depths = self._depths
+
+        for match in _TOKEN.finditer(text):
+            kind = match.lastgroup
+            start = match.start(kind)
+            token = match.group(kind)
+
+            if kind == "punct":
+                if token == ":":
+                    if expect == EXPECT_COLON:
+                        expect = EXPECT_VALUE
+                    else:
+                        errors.append(LineError(start, 1, _EXPECT_MESSAGES[expect]))
+                    continue
+                if token == ",":
+                    if expect == EXPECT_COMMA_OR_CLOSE:
+                        expect = EXPECT_KEY if brackets[node] == "{" else EXPECT_VALUE
+                        if marks is not None:
+                            marks.append((start, depths[node]))
+                    else:
+                        errors.append(LineError(start, 1, _EXPECT_MESSAGES[expect]))
+                        if expect == EXPECT_COLON:
+                            # Ключ без значения: {"a", "b": 1}
+                            expect = EXPECT_KEY
+                            if builder is not None:
+                                builder.drop_key()
+                    continue
+                if token == "{" or token == "[":
+                    attached = (
+                        expect == EXPECT_VALUE or expect == EXPECT_VALUE_OR_CLOSE
+                        or expect == EXPECT_COLON
+                        or (expect == EXPECT_COMMA_OR_CLOSE and brackets[node] == "[")
+                    )
+                    if not (expect == EXPECT_VALUE or expect == EXPECT_VALUE_OR_CLOSE):
+                        errors.append(LineError(start, 1, _EXPECT_MESSAGES[expect]))
+                    # Скобку открываем всегда, чтобы не сбить парность следующих скобок
+                    node = self._push(node, token)
+                    expect = EXPECT_KEY_OR_CLOSE if token == "{" else EXPECT_VALUE_OR_CLOSE
+                    if pairs is not None:
+                        pairs.append((start, depths[node]))
+                    if builder is not None:
+                        builder.open(token, attached)
+                    continue
+                # Закрывающая скобка
+                opener = "{" if token == "}" else "["
+                if node and brackets[node] == opener:
+                    allowed = EXPECT_KEY_OR_CLOSE if token == "}" else EXPECT_VALUE_OR_CLOSE
+                    if expect != allowed and expect != EXPECT_COMMA_OR_CLOSE:
+                        # Лишняя запятая или пропущенное значение
+                        errors.append(LineError(start, 1, _EXPECT_MESSAGES[expect]))
+                    pops = 1
+                else:
+                    pops = 0
+                    probe = node
+                    while probe and brackets[probe] != opener:
+                        probe = parents[probe]
+                        pops += 1
+                    if not probe:
+                        errors.append(LineError(start, 1, "Непарная скобка"))
+                        continue
+                    # Внутренние скобки не закрыты: закрываем их вместе с внешней
+                    errors.append(LineError(start, 1, "Не закрыта скобка '%s'" % brackets[node]))
+                    pops += 1
+                if pairs is not None:
+                    # Скобка закрывает внешнюю из закрываемых пар
+                    pairs.append((start, depths[node] - pops + 1))
+                for _ in range(pops):
+                    node = parents[node]
+                    if builder is not None:
+                        builder.close()
+                expect = EXPECT_COMMA_OR_CLOSE if node else EXPECT_END
+                continue
+
+            if kind == "str":
+                if match.group("closed") is None:
+                    errors.append(LineError(start, len(token), "Незакрытая строка"))
+                    continue
+                if not _STRICT_STRING.fullmatch(token):
+                    errors.append(LineError(start, len(token), "Недопустимый символ в строке"))
+            elif kind == "bad":
+                errors.append(LineError(start, len(token), "Неожиданный символ"))
+                if expect == EXPECT_COMMA_OR_CLOSE or expect == EXPECT_END:
+                    continue
+
+            # Ключ или значение
+            if expect == EXPECT_KEY or expect == EXPECT_KEY_OR_CLOSE:
+                if kind != "str" and kind != "bad":
+                    errors.append(LineError(start, len(token), _EXPECT_MESSAGES[expect]))
+                expect = EXPECT_COLON
+                if marks is not None and kind == "str":
+                    marks.append((start, depths[node]))
+                if builder is not None:
+                    builder.key(kind, token)
+                continue
+            if expect == EXPECT_COMMA_OR_CLOSE:
+                errors.append(LineError(start, len(token), _EXPECT_MESSAGES[expect]))
+                # Пропущенная запятая: строка в объекте — следующий ключ, в массиве — элемент
+                if brackets[node] == "{":
+                    if kind == "str":
+                        expect = EXPECT_COLON
+                        if marks is not None:
+                            marks.append((start, depths[node]))
+                        if builder is not None:
+                            builder.key(kind, token)
+                elif builder is not None:
+                    builder.value(kind, token)
+                continue
+            if expect == EXPECT_END:
+                errors.append(LineError(start, len(token), _EXPECT_MESSAGES[expect]))
+                continue
+            if expect == EXPECT_COLON:
+                # Пропущенное двоеточие
+                errors.append(LineError(start, len(token), _EXPECT_MESSAGES[expect]))
+            expect = EXPECT_COMMA_OR_CLOSE if node else EXPECT_END
+            if builder is not None:
+                builder.value(kind, token)
+
+        return (node << _EXPECT_BITS) | expect, errors
+
+    def end_error(self, state: int) -> Optional[str]:
+        """Сообщение об ошибке конца документа для итогового состояния (None — ошибки нет)"""
+        if state == EXPECT_END or state == START_STATE:
+            return None
+        if state >> _EXPECT_BITS:
+            return "Неожиданный конец документа: не закрыто скобок — %d" % self.depth_of(state)
+        return "Неожиданный конец документа"
+
+
+class ParseResult(NamedTuple):
+    """Результат устойчивого разбора: частичные данные и все ошибки"""
+    data: Any
+    errors: List[Tuple[int, LineError]]
+
+
+_MISSING = object()
+_LITERALS = {
+    "true": True, "false": False, "null": None,
+    "NaN": codec.NonFiniteFloat("nan"), "Infinity": codec.NonFiniteFloat("inf"),
+    "-Infinity": codec.NonFiniteFloat("-inf"),
+}
+
+
+def _decode(kind: str, token: str):
+    if kind == "str":
+        if "\\" not in token:
+            return token[1:-1]
+        try:
+            return json.loads(token)
+        except ValueError:
+            return token[1:-1]
+    if kind == "lit":
+        return _LITERALS[token]
+    if kind == "num":
+        # Запись дробных чисел сохраняется, как в codec.loads(exact=True)
+        return codec.exact_float(token) if any(c in token for c in ".eE") else int(token)
+    return token
+
+
+class _TreeBuilder:
+    """Собирает данные из корректных частей документа во время разбора"""
+
+    def __init__(self, json_lines: bool = False):
+        # В режиме JSON Lines корень — список записей
+        self.root = [] if json_lines else _MISSING
+        self.json_lines = json_lines
+        # Кадры открытых контейнеров: [контейнер или None (отброшенный), ожидающий ключ]
+        self.stack = []
+
+    def _add(self, value):
+        if not self.stack:
+            if self.json_lines:
+                self.root.append(value)
+            elif self.root is _MISSING:
+                self.root = value
+            return
+        frame = self.stack[-1]
+        container = frame[0]
+        if container.__class__ is list:
+            container.append(value)
+        elif container is not None and frame[1] is not None:
+            container[frame[1]] = value
+            frame[1] = None
+
+    def key(self, kind: str, token: str):
+        self.stack[-1][1] = _decode(kind, token)
+
+    def drop_key(self):
+        self.stack[-1][1] = None
+
+    def value(self, kind: str, token: str):
+        if kind == "bad":
+            if self.stack and self.stack[-1][0].__class__ is dict:
+                self.drop_key()
+            return
+        self._add(_decode(kind, token))
+
+    def open(self, bracket: str, attached: bool):
+        container = {} if bracket == "{" else []
+        if attached:
+            self._add(container)
+        else:
+            container = None
+        self.stack.append([container, None])
+
+    def close(self):
+        self.stack.pop()
+
+
+def _run_lines(text: str, lexer: LineLexer, builder=None, json_lines: bool = False) -> List[Tuple[int, LineError]]:
+    state = START_STATE
+    found = []
+    line_number = 0
+    for line_number, line in enumerate(text.split("\n"), 1):
+        if json_lines and state == EXPECT_END and line.strip():
+            # JSON Lines: непустая строка после законченного значения начинает новую запись
+            state = START_STATE
+        state, errors = lexer.lex(line, state, builder)
+        if errors:
+            found.extend((line_number, error) for error in errors)
+    message = lexer.end_error(state)
+    if message:
+        found.append((line_number, LineError(len(text) - text.rfind("\n") - 1, 0, message)))
+    return found
+
+
+def check_text(text: str, lexer: Optional[LineLexer] = None, json_lines: bool = False) -> List[Tuple[int, LineError]]:
+    """Проверяет весь текст; возвращает (номер строки с 1, ошибка) для всех ошибок"""
+    return _run_lines(text, lexer or LineLexer(), json_lines=json_lines)
+
+
+def parse_tolerant(text: str, json_lines: bool = False) -> ParseResult:
+    """Разбор с восстановлением после ошибок за один линейный проход (без рекурсии).
+    Возвращает данные из корректных частей (None, если значений нет) и все ошибки.
+    В режиме JSON Lines данные — список записей."""
+    builder = _TreeBuilder(json_lines)
+    errors = _run_lines(text, LineLexer(), builder, json_lines)
+    return ParseResult(None if builder.root is _MISSING else builder.root, errors)
+
+
+# Расширения файлов JSON Lines (одна запись JSON на строку)
+JSON_LINES_EXTENSIONS = (".jsonl", ".ndjson", ".ldjson")
+
+
+def is_json_lines_path(path) -> bool:
+    return str(path).lower().endswith(JSON_LINES_EXTENSIONS)
+
+
+def parse_json_lines(text: str, exact: bool = False) -> list:
+    """Разбирает JSON Lines в список записей; пустые строки пропускаются.
+    Ошибка сообщается с позицией во всем тексте (json.JSONDecodeError).
+    exact — сохранять запись дробных чисел (см. codec.JsonNumber)."""
+    records = []
+    offset = 0
+    for line in text.split("\n"):
+        if line.strip():
+            try:
+                records.append(codec.loads(line, exact))
+            except json.JSONDecodeError as e:
+                raise json.JSONDecodeError(e.msg, text, offset + e.pos) from None
+        offset += len(line) + 1
+    return records
+
+
+def loads(text: str, json_lines: bool = False, exact: bool = False):
+    """Разбор JSON (или JSON Lines) выбранной библиотекой без ограничения глубины.
+    json.loads рекурсивен и на документах в тысячи уровней падает с RecursionError;
+    тогда документ разбирается линейным проходом лексера (он всегда сохраняет
+    запись чисел). exact — сохранять запись дробных чисел."""
+    try:
+        return parse_json_lines(text, exact) if json_lines else codec.loads(text, exact)
+    except RecursionError:
+        pass
+    result = parse_tolerant(text, json_lines)
+    if result.errors:
+        line, error = result.errors[0]
+        offset = sum(len(part) + 1 for part in text.split("\n", line - 1)[:line - 1])
+        raise json.JSONDecodeError(error.message, text, offset + error.column)
+    return result.data
+
+
+_HERE = object()
+
+
+def locate_paths(text: str, paths) -> dict:
+    """Позиции значений по путям (кортежи ключей и индексов) в корректном JSON.
+
+    Текст просматривается одним проходом по токенам; пути собираются в
+    префиксное дерево, поэтому стоимость не зависит от числа путей.
+    Возвращает {путь: (номер строки с 1, колонка, длина)} для найденных путей."""
+    trie = {}
+    for path in paths:
+        node = trie
+        for part in path:
+            node = node.setdefault(part, {})
+        node[_HERE] = path
+    found = {}
+    remaining = sum(1 for _ in _iter_targets(trie))
+    if not remaining:
+        return found
+
+    # Кадры открытых контейнеров: [объект ли, узел префиксного дерева, ключ или индекс, ждем ключ]
+    stack = []
+    line, line_start, pos = 1, 0, 0
+    for match in _TOKEN.finditer(text):
+        kind = match.lastgroup
+        start = match.start(kind)
+        newlines = text.count("\n", pos, start)
+        if newlines:
+            line += newlines
+            line_start = text.rfind("\n", pos, start) + 1
+        pos = match.end()
+        token = match.group(kind)
+        frame = stack[-1] if stack else None
+
+        if kind == "punct":
+            if token == ",":
+                if frame[0]:
+                    frame[3] = True
+                else:
+                    frame[2] += 1
+                continue
+            if token == ":":
+                continue
+            if token == "}" or token == "]":
+                stack.pop()
+                continue
+        elif frame is not None and frame[3]:
+            frame[2] = _decode(kind, token)
+            frame[3] = False
+            continue
+
+        # Начало значения
+        if frame is None:
+            node = trie
+        else:
+            node = frame[1].get(frame[2]) if frame[1] is not None else None
+        if node is not None and _HERE in node:
+            found[node[_HERE]] = (line, start - line_start, 1 if kind == "punct" else len(token))
+            remaining -= 1
+            if not remaining:
+                break
+        if kind == "punct":
+            is_object = token == "{"
+            stack.append([is_object, node, None if is_object else 0, is_object])
+    return found
+
+
+_SPACE = re.compile(r"[ \t\r\n]*")
+
+
+def locate_path(text: str, path) -> Optional[Tuple[int, int]]:
+    """Позиция значения по одному пути: (смещение в тексте, длина записи
+    скаляра или 1 для контейнера). Соседние значения пропускаются разбором
+    json на уровне C, поэтому поиск намного быстрее прохода по токенам
+    locate_paths. None, если пути нет или текст некорректен (в том числе
+    слишком глубокий для json пропускаемый элемент)."""
+    decoder = json.JSONDecoder()
+    skip = _SPACE.match
+    try:
+        pos = skip(text, 0).end()
+        for part in path:
+            opening = text[pos]
+            pos = skip(text, pos + 1).end()
+            if opening == "{":
+                while text[pos] != "}":
+                    key, pos = decoder.raw_decode(text, pos)
+                    pos = skip(text, skip(text, pos).end() + 1).end()
+                    if key == part:
+                        break
+                    pos = skip(text, decoder.raw_decode(text, pos)[1]).end()
+                    if text[pos] == ",":
+                        pos = skip(text, pos + 1).end()
+                else:
+                    return None
+            elif opening == "[" and isinstance(part, int):
+                for _ in range(part):
+                    pos = skip(text, decoder.raw_decode(text, pos)[1]).end()
+                    if text[pos] != ",":
+                        return None
+                    pos = skip(text, pos + 1).end()
+                if text[pos] == "]":
+                    return None
+            else:
+                return None
+        if text[pos] in "{[":
+            return pos, 1
+        return pos, decoder.raw_decode(text, pos)[1] - pos
+    except (ValueError, IndexError, RecursionError):
+        return None
+
+
+def _iter_targets(trie):
+    pending = [trie]
+    while pending:
+        node = pending.pop()
+        for key, child in node.items():
+            if key is _HERE:
+                yield child
+            else:
+                pending.append(child)
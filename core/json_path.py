@@ -0,0 +1,55 @@
+"""
+Модуль записи пути JSON в разных нотациях
+
+Путь — список ключей (str) и номеров элементов (int) от корня, как в дереве
+(NodeStore.path). Для JSON Lines первый элемент — номер записи.
+"""
+import json
+import re
+from typing import Sequence, Union
+
+PathPart = Union[str, int]
+
+# Ключ, который можно записать через точку без кавычек
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*\Z")
+
+
+def to_jsonpath(path: Sequence[PathPart]) -> str:
+    """JSONPath: $.items[3].name, ключи с особыми символами — $['a b']"""
+    parts = ["$"]
+    for part in path:
+        if isinstance(part, int):
+            parts.append(f"[{part}]")
+        elif _IDENTIFIER.match(part):
+            parts.append(f".{part}")
+        else:
+            escaped = part.replace("\\", "\\\\").replace("'", "\\'")
+            parts.append(f"['{escaped}']")
+    return "".join(parts)
+
+
+def to_pointer(path: Sequence[PathPart]) -> str:
+    """JSON Pointer (RFC 6901): /items/3/name, «~» и «/» в ключах — ~0 и ~1"""
+    return "".join("/" + str(part).replace("~", "~0").replace("/", "~1") for part in path)
+
+
+def to_jq(path: Sequence[PathPart]) -> str:
+    """Фильтр jq: .items[3].name, ключи с особыми символами — .items["a b"]
+    (скобка без точки перед ней: запись .a.["b"] jq 1.6 не принимает)"""
+    parts = []
+    for part in path:
+        if isinstance(part, str) and _IDENTIFIER.match(part):
+            parts.append(f".{part}")
+            continue
+        index = part if isinstance(part, int) else json.dumps(part, ensure_ascii=False)
+        # В начале пути скобке нужна точка: [0] в jq — конструктор массива
+        parts.append(f"{'' if parts else '.'}[{index}]")
+    return "".join(parts) or "."
+
+
+# Нотации для меню копирования: название и функция записи
+FORMATS = (
+    ("JSONPath", to_jsonpath),
+    ("JSON Pointer", to_pointer),
+    ("jq", to_jq),
+)
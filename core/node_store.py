@@ -0,0 +1,363 @@
+"""
+Модуль компактного хранилища узлов документа
+
+Узел — целое число (индекс). Для каждого узла хранятся только индекс родителя
+(в массиве array) и ключ (строки интернируются, поэтому повторяющиеся имена
+ключей хранятся один раз). Путь до узла не хранится, а восстанавливается по
+цепочке родителей за O(глубины). Для листьев дополнительно хранится запись
+Leaf с текстом значения и номером его вхождения в тексте документа.
+
+У каждого узла есть хэш содержимого поддерева (дерево Меркла): он считается
+по требованию и запоминается, а при правке листа сбрасывается у цепочки
+предков. Тот же хэш для данных без хранилища считает content_hash, поэтому
+новый разбор можно сравнить с показанным деревом без его перестройки. Хэш
+учитывает порядок ключей: узлы дерева и вхождения значений в тексте идут в
+порядке документа, поэтому перестановка ключей требует перестройки дерева.
+"""
+import sys
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from core import codec
+from core.codec import JsonNumber, NonFiniteFloat
+
+# Родитель узлов верхнего уровня
+ROOT = -1
+
+# Массивы длиннее LARGE_ARRAY дерево показывает страницами (OPAQUE-узел), а
+# хэш такого массива считается одной канонической записью
+LARGE_ARRAY = 1000
+
+# Виды узлов; OPAQUE — контейнер, потомки которого добавляются не сразу или не
+# добавляются вовсе: хэш такого узла считается по самому значению
+SCALAR = 0
+OBJECT = 1
+ARRAY = 2
+OPAQUE = 3
+
+Key = Union[str, int]
+
+
+def leaf_hash(value) -> int:
+    """Хэш скалярного значения. Тип входит в хэш: 1, 1.0 и True в Python
+    равны, а в JSON различны; у чисел с сохраненной записью хэшируется запись"""
+    cls = value.__class__
+    if cls is JsonNumber:
+        return hash((value.literal, cls))
+    if cls is NonFiniteFloat:
+        # hash(nan) зависит от объекта, а запись одинакова
+        return hash((float.__repr__(value), cls))
+    return hash((value, cls))
+
+
+def _combine(kind: int, keys, hashes) -> int:
+    if kind == OBJECT:
+        return hash((OBJECT, tuple(zip(keys, hashes))))
+    return hash((ARRAY, tuple(hashes)))
+
+
+def _large_hash(value) -> Optional[int]:
+    """Хэш длинного массива одной записью codec с ключами в порядке документа
+    (вызов C вместо обхода всех элементов); None, если записи нет или она
+    отказала (NaN, большие целые, числа с сохраненной записью)"""
+    canonical = codec.current().ordered_canonical
+    if canonical is None:
+        return None
+    try:
+        return hash((ARRAY, canonical(value)))
+    except (TypeError, ValueError):
+        return None
+
+
+def content_hash(data) -> int:
+    """Хэш Меркла значения без рекурсии; совпадает с NodeStore.subtree_hash
+    узла, построенного из этого значения. Массивы длиннее LARGE_ARRAY
+    хэшируются канонической записью, если она доступна."""
+    cls = data.__class__
+    if cls is not dict and cls is not list:
+        return leaf_hash(data)
+    if cls is list and len(data) > LARGE_ARRAY:
+        value_hash = _large_hash(data)
+        if value_hash is not None:
+            return value_hash
+    # Кадр: (контейнер, итератор значений потомков, хэши посчитанных потомков)
+    stack = [(data, iter(data.values() if cls is dict else data), [])]
+    while True:
+        container, values, hashes = stack[-1]
+        for value in values:
+            cls = value.__class__
+            if cls is list and len(value) > LARGE_ARRAY:
+                value_hash = _large_hash(value)
+                if value_hash is not None:
+                    hashes.append(value_hash)
+                    continue
+            if cls is dict or cls is list:
+                stack.append((value, iter(value.values() if cls is dict else value), []))
+                break
+            hashes.append(leaf_hash(value))
+        else:
+            stack.pop()
+            if container.__class__ is dict:
+                value_hash = _combine(OBJECT, container.keys(), hashes)
+            else:
+                value_hash = _combine(ARRAY, None, hashes)
+            if not stack:
+                return value_hash
+            stack[-1][2].append(value_hash)
+
+
+def level_hashes(data, depth: int) -> Dict[int, int]:
+    """Хэши контейнеров уровней от 0 (корень) до depth по id контейнера.
+    Контейнер уровня depth хэшируется целиком: канонической записью codec,
+    если она есть, иначе content_hash. Контейнеры выше — хэш Меркла из хэшей
+    потомков, поэтому каждое значение обходится один раз"""
+    canonical = codec.current().ordered_canonical
+    hashes: Dict[int, int] = {}
+
+    def visit(value, level: int) -> int:
+        cls = value.__class__
+        if cls is not dict and cls is not list:
+            return leaf_hash(value)
+        value_hash = None
+        if level < depth:
+            values = value.values() if cls is dict else value
+            child_hashes = [visit(child, level + 1) for child in values]
+            value_hash = _combine(OBJECT if cls is dict else ARRAY,
+                                  value.keys() if cls is dict else None, child_hashes)
+        elif canonical is not None:
+            try:
+                value_hash = hash((cls, canonical(value)))
+            except (TypeError, ValueError):
+                pass
+        if value_hash is None:
+            value_hash = content_hash(value)
+        hashes[id(value)] = value_hash
+        return value_hash
+
+    visit(data, 0)
+    return hashes
+
+
+class Leaf:
+    """Скалярное значение узла: JSON-текст, номер вхождения в документе и хэш значения"""
+    __slots__ = ("text", "occurrence", "value_hash")
+
+    def __init__(self, text: str, occurrence: int, value_hash: int = 0):
+        self.text = text
+        self.occurrence = occurrence
+        self.value_hash = value_hash
+
+
+class NodeStore:
+    """Узлы документа: массив индексов родителей, интернированные ключи, листья.
+
+    Узлы добавляются в порядке документа (родитель раньше потомков, поддерево
+    целиком), новые узлы после построения — только в корень или в OPAQUE-узел
+    (страницы больших массивов). На этом держится массив концов поддеревьев:
+    потомки узла n — это номера от n + 1 до end[n]."""
+    __slots__ = ("_parents", "_keys", "_leaves", "_kinds", "_hashes", "_valid",
+                 "_ends", "_opaque", "root_kind", "_root_hash")
+
+    def __init__(self):
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self._parents)
+
+    def clear(self):
+        self._parents = array("q")
+        self._keys: List[Key] = []
+        self._leaves: Dict[int, Leaf] = {}
+        self._kinds = array("b")
+        # Хэши поддеревьев; хэш действителен, если _valid[n] != 0
+        self._hashes = array("q")
+        self._valid = bytearray()
+        # Концы поддеревьев, считаются по требованию
+        self._ends = array("q")
+        # Значения OPAQUE-узлов (в том числе ROOT)
+        self._opaque: Dict[int, Any] = {}
+        # Вид корня (OBJECT, ARRAY или OPAQUE); None — корень не контейнер
+        self.root_kind: Optional[int] = None
+        self._root_hash: Optional[int] = None
+
+    def add(self, parent: int, key: Key, kind: int = SCALAR) -> int:
+        """Добавляет узел с ключом (имя в объекте или индекс в массиве); возвращает его номер"""
+        self._parents.append(parent)
+        self._keys.append(sys.intern(key) if type(key) is str else key)
+        self._kinds.append(kind)
+        self._hashes.append(0)
+        self._valid.append(0)
+        # Хэш OPAQUE-узла считается по значению, а не по добавленным потомкам
+        if self.kind(parent) != OPAQUE and (parent == ROOT or self._valid[parent]):
+            self.invalidate(parent)
+        return len(self._parents) - 1
+
+    def set_leaf(self, node: int, text: str, occurrence: int, value_hash: int = 0):
+        self._leaves[node] = Leaf(text, occurrence, value_hash)
+
+    def update_leaf(self, node: int, text: str, value_hash: int):
+        """Меняет значение листа; хэши узла и его предков сбрасываются"""
+        leaf = self._leaves[node]
+        leaf.text = text
+        leaf.value_hash = value_hash
+        self.invalidate(node)
+
+    def set_opaque(self, node: int, value):
+        """Значение OPAQUE-узла (ROOT — корня документа); хэши не сбрасываются,
+        поэтому при замене на равное значение они остаются верными"""
+        self._opaque[node] = value
+        if node == ROOT:
+            self.root_kind = OPAQUE
+
+    def opaque(self, node: int):
+        return self._opaque.get(node)
+
+    def opaque_nodes(self) -> List[int]:
+        return list(self._opaque)
+
+    def leaf(self, node: int) -> Optional[Leaf]:
+        """Запись листа; None для объектов и массивов"""
+        return self._leaves.get(node)
+
+    def leaves(self):
+        """Пары (узел, лист) в порядке документа"""
+        return self._leaves.items()
+
+    def parent(self, node: int) -> int:
+        return self._parents[node]
+
+    def key(self, node: int) -> Key:
+        return self._keys[node]
+
+    def kind(self, node: int) -> Optional[int]:
+        return self.root_kind if node == ROOT else self._kinds[node]
+
+    def path(self, node: int) -> list:
+        """Путь от корня до узла (ключи и индексы); ROOT — пустой путь"""
+        parents = self._parents
+        keys = self._keys
+        path = []
+        while node != ROOT:
+            path.append(keys[node])
+            node = parents[node]
+        path.reverse()
+        return path
+
+    def depth(self, node: int) -> int:
+        parents = self._parents
+        depth = 0
+        while node != ROOT:
+            depth += 1
+            node = parents[node]
+        return depth
+
+    # --- хэши поддеревьев ---
+    def _update_ends(self):
+        """Дополняет массив концов поддеревьев для добавленных узлов одним
+        проходом со стеком открытых узлов"""
+        ends = self._ends
+        parents = self._parents
+        total = len(parents)
+        start = len(ends)
+        if start == total:
+            return
+        ends.extend(array("q", bytes(8 * (total - start))))
+        stack = []
+        for node in range(start, total):
+            parent = parents[node]
+            while stack and stack[-1] != parent:
+                ends[stack.pop()] = node
+            stack.append(node)
+        for node in stack:
+            ends[node] = total
+
+    def children(self, node: int) -> Iterator[int]:
+        """Непосредственные потомки узла в порядке документа"""
+        self._update_ends()
+        ends = self._ends
+        if node == ROOT:
+            # Среди поддеревьев верхнего уровня есть и добавленные позже в OPAQUE-узлы
+            parents = self._parents
+            child, end = 0, len(ends)
+            while child < end:
+                if parents[child] == ROOT:
+                    yield child
+                child = ends[child]
+            return
+        child, end = node + 1, ends[node]
+        while child < end:
+            yield child
+            child = ends[child]
+
+    def invalidate(self, node: int):
+        """Сбрасывает хэши узла и всех его предков"""
+        parents = self._parents
+        valid = self._valid
+        while node != ROOT:
+            valid[node] = 0
+            node = parents[node]
+        self._root_hash = None
+
+    def reset_hashes(self):
+        """Сбрасывает хэши всех узлов (например, для замера полного пересчета)"""
+        self._valid = bytearray(len(self._parents))
+        self._root_hash = None
+
+    def set_root_hash(self, value_hash: int):
+        """Хэш всего документа, уже посчитанный по данным (content_hash):
+        при загрузке дерева хэши узлов тогда считаются только после правки"""
+        self._root_hash = value_hash
+
+    def subtree_hash(self, node: int = ROOT) -> int:
+        """Хэш содержимого поддерева; равен content_hash значения узла.
+        Считаются только сброшенные хэши, потомки — раньше родителя."""
+        if node == ROOT:
+            if self._root_hash is None:
+                self._root_hash = 0 if self.root_kind is None else self._compute(ROOT)
+            return self._root_hash
+        if not self._valid[node]:
+            self._hashes[node] = self._compute(node)
+            self._valid[node] = 1
+        return self._hashes[node]
+
+    def _compute(self, top: int) -> int:
+        """Хэш узла без рекурсии: листья считаются сразу при обходе родителя,
+        контейнеры со сброшенными хэшами откладываются в стек"""
+        hashes = self._hashes
+        valid = self._valid
+        kinds = self._kinds
+        keys = self._keys
+        leaves = self._leaves
+        kind = self.kind(top)
+        if kind == SCALAR:
+            return leaves[top].value_hash
+        if kind == OPAQUE:
+            return content_hash(self._opaque[top])
+        stack = [top]
+        while True:
+            node = stack[-1]
+            children = list(self.children(node))
+            pending = []
+            for child in children:
+                if valid[child]:
+                    continue
+                child_kind = kinds[child]
+                if child_kind == SCALAR:
+                    hashes[child] = leaves[child].value_hash
+                elif child_kind == OPAQUE:
+                    hashes[child] = content_hash(self._opaque[child])
+                else:
+                    pending.append(child)
+                    continue
+                valid[child] = 1
+            if pending:
+                stack.extend(pending)
+                continue
+            kind = self.kind(node)
+            value_hash = _combine(kind, [keys[c] for c in children] if kind == OBJECT else None,
+                                  [hashes[c] for c in children])
+            stack.pop()
+            if not stack:
+                return value_hash
+            hashes[node] = value_hash
+            valid[node] = 1
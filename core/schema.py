@@ -0,0 +1,551 @@
+"""
+Модуль проверки JSON по JSON Schema
+
+Схема компилируется один раз в дерево узлов с заранее подготовленными
+проверками (регулярные выражения, множества типов, ссылки $ref) и кэшируется
+по mtime файла схемы. Обход данных итеративный, поэтому глубина документа не
+ограничена стеком Python.
+
+Повторная проверка после небольшой правки переиспользует результаты для
+неизмененных поддеревьев верхних уровней: они находятся по хэшам Меркла
+(node_store.level_hashes, один обход документа), и перепроверяются только
+затронутые правкой ветви.
+
+Поддерживается распространенное подмножество черновиков 4–2020-12: type,
+enum, const, числовые и строковые ограничения, pattern, properties,
+patternProperties, additionalProperties, required, propertyNames,
+dependentRequired, items/prefixItems/additionalItems, contains,
+uniqueItems, allOf/anyOf/oneOf/not, if/then/else, $ref (локальные и на
+файлы рядом со схемой), definitions/$defs.
+"""
+import fnmatch
+import json
+import math
+import os
+import re
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import unquote
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from core.node_store import level_hashes
+
+# Уровни данных (0 — корень), для которых запоминаются результаты поддеревьев
+REUSE_DEPTH = 2
+# Как часто проверяется флаг отмены (в узлах)
+CANCEL_CHECK_INTERVAL = 2048
+
+
+class SchemaError(Exception):
+    """Некорректная или недоступная схема"""
+
+
+class Violation(NamedTuple):
+    """Нарушение схемы: путь к значению, сообщение и ключевое слово схемы"""
+    path: Tuple
+    message: str
+    keyword: str
+
+
+_TYPE_NAMES = ("null", "boolean", "object", "array", "number", "string", "integer")
+
+
+def _json_type(value) -> str:
+    if value is None:
+        return "null"
+    if value is True or value is False:
+        return "boolean"
+    if isinstance(value, dict):
+        return "object"
+    if isinstance(value, list):
+        return "array"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, int):
+        return "integer"
+    return "number"
+
+
+def _is_type(value, kind: str, actual: str) -> bool:
+    if kind == actual:
+        return True
+    if kind == "number":
+        return actual == "integer"
+    if kind == "integer":
+        return actual == "number" and float(value).is_integer()
+    return False
+
+
+def _canonical(value) -> str:
+    """Каноническая сериализация для сравнения значений (enum, const, uniqueItems)"""
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+def _fmt(value) -> str:
+    text = json.dumps(value, ensure_ascii=False)
+    return text if len(text) <= 60 else text[:57] + "..."
+
+
+class _Node:
+    """Скомпилированная подсхема"""
+
+    __slots__ = (
+        "always", "ref", "ref_resolver", "types", "enum", "const",
+        "minimum", "maximum", "exclusive_minimum", "exclusive_maximum", "multiple_of",
+        "min_length", "max_length", "pattern",
+        "items", "prefix_items", "additional_items", "min_items", "max_items",
+        "unique_items", "contains",
+        "properties", "pattern_properties", "additional_properties", "required",
+        "min_properties", "max_properties", "property_names", "dependent_required",
+        "all_of", "any_of", "one_of", "not_", "if_", "then", "else_",
+    )
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, None)
+
+
+class _Compiler:
+    """Компиляция документа схемы (и документов, на которые он ссылается)"""
+
+    def __init__(self, root: dict, base_dir: Optional[str]):
+        self.base_dir = base_dir
+        self.documents = {"": root}
+        # Узлы по (документ, id словаря схемы): общие подсхемы и циклические $ref
+        self._compiled: Dict[Tuple[str, int], _Node] = {}
+
+    def _load_document(self, name: str):
+        if name not in self.documents:
+            if self.base_dir is None or "://" in name:
+                raise SchemaError(f"Ссылка на внешнюю схему не поддерживается: {name}")
+            path = os.path.join(self.base_dir, name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.documents[name] = json.load(f)
+            except (OSError, ValueError) as e:
+                raise SchemaError(f"Не удается загрузить схему {name}: {e}")
+        return self.documents[name]
+
+    def resolve(self, ref: str, document: str) -> _Node:
+        name, _, pointer = ref.partition("#")
+        document = name or document
+        target = self._load_document(document)
+        for part in pointer.lstrip("/").split("/") if pointer.strip("/") else ():
+            part = unquote(part).replace("~1", "/").replace("~0", "~")
+            try:
+                target = target[int(part)] if isinstance(target, list) else target[part]
+            except (KeyError, IndexError, ValueError, TypeError):
+                raise SchemaError(f"Ссылка не найдена: {ref}")
+        return self.compile(target, document)
+
+    def compile(self, schema, document: str = "") -> _Node:
+        if schema is True or schema is False:
+            node = _Node()
+            node.always = schema
+            return node
+        if not isinstance(schema, dict):
+            raise SchemaError(f"Схема должна быть объектом: {_fmt(schema)}")
+        key = (document, id(schema))
+        node = self._compiled.get(key)
+        if node is not None:
+            return node
+        node = self._compiled[key] = _Node()
+        compile_ = lambda sub: self.compile(sub, document)
+
+        if "$ref" in schema:
+            # Ссылка разрешается при первом использовании (допускает циклы)
+            ref = schema["$ref"]
+            node.ref_resolver = lambda: self.resolve(ref, document)
+
+        kind = schema.get("type")
+        if kind is not None:
+            kinds = [kind] if isinstance(kind, str) else list(kind)
+            unknown = [k for k in kinds if k not in _TYPE_NAMES]
+            if unknown:
+                raise SchemaError(f"Неизвестный тип: {unknown[0]}")
+            node.types = tuple(kinds)
+        if "enum" in schema:
+            node.enum = (schema["enum"], {_canonical(v) for v in schema["enum"]})
+        if "const" in schema:
+            node.const = (schema["const"], _canonical(schema["const"]))
+
+        # Числа (exclusive* в черновике 4 — флаги при minimum/maximum)
+        node.minimum = schema.get("minimum")
+        node.maximum = schema.get("maximum")
+        exclusive_min = schema.get("exclusiveMinimum")
+        exclusive_max = schema.get("exclusiveMaximum")
+        if exclusive_min is True:
+            node.exclusive_minimum, node.minimum = node.minimum, None
+        elif exclusive_min is not False:
+            node.exclusive_minimum = exclusive_min
+        if exclusive_max is True:
+            node.exclusive_maximum, node.maximum = node.maximum, None
+        elif exclusive_max is not False:
+            node.exclusive_maximum = exclusive_max
+        node.multiple_of = schema.get("multipleOf")
+
+        # Строки
+        node.min_length = schema.get("minLength")
+        node.max_length = schema.get("maxLength")
+        if "pattern" in schema:
+            try:
+                node.pattern = re.compile(schema["pattern"])
+            except re.error as e:
+                raise SchemaError(f"Некорректный pattern {schema['pattern']!r}: {e}")
+
+        # Массивы
+        items = schema.get("items")
+        prefix = schema.get("prefixItems")
+        if isinstance(items, list):  # черновики до 2019-09
+            prefix, items = items, schema.get("additionalItems")
+        if prefix is not None:
+            node.prefix_items = [compile_(s) for s in prefix]
+        if items is not None:
+            node.items = compile_(items)
+        node.min_items = schema.get("minItems")
+        node.max_items = schema.get("maxItems")
+        node.unique_items = schema.get("uniqueItems") or None
+        if "contains" in schema:
+            node.contains = compile_(schema["contains"])
+
+        # Объекты
+        if "properties" in schema:
+            node.properties = {k: compile_(s) for k, s in schema["properties"].items()}
+        if "patternProperties" in schema:
+            node.pattern_properties = [
+                (re.compile(p), compile_(s)) for p, s in schema["patternProperties"].items()
+            ]
+        if "additionalProperties" in schema:
+            node.additional_properties = compile_(schema["additionalProperties"])
+        node.required = schema.get("required") or None
+        node.min_properties = schema.get("minProperties")
+        node.max_properties = schema.get("maxProperties")
+        if "propertyNames" in schema:
+            node.property_names = compile_(schema["propertyNames"])
+        dependent = dict(schema.get("dependentRequired") or {})
+        for name, value in (schema.get("dependencies") or {}).items():
+            if isinstance(value, list):
+                dependent[name] = value
+        node.dependent_required = dependent or None
+
+        # Комбинации
+        for keyword, slot in (("allOf", "all_of"), ("anyOf", "any_of"), ("oneOf", "one_of")):
+            if keyword in schema:
+                setattr(node, slot, [compile_(s) for s in schema[keyword]])
+        if "not" in schema:
+            node.not_ = compile_(schema["not"])
+        if "if" in schema:
+            node.if_ = compile_(schema["if"])
+            node.then = compile_(schema["then"]) if "then" in schema else None
+            node.else_ = compile_(schema["else"]) if "else" in schema else None
+        return node
+
+
+def _materialize(link) -> Tuple:
+    """Путь из связного списка (родитель, ключ) в кортеж"""
+    parts = []
+    while link is not None:
+        link, key = link
+        parts.append(key)
+    parts.reverse()
+    return tuple(parts)
+
+
+class CompiledSchema:
+    """Скомпилированная схема с памятью результатов прошлой проверки"""
+
+    def __init__(self, schema, base_dir: Optional[str] = None, source: str = ""):
+        self.source = source
+        self._compiler = _Compiler(schema, base_dir)
+        self.root = self._compiler.compile(schema)
+        # (id узла, хэш поддерева) -> нарушения относительно поддерева
+        self._memo: Dict[Tuple[int, int], List[Violation]] = {}
+        self.last_reused = 0
+
+    def validate(self, data, is_cancelled: Optional[Callable[[], bool]] = None,
+                 reuse: bool = True) -> Optional[List[Violation]]:
+        """Проверяет данные; возвращает нарушения (None, если проверка отменена)"""
+        memo = {} if reuse else None
+        digests = level_hashes(data, REUSE_DEPTH) if reuse else None
+        self.last_reused = 0
+        violations = self._run(self.root, data, None, 0, memo, is_cancelled, digests)
+        if violations is not None and reuse:
+            self._memo = memo
+        return violations
+
+    def is_valid(self, node: _Node, value) -> bool:
+        return not self._run(node, value, None, -1, None, None)
+
+    def _run(self, root: _Node, data, base_link, base_depth: int, memo, is_cancelled,
+             digests: Optional[Dict[int, int]] = None):
+        """Итеративный обход. base_depth < 0 — вложенная проверка (anyOf и т.п.) без памяти;
+        digests — хэши контейнеров верхних уровней по id (ключи памяти)"""
+        errors: List[Violation] = []
+        # Задачи: (узел, значение, путь-связка, глубина) или маркер конца поддерева
+        stack = [(root, data, base_link, base_depth)]
+        previous = self._memo
+        steps = 0
+
+        def fail(link, message, keyword):
+            errors.append(Violation(_materialize(link), message, keyword))
+
+        while stack:
+            task = stack.pop()
+            if task[0] is None:
+                # Маркер: все нарушения поддерева собраны, запоминаем их
+                _, key, start, prefix_len = task
+                memo[key] = [v._replace(path=v.path[prefix_len:]) for v in errors[start:]]
+                continue
+            node, value, link, depth = task
+
+            steps += 1
+            if is_cancelled is not None and steps % CANCEL_CHECK_INTERVAL == 0 and is_cancelled():
+                return None
+
+            if node.always is not None:
+                if node.always is False:
+                    fail(link, "Значение запрещено схемой", "false")
+                continue
+
+            # Результаты неизмененных поддеревьев верхних уровней берем из прошлой проверки
+            digest = None
+            if memo is not None and 0 <= depth <= REUSE_DEPTH:
+                digest = digests.get(id(value))
+            if digest is not None:
+                key = (id(node), digest)
+                cached = previous.get(key)
+                if cached is not None:
+                    memo[key] = cached
+                    self.last_reused += 1
+                    if cached:
+                        prefix = _materialize(link)
+                        errors.extend(v._replace(path=prefix + v.path) for v in cached)
+                    continue
+                stack.append((None, key, len(errors), depth and len(_materialize(link))))
+
+            if node.ref_resolver is not None:
+                if node.ref is None:
+                    node.ref = node.ref_resolver()
+                stack.append((node.ref, value, link, depth))
+
+            actual = _json_type(value)
+            if node.types is not None and not any(_is_type(value, t, actual) for t in node.types):
+                fail(link, f"Ожидается тип {' или '.join(node.types)}, получено {actual}", "type")
+                continue
+            if node.enum is not None and _canonical(value) not in node.enum[1]:
+                fail(link, f"Значение {_fmt(value)} не входит в список допустимых", "enum")
+            if node.const is not None and _canonical(value) != node.const[1]:
+                fail(link, f"Ожидается значение {_fmt(node.const[0])}", "const")
+
+            if actual == "integer" or actual == "number":
+                self._check_number(node, value, link, fail)
+            elif actual == "string":
+                self._check_string(node, value, link, fail)
+            elif actual == "array":
+                self._check_array(node, value, link, depth, stack, fail)
+            elif actual == "object":
+                self._check_object(node, value, link, depth, stack, fail)
+
+            # Комбинации схем
+            if node.all_of is not None:
+                for sub in node.all_of:
+                    stack.append((sub, value, link, depth))
+            if node.any_of is not None and not any(self.is_valid(s, value) for s in node.any_of):
+                fail(link, "Значение не подходит ни под одну схему из anyOf", "anyOf")
+            if node.one_of is not None:
+                matched = sum(1 for s in node.one_of if self.is_valid(s, value))
+                if matched != 1:
+                    fail(link, f"Значение подходит под {matched} схем из oneOf (нужна ровно одна)", "oneOf")
+            if node.not_ is not None and self.is_valid(node.not_, value):
+                fail(link, "Значение не должно соответствовать схеме not", "not")
+            if node.if_ is not None:
+                branch = node.then if self.is_valid(node.if_, value) else node.else_
+                if branch is not None:
+                    stack.append((branch, value, link, depth))
+        return errors
+
+    @staticmethod
+    def _check_number(node, value, link, fail):
+        if node.minimum is not None and value < node.minimum:
+            fail(link, f"Значение {value} меньше минимума {node.minimum}", "minimum")
+        if node.maximum is not None and value > node.maximum:
+            fail(link, f"Значение {value} больше максимума {node.maximum}", "maximum")
+        if node.exclusive_minimum is not None and value <= node.exclusive_minimum:
+            fail(link, f"Значение {value} должно быть больше {node.exclusive_minimum}", "exclusiveMinimum")
+        if node.exclusive_maximum is not None and value >= node.exclusive_maximum:
+            fail(link, f"Значение {value} должно быть меньше {node.exclusive_maximum}", "exclusiveMaximum")
+        if node.multiple_of is not None:
+            quotient = value / node.multiple_of
+            if abs(quotient) < 2 ** 53 and not math.isclose(quotient, round(quotient), abs_tol=1e-9):
+                fail(link, f"Значение {value} не кратно {node.multiple_of}", "multipleOf")
+
+    @staticmethod
+    def _check_string(node, value, link, fail):
+        if node.min_length is not None and len(value) < node.min_length:
+            fail(link, f"Строка короче {node.min_length} символов", "minLength")
+        if node.max_length is not None and len(value) > node.max_length:
+            fail(link, f"Строка длиннее {node.max_length} символов", "maxLength")
+        if node.pattern is not None and node.pattern.search(value) is None:
+            fail(link, f"Строка не соответствует шаблону {node.pattern.pattern}", "pattern")
+
+    def _check_array(self, node, value, link, depth, stack, fail):
+        count = len(value)
+        if node.min_items is not None and count < node.min_items:
+            fail(link, f"Элементов меньше {node.min_items}", "minItems")
+        if node.max_items is not None and count > node.max_items:
+            fail(link, f"Элементов больше {node.max_items}", "maxItems")
+        if node.unique_items:
+            seen = set()
+            for index, item in enumerate(value):
+                canonical = _canonical(item)
+                if canonical in seen:
+                    fail((link, index), "Повторяющийся элемент массива", "uniqueItems")
+                seen.add(canonical)
+        if node.contains is not None and not any(self.is_valid(node.contains, item) for item in value):
+            fail(link, "Нет элемента, соответствующего contains", "contains")
+        child_depth = depth + 1 if depth >= 0 else depth
+        prefix = node.prefix_items or ()
+        # В обратном порядке, чтобы нарушения шли в порядке документа
+        for index in range(count - 1, -1, -1):
+            sub = prefix[index] if index < len(prefix) else node.items
+            if sub is not None:
+                stack.append((sub, value[index], (link, index), child_depth))
+
+    def _check_object(self, node, value, link, depth, stack, fail):
+        if node.required is not None:
+            for name in node.required:
+                if name not in value:
+                    fail(link, f"Отсутствует обязательное свойство «{name}»", "required")
+        if node.min_properties is not None and len(value) < node.min_properties:
+            fail(link, f"Свойств меньше {node.min_properties}", "minProperties")
+        if node.max_properties is not None and len(value) > node.max_properties:
+            fail(link, f"Свойств больше {node.max_properties}", "maxProperties")
+        if node.dependent_required is not None:
+            for name, needed in node.dependent_required.items():
+                if name in value:
+                    for other in needed:
+                        if other not in value:
+                            fail(link, f"При «{name}» требуется свойство «{other}»", "dependentRequired")
+        if node.property_names is not None:
+            for name in value:
+                if not self.is_valid(node.property_names, name):
+                    fail((link, name), f"Недопустимое имя свойства «{name}»", "propertyNames")
+
+        properties = node.properties or {}
+        patterns = node.pattern_properties or ()
+        additional = node.additional_properties
+        child_depth = depth + 1 if depth >= 0 else depth
+        for name in reversed(list(value)):
+            child = value[name]
+            child_link = (link, name)
+            matched = False
+            sub = properties.get(name)
+            if sub is not None:
+                matched = True
+                stack.append((sub, child, child_link, child_depth))
+            for regex, sub in patterns:
+                if regex.search(name):
+                    matched = True
+                    stack.append((sub, child, child_link, child_depth))
+            if not matched and additional is not None:
+                if additional.always is False:
+                    fail(child_link, f"Недопустимое свойство «{name}»", "additionalProperties")
+                else:
+                    stack.append((additional, child, child_link, child_depth))
+
+
+def load_schema(path: str) -> CompiledSchema:
+    """Загружает и компилирует схему из файла"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            schema = json.load(f)
+    except (OSError, ValueError) as e:
+        raise SchemaError(f"Не удается загрузить схему {path}: {e}")
+    return CompiledSchema(schema, os.path.dirname(os.path.abspath(path)), path)
+
+
+class SchemaCache:
+    """Скомпилированные схемы по пути; перекомпиляция при изменении mtime или размера"""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[int, int, CompiledSchema]] = {}
+
+    def get(self, path: str) -> CompiledSchema:
+        path = os.path.abspath(path)
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            raise SchemaError(f"Файл схемы недоступен: {e}")
+        entry = self._entries.get(path)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            return entry[2]
+        compiled = load_schema(path)
+        self._entries[path] = (st.st_mtime_ns, st.st_size, compiled)
+        return compiled
+
+    def clear(self):
+        self._entries.clear()
+
+
+# --- привязка схем к файлам ---
+def parse_associations(raw: str) -> List[Tuple[str, str]]:
+    """Список (шаблон или путь файла, путь схемы) из строки настроек"""
+    if not raw:
+        return []
+    try:
+        return [(str(p), str(s)) for p, s in json.loads(raw)]
+    except (ValueError, TypeError):
+        return []
+
+
+def dump_associations(associations: List[Tuple[str, str]]) -> str:
+    return json.dumps([list(a) for a in associations], ensure_ascii=False)
+
+
+def find_schema(file_path, associations: List[Tuple[str, str]]) -> Optional[str]:
+    """Схема для файла: сначала точная привязка к файлу, затем первый подходящий шаблон"""
+    if not file_path:
+        return None
+    full = os.path.normcase(os.path.abspath(str(file_path)))
+    name = os.path.basename(full)
+    for pattern, schema in associations:
+        if os.path.normcase(os.path.abspath(pattern)) == full:
+            return schema
+    for pattern, schema in associations:
+        pattern = os.path.normcase(pattern)
+        if fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(full.replace(os.sep, "/"), pattern.replace(os.sep, "/")):
+            return schema
+    return None
+
+
+class SchemaValidationWorker(QThread):
+    """Фоновая проверка текста по схеме с привязкой нарушений к позициям в тексте"""
+
+    validated = pyqtSignal(object, list)
+
+    def __init__(self, schema: CompiledSchema, text: str, token, max_located: int = 1000, parent=None):
+        super().__init__(parent)
+        self.schema = schema
+        self.text = text
+        self.token = token
+        self.max_located = max_located
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        from core.json_lexer import loads, locate_paths
+        try:
+            data = loads(self.text)
+        except ValueError:
+            return
+        violations = self.schema.validate(data, lambda: self._cancelled)
+        if violations is None or self._cancelled:
+            return
+        spans = locate_paths(self.text, [v.path for v in violations[:self.max_located]])
+        self.validated.emit(self.token, [(v, spans.get(v.path)) for v in violations])
+
+
+# Глобальный кэш скомпилированных схем
+schema_cache = SchemaCache()
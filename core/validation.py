@@ -0,0 +1,53 @@
+"""
+Модуль планирования автоматической проверки JSON
+
+Задержка проверки подбирается по размеру документа и скользящему среднему
+времени проверки: на больших файлах проверка откладывается дольше, чтобы
+очередной разбор не начинался сразу после предыдущего и не мешал набору.
+Выше порога размера автопроверка приостанавливается до ручного запуска.
+"""
+from typing import Optional
+
+# Пределы задержки перед проверкой, мс
+MIN_DELAY_MS = 150
+MAX_DELAY_MS = 10000
+# Во сколько раз пауза должна превышать ожидаемое время проверки
+DELAY_FACTOR = 3.0
+# Вес нового замера в скользящем среднем
+SMOOTHING = 0.3
+
+
+class ValidationScheduler:
+    """Адаптивная задержка автопроверки по размеру документа и замерам"""
+
+    def __init__(self, base_delay_ms: int = 500, max_chars: Optional[int] = None):
+        self.base_delay_ms = max(MIN_DELAY_MS, int(base_delay_ms))
+        # Порог размера (в символах), выше которого автопроверка приостановлена
+        self.max_chars = max_chars
+        # Скользящее среднее времени проверки на один символ, секунды
+        self.seconds_per_char: Optional[float] = None
+
+    def record(self, chars: int, seconds: float):
+        """Учитывает длительность очередной проверки документа из chars символов"""
+        if chars <= 0:
+            return
+        rate = seconds / chars
+        if self.seconds_per_char is None:
+            self.seconds_per_char = rate
+        else:
+            self.seconds_per_char += SMOOTHING * (rate - self.seconds_per_char)
+
+    def estimate(self, chars: int) -> float:
+        """Ожидаемое время проверки документа, секунды (0, пока нет замеров)"""
+        return (self.seconds_per_char or 0.0) * chars
+
+    def is_paused(self, chars: int) -> bool:
+        return self.max_chars is not None and 0 < self.max_chars < chars
+
+    def delay_for(self, chars: int) -> Optional[int]:
+        """Задержка перед проверкой, мс; None — автопроверка приостановлена"""
+        if self.is_paused(chars):
+            return None
+        expected_ms = self.estimate(chars) * 1000
+        delay = max(self.base_delay_ms, int(expected_ms * DELAY_FACTOR))
+        return min(delay, MAX_DELAY_MS)
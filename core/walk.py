@@ -0,0 +1,51 @@
+"""
+Модуль обхода разобранного JSON без рекурсии
+
+Все обходы документа (построение дерева, экспорт) используют один итератор
+с явным стеком, поэтому глубина вложенности ограничена только памятью,
+а не пределом рекурсии Python.
+"""
+from itertools import islice
+from typing import Any, Callable, Iterator, Optional, Tuple
+
+# События обхода
+ENTER = 0   # вход в объект или массив
+LEAVE = 1   # выход из объекта или массива
+VALUE = 2   # значение, внутрь которого обход не заходит
+
+Event = Tuple[int, Any, Any, int]
+
+
+def _children(value, start: int = 0, stop: Optional[int] = None):
+    if isinstance(value, dict):
+        return iter(value.items())
+    if isinstance(value, list):
+        return enumerate(islice(value, start, stop), start)
+    return iter(())
+
+
+def walk(data, start: int = 0,
+         descend: Optional[Callable[[Any, Any], bool]] = None,
+         stop: Optional[int] = None) -> Iterator[Event]:
+    """Обходит потомков data в порядке документа.
+
+    Выдает (событие, ключ, значение, глубина): ключ — имя в объекте или индекс
+    в массиве, глубина потомков data — 1. За ENTER следуют события потомков
+    и LEAVE с теми же ключом, значением и глубиной. descend(родитель, значение)
+    решает, заходить ли внутрь значения (по умолчанию — во все объекты и
+    массивы); иначе выдается VALUE. start и stop — диапазон индексов, если
+    data — массив.
+    """
+    stack = [(_children(data, start, stop), data, None)]
+    while stack:
+        children, parent, _ = stack[-1]
+        for key, value in children:
+            if descend(parent, value) if descend is not None else isinstance(value, (dict, list)):
+                yield ENTER, key, value, len(stack)
+                stack.append((_children(value), value, key))
+                break
+            yield VALUE, key, value, len(stack)
+        else:
+            _, value, key = stack.pop()
+            if stack:
+                yield LEAVE, key, value, len(stack)
@@ -0,0 +1,277 @@
+"""
+Модуль диалога структурного сравнения двух JSON-документов
+"""
+import json
+import time
+from pathlib import Path
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QLineEdit,
+    QFormLayout, QFileDialog, QTreeWidget, QTreeWidgetItem, QSplitter
+)
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QBrush, QColor
+
+from core.json_diff import DiffWorker, ADDED, REMOVED, CHANGED, MOVED, format_path
+
+# Сколько изменений показывать в деревьях; счетчики учитывают все
+MAX_SHOWN_CHANGES = 5000
+# Длина текста значения в строке дерева
+PREVIEW_LENGTH = 120
+# Глубина групп в деревьях; глубже путь пишется в строке изменения
+MAX_GROUP_DEPTH = 32
+
+_COLORS = {
+    ADDED: "#27ae60",
+    REMOVED: "#c0392b",
+    CHANGED: "#d35400",
+    MOVED: "#8e44ad",
+}
+_TITLES = {
+    ADDED: "добавлено",
+    REMOVED: "удалено",
+    CHANGED: "изменено",
+    MOVED: "перемещено",
+}
+
+
+def _preview(value) -> str:
+    """Короткий текст значения: контейнеры — только размер, чтобы не записывать
+    целиком большие поддеревья"""
+    if isinstance(value, dict):
+        return f"{{…}} ключей: {len(value)}"
+    if isinstance(value, list):
+        return f"[…] элементов: {len(value)}"
+    text = json.dumps(value, ensure_ascii=False)
+    if len(text) > PREVIEW_LENGTH:
+        text = text[:PREVIEW_LENGTH - 3] + "..."
+    return text
+
+
+def _segment(part) -> str:
+    return f"[{part}]" if isinstance(part, int) else str(part)
+
+
+def _relative(path: tuple, start: int) -> str:
+    """Часть пути начиная с start: name, [3], name[3].value"""
+    text = ""
+    for part in path[start:]:
+        text += f"[{part}]" if isinstance(part, int) or not text else f".{part}"
+    return text or "$"
+
+
+class JsonDiffDialog(QDialog):
+    """Сравнение текущего документа (или файла) с другим файлом в парных деревьях"""
+
+    def __init__(self, current_text=None, current_file=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Сравнение JSON")
+        self.resize(1000, 600)
+        # Функция, возвращающая текст текущего документа (левая сторона по умолчанию)
+        self.current_text = current_text
+        self.current_file = current_file
+        self.worker = None
+        self.result = None
+        self._started = 0.0
+        # Парные строки: id элемента одного дерева -> элемент другого
+        # (QTreeWidgetItem не хэшируется; словарь хранит ссылки на оба элемента)
+        self._partners = {}
+        self._syncing = False
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+
+        self.left_edit = QLineEdit()
+        self.left_edit.setPlaceholderText(
+            "Текущий документ" if self.current_text is not None else "Файл JSON")
+        form.addRow("Слева:", self._with_browse(self.left_edit))
+        self.right_edit = QLineEdit()
+        form.addRow("Справа:", self._with_browse(self.right_edit))
+        self.identity_edit = QLineEdit()
+        self.identity_edit.setPlaceholderText("id — элементы массивов сопоставляются по этому ключу")
+        form.addRow("Ключ элементов:", self.identity_edit)
+        layout.addLayout(form)
+
+        # --- Парные деревья ---
+        splitter = QSplitter(Qt.Horizontal)
+        self.left_tree = QTreeWidget()
+        self.right_tree = QTreeWidget()
+        self.left_tree.setHeaderLabel("Слева")
+        self.right_tree.setHeaderLabel("Справа")
+        for tree in (self.left_tree, self.right_tree):
+            tree.itemExpanded.connect(lambda item: self._sync_expanded(item, True))
+            tree.itemCollapsed.connect(lambda item: self._sync_expanded(item, False))
+            tree.currentItemChanged.connect(self._sync_current)
+            splitter.addWidget(tree)
+        self.left_tree.verticalScrollBar().valueChanged.connect(
+            self.right_tree.verticalScrollBar().setValue)
+        self.right_tree.verticalScrollBar().valueChanged.connect(
+            self.left_tree.verticalScrollBar().setValue)
+        layout.addWidget(splitter)
+
+        self.status_label = QLabel("Выберите файлы для сравнения")
+        layout.addWidget(self.status_label)
+
+        # --- Кнопки ---
+        button_layout = QHBoxLayout()
+        self.compare_button = QPushButton("Сравнить")
+        self.compare_button.setDefault(True)
+        self.compare_button.clicked.connect(self.start_diff)
+        button_layout.addWidget(self.compare_button)
+
+        self.stop_button = QPushButton("Остановить")
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.stop_diff)
+        button_layout.addWidget(self.stop_button)
+
+        close_button = QPushButton("Закрыть")
+        close_button.clicked.connect(self.close)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+    def _with_browse(self, edit: QLineEdit) -> QHBoxLayout:
+        row = QHBoxLayout()
+        row.addWidget(edit)
+        browse_button = QPushButton("Обзор...")
+        browse_button.clicked.connect(lambda: self.browse(edit))
+        row.addWidget(browse_button)
+        return row
+
+    def browse(self, edit: QLineEdit):
+        start = str(self.current_file.parent) if self.current_file else ""
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Выберите файл", edit.text() or start, "JSON Files (*.json);;All Files (*)"
+        )
+        if path:
+            edit.setText(path)
+
+    def _source(self, edit: QLineEdit):
+        """Путь к файлу или текст текущего документа; None, если источник не задан"""
+        if edit.text().strip():
+            return Path(edit.text().strip())
+        if edit is self.left_edit and self.current_text is not None:
+            return self.current_text()
+        return None
+
+    def start_diff(self):
+        """Запускает сравнение в фоновом потоке"""
+        left, right = self._source(self.left_edit), self._source(self.right_edit)
+        if left is None or right is None:
+            self.status_label.setText("Укажите оба документа")
+            return
+        self.stop_diff()
+        self.left_tree.clear()
+        self.right_tree.clear()
+        self._partners = {}
+        self.result = None
+        identity_key = self.identity_edit.text().strip() or None
+        self.worker = DiffWorker(left, right, identity_key, self)
+        self.worker.diffed.connect(self.show_result)
+        self.worker.failed.connect(lambda msg: self.status_label.setText(f"Ошибка: {msg}"))
+        self.worker.finished.connect(self.on_finished)
+        self.compare_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        self.status_label.setText("Сравнение...")
+        self._started = time.perf_counter()
+        self.worker.start()
+
+    def stop_diff(self):
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.cancel()
+            self.worker.wait()
+
+    def on_finished(self):
+        self.compare_button.setEnabled(True)
+        self.stop_button.setEnabled(False)
+        if self.result is None and self.status_label.text() == "Сравнение...":
+            self.status_label.setText("Сравнение остановлено")
+
+    def show_result(self, result):
+        """Строит парные деревья изменений: строки с одинаковым номером соответствуют друг другу"""
+        self.result = result
+        elapsed = time.perf_counter() - self._started
+        counts = {kind: 0 for kind in _TITLES}
+        for change in result.changes:
+            counts[change.kind] += 1
+        summary = ", ".join(f"{_TITLES[kind]}: {count}" for kind, count in counts.items())
+        if not result.changes:
+            summary = "Документы совпадают"
+        shown = result.changes[:MAX_SHOWN_CHANGES]
+        if len(shown) < len(result.changes):
+            summary += f" (показаны первые {len(shown)})"
+        self.status_label.setText(
+            f"{summary}; сравнено узлов: {result.compared}, "
+            f"пропущено одинаковых поддеревьев: {result.skipped}, {elapsed:.2f} с"
+        )
+        self.left_tree.setUpdatesEnabled(False)
+        self.right_tree.setUpdatesEnabled(False)
+        try:
+            # Пара элементов-групп для каждого префикса пути
+            groups = {(): (self.left_tree.invisibleRootItem(), self.right_tree.invisibleRootItem())}
+            for change in shown:
+                path = change.right_path if change.right_path is not None else change.left_path
+                group = path[:-1][:MAX_GROUP_DEPTH]
+                self._add_change(self._group(groups, group), change, len(group))
+            self.left_tree.expandAll()
+            self.right_tree.expandAll()
+        finally:
+            self.left_tree.setUpdatesEnabled(True)
+            self.right_tree.setUpdatesEnabled(True)
+
+    def _pair(self, parents, left_text: str, right_text: str):
+        left_item = QTreeWidgetItem(parents[0])
+        right_item = QTreeWidgetItem(parents[1])
+        left_item.setText(0, left_text)
+        right_item.setText(0, right_text)
+        self._partners[id(left_item)] = right_item
+        self._partners[id(right_item)] = left_item
+        return left_item, right_item
+
+    def _group(self, groups: dict, path: tuple):
+        """Пара элементов-групп для префикса пути; недостающие группы создаются"""
+        depth = len(path)
+        while path[:depth] not in groups:
+            depth -= 1
+        pair = groups[path[:depth]]
+        for depth in range(depth + 1, len(path) + 1):
+            text = _segment(path[depth - 1])
+            pair = self._pair(pair, text, text)
+            groups[path[:depth]] = pair
+        return pair
+
+    def _add_change(self, parents, change, depth: int):
+        """Пара строк изменения; depth — длина пути группы, в которой они стоят"""
+        if change.kind == MOVED:
+            left_text = f"{format_path(change.left_path)}: {_preview(change.left)}"
+            right_text = f"{format_path(change.right_path)}: {_preview(change.right)}"
+        else:
+            left_text = (f"{_relative(change.left_path, depth)}: {_preview(change.left)}"
+                         if change.left_path is not None else "—")
+            right_text = (f"{_relative(change.right_path, depth)}: {_preview(change.right)}"
+                          if change.right_path is not None else "—")
+        brush = QBrush(QColor(_COLORS[change.kind]))
+        for item in self._pair(parents, left_text, right_text):
+            item.setForeground(0, brush)
+            item.setToolTip(0, _TITLES[change.kind])
+            item.setData(0, Qt.UserRole, change.kind)
+
+    def _sync_expanded(self, item, expanded: bool):
+        partner = self._partners.get(id(item))
+        if partner is not None and partner.isExpanded() != expanded:
+            partner.setExpanded(expanded)
+
+    def _sync_current(self, current, previous):
+        if self._syncing or current is None:
+            return
+        partner = self._partners.get(id(current))
+        if partner is not None:
+            self._syncing = True
+            try:
+                partner.treeWidget().setCurrentItem(partner)
+            finally:
+                self._syncing = False
+
+    def closeEvent(self, event):
+        self.stop_diff()
+        super().closeEvent(event)
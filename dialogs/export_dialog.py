@@ -2,7 +2,6 @@
 Модуль диалога экспорта данных
 """
 import json
-import xml.etree.ElementTree as ET
 import io
 from typing import Any, Dict, List
 from PyQt5.QtWidgets import (
@@ -11,6 +10,17 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt
 
+from core.instrumentation import instrumentation
+from core.walk import walk, ENTER, LEAVE
+
+
+def _xml_element(tag: str, text: str) -> str:
+    """Элемент с текстом; экранирование текста — как у ElementTree"""
+    if not text:
+        return f"<{tag} />"
+    text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return f"<{tag}>{text}</{tag}>"
+
 
 class ExportDialog(QDialog):
     """Диалог экспорта в другие форматы"""
@@ -61,64 +71,75 @@ class ExportDialog(QDialog):
         """Обновляет предварительный просмотр"""
         format_type = self.format_combo.currentText()
         try:
-            if format_type == "XML":
-                preview = self.json_to_xml(self.json_data)
-            elif format_type == "YAML":
-                preview = self.json_to_yaml(self.json_data)
-            else:
-                preview = "Неподдерживаемый формат"
+            with instrumentation.timed(f"export.{format_type.lower()}"):
+                if format_type == "XML":
+                    preview = self.json_to_xml(self.json_data)
+                elif format_type == "YAML":
+                    preview = self.json_to_yaml(self.json_data)
+                else:
+                    preview = "Неподдерживаемый формат"
             
             self.preview_edit.setPlainText(preview)
         except Exception as e:
             self.preview_edit.setPlainText(f"Ошибка конвертации: {str(e)}")
     
     def json_to_xml(self, data, root_name="root"):
-        """Конвертация JSON в XML"""
-        def dict_to_xml(d, root):
-            for key, value in d.items():
-                if isinstance(value, dict):
-                    child = ET.SubElement(root, str(key))
-                    dict_to_xml(value, child)
-                elif isinstance(value, list):
-                    for item in value:
-                        child = ET.SubElement(root, str(key))
-                        if isinstance(item, dict):
-                            dict_to_xml(item, child)
-                        else:
-                            child.text = str(item)
+        """Конвертация JSON в XML (вывод совпадает с xml.etree.ElementTree.tostring).
+        Текст собирается обходом без рекурсии: сериализатор ElementTree рекурсивен
+        и не справляется с глубоко вложенными документами."""
+        if not isinstance(data, dict):
+            return _xml_element(root_name, str(data))
+
+        def descend(parent, value):
+            # Объекты становятся элементами; массив объекта — повтором элемента
+            # с его ключом; вложенный массив массива выводится текстом
+            return isinstance(value, dict) or (isinstance(value, list) and isinstance(parent, dict))
+
+        parts = [f"<{root_name}>"]
+        # Для каждого уровня обхода: имя элемента, которым выводятся элементы массива
+        tags = [None]
+        for event, key, value, _ in walk(data, descend=descend):
+            if event == LEAVE:
+                tags.pop()
+            tag = tags[-1] if isinstance(key, int) else str(key)
+            if event == ENTER:
+                if isinstance(value, list):
+                    tags.append(tag)
                 else:
-                    child = ET.SubElement(root, str(key))
-                    child.text = str(value)
-        
-        root = ET.Element(root_name)
-        if isinstance(data, dict):
-            dict_to_xml(data, root)
-        else:
-            root.text = str(data)
-        
-        return ET.tostring(root, encoding='unicode')
+                    tags.append(None)
+                    parts.append(f"<{tag}>")
+            elif event == LEAVE:
+                if isinstance(value, dict):
+                    # Пустой объект — пустой элемент, как у ElementTree
+                    if parts[-1] == f"<{tag}>":
+                        parts[-1] = f"<{tag} />"
+                    else:
+                        parts.append(f"</{tag}>")
+            else:
+                parts.append(_xml_element(tag, str(value)))
+        if len(parts) == 1:
+            return f"<{root_name} />"
+        parts.append(f"</{root_name}>")
+        return "".join(parts)
     
     def json_to_yaml(self, data, indent=0):
-        """Конвертация JSON в YAML"""
-        result = []
-        
-        if isinstance(data, dict):
-            for key, value in data.items():
-                if isinstance(value, (dict, list)):
-                    result.append("  " * indent + f"{key}:")
-                    result.append(self.json_to_yaml(value, indent + 1))
-                else:
-                    result.append("  " * indent + f"{key}: {value}")
-        elif isinstance(data, list):
-            for item in data:
-                if isinstance(item, (dict, list)):
-                    result.append("  " * indent + "-")
-                    result.append(self.json_to_yaml(item, indent + 1))
-                else:
-                    result.append("  " * indent + f"- {item}")
-        else:
+        """Конвертация JSON в YAML (обход без рекурсии)"""
+        if not isinstance(data, (dict, list)):
             return "  " * indent + str(data)
         
+        result = []
+        for event, key, value, depth in walk(data):
+            if event == LEAVE:
+                # Пустой вложенный контейнер дает пустую строку
+                if not value:
+                    result.append("")
+                continue
+            prefix = "  " * (indent + depth - 1) + ("-" if isinstance(key, int) else f"{key}:")
+            if event == ENTER:
+                result.append(prefix)
+            else:
+                result.append(f"{prefix} {value}")
+        
         return "\n".join(result)
     
     def export_data(self):
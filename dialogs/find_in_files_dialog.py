@@ -0,0 +1,221 @@
+"""
+Модуль диалога поиска по файлам каталога
+"""
+import re
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QLineEdit,
+    QCheckBox, QComboBox, QSpinBox, QFormLayout, QFileDialog,
+    QTreeWidget, QTreeWidgetItem
+)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+
+from core.instrumentation import instrumentation
+from core.file_search import (
+    DirectorySearch, SearchQuery, MODE_LITERAL, MODE_REGEX, MODE_KEY_PATH
+)
+
+
+class FileSearchWorker(QThread):
+    """Фоновый поток поиска, отдает результаты по мере нахождения"""
+
+    fileMatched = pyqtSignal(str, list)
+    progress = pyqtSignal(int, int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, search: DirectorySearch, parent=None):
+        super().__init__(parent)
+        self.search = search
+        self.found = 0
+        # Ошибка, прервавшая поиск (неверный шаблон, недоступный каталог)
+        self.error = None
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        try:
+            with instrumentation.timed("search.files"):
+                self.found = self.search.run(
+                    lambda path, matches: self.fileMatched.emit(path, list(matches)),
+                    lambda: self._cancelled,
+                    lambda done, total: self.progress.emit(done, total),
+                )
+        except (OSError, re.error) as e:
+            self.error = str(e)
+            self.failed.emit(self.error)
+
+
+class FindInFilesDialog(QDialog):
+    """Диалог поиска по файлам в каталоге"""
+
+    MODES = [
+        ("Текст", MODE_LITERAL),
+        ("Регулярное выражение", MODE_REGEX),
+        ("Путь ключа", MODE_KEY_PATH),
+    ]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Поиск в файлах")
+        self.resize(700, 500)
+        self.worker = None
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+
+        # --- Каталог ---
+        dir_layout = QHBoxLayout()
+        self.dir_edit = QLineEdit()
+        dir_layout.addWidget(self.dir_edit)
+        browse_button = QPushButton("Обзор...")
+        browse_button.clicked.connect(self.browse_directory)
+        dir_layout.addWidget(browse_button)
+        form.addRow("Каталог:", dir_layout)
+
+        # --- Запрос ---
+        self.query_edit = QLineEdit()
+        self.query_edit.setPlaceholderText("Текст, регулярное выражение или путь (items[*].id)")
+        self.query_edit.returnPressed.connect(self.start_search)
+        form.addRow("Найти:", self.query_edit)
+
+        self.mode_combo = QComboBox()
+        for title, _ in self.MODES:
+            self.mode_combo.addItem(title)
+        form.addRow("Режим:", self.mode_combo)
+
+        self.case_sensitive = QCheckBox()
+        form.addRow("Учитывать регистр:", self.case_sensitive)
+
+        # --- Фильтры ---
+        self.include_edit = QLineEdit("*.json")
+        form.addRow("Маски файлов:", self.include_edit)
+        self.exclude_edit = QLineEdit(".git; node_modules")
+        form.addRow("Исключить:", self.exclude_edit)
+        self.max_size_spin = QSpinBox()
+        self.max_size_spin.setRange(0, 100000)
+        self.max_size_spin.setValue(50)
+        self.max_size_spin.setSuffix(" МБ")
+        self.max_size_spin.setSpecialValueText("Без ограничения")
+        form.addRow("Макс. размер:", self.max_size_spin)
+        layout.addLayout(form)
+
+        # --- Результаты ---
+        self.results_tree = QTreeWidget()
+        self.results_tree.setHeaderLabel("Результаты")
+        self.results_tree.itemActivated.connect(self.open_result)
+        layout.addWidget(self.results_tree)
+
+        self.status_label = QLabel("Готово")
+        layout.addWidget(self.status_label)
+
+        # --- Кнопки ---
+        button_layout = QHBoxLayout()
+        self.find_button = QPushButton("Найти")
+        self.find_button.setDefault(True)
+        self.find_button.clicked.connect(self.start_search)
+        button_layout.addWidget(self.find_button)
+
+        self.stop_button = QPushButton("Остановить")
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.stop_search)
+        button_layout.addWidget(self.stop_button)
+
+        close_button = QPushButton("Закрыть")
+        close_button.clicked.connect(self.close)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+    def browse_directory(self):
+        directory = QFileDialog.getExistingDirectory(self, "Выберите каталог", self.dir_edit.text())
+        if directory:
+            self.dir_edit.setText(directory)
+
+    @staticmethod
+    def _split_patterns(text: str):
+        return tuple(p.strip() for p in re.split(r"[;,]", text) if p.strip())
+
+    def build_search(self) -> DirectorySearch:
+        """Создает объект поиска по текущим значениям полей"""
+        query = SearchQuery(
+            self.query_edit.text(),
+            self.MODES[self.mode_combo.currentIndex()][1],
+            self.case_sensitive.isChecked(),
+        )
+        max_size_mb = self.max_size_spin.value()
+        return DirectorySearch(
+            self.dir_edit.text(), query,
+            include=self._split_patterns(self.include_edit.text()),
+            exclude=self._split_patterns(self.exclude_edit.text()),
+            max_size=max_size_mb * 1024 * 1024 if max_size_mb else None,
+        )
+
+    def start_search(self):
+        """Запускает поиск в фоновом потоке"""
+        if not self.query_edit.text() or not self.dir_edit.text():
+            self.status_label.setText("Укажите каталог и строку поиска")
+            return
+        self.stop_search()
+        self.results_tree.clear()
+        worker = self.worker = FileSearchWorker(self.build_search(), self)
+        # Сигналы прежнего поиска могут прийти из очереди уже после запуска
+        # нового: обработчики получают своего исполнителя и сверяют его с текущим
+        worker.fileMatched.connect(
+            lambda path, matches: worker is self.worker and self.add_file_results(path, matches))
+        worker.progress.connect(lambda done, total: worker is self.worker and self.on_progress(done, total))
+        worker.failed.connect(
+            lambda msg: worker is self.worker and self.status_label.setText(f"Ошибка: {msg}"))
+        worker.finished.connect(lambda: self.on_finished(worker))
+        self.find_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        self.status_label.setText("Поиск...")
+        worker.start()
+
+    def stop_search(self):
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.cancel()
+            self.worker.wait()
+
+    def add_file_results(self, path: str, matches: list):
+        """Добавляет совпадения одного файла в список результатов"""
+        file_item = QTreeWidgetItem(self.results_tree)
+        file_item.setText(0, f"{path} ({len(matches)})")
+        file_item.setData(0, Qt.UserRole, (path, 0))
+        for match in matches:
+            child = QTreeWidgetItem(file_item)
+            prefix = f"{match.line}: " if match.line else ""
+            child.setText(0, f"{prefix}{match.text}")
+            child.setData(0, Qt.UserRole, (path, match.line))
+
+    def on_progress(self, done: int, total: int):
+        self.status_label.setText(f"Просмотрено файлов: {done} из {total}")
+
+    def on_finished(self, worker):
+        if worker is not self.worker:
+            return
+        self.find_button.setEnabled(True)
+        self.stop_button.setEnabled(False)
+        if worker.error is not None:
+            # Итог поиска не затирает сообщение об ошибке
+            self.status_label.setText(f"Ошибка: {worker.error}")
+            return
+        search = worker.search
+        unread = f", не прочитано: {len(search.errors)}" if search.errors else ""
+        self.status_label.setText(
+            f"Найдено в файлах: {worker.found} "
+            f"(просмотрено: {search.files_scanned}, из кэша: {search.cache_hits}{unread})"
+        )
+
+    def open_result(self, item, column):
+        """Открывает файл результата в редакторе"""
+        data = item.data(0, Qt.UserRole)
+        parent = self.parent()
+        if data and hasattr(parent, 'open_file_at'):
+            path, line = data
+            parent.open_file_at(path, line)
+
+    def closeEvent(self, event):
+        self.stop_search()
+        super().closeEvent(event)
@@ -0,0 +1,97 @@
+"""
+Модуль диалога привязки JSON Schema к файлам
+"""
+import os
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget,
+    QTableWidgetItem, QHeaderView, QFileDialog, QInputDialog, QDialogButtonBox
+)
+
+
+class SchemaAssociationsDialog(QDialog):
+    """Диалог списка привязок: шаблон имени (или путь) файла -> файл схемы"""
+
+    def __init__(self, associations, current_file=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Схемы JSON")
+        self.resize(650, 350)
+        self.current_file = current_file
+        self.init_ui()
+        for pattern, schema in associations:
+            self.add_row(pattern, schema)
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(
+            "Файл проверяется по первой подходящей схеме. Точный путь файла "
+            "имеет приоритет над шаблонами (*.json, config/*.json)."
+        ))
+
+        self.table = QTableWidget(0, 2)
+        self.table.setHorizontalHeaderLabels(["Файл или шаблон", "Схема"])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+        # --- Кнопки управления списком ---
+        button_layout = QHBoxLayout()
+        add_button = QPushButton("Добавить шаблон...")
+        add_button.clicked.connect(self.add_pattern)
+        button_layout.addWidget(add_button)
+
+        self.current_button = QPushButton("Для текущего файла...")
+        self.current_button.setEnabled(self.current_file is not None)
+        self.current_button.clicked.connect(self.add_for_current_file)
+        button_layout.addWidget(self.current_button)
+
+        remove_button = QPushButton("Удалить")
+        remove_button.clicked.connect(self.remove_selected)
+        button_layout.addWidget(remove_button)
+        button_layout.addStretch()
+        layout.addLayout(button_layout)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def add_row(self, pattern: str, schema: str):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        self.table.setItem(row, 0, QTableWidgetItem(pattern))
+        self.table.setItem(row, 1, QTableWidgetItem(schema))
+
+    def _choose_schema(self) -> str:
+        start = os.path.dirname(str(self.current_file)) if self.current_file else ""
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Выберите схему", start, "JSON Schema (*.json);;All Files (*)"
+        )
+        return path
+
+    def add_pattern(self):
+        """Добавляет привязку по шаблону имени файла"""
+        pattern, ok = QInputDialog.getText(self, "Шаблон файлов", "Шаблон (например, *.config.json):")
+        if not ok or not pattern.strip():
+            return
+        schema = self._choose_schema()
+        if schema:
+            self.add_row(pattern.strip(), schema)
+
+    def add_for_current_file(self):
+        """Привязывает схему к открытому файлу"""
+        schema = self._choose_schema()
+        if schema:
+            self.add_row(str(self.current_file), schema)
+
+    def remove_selected(self):
+        for row in sorted({index.row() for index in self.table.selectedIndexes()}, reverse=True):
+            self.table.removeRow(row)
+
+    def associations(self):
+        """Список (шаблон, схема) в порядке таблицы, без пустых строк"""
+        result = []
+        for row in range(self.table.rowCount()):
+            pattern = self.table.item(row, 0).text().strip() if self.table.item(row, 0) else ""
+            schema = self.table.item(row, 1).text().strip() if self.table.item(row, 1) else ""
+            if pattern and schema:
+                result.append((pattern, schema))
+        return result
@@ -8,6 +8,8 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt, QRegularExpression
 from PyQt5.QtGui import QTextCursor, QTextDocument
 
+from core.instrumentation import instrumentation
+
 
 class SearchReplaceDialog(QDialog):
     """Диалог поиска и замены"""
@@ -98,10 +100,11 @@ class SearchReplaceDialog(QDialog):
 
         # Подсчитываем все вхождения
         count = 0
-        iterator = regex.globalMatch(content)
-        while iterator.hasNext():
-            iterator.next()
-            count += 1
+        with instrumentation.timed("search.count"):
+            iterator = regex.globalMatch(content)
+            while iterator.hasNext():
+                iterator.next()
+                count += 1
 
         return count
 
@@ -127,7 +130,9 @@ class SearchReplaceDialog(QDialog):
                 flags |= QTextDocument.FindWholeWords
 
             # Пытаемся найти от текущего положения курсора
-            if text_edit.find(search_text, flags):
+            with instrumentation.timed("search.find"):
+                found = text_edit.find(search_text, flags)
+            if found:
                 QMessageBox.information(self, "Найдено",
                                         f"Текст '{search_text}' найден!\nВсего найдено: {total_count}")
             else:
@@ -187,13 +192,14 @@ class SearchReplaceDialog(QDialog):
             text_edit = parent.text_edit
             content = text_edit.toPlainText()
 
-            if self.case_sensitive.isChecked():
-                new_content = content.replace(search_text, replace_text)
-            else:
-                import re
-                pattern = re.escape(search_text)
-                pattern = f"(?i){pattern}"
-                new_content = re.sub(pattern, replace_text, content)
+            with instrumentation.timed("search.replace_all"):
+                if self.case_sensitive.isChecked():
+                    new_content = content.replace(search_text, replace_text)
+                else:
+                    import re
+                    pattern = re.escape(search_text)
+                    pattern = f"(?i){pattern}"
+                    new_content = re.sub(pattern, replace_text, content)
 
             text_edit.setPlainText(new_content)
             QMessageBox.information(self, "Заменено",
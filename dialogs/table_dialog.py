@@ -0,0 +1,89 @@
+"""
+Модуль диалога табличного просмотра массива JSON
+"""
+from typing import Callable, Optional
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableView, QHeaderView
+)
+from PyQt5.QtCore import Qt, pyqtSignal
+
+from core.json_diff import format_path
+from widgets.json_table_model import JsonArrayModel, VALUE_COLUMN
+
+
+class JsonTableDialog(QDialog):
+    """Массив объектов как таблица: столбцы — ключи из выборки строк,
+    строки и ячейки запрашиваются по мере прокрутки"""
+
+    # Правка ячейки: (путь значения в документе, введенный текст) — как itemEdited дерева
+    valueEdited = pyqtSignal(list, str)
+
+    def __init__(self, rows: list, path: list, load_rows: Optional[Callable] = None, parent=None):
+        super().__init__(parent)
+        self.path = list(path)
+        # Функция, заново читающая массив из текущих данных документа
+        self.load_rows = load_rows
+        self.setWindowTitle(f"Таблица: {format_path(self.path)}")
+        self.resize(900, 600)
+        self.model = None
+        self.init_ui()
+        self.set_rows(rows)
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        self.table = QTableView()
+        # Строки одной высоты: представлению не нужно измерять каждую
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        layout.addWidget(self.table)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        button_layout = QHBoxLayout()
+        self.refresh_button = QPushButton("Обновить")
+        self.refresh_button.setEnabled(self.load_rows is not None)
+        self.refresh_button.clicked.connect(self.refresh)
+        button_layout.addWidget(self.refresh_button)
+        button_layout.addStretch()
+        close_button = QPushButton("Закрыть")
+        close_button.clicked.connect(self.close)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+    def set_rows(self, rows: list):
+        """Показывает массив; прежняя модель и ее сортировки останавливаются"""
+        if self.model is not None:
+            self.model.stop()
+        self.table.setSortingEnabled(False)
+        self.model = JsonArrayModel(rows, parent=self)
+        self.model.cellEdited.connect(self.on_cell_edited)
+        self.model.sorting.connect(self.on_sorting)
+        self.table.setModel(self.model)
+        # Без индикатора включение сортировки не запускает ее по первому столбцу
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table.setSortingEnabled(True)
+        self.show_status()
+
+    def show_status(self, text: str = ""):
+        summary = f"Строк: {len(self.model.rows)}, столбцов: {self.model.columnCount()}"
+        self.status_label.setText(f"{summary}. {text}" if text else summary)
+
+    def on_sorting(self, running: bool):
+        self.show_status("Сортировка..." if running else "")
+
+    def on_cell_edited(self, row: int, column, text: str):
+        path = self.path + [row] + ([] if column is VALUE_COLUMN else [column])
+        self.valueEdited.emit(path, text)
+
+    def refresh(self):
+        """Перечитывает массив из документа (после правок текста)"""
+        rows = self.load_rows() if self.load_rows is not None else None
+        if isinstance(rows, list):
+            self.set_rows(rows)
+        else:
+            self.show_status("Массив больше не найден в документе")
+
+    def closeEvent(self, event):
+        self.model.stop()
+        super().closeEvent(event)
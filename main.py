@@ -1,24 +1,38 @@
+import os
 import sys
+import time
 import json
 import re
+import importlib
 from pathlib import Path
 from typing import Optional
 from PyQt5.QtWidgets import (
 QApplication, QMainWindow, QTextEdit, QVBoxLayout, QHBoxLayout,QWidget, QPushButton, QFileDialog, QMessageBox, QToolBar,QFontComboBox, QSpinBox, QColorDialog, QLabel, QStatusBar,
-QAction, QSplitter, QTreeWidget, QTreeWidgetItem, QTabWidget, QMenu, QMenuBar)
+QAction, QSplitter, QTreeWidget, QTreeWidgetItem, QTabWidget, QMenu, QMenuBar, QProgressBar, QInputDialog)
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont, QColor, QTextCharFormat, QTextCursor, QIcon
-from PyQt5 import uic
 
+from widgets.document_tabs import Document, DocumentManager
+from core.instrumentation import instrumentation
+from core.validation import ValidationScheduler
+from core.json_lexer import LineError, parse_tolerant, is_json_lines_path, loads, locate_path
+from core import codec
+from core.node_store import leaf_hash
+from core.json_path import to_jsonpath
+
+# Сколько ошибок подчеркивать в тексте и перечислять в подсказке
+MAX_ERROR_MARKS = 1000
+MAX_ERRORS_IN_TOOLTIP = 10
 
 # Импортируем наши модули
 try:
     from config.settings import settings_manager
-    from dialogs.about_dialog import AboutDialog
-    from dialogs.search_dialog import SearchReplaceDialog
-    from dialogs.export_dialog import ExportDialog
+    from config.recent_files import RecentFilesCache, format_size
     from widgets.syntax_highlighter import JsonSyntaxHighlighter
     from widgets.json_tree_widget import JsonTreeWidget
+    from widgets.code_folding import CodeFolding
+    from widgets.bracket_matcher import BracketMatcher
+    from widgets.breadcrumb_bar import BreadcrumbBar, PathResolver
 except ImportError as e:
     print(f"Ошибка импорта модулей: {e}")
     # Создаем заглушки для модулей
@@ -38,23 +52,63 @@ except ImportError as e:
         def add_recent_file(self, path): pass
         def get_recent_files(self): return []
         def clear_recent_files(self): pass
+        def flush(self): pass
     
     settings_manager = DummySettings()
-    AboutDialog = None
-    SearchReplaceDialog = None
-    ExportDialog = None
+    RecentFilesCache = None
+    format_size = str
     JsonSyntaxHighlighter = None
     JsonTreeWidget = None
+    CodeFolding = None
+    BracketMatcher = None
+    BreadcrumbBar = PathResolver = None
+
+# Момент начала запуска — для измерения времени до первой отрисовки окна
+STARTUP_STARTED = time.perf_counter()
+
+
+def _load_dialog(module_name: str, class_name: str):
+    """Загружает класс диалога при первом использовании (None, если модуль недоступен).
+    Диалоги не импортируются при старте, чтобы не замедлять запуск приложения."""
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError as e:
+        print(f"Ошибка импорта модуля {module_name}: {e}")
+        return None
+    return getattr(module, class_name, None)
 
 
+def _setup_main_window_ui(window, ui_path: Path):
+    """Строит интерфейс окна из заранее скомпилированного модуля (pyuic5).
+    Если модуля нет или .ui-файл новее, разбираем XML через uic во время выполнения."""
+    compiled_path = ui_path.with_name("mainwindow_ui.py")
+    try:
+        if compiled_path.stat().st_mtime + 1 < ui_path.stat().st_mtime:
+            raise ImportError("mainwindow_ui.py устарел")
+        from ui.mainwindow_ui import Ui_MainWindow
+    except (ImportError, OSError):
+        from PyQt5 import uic
+        uic.loadUi(str(ui_path), window)
+        return
+    ui = Ui_MainWindow()
+    ui.setupUi(window)
+    # Как и uic.loadUi, делаем виджеты и действия атрибутами окна
+    for name, value in vars(ui).items():
+        setattr(window, name, value)
+
 
 class JsonEditor(QMainWindow):
     """Главное окно редактора JSON"""
+
+    # Каталог журналов автосохранения (None — каталог данных приложения)
+    autosave_directory: Optional[str] = None
     
     def __init__(self):
         super().__init__()
         self.current_file: Optional[Path] = None
         self.is_modified = False
+        self.autosave = None
+        self.file_watcher = None
         
         # Устанавливаем иконку приложения (путь от корня проекта)
         app_dir = Path(__file__).resolve().parent
@@ -71,7 +125,7 @@ class JsonEditor(QMainWindow):
         # Загружаем UI из Qt Designer файла (ui/mainwindow.ui)
         app_dir = Path(__file__).resolve().parent
         ui_path = app_dir / "ui" / "mainwindow.ui"
-        uic.loadUi(str(ui_path), self)
+        _setup_main_window_ui(self, ui_path)
 
         # Загружаем геометрию окна из настроек
         geometry = settings_manager.get("window_geometry")
@@ -81,40 +135,33 @@ class JsonEditor(QMainWindow):
         )
 
         # Привязываем основные виджеты по objectName
-        self.text_edit: QTextEdit = self.findChild(QTextEdit, "text_edit")
-        self.splitter: QSplitter = self.findChild(QSplitter, "splitter")
+        text_edit: QTextEdit = self.findChild(QTextEdit, "text_edit")
+        splitter: QSplitter = self.findChild(QSplitter, "splitter")
         tree_placeholder: QTreeWidget = self.findChild(QTreeWidget, "tree_widget")
         self.tab_widget: QTabWidget = self.findChild(QTabWidget, "tab_widget")
 
-        # Подключаем сигналы редактора
-        self.text_edit.setFont(QFont("Consolas", 12))
-        self.text_edit.textChanged.connect(self.on_text_changed)
-
-        # Подсветка синтаксиса
-        if JsonSyntaxHighlighter:
-            self.highlighter = JsonSyntaxHighlighter(self.text_edit.document())
-        else:
-            self.highlighter = None
-
-        # Заменяем QTreeWidget на наш JsonTreeWidget, если доступен
-        if JsonTreeWidget:
-            self.tree_widget = JsonTreeWidget()
-            self.tree_widget.itemSelected.connect(self.on_tree_item_selected)
-            self.tree_widget.itemEdited.connect(self.on_tree_item_edited)
-            # Вставляем в сплиттер вместо placeholder
-            # 0 - QTextEdit, 1 - placeholder tree
-            # Удаляем placeholder и добавляем новый
-            if tree_placeholder is not None and self.splitter is not None:
-                # Сохраняем индекс
-                idx = self.splitter.indexOf(tree_placeholder)
-                tree_placeholder.setParent(None)
-                self.splitter.insertWidget(idx if idx >= 0 else 1, self.tree_widget)
-            else:
-                self.splitter.addWidget(self.tree_widget)
-        else:
-            self.tree_widget = tree_placeholder
-            if self.tree_widget is not None:
-                self.tree_widget.setHeaderLabel("JSON Structure")
+        # Документы вкладок; первая вкладка берется из Qt Designer
+        budget_mb = settings_manager.get("memory_budget_mb", 512)
+        self.documents = DocumentManager(budget_mb * 1024 * 1024)
+        self.current_document: Optional[Document] = None
+        # Открытые табличные просмотры (немодальные, закрываются сами)
+        self.table_dialogs = []
+        # Строка пути JSON у курсора под вкладками; путь ищется после серии
+        # движений курсора (таймер с нулевой задержкой их объединяет)
+        self.breadcrumb_bar = BreadcrumbBar() if BreadcrumbBar else None
+        self.breadcrumb_timer = QTimer(self)
+        self.breadcrumb_timer.setSingleShot(True)
+        self.breadcrumb_timer.setInterval(0)
+        self.breadcrumb_timer.timeout.connect(self.update_breadcrumbs)
+        if self.breadcrumb_bar is not None:
+            self.tab_widget.parentWidget().layout().addWidget(self.breadcrumb_bar)
+            self.breadcrumb_bar.segmentClicked.connect(self.goto_position)
+        editor_tab = self.findChild(QWidget, "editor_tab")
+        first_doc = self._create_document(editor_tab, splitter, text_edit, tree_placeholder)
+        self.tab_widget.setTabsClosable(True)
+        self.tab_widget.tabCloseRequested.connect(self.close_tab)
+        self.tab_widget.currentChanged.connect(self.on_tab_changed)
+        self._activate_document(first_doc)
 
         # Загружаем размеры сплиттера из настроек
         splitter_sizes = settings_manager.get("splitter_sizes", [700, 300])
@@ -143,6 +190,8 @@ class JsonEditor(QMainWindow):
             close_doc_btn.clicked.connect(self.close_document)
 
         # Действия меню и тулбара
+        if hasattr(self, 'actionNew'):
+            self.actionNew.triggered.connect(self.new_document)
         if hasattr(self, 'actionOpen'):
             self.actionOpen.triggered.connect(self.open_file)
         if hasattr(self, 'actionSave'):
@@ -153,8 +202,12 @@ class JsonEditor(QMainWindow):
             self.actionExit.triggered.connect(self.close)
         if hasattr(self, 'actionFind'):
             self.actionFind.triggered.connect(self.show_search_dialog)
+        if hasattr(self, 'actionFindInFiles'):
+            self.actionFindInFiles.triggered.connect(self.show_find_in_files_dialog)
         if hasattr(self, 'actionExport'):
             self.actionExport.triggered.connect(self.show_export_dialog)
+        if hasattr(self, 'actionPerformance'):
+            self.actionPerformance.triggered.connect(self.toggle_performance_panel)
         if hasattr(self, 'actionAbout'):
             self.actionAbout.triggered.connect(self.show_about_dialog)
         if hasattr(self, 'actionFormat'):
@@ -163,6 +216,27 @@ class JsonEditor(QMainWindow):
             self.actionMinify.triggered.connect(self.minify_json)
         if hasattr(self, 'actionValidate'):
             self.actionValidate.triggered.connect(self.validate_json)
+        if hasattr(self, 'actionValidateNow'):
+            self.actionValidateNow.triggered.connect(self.validate_now)
+        if hasattr(self, 'actionNextError'):
+            self.actionNextError.triggered.connect(self.goto_next_error)
+        if hasattr(self, 'actionMatchBracket'):
+            self.actionMatchBracket.triggered.connect(self.goto_matching_bracket)
+        if hasattr(self, 'actionSchemas'):
+            self.actionSchemas.triggered.connect(self.show_schema_dialog)
+        if hasattr(self, 'actionCompare'):
+            self.actionCompare.triggered.connect(self.show_diff_dialog)
+        if hasattr(self, 'actionFollow'):
+            self.actionFollow.triggered.connect(self.toggle_follow)
+        if hasattr(self, 'actionToggleFold'):
+            self.actionToggleFold.triggered.connect(self.toggle_fold)
+        if hasattr(self, 'actionFoldToLevel'):
+            self.actionFoldToLevel.triggered.connect(self.fold_to_level)
+        if hasattr(self, 'actionUnfoldAll'):
+            self.actionUnfoldAll.triggered.connect(self.unfold_all)
+        if hasattr(self, 'actionMinimap'):
+            self.actionMinimap.setChecked(settings_manager.get("show_minimap", True))
+            self.actionMinimap.triggered.connect(self.toggle_minimap)
 
         # Статус бар и информационные метки
         self.status_bar = self.statusBar() if hasattr(self, 'statusBar') else QStatusBar()
@@ -174,12 +248,181 @@ class JsonEditor(QMainWindow):
         self.status_bar.addPermanentWidget(self.validation_label)
         self.info_label = QLabel("Готово")
         self.status_bar.addWidget(self.info_label)
+        # Ход фонового сохранения
+        self.save_progress = QProgressBar()
+        self.save_progress.setMaximumWidth(160)
+        self.save_progress.setRange(0, 100)
+        self.save_progress.hide()
+        self.status_bar.addPermanentWidget(self.save_progress)
 
-        # Меню недавних файлов
+        # Показ последних замеров (только при включенном сборе метрик)
+        self.perf_label = QLabel()
+        self.status_bar.addPermanentWidget(self.perf_label)
+        self.perf_label_timer = QTimer(self)
+        self.perf_label_timer.timeout.connect(self.update_perf_label)
+        self.performance_panel = None
+        self.on_instrumentation_toggled(settings_manager.get("instrumentation_enabled", False))
+
+        # Меню недавних файлов и кэш сведений о них (проверяются в фоне)
         self.recent_files_menu = getattr(self, 'menuRecentFiles', None)
+        self.recent_files_cache = RecentFilesCache(settings_manager, self) if RecentFilesCache else None
+        if self.recent_files_cache is not None:
+            self.recent_files_cache.updated.connect(self._on_recent_files_checked)
         self.update_title()
-        self.load_recent_files()
+        # Меню недавних файлов строим после показа окна, чтобы не задерживать запуск
+        QTimer.singleShot(0, self.load_recent_files)
+        # Журналы автосохранения и восстановление после сбоя — тоже после показа окна
+        QTimer.singleShot(0, self.start_autosave)
     
+    def _create_document(self, page=None, splitter=None, text_edit=None, tree_placeholder=None) -> Document:
+        """Создает документ вкладки; без аргументов строит новую страницу"""
+        if page is None:
+            page = QWidget()
+            layout = QHBoxLayout(page)
+            splitter = QSplitter(Qt.Horizontal)
+            layout.addWidget(splitter)
+            text_edit = QTextEdit()
+            splitter.addWidget(text_edit)
+            if self.current_document is not None:
+                # Новая вкладка наследует шрифт, цвета и пропорции текущей
+                text_edit.setFont(self.text_edit.font())
+                text_edit.setStyleSheet(self.text_edit.styleSheet())
+        else:
+            text_edit.setFont(QFont("Consolas", 12))
+        text_edit.textChanged.connect(self.on_text_changed)
+        text_edit.cursorPositionChanged.connect(self.on_cursor_position_changed)
+
+        # Подсветка синтаксиса
+        highlighter = JsonSyntaxHighlighter(text_edit.document()) if JsonSyntaxHighlighter else None
+
+        # Заменяем QTreeWidget на наш JsonTreeWidget, если доступен
+        if JsonTreeWidget:
+            tree_widget = JsonTreeWidget()
+            tree_widget.itemSelected.connect(self.on_tree_item_selected)
+            tree_widget.itemEdited.connect(self.on_tree_item_edited)
+            tree_widget.tableRequested.connect(self.show_table_view)
+            # Вставляем в сплиттер вместо placeholder (0 - QTextEdit, 1 - дерево)
+            if tree_placeholder is not None:
+                idx = splitter.indexOf(tree_placeholder)
+                tree_placeholder.setParent(None)
+                splitter.insertWidget(idx if idx >= 0 else 1, tree_widget)
+            else:
+                splitter.addWidget(tree_widget)
+        else:
+            tree_widget = tree_placeholder or QTreeWidget()
+            if tree_placeholder is None:
+                splitter.addWidget(tree_widget)
+            tree_widget.setHeaderLabel("JSON Structure")
+
+        if self.current_document is not None:
+            splitter.setSizes(self.splitter.sizes())
+
+        doc = Document(page, splitter, text_edit, tree_widget, highlighter)
+        if CodeFolding and highlighter is not None:
+            # Свертка и мини-карта работают по индексу скобок подсветки
+            doc.folding = CodeFolding(text_edit, highlighter)
+            doc.folding.set_minimap_visible(settings_manager.get("show_minimap", True))
+        if BracketMatcher and highlighter is not None:
+            doc.bracket_matcher = BracketMatcher(highlighter)
+        if PathResolver and highlighter is not None:
+            doc.path_resolver = PathResolver(highlighter)
+        if self.autosave is not None:
+            doc.journal = self.autosave.journal_for(text_edit.document())
+        self.documents.add(doc)
+        if self.tab_widget.indexOf(page) < 0:
+            self.tab_widget.addTab(page, doc.title())
+        return doc
+
+    def _activate_document(self, doc: Document):
+        """Делает документ текущим: переключает ссылки главного окна на его виджеты"""
+        previous = self.current_document
+        if previous is not None and previous is not doc:
+            self._sync_current_document()
+            # Отложенная проверка относилась к уходящему документу
+            if getattr(self, 'validation_timer', None) is not None and self.validation_timer.isActive():
+                self.validation_timer.stop()
+                previous.tree_loaded = False
+        self.current_document = doc
+        self.text_edit = doc.text_edit
+        self.tree_widget = doc.tree_widget
+        self.splitter = doc.splitter
+        self.highlighter = doc.highlighter
+        self.current_file = doc.file_path
+        self.is_modified = doc.is_modified
+        self.documents.touch(doc)
+        if hasattr(self, 'actionFollow'):
+            self.actionFollow.setChecked(doc.follow)
+        if self.tab_widget.currentWidget() is not doc.page:
+            self.tab_widget.setCurrentWidget(doc.page)
+        self.breadcrumb_timer.start()
+
+    def _sync_current_document(self):
+        """Переносит состояние главного окна в объект текущего документа"""
+        if self.current_document is not None:
+            self.current_document.file_path = self.current_file
+            self.current_document.is_modified = self.is_modified
+
+    def new_document(self) -> Document:
+        """Открывает новую пустую вкладку"""
+        doc = self._create_document()
+        self._activate_document(doc)
+        self.update_title()
+        return doc
+
+    def on_tab_changed(self, index: int):
+        """Переключение вкладки: лениво восстанавливает дерево и соблюдает бюджет памяти"""
+        doc = self.documents.find_by_page(self.tab_widget.widget(index))
+        if doc is None or doc is self.current_document:
+            return
+        self._activate_document(doc)
+        self.update_title()
+        if not doc.tree_loaded and self.text_edit.toPlainText().strip():
+            self.auto_validate()
+        self.documents.enforce_budget(doc)
+
+    def close_tab(self, index: int):
+        """Закрывает вкладку по индексу"""
+        doc = self.documents.find_by_page(self.tab_widget.widget(index))
+        if doc is None:
+            return
+        if doc is not self.current_document:
+            self._activate_document(doc)
+        self.close_document()
+
+    def _document_for_file(self, file_path) -> Document:
+        """Возвращает вкладку для открытия файла: уже открытую, пустую текущую или новую"""
+        existing = self.documents.find_by_path(Path(file_path))
+        if existing is not None:
+            return existing
+        if self.current_file is None and not self.is_modified and not self.text_edit.toPlainText():
+            return self.current_document
+        return self._create_document()
+
+    def _parsed_document_data(self):
+        """Данные текущего документа: из кэша разбора или новым разбором"""
+        hit, data = self.current_document.cached_parse()
+        if hit:
+            return data
+        text = self.text_edit.toPlainText()
+        with instrumentation.timed("parse"):
+            data = self._parse_text(text)
+        self.current_document.cache_parsed(data)
+        return data
+
+    def _parse_text(self, text: str, doc: Optional[Document] = None):
+        """Разбирает текст документа: JSON или JSON Lines (список записей).
+        Запись дробных чисел сохраняется, чтобы форматирование не меняло 1.10 на 1.1."""
+        doc = doc or self.current_document
+        return loads(text, doc.json_lines, exact=True)
+
+    def _dump_document(self, data, compact: bool = False) -> str:
+        """Текст документа из данных; JSON Lines — по записи на строку"""
+        if self.current_document.json_lines:
+            return "".join(codec.dumps(record, compact=compact, exact=True) + "\n" for record in data)
+        if compact:
+            return codec.dumps(data, compact=True, exact=True)
+        return codec.dumps(data, indent=2, exact=True)
+
     def create_menu_bar(self):
         """Совместимость: меню определяется в Qt Designer."""
         pass
@@ -193,75 +436,570 @@ class JsonEditor(QMainWindow):
         self.validation_timer = QTimer()
         self.validation_timer.timeout.connect(self.auto_validate)
         self.validation_timer.setSingleShot(True)
+        # Задержка подбирается по размеру документа и времени прошлых проверок
+        self.auto_validation_enabled = settings_manager.get("auto_validate", True)
+        self.validation_scheduler = ValidationScheduler(
+            settings_manager.get("validation_delay", 500),
+            settings_manager.get("auto_validate_max_kb", 5120) * 1024,
+        )
     
     def on_text_changed(self):
+        # Изменения фоновых вкладок (например, при создании) не трогают текущий документ
+        sender = self.sender()
+        if sender is not None and sender is not self.text_edit:
+            return
         self.is_modified = True
         self.update_title()
-        self.validation_timer.start(500)  # Валидация через 500мс после остановки печати
+        if not self.auto_validation_enabled:
+            return
+        # characterCount() не копирует текст, поэтому цена нажатия не зависит от размера файла
+        chars = self.text_edit.document().characterCount()
+        delay = self.validation_scheduler.delay_for(chars)
+        if delay is None:
+            self.validation_timer.stop()
+            self.validation_label.setText("⏸ Автопроверка приостановлена (F5)")
+            self.validation_label.setStyleSheet("color: orange; font-weight: bold;")
+            return
+        self.validation_timer.start(delay)
+
+    def validate_now(self):
+        """Немедленная проверка, в том числе когда автопроверка приостановлена"""
+        self.validation_timer.stop()
+        self.auto_validate()
     
     def auto_validate(self):
         """Автоматическая валидация без сообщений"""
+        self._validate_current_document()
+
+    def _validate_current_document(self):
+        # Построчная проверка подсветки уже знает, есть ли ошибки: json.loads
+        # нужен только для корректного документа (для дерева)
+        highlighter = self.highlighter
+        checked = highlighter is not None and highlighter.is_checked()
+        if checked:
+            if highlighter.is_blank():
+                self._show_empty_document()
+                return
+            if highlighter.syntax_errors():
+                self._show_partial_document()
+                return
         try:
-            text = self.text_edit.toPlainText().strip()
-            if not text:
-                self.validation_label.setText("⚠️ Пустой файл")
-                self.validation_label.setStyleSheet("color: orange; font-weight: bold;")
+            if not checked and not self.text_edit.toPlainText().strip():
+                self._show_empty_document()
                 return
             
-            data = json.loads(text)
+            # Скользящее среднее планировщика учитывает только настоящий разбор
+            # с построением дерева: почти нулевые замеры (кэш разбора при
+            # переключении вкладок, пустой документ, ошибки из подсветки)
+            # занизили бы ожидаемое время и учащали проверки больших файлов
+            parsed, _ = self.current_document.cached_parse()
+            started = time.perf_counter()
+            data = self._parsed_document_data()
             self.validation_label.setText("✅ Корректный JSON")
             self.validation_label.setStyleSheet("color: green; font-weight: bold;")
+            self.validation_label.setToolTip("")
+            self._set_extra_selections("errors", [])
             
             # Обновляем дерево
             self.tree_widget.load_json(data)
+            self.current_document.tree_loaded = True
+            if not parsed:
+                self.validation_scheduler.record(
+                    self.text_edit.document().characterCount(), time.perf_counter() - started
+                )
+            self._start_schema_validation()
             
         except json.JSONDecodeError as e:
-            self.validation_label.setText(f"❌ Ошибка: Line {e.lineno}")
-            self.validation_label.setStyleSheet("color: red; font-weight: bold;")
+            self._show_partial_document(e)
+
+    def _show_empty_document(self):
+        self.validation_label.setText("⚠️ Пустой файл")
+        self.validation_label.setStyleSheet("color: orange; font-weight: bold;")
+        self.validation_label.setToolTip("")
+        self._set_extra_selections("errors", [])
+        self._clear_schema_results()
+
+    def _show_partial_document(self, decode_error: Optional[json.JSONDecodeError] = None):
+        """Разбор с восстановлением: все ошибки в тексте и дерево из корректных частей"""
+        with instrumentation.timed("parse.tolerant"):
+            result = parse_tolerant(self.text_edit.toPlainText(), self.current_document.json_lines)
+        errors = result.errors
+        if not errors and decode_error is not None:
+            errors = [(decode_error.lineno, LineError(decode_error.colno - 1, 1, decode_error.msg))]
+        line, first = errors[0]
+        suffix = f" (всего: {len(errors)})" if len(errors) > 1 else ""
+        self.validation_label.setText(f"❌ Ошибка: Line {line}{suffix}")
+        self.validation_label.setStyleSheet("color: red; font-weight: bold;")
+        details = [f"Строка {n}, столбец {e.column + 1}: {e.message}"
+                   for n, e in errors[:MAX_ERRORS_IN_TOOLTIP]]
+        if len(errors) > MAX_ERRORS_IN_TOOLTIP:
+            details.append(f"... и еще {len(errors) - MAX_ERRORS_IN_TOOLTIP}")
+        self.validation_label.setToolTip("\n".join(details))
+        self._mark_syntax_errors(errors)
+        self._clear_schema_results()
+
+        if result.data is not None:
+            self.tree_widget.load_json(result.data)
+        else:
             self.tree_widget.clear()
-    
-    def open_file(self):
-        if self.is_modified:
+        self.current_document.tree_loaded = True
+
+    # --- изменения файлов другими программами ---
+    def _watch_file(self, file_path):
+        """Начинает следить за изменениями файла на диске"""
+        if self.file_watcher is None:
+            from core.file_watch import FileWatcher
+            self.file_watcher = FileWatcher(self)
+            self.file_watcher.fileChanged.connect(self.on_file_changed_externally)
+        self.file_watcher.watch(file_path)
+
+    def _document_for_watched_path(self, path: str) -> Optional[Document]:
+        for doc in self.documents.documents:
+            if doc.file_path is not None and os.path.abspath(doc.file_path) == path:
+                return doc
+        return None
+
+    def on_file_changed_externally(self, change):
+        """Файл изменен на диске: дописанный хвост добавляется, иначе предлагается перезагрузка"""
+        from core.file_watch import APPENDED, DELETED
+        doc = self._document_for_watched_path(change.path)
+        if doc is None:
+            return
+        if change.kind == DELETED:
+            self.info_label.setText(f"Файл удален на диске: {change.path}")
+            return
+        if change.kind == APPENDED and not doc.is_modified:
+            self._append_external_text(doc, change.text)
+            return
+        if doc.follow and not doc.is_modified:
+            self._reload_document(doc)
+            return
+        if doc.reload_prompt_open:
+            return
+        doc.reload_prompt_open = True
+        try:
+            warning = "\nНесохраненные изменения будут потеряны." if doc.is_modified else ""
             reply = QMessageBox.question(
                 self, "Файл изменен",
-                "Хотите сохранить изменения?",
-                QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel
+                f"Файл {doc.file_path.name} изменен другой программой. Перезагрузить?{warning}",
+                QMessageBox.Yes | QMessageBox.No
+            )
+        finally:
+            doc.reload_prompt_open = False
+        if reply == QMessageBox.Yes:
+            self._reload_document(doc)
+
+    def _reload_document(self, doc: Document):
+        if doc is not self.current_document:
+            self._activate_document(doc)
+        self._load_file(doc.file_path)
+
+    def _append_external_text(self, doc: Document, text: str):
+        """Добавляет дописанный в файл хвост в конец документа (и в дерево для JSON Lines)"""
+        document = doc.text_edit.document()
+        hit, data = doc.cached_parse()
+        ends_with_newline = document.characterCount() <= 1 or \
+            document.characterAt(document.characterCount() - 2) == "\u2029"
+        with instrumentation.timed("reload.append"):
+            cursor = QTextCursor(document)
+            cursor.movePosition(QTextCursor.End)
+            cursor.insertText(text)
+        doc.is_modified = False
+        if doc.journal is not None:
+            doc.journal.reset(doc.file_path)
+        if doc is self.current_document:
+            self.is_modified = False
+            self.update_title()
+        else:
+            doc.tree_loaded = False
+            self.tab_widget.setTabText(self.tab_widget.indexOf(doc.page), doc.title())
+
+        # JSON Lines: новые записи разбираются и добавляются в дерево без перестроения
+        if doc.json_lines and hit and ends_with_newline:
+            try:
+                records = loads(text, json_lines=True, exact=True)
+            except json.JSONDecodeError:
+                records = None
+            if records is not None:
+                start = len(data)
+                data.extend(records)
+                doc.cache_parsed(data)
+                if doc.tree_loaded:
+                    doc.tree_widget.append_records(data, start)
+                if doc is self.current_document:
+                    self.validation_timer.stop()
+        if doc.follow:
+            doc.text_edit.moveCursor(QTextCursor.End)
+            doc.text_edit.ensureCursorVisible()
+            doc.tree_widget.scrollToBottom()
+        self.info_label.setText(f"Добавлено из файла: {text.count(chr(10))} строк")
+
+    def toggle_follow(self, checked=None):
+        """Режим слежения за файлом (как tail -f): новые строки добавляются автоматически"""
+        doc = self.current_document
+        enabled = not doc.follow if checked is None else bool(checked)
+        if enabled and self.current_file is None:
+            self.info_label.setText("Слежение доступно только для открытого файла")
+            enabled = False
+        doc.follow = enabled
+        if hasattr(self, 'actionFollow'):
+            self.actionFollow.setChecked(enabled)
+        if self.current_file is not None:
+            if self.file_watcher is None or not self.file_watcher.is_watched(self.current_file):
+                self._watch_file(self.current_file)
+            self.file_watcher.set_follow(self.current_file, enabled)
+        if enabled:
+            self.text_edit.moveCursor(QTextCursor.End)
+            self.text_edit.ensureCursorVisible()
+            self.info_label.setText(f"Слежение за файлом: {self.current_file.name}")
+
+    # --- автосохранение ---
+    def start_autosave(self):
+        """Открывает сессию журналов автосохранения и предлагает восстановить документы после сбоя"""
+        if self.autosave is not None or not settings_manager.get("autosave_enabled", True):
+            return
+        from core.autosave import AutosaveSession
+        try:
+            self.autosave = AutosaveSession(self.autosave_directory)
+        except OSError as e:
+            self.info_label.setText(f"Автосохранение недоступно: {e}")
+            return
+        for doc in self.documents.documents:
+            doc.journal = self.autosave.journal_for(doc.text_edit.document(), doc.file_path)
+            if doc.is_modified:
+                doc.journal.needs_snapshot = True
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.timeout.connect(self.autosave_now)
+        self.autosave_timer.start(max(1, settings_manager.get("autosave_interval_sec", 30)) * 1000)
+        self.offer_recovery()
+
+    def autosave_now(self):
+        """Дописывает накопленные правки всех документов в журналы"""
+        if self.autosave is not None:
+            with instrumentation.timed("autosave"):
+                self.autosave.flush()
+
+    def offer_recovery(self):
+        """Предлагает восстановить документы сессий, завершившихся аварийно"""
+        orphans = self.autosave.orphaned_documents()
+        if orphans:
+            reply = QMessageBox.question(
+                self, "Восстановление документов",
+                f"Найдены несохраненные изменения после аварийного завершения "
+                f"(документов: {len(orphans)}). Восстановить их?",
+                QMessageBox.Yes | QMessageBox.No
             )
             if reply == QMessageBox.Yes:
-                self.save_file()
-            elif reply == QMessageBox.Cancel:
-                return
-        
+                self._restore_documents(orphans)
+        self.autosave.remove_orphans(orphans)
+
+    def _restore_documents(self, recovered):
+        restored = 0
+        for item in recovered:
+            reuse = self.current_file is None and not self.is_modified and not self.text_edit.toPlainText()
+            doc = self.current_document if reuse else self.new_document()
+            if not item.replay(doc.text_edit.document()):
+                continue
+            restored += 1
+            self.current_file = Path(item.file_path) if item.file_path else None
+            self.is_modified = True
+            self.update_title()
+        self.info_label.setText(f"Восстановлено документов: {restored} из {len(recovered)}")
+
+    # --- проверка по JSON Schema ---
+    def _schema_for_current_file(self) -> Optional[str]:
+        """Путь схемы, привязанной к текущему файлу (None — схемы нет)"""
+        raw = settings_manager.get("schema_associations", "")
+        if not raw or self.current_file is None:
+            return None
+        from core.schema import find_schema, parse_associations
+        return find_schema(self.current_file, parse_associations(raw))
+
+    def _compiled_schema(self):
+        """Скомпилированная схема текущего файла из кэша; None, если схемы нет или она некорректна"""
+        schema_path = self._schema_for_current_file()
+        if schema_path is None:
+            return None
+        from core.schema import SchemaError, schema_cache
+        try:
+            return schema_cache.get(schema_path)
+        except SchemaError as e:
+            self.info_label.setText(f"Схема не загружена: {e}")
+            return None
+
+    def _cancel_schema_validation(self, doc: Document, wait: bool = False):
+        worker = doc.schema_worker
+        if worker is not None:
+            worker.cancel()
+            if wait:
+                worker.wait()
+            doc.schema_worker = None
+
+    def _start_schema_validation(self):
+        """Запускает фоновую проверку корректного документа по привязанной схеме"""
+        doc = self.current_document
+        self._cancel_schema_validation(doc)
+        schema = self._compiled_schema() if not doc.json_lines else None
+        if schema is None:
+            self._clear_schema_results()
+            return
+        from core.schema import SchemaValidationWorker
+        token = (doc, doc.text_edit.document().revision())
+        worker = SchemaValidationWorker(schema, self.text_edit.toPlainText(), token, MAX_ERROR_MARKS, self)
+        worker.validated.connect(self._on_schema_validated)
+        # Проверка может завершиться без результата (отмена, ошибка разбора):
+        # ссылку на поток снимаем по finished, до удаления объекта Qt
+        worker.finished.connect(lambda: self._on_schema_worker_finished(doc, worker))
+        worker.finished.connect(worker.deleteLater)
+        doc.schema_worker = worker
+        worker.start()
+
+    def _on_schema_worker_finished(self, doc: Document, worker):
+        if doc.schema_worker is worker:
+            doc.schema_worker = None
+
+    def wait_for_schema_validation(self, timeout_ms: int = 5000) -> bool:
+        """Дожидается фоновой проверки по схеме и применяет ее результат"""
+        worker = self.current_document.schema_worker
+        if worker is not None and not worker.wait(timeout_ms):
+            return False
+        QApplication.processEvents()
+        return True
+
+    def _on_schema_validated(self, token, results):
+        """Результат фоновой проверки; устаревшие результаты (текст уже изменен) отбрасываются"""
+        doc, revision = token
+        if doc not in self.documents.documents or doc.text_edit.document().revision() != revision:
+            return
+        if doc.schema_worker is self.sender():
+            doc.schema_worker = None
+        doc.schema_results = results
+        if doc is self.current_document:
+            self._show_schema_results(results)
+
+    def _show_schema_results(self, results):
+        """Статус, подчеркивания и отметки в дереве для нарушений схемы"""
+        if not results:
+            self.validation_label.setText("✅ Соответствует схеме")
+            self.validation_label.setStyleSheet("color: green; font-weight: bold;")
+            self.validation_label.setToolTip("")
+        else:
+            self.validation_label.setText(f"⚠️ Схема: {len(results)} нарушений")
+            self.validation_label.setStyleSheet("color: #d35400; font-weight: bold;")
+            details = [f"{self._format_schema_path(v.path)}: {v.message}"
+                       for v, _ in results[:MAX_ERRORS_IN_TOOLTIP]]
+            if len(results) > MAX_ERRORS_IN_TOOLTIP:
+                details.append(f"... и еще {len(results) - MAX_ERRORS_IN_TOOLTIP}")
+            self.validation_label.setToolTip("\n".join(details))
+
+        schema_format = QTextCharFormat()
+        schema_format.setUnderlineStyle(QTextCharFormat.WaveUnderline)
+        schema_format.setUnderlineColor(QColor("#e67e22"))
+        selections = []
+        for violation, span in results[:MAX_ERROR_MARKS]:
+            if span is None:
+                continue
+            line, column, length = span
+            selection = QTextEdit.ExtraSelection()
+            selection.cursor = self._error_cursor(line, LineError(column, length, violation.message))
+            selection.format = schema_format
+            selections.append(selection)
+        self._set_extra_selections("schema", selections)
+        self.tree_widget.mark_violations([(v.path, v.message) for v, _ in results[:MAX_ERROR_MARKS]])
+
+    @staticmethod
+    def _format_schema_path(path) -> str:
+        if not path:
+            return "$"
+        return "$" + "".join(f"[{p}]" if isinstance(p, int) else f".{p}" for p in path)
+
+    def _clear_schema_results(self):
+        doc = self.current_document
+        self._cancel_schema_validation(doc)
+        if doc.schema_results or doc.extra_selections.get("schema"):
+            doc.schema_results = []
+            self._set_extra_selections("schema", [])
+            self.tree_widget.mark_violations([])
+
+    def show_schema_dialog(self):
+        """Диалог привязки схем к файлам"""
+        SchemaAssociationsDialog = _load_dialog("dialogs.schema_dialog", "SchemaAssociationsDialog")
+        if not SchemaAssociationsDialog:
+            QMessageBox.information(self, "Схемы JSON", "Проверка по схемам недоступна в базовой версии")
+            return
+        from core.schema import dump_associations, parse_associations
+        associations = parse_associations(settings_manager.get("schema_associations", ""))
+        dialog = SchemaAssociationsDialog(associations, self.current_file, self)
+        if dialog.exec_():
+            settings_manager.set("schema_associations", dump_associations(dialog.associations()))
+            self.validate_now()
+
+    def _error_cursor(self, line: int, error) -> QTextCursor:
+        """Курсор, выделяющий фрагмент ошибки в тексте"""
+        block = self.text_edit.document().findBlockByNumber(line - 1)
+        end_of_block = block.position() + max(block.length() - 1, 0)
+        start = min(block.position() + error.column, end_of_block)
+        cursor = QTextCursor(block)
+        if error.length == 0 and start > block.position():
+            # Ошибка в конце документа: подчеркиваем последний символ
+            start -= 1
+        cursor.setPosition(start)
+        cursor.setPosition(min(start + max(error.length, 1), end_of_block), QTextCursor.KeepAnchor)
+        return cursor
+
+    def _mark_syntax_errors(self, errors):
+        """Подчеркивает фрагменты с ошибками волнистой линией"""
+        error_format = QTextCharFormat()
+        error_format.setUnderlineStyle(QTextCharFormat.WaveUnderline)
+        error_format.setUnderlineColor(QColor("red"))
+        selections = []
+        for line, error in errors[:MAX_ERROR_MARKS]:
+            selection = QTextEdit.ExtraSelection()
+            selection.cursor = self._error_cursor(line, error)
+            selection.format = error_format
+            selections.append(selection)
+        self._set_extra_selections("errors", selections)
+
+    def _set_extra_selections(self, kind: str, selections: list):
+        """Обновляет выделения одного вида, сохраняя остальные"""
+        extra = self.current_document.extra_selections
+        if not selections and not extra.get(kind):
+            return
+        extra[kind] = selections
+        self.text_edit.setExtraSelections([s for group in extra.values() for s in group])
+
+    def goto_next_error(self):
+        """Переводит курсор к следующей ошибке синтаксиса (по кругу)"""
+        errors = self.highlighter.syntax_errors() if self.highlighter is not None else None
+        if not errors:
+            self.info_label.setText("Ошибок не найдено")
+            return
+        position = self.text_edit.textCursor().position()
+        cursors = [self._error_cursor(line, error) for line, error in errors]
+        target = next((c for c in cursors if c.selectionStart() > position), cursors[0])
+        cursor = self.text_edit.textCursor()
+        cursor.setPosition(target.selectionStart())
+        self.text_edit.setTextCursor(cursor)
+        self.text_edit.setFocus()
+        index = cursors.index(target)
+        self.info_label.setText(f"Ошибка {index + 1} из {len(errors)}: {errors[index][1].message}")
+    
+    def on_cursor_position_changed(self):
+        # Курсоры фоновых вкладок не трогают выделения текущего документа
+        if self.sender() is not self.text_edit:
+            return
+        self.update_bracket_match()
+        self.breadcrumb_timer.start()
+
+    def update_bracket_match(self):
+        """Подсвечивает скобку у курсора и парную ей (непарную — красным)"""
+        matcher = self.current_document.bracket_matcher
+        match = matcher.match(self.text_edit.textCursor().position()) if matcher is not None else None
+        selections = []
+        if match is not None:
+            bracket_format = QTextCharFormat()
+            bracket_format.setBackground(QColor("#c8e6c9" if match[1] is not None else "#ffcdd2"))
+            for position in match:
+                if position is None:
+                    continue
+                selection = QTextEdit.ExtraSelection()
+                selection.cursor = QTextCursor(self.text_edit.document())
+                selection.cursor.setPosition(position)
+                selection.cursor.setPosition(position + 1, QTextCursor.KeepAnchor)
+                selection.format = bracket_format
+                selections.append(selection)
+        self._set_extra_selections("brackets", selections)
+
+    def goto_matching_bracket(self):
+        """Переводит курсор к скобке, парной скобке у курсора"""
+        matcher = self.current_document.bracket_matcher
+        cursor = self.text_edit.textCursor()
+        match = matcher.match(cursor.position()) if matcher is not None else None
+        if match is None or match[1] is None:
+            self.info_label.setText("Парная скобка не найдена")
+            return
+        bracket, paired = match
+        # Курсор встает с той же стороны от парной скобки, что и от исходной
+        cursor.setPosition(paired + (cursor.position() - bracket))
+        self.text_edit.setTextCursor(cursor)
+        self.text_edit.ensureCursorVisible()
+
+    def update_breadcrumbs(self):
+        """Показывает путь JSON у курсора (у начала выделения)"""
+        if self.breadcrumb_bar is None:
+            return
+        resolver = self.current_document.path_resolver
+        found = None
+        if resolver is not None:
+            with instrumentation.timed("breadcrumbs.resolve"):
+                found = resolver.resolve(self.text_edit.textCursor().selectionStart())
+        self.breadcrumb_bar.set_path(found)
+
+    def goto_position(self, position: int):
+        """Переводит курсор в позицию текста (щелчок по части пути)"""
+        cursor = self.text_edit.textCursor()
+        cursor.setPosition(min(position, self.text_edit.document().characterCount() - 1))
+        self.text_edit.setTextCursor(cursor)
+        self.text_edit.ensureCursorVisible()
+        self.text_edit.setFocus()
+
+    def open_file(self):
         file_path, _ = QFileDialog.getOpenFileName(
             self, "Open JSON File", "",
             "JSON Files (*.json);;All Files (*)"
         )
         
         if file_path:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    # Проверяем валидность
-                    json.loads(content)
-                    self.text_edit.setPlainText(content)
-                    self.current_file = Path(file_path)
-                    self.is_modified = False
-                    self.update_title()
-                    self.info_label.setText(f"Opened: {file_path}")
-                    
-                    # Добавляем в недавние файлы
-                    settings_manager.add_recent_file(file_path)
-                    self.load_recent_files()
-            except json.JSONDecodeError as e:
-                QMessageBox.warning(
-                    self, "Некорректный JSON",
-                    f"Этот файл содержит некорректный JSON:\n{str(e)}"
-                )
-            except Exception as e:
-                QMessageBox.critical(
-                    self, "Ошибка",
-                    f"Не удается открыть:\n{str(e)}"
-                )
+            self._load_file(file_path)
+
+    def _load_file(self, file_path) -> bool:
+        """Открывает файл во вкладке (уже открытой, пустой текущей или новой)"""
+        started = time.perf_counter()
+        json_lines = is_json_lines_path(file_path)
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+                file_size = os.fstat(f.fileno()).st_size
+            # Проверяем валидность; результат разбора сохраняем в кэш вкладки
+            data = loads(content, json_lines, exact=True)
+        except json.JSONDecodeError as e:
+            QMessageBox.warning(
+                self, "Некорректный JSON",
+                f"Этот файл содержит некорректный JSON:\n{str(e)}"
+            )
+            return False
+        except Exception as e:
+            QMessageBox.critical(
+                self, "Ошибка",
+                f"Не удается открыть:\n{str(e)}"
+            )
+            return False
+
+        doc = self._document_for_file(file_path)
+        self._activate_document(doc)
+        doc.json_lines = json_lines
+        if doc.highlighter is not None:
+            doc.highlighter.set_json_lines(json_lines)
+        if doc.file_path is None or self.text_edit.toPlainText() != content:
+            self.text_edit.setPlainText(content)
+        self.current_document.cache_parsed(data)
+        if doc.journal is not None:
+            doc.journal.reset(file_path)
+        self._watch_file(file_path)
+        self.current_file = Path(file_path)
+        self.is_modified = False
+        self.update_title()
+        self.info_label.setText(f"Opened: {file_path}")
+
+        # Добавляем в недавние файлы и запоминаем, сколько длилось открытие
+        elapsed = time.perf_counter() - started
+        if instrumentation.enabled:
+            instrumentation.record("open", elapsed)
+        if self.recent_files_cache is not None:
+            self.recent_files_cache.record_open(str(file_path), elapsed, file_size)
+        settings_manager.add_recent_file(str(file_path))
+        self.load_recent_files()
+        return True
     
     def save_file(self):
         if self.current_file:
@@ -290,13 +1028,47 @@ class JsonEditor(QMainWindow):
                 QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel
             )
             if reply == QMessageBox.Yes:
-                if not self.save_file():
+                if not (self.save_file() and self.wait_for_save()):
                     return
             elif reply == QMessageBox.Cancel:
                 return
 
+        if len(self.documents.documents) > 1:
+            # Закрываем вкладку и переходим на соседнюю
+            doc = self.current_document
+            self.validation_timer.stop()
+            self.wait_for_save(doc)
+            self._cancel_schema_validation(doc, wait=True)
+            if doc.journal is not None and self.autosave is not None:
+                self.autosave.remove_journal(doc.journal)
+            if doc.file_path is not None and self.file_watcher is not None:
+                self.file_watcher.unwatch(doc.file_path)
+            self.documents.remove(doc)
+            self.current_document = None
+            index = self.tab_widget.indexOf(doc.page)
+            self.tab_widget.removeTab(index)
+            doc.page.deleteLater()
+            next_doc = self.documents.find_by_page(self.tab_widget.currentWidget())
+            self._activate_document(next_doc)
+            self.update_title()
+            if not next_doc.tree_loaded and self.text_edit.toPlainText().strip():
+                self.auto_validate()
+            self.info_label.setText("Документ закрыт")
+            return
+
         self.text_edit.clear()
         self.tree_widget.clear()
+        self.current_document.unload()
+        if self.current_document.journal is not None:
+            self.current_document.journal.reset()
+        if self.current_file is not None and self.file_watcher is not None:
+            self.file_watcher.unwatch(self.current_file)
+        self.current_document.follow = False
+        self.current_document.json_lines = False
+        if self.highlighter is not None:
+            self.highlighter.set_json_lines(False)
+        if hasattr(self, 'actionFollow'):
+            self.actionFollow.setChecked(False)
         self.current_file = None
         self.is_modified = False
         self.update_title()
@@ -304,44 +1076,123 @@ class JsonEditor(QMainWindow):
         self.validation_label.setStyleSheet("color: orange; font-weight: bold;")
         self.info_label.setText("Документ закрыт")
     
-    def _save_to_file(self, file_path: Path):
+    def _save_validation_error(self, content: str) -> Optional[str]:
+        """Ошибка, из-за которой документ нельзя сохранить (None — документ корректен).
+        Использует результат последней проверки и разбирает текст, только если его нет."""
+        hit, _ = self.current_document.cached_parse()
+        if hit:
+            return None
+        highlighter = self.highlighter
+        if highlighter is not None and highlighter.is_checked():
+            if highlighter.is_blank():
+                return "Документ пуст"
+            errors = highlighter.syntax_errors()
+            if not errors:
+                return None
+            line, error = errors[0]
+            return f"Строка {line}, столбец {error.column + 1}: {error.message}"
         try:
-            # Валидация перед сохранением
-            content = self.text_edit.toPlainText()
-            json.loads(content)  # Проверка валидности
-            
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            
-            self.current_file = file_path
-            self.is_modified = False
-            self.update_title()
-            self.info_label.setText(f"Сохранено: {file_path}")
-            
-            # Добавляем в недавние файлы
-            settings_manager.add_recent_file(str(file_path))
-            self.load_recent_files()
-            
-            QMessageBox.information(self, "Успешно!", "Файл сохранен успешно!")
-            return True
+            self._parse_text(content)
         except json.JSONDecodeError as e:
+            return str(e)
+        return None
+
+    def _save_to_file(self, file_path: Path) -> bool:
+        """Запускает фоновое атомарное сохранение; True — сохранение начато"""
+        content = self.text_edit.toPlainText()
+        error = self._save_validation_error(content)
+        if error is not None:
             QMessageBox.warning(
                 self, "Некорректный JSON!",
-                f"Не удалось сохранить JSON:\n{str(e)}"
-            )
-            return False
-        except Exception as e:
-            QMessageBox.critical(
-                self, "Ошибка!",
-                f"Не удалось сохранить по этому пути:\n{str(e)}"
+                f"Не удалось сохранить JSON:\n{error}"
             )
             return False
+
+        from core.atomic_save import SaveWorker
+        doc = self.current_document
+        # Сохранения одного документа выполняются по очереди
+        self.wait_for_save(doc)
+        if self.file_watcher is not None:
+            # Собственная запись не считается внешним изменением
+            self.file_watcher.suspend(file_path)
+        worker = SaveWorker(file_path, content, self)
+        worker.document = doc
+        worker.revision = doc.text_edit.document().revision()
+        worker.progress.connect(self._on_save_progress)
+        worker.saved.connect(self._on_saved)
+        worker.failed.connect(self._on_save_failed)
+        worker.finished.connect(worker.deleteLater)
+        doc.save_worker = worker
+        doc.last_save_error = None
+        self.info_label.setText(f"Сохранение: {file_path}...")
+        worker.start()
+        return True
+
+    def wait_for_save(self, doc: Optional[Document] = None) -> bool:
+        """Дожидается фонового сохранения документа; True, если оно прошло успешно"""
+        doc = doc or self.current_document
+        worker = doc.save_worker
+        if worker is not None:
+            worker.wait()
+            # Доставляем сигналы завершения, отправленные из потока
+            QApplication.processEvents()
+        return doc.last_save_error is None
+
+    def _on_save_progress(self, written: int, total: int):
+        percent = written * 100 // total if total else 100
+        self.save_progress.setValue(percent)
+        self.save_progress.show()
+        self.info_label.setText(f"Сохранение: {percent}%")
+
+    def _finish_save(self, worker) -> Document:
+        doc = worker.document
+        if doc.save_worker is worker:
+            doc.save_worker = None
+        self.save_progress.hide()
+        return doc
+
+    def _on_saved(self, path: str):
+        worker = self.sender()
+        doc = self._finish_save(worker)
+        file_path = Path(path)
+        if doc.file_path is not None and doc.file_path != file_path and self.file_watcher is not None:
+            self.file_watcher.unwatch(doc.file_path)
+        doc.file_path = file_path
+        self._watch_file(file_path)
+        # Правки, сделанные во время сохранения, остаются несохраненными
+        if doc.text_edit.document().revision() == worker.revision:
+            doc.is_modified = False
+            if doc.journal is not None:
+                doc.journal.reset(file_path)
+        if doc is self.current_document:
+            self.current_file = doc.file_path
+            self.is_modified = doc.is_modified
+            self.update_title()
+        elif doc in self.documents.documents:
+            self.tab_widget.setTabText(self.tab_widget.indexOf(doc.page), doc.title())
+        self.info_label.setText(f"Сохранено: {file_path}")
+
+        # Добавляем в недавние файлы
+        settings_manager.add_recent_file(str(file_path))
+        self.load_recent_files()
+
+    def _on_save_failed(self, message: str):
+        worker = self.sender()
+        doc = self._finish_save(worker)
+        doc.last_save_error = message
+        if self.file_watcher is not None:
+            self.file_watcher.refresh(worker.path)
+        self.info_label.setText("Ошибка сохранения")
+        QMessageBox.critical(
+            self, "Ошибка!",
+            f"Не удалось сохранить по этому пути:\n{message}"
+        )
     
     def format_json(self):
         try:
-            text = self.text_edit.toPlainText()
-            data = json.loads(text)
-            formatted = json.dumps(data, indent=2, ensure_ascii=False)
+            data = self._parsed_document_data()
+            with instrumentation.timed("format"):
+                formatted = self._dump_document(data)
             self.text_edit.setPlainText(formatted)
             self.info_label.setText("JSON отформатирован успешно!")
         except json.JSONDecodeError as e:
@@ -352,9 +1203,9 @@ class JsonEditor(QMainWindow):
     
     def minify_json(self):
         try:
-            text = self.text_edit.toPlainText()
-            data = json.loads(text)
-            minified = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+            data = self._parsed_document_data()
+            with instrumentation.timed("minify"):
+                minified = self._dump_document(data, compact=True)
             self.text_edit.setPlainText(minified)
             self.info_label.setText("JSON минифицировать успешно!")
         except json.JSONDecodeError as e:
@@ -370,7 +1221,18 @@ class JsonEditor(QMainWindow):
                 QMessageBox.warning(self, "Пустой документ!", "Этот документ пустой!")
                 return
             
-            data = json.loads(text)
+            data = self._parse_text(text)
+            schema = self._compiled_schema() if not self.current_document.json_lines else None
+            if schema is not None:
+                violations = schema.validate(data)
+                if violations:
+                    details = "\n".join(f"{self._format_schema_path(v.path)}: {v.message}"
+                                        for v in violations[:MAX_ERRORS_IN_TOOLTIP])
+                    QMessageBox.warning(
+                        self, "Нарушения схемы",
+                        f"⚠️ Документ не соответствует схеме ({len(violations)}):\n\n{details}"
+                    )
+                    return
             QMessageBox.information(
                 self, "Корректный JSON",
                 f"✅ Документ соответствует формату JSON!\n\nТип: {type(data).__name__}"
@@ -381,16 +1243,22 @@ class JsonEditor(QMainWindow):
                 f"❌ JSON Ошибка:\n\nСтрока {e.lineno}, Столбец {e.colno}\n{e.msg}"
             )
     
+    def _text_edits(self):
+        """Текстовые редакторы всех открытых вкладок"""
+        return [doc.text_edit for doc in self.documents.documents]
+
     def change_font(self, font):
         current_font = self.text_edit.font()
         current_font.setFamily(font.family())
-        self.text_edit.setFont(current_font)
+        for text_edit in self._text_edits():
+            text_edit.setFont(current_font)
         settings_manager.set("font_family", font.family())
     
     def change_font_size(self, size):
         current_font = self.text_edit.font()
         current_font.setPointSize(size)
-        self.text_edit.setFont(current_font)
+        for text_edit in self._text_edits():
+            text_edit.setFont(current_font)
         settings_manager.set("font_size", size)
 
     def change_text_color(self):
@@ -412,19 +1280,24 @@ class JsonEditor(QMainWindow):
         text_color = settings_manager.get("text_color", "#000000")
         bg_color = settings_manager.get("background_color", "#ffffff")
         
-        # Применяем цвета к текстовому редактору
-        self.text_edit.setStyleSheet(
-            f"QTextEdit {{ color: {text_color}; background-color: {bg_color}; }}"
-        )
+        # Применяем цвета к текстовым редакторам всех вкладок
+        for text_edit in self._text_edits():
+            text_edit.setStyleSheet(
+                f"QTextEdit {{ color: {text_color}; background-color: {bg_color}; }}"
+            )
     
     def load_settings(self):
         """Загружает настройки приложения"""
+        # Библиотека разбора и сериализации JSON (auto — самая быстрая из установленных)
+        codec.set_backend(settings_manager.get("json_backend", codec.AUTO))
+
         # Загружаем настройки шрифта
         font_family = settings_manager.get("font_family", "Consolas")
         font_size = settings_manager.get("font_size", 12)
         
         font = QFont(font_family, font_size)
-        self.text_edit.setFont(font)
+        for text_edit in self._text_edits():
+            text_edit.setFont(font)
         
         # Применяем сохраненные цвета
         self.apply_colors()
@@ -455,6 +1328,7 @@ class JsonEditor(QMainWindow):
     
     def show_search_dialog(self):
         """Показывает диалог поиска и замены"""
+        SearchReplaceDialog = _load_dialog("dialogs.search_dialog", "SearchReplaceDialog")
         if not SearchReplaceDialog:
             QMessageBox.information(self, "Поиск", "Функция поиска недоступна в базовой версии")
             return
@@ -468,8 +1342,154 @@ class JsonEditor(QMainWindow):
         dialog.set_editor(editor)
         dialog.exec_()
     
+    def show_find_in_files_dialog(self):
+        """Показывает немодальный диалог поиска по файлам каталога"""
+        FindInFilesDialog = _load_dialog("dialogs.find_in_files_dialog", "FindInFilesDialog")
+        if not FindInFilesDialog:
+            QMessageBox.information(self, "Поиск в файлах", "Функция поиска недоступна в базовой версии")
+            return
+        if getattr(self, 'find_in_files_dialog', None) is None:
+            self.find_in_files_dialog = FindInFilesDialog(self)
+            if self.current_file:
+                self.find_in_files_dialog.dir_edit.setText(str(self.current_file.parent))
+        self.find_in_files_dialog.show()
+        self.find_in_files_dialog.raise_()
+        self.find_in_files_dialog.activateWindow()
+
+    def show_diff_dialog(self):
+        """Показывает немодальный диалог сравнения текущего документа с файлом"""
+        JsonDiffDialog = _load_dialog("dialogs.diff_dialog", "JsonDiffDialog")
+        if not JsonDiffDialog:
+            QMessageBox.information(self, "Сравнение JSON", "Сравнение недоступно в базовой версии")
+            return
+        if getattr(self, 'diff_dialog', None) is None:
+            self.diff_dialog = JsonDiffDialog(self.text_edit.toPlainText, self.current_file, self)
+        self.diff_dialog.current_file = self.current_file
+        self.diff_dialog.show()
+        self.diff_dialog.raise_()
+        self.diff_dialog.activateWindow()
+
+    def show_table_view(self, node: int):
+        """Показывает массив узла таблицей; правки ячеек идут через edit_value
+        того документа, из которого таблица открыта"""
+        JsonTableDialog = _load_dialog("dialogs.table_dialog", "JsonTableDialog")
+        if not JsonTableDialog:
+            QMessageBox.information(self, "Таблица", "Табличный просмотр недоступен в базовой версии")
+            return
+        doc = self.current_document
+        path = self.tree_widget.nodes.path(node)
+
+        def load_rows():
+            if doc not in self.documents.documents:
+                return None
+            if doc is not self.current_document:
+                self._activate_document(doc)
+            try:
+                return self._get_by_path(self._parsed_document_data(), path)
+            except (KeyError, IndexError, TypeError, ValueError):
+                return None
+
+        rows = load_rows()
+        if not isinstance(rows, list):
+            QMessageBox.information(self, "Таблица", f"По пути {path} нет массива")
+            return
+        dialog = JsonTableDialog(rows, path, load_rows, self)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        dialog.valueEdited.connect(lambda value_path, text: self._edit_table_value(doc, value_path, text))
+        dialog.finished.connect(lambda: self.table_dialogs.remove(dialog))
+        self.table_dialogs.append(dialog)
+        dialog.show()
+
+    def _edit_table_value(self, doc, path: list, text: str):
+        if doc not in self.documents.documents:
+            self.info_label.setText("Документ таблицы закрыт")
+            return
+        if doc is not self.current_document:
+            self._activate_document(doc)
+        self.edit_value(path, text)
+
+    def open_file_at(self, file_path, line: int = 0):
+        """Открывает файл и ставит курсор на указанную строку (нумерация с 1)"""
+        self.open_recent_file(file_path)
+        if line > 0 and self.current_file == Path(file_path):
+            block = self.text_edit.document().findBlockByNumber(line - 1)
+            if block.isValid():
+                cursor = self.text_edit.textCursor()
+                cursor.setPosition(block.position())
+                self.text_edit.setTextCursor(cursor)
+                self.text_edit.setFocus()
+
+    def toggle_fold(self):
+        """Сворачивает или разворачивает блок под курсором"""
+        folding = self.current_document.folding
+        if folding is None:
+            return
+        if not folding.toggle():
+            self.info_label.setText("Нет блока для свертки (или проверка синтаксиса не завершена)")
+
+    def fold_to_level(self, level=None):
+        """Сворачивает все блоки глубже заданного уровня"""
+        folding = self.current_document.folding
+        if folding is None:
+            return
+        if level is None:
+            level, ok = QInputDialog.getInt(self, "Свертка", "Оставить развернутыми уровней:", 1, 0, 1000)
+            if not ok:
+                return
+        count = folding.fold_to_level(level)
+        self.info_label.setText(f"Свернуто блоков: {count}")
+
+    def unfold_all(self):
+        if self.current_document.folding is not None:
+            self.current_document.folding.unfold_all()
+
+    def toggle_minimap(self, checked=None):
+        """Показывает или скрывает мини-карту во всех вкладках"""
+        visible = not settings_manager.get("show_minimap", True) if checked is None else bool(checked)
+        settings_manager.set("show_minimap", visible)
+        for doc in self.documents.documents:
+            if doc.folding is not None:
+                doc.folding.set_minimap_visible(visible)
+        if hasattr(self, 'actionMinimap'):
+            self.actionMinimap.setChecked(visible)
+
+    def toggle_performance_panel(self, checked=None):
+        """Показывает или скрывает панель «Производительность»"""
+        if self.performance_panel is None:
+            from widgets.performance_panel import PerformancePanel
+            self.performance_panel = PerformancePanel(self)
+            self.addDockWidget(Qt.BottomDockWidgetArea, self.performance_panel)
+            self.performance_panel.hide()
+        visible = not self.performance_panel.isVisible() if checked is None else checked
+        self.performance_panel.setVisible(visible)
+        if hasattr(self, 'actionPerformance'):
+            self.actionPerformance.setChecked(visible)
+
+    def on_instrumentation_toggled(self, enabled: bool):
+        """Включает или выключает сбор метрик и показ замеров в статус-баре"""
+        instrumentation.enabled = bool(enabled)
+        settings_manager.set("instrumentation_enabled", bool(enabled))
+        self.perf_label.setVisible(bool(enabled))
+        if enabled:
+            self.perf_label_timer.start(1000)
+            self.update_perf_label()
+        else:
+            self.perf_label_timer.stop()
+
+    def update_perf_label(self):
+        """Выводит длительность последней операции и пик памяти"""
+        name = instrumentation.last_operation
+        parts = []
+        if name is not None:
+            parts.append(f"⏱ {name}: {instrumentation.histograms[name].last * 1000:.1f} мс")
+        peak = instrumentation.peak_memory_kb()
+        if peak is not None:
+            parts.append(f"пик {peak / 1024:.0f} МБ")
+        self.perf_label.setText(" · ".join(parts) if parts else "⏱ нет замеров")
+
     def show_export_dialog(self):
         """Показывает диалог экспорта"""
+        ExportDialog = _load_dialog("dialogs.export_dialog", "ExportDialog")
         if ExportDialog:
             try:
                 text = self.text_edit.toPlainText()
@@ -477,7 +1497,7 @@ class JsonEditor(QMainWindow):
                     QMessageBox.warning(self, "Пустой документ", "Нет данных для экспорта!")
                     return
                 
-                data = json.loads(text)
+                data = self._parse_text(text)
                 dialog = ExportDialog(data, self)
                 dialog.exec_()
             except json.JSONDecodeError:
@@ -487,6 +1507,7 @@ class JsonEditor(QMainWindow):
     
     def show_about_dialog(self):
         """Показывает диалог 'О программе'"""
+        AboutDialog = _load_dialog("dialogs.about_dialog", "AboutDialog")
         if AboutDialog:
             dialog = AboutDialog(self)
             dialog.exec_()
@@ -498,7 +1519,34 @@ class JsonEditor(QMainWindow):
                 "© 2025 JSON Editor Pro Team")
     
     def load_recent_files(self):
-        """Загружает список недавних файлов в меню"""
+        """Строит меню недавних файлов из кэша и запускает фоновую проверку путей"""
+        self._build_recent_files_menu()
+        if self.recent_files_cache is not None:
+            self.recent_files_cache.refresh(settings_manager.get_recent_files())
+
+    def _on_recent_files_checked(self):
+        """Фоновая проверка завершена — обновляем меню и сохраняем сведения"""
+        recent_files = settings_manager.get_recent_files()
+        self.recent_files_cache.save(recent_files)
+        self._build_recent_files_menu()
+
+    def _recent_file_label(self, file_path: str) -> str:
+        """Подпись пункта меню: имя, размер и время последнего открытия"""
+        name = Path(file_path).name
+        if self.recent_files_cache is None:
+            return name
+        info = self.recent_files_cache.info(file_path)
+        if info.stale:
+            return f"{name} — недоступен"
+        details = []
+        if info.size is not None:
+            details.append(format_size(info.size))
+        if info.open_seconds is not None:
+            details.append(f"открыт за {info.open_seconds:.2f} с")
+        return f"{name} — {', '.join(details)}" if details else name
+
+    def _build_recent_files_menu(self):
+        """Заполняет меню недавних файлов без обращения к диску"""
         recent_files = settings_manager.get_recent_files()
         if self.recent_files_menu is None:
             # Если меню недавних файлов не найдено из UI, создадим временное
@@ -515,10 +1563,10 @@ class JsonEditor(QMainWindow):
         self.recent_files_menu.clear()
         
         for file_path in recent_files:
-            if Path(file_path).exists():
-                action = QAction(Path(file_path).name, self)
-                action.triggered.connect(lambda checked, path=file_path: self.open_recent_file(path))
-                self.recent_files_menu.addAction(action)
+            action = QAction(self._recent_file_label(file_path), self)
+            action.setToolTip(file_path)
+            action.triggered.connect(lambda checked, path=file_path: self.open_recent_file(path))
+            self.recent_files_menu.addAction(action)
         
         if recent_files:
             self.recent_files_menu.addSeparator()
@@ -528,17 +1576,7 @@ class JsonEditor(QMainWindow):
     
     def open_recent_file(self, file_path):
         """Открывает недавний файл"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                json.loads(content)  # Проверка валидности
-                self.text_edit.setPlainText(content)
-                self.current_file = Path(file_path)
-                self.is_modified = False
-                self.update_title()
-                self.info_label.setText(f"Opened: {file_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удается открыть файл:\n{str(e)}")
+        return self._load_file(file_path)
     
     def clear_recent_files(self):
         """Очищает список недавних файлов"""
@@ -558,38 +1596,41 @@ class JsonEditor(QMainWindow):
         last = path[-1]
         cur[last] = value
 
-    def on_tree_item_selected(self, path, occurrence=0):
+    def on_tree_item_selected(self, node, occurrence=0):
         """Быстрое выделение значения в тексте без повторного парсинга JSON.
-        При наличии у текущего элемента заранее сохраненного текста значения
-        (JsonTreeWidget кладет в UserRole+2), используем его напрямую.
+        Для листа текст значения уже сохранен в хранилище узлов дерева;
+        путь восстанавливается по номеру узла только для сообщений и фолбэка.
         """
         text = self.text_edit.toPlainText()
+        nodes = self.tree_widget.nodes
+        path = nodes.path(node)
         rep = None
-        try:
-            current_item = self.tree_widget.currentItem()
-            kv_key_literal = None
-            if current_item is not None:
-                rep = current_item.data(0, Qt.UserRole + 2)  # значение как JSON-строка
-                key_name = current_item.data(0, Qt.UserRole + 3)
-                container_path = current_item.data(0, Qt.UserRole + 4)  # путь родителя
-                # Если есть имя ключа (объект), строим шаблон "\"key\": <value>"
-                if key_name is not None and rep is not None:
-                    key_literal = json.dumps(key_name, ensure_ascii=False)
-                    kv_key_literal = f"{key_literal}: {rep}"
-        except Exception:
-            rep = None
-            kv_key_literal = None
+        kv_key_literal = None
+        leaf = nodes.leaf(node)
+        if leaf is not None:
+            rep = leaf.text  # значение как JSON-строка
+            key_name = nodes.key(node)
+            # Если есть имя ключа (объект), строим шаблон "\"key\": <value>"
+            if isinstance(key_name, str):
+                key_literal = json.dumps(key_name, ensure_ascii=False)
+                kv_key_literal = f"{key_literal}: {rep}"
 
         if rep is None:
             # Фолбэк: парсим только если нужно
             try:
-                data = json.loads(text)
+                data = self._parse_text(text)
                 value = self._get_by_path(data, path)
-                rep = json.dumps(value, ensure_ascii=False)
+                rep = codec.dumps(value, exact=True)
             except Exception:
-                self.info_label.setText(f"Выбран: {path}")
+                self.info_label.setText(f"Выбран: {to_jsonpath(path)}")
                 return
 
+        if occurrence < 0:
+            # Номер вхождения неизвестен (элементы страниц больших массивов и
+            # значения после них): позиция находится по пути
+            self._select_by_path(text, path)
+            return
+
         # Поиск n-го вхождения. Сначала пробуем более точный паттерн ключ:значение,
         # чтобы не схватить чужие такие же значения под другим ключом.
         start = 0
@@ -607,35 +1648,86 @@ class JsonEditor(QMainWindow):
             cursor.setPosition(found_idx + len(target_string), QTextCursor.KeepAnchor)
             self.text_edit.setTextCursor(cursor)
             self.text_edit.setFocus()
-            self.info_label.setText(f"Выбран: {path} (#{occurrence + 1})")
+            self.info_label.setText(f"Выбран: {to_jsonpath(path)} (#{occurrence + 1})")
         else:
-            self.info_label.setText(f"Выбран: {path} (не найдено в тексте)")
+            self.info_label.setText(f"Выбран: {to_jsonpath(path)} (не найдено в тексте)")
+
+    def _select_by_path(self, text: str, path: list):
+        """Выделяет значение по пути: соседние значения пропускаются разбором json"""
+        offset = 0
+        target = path
+        if self.current_document.json_lines and path:
+            # Запись JSON Lines — непустая строка с номером path[0]
+            block = self.text_edit.document().begin()
+            record = path[0]
+            while block.isValid() and not (block.text().strip() and record == 0):
+                record -= bool(block.text().strip())
+                block = block.next()
+            if not block.isValid():
+                self.info_label.setText(f"Выбран: {to_jsonpath(path)} (не найдено в тексте)")
+                return
+            text, offset, target = block.text(), block.position(), path[1:]
+        span = locate_path(text, target)
+        if span is None:
+            self.info_label.setText(f"Выбран: {to_jsonpath(path)} (не найдено в тексте)")
+            return
+        position, length = span
+        cursor = self.text_edit.textCursor()
+        cursor.setPosition(offset + position)
+        cursor.setPosition(offset + position + length, QTextCursor.KeepAnchor)
+        self.text_edit.setTextCursor(cursor)
+        self.text_edit.setFocus()
+        self.info_label.setText(f"Выбран: {to_jsonpath(path)}")
 
-    def on_tree_item_edited(self, path, new_text):
+    def on_tree_item_edited(self, node, new_text):
         """Обработчик редактирования значения в дереве — обновляет JSON в тексте"""
+        self.edit_value(self.tree_widget.nodes.path(node), new_text, node)
+
+    def edit_value(self, path: list, new_text: str, node: Optional[int] = None):
+        """Записывает значение по пути в данные и текст документа (правка в
+        дереве или в таблице). node — узел дерева, если он уже известен."""
         try:
-            text = self.text_edit.toPlainText()
-            data = json.loads(text)
+            data = self._parsed_document_data()
+            nodes = self.tree_widget.nodes
+            if node is None:
+                item = self.tree_widget.find_item(path)
+                node = self.tree_widget.item_node(item) if item is not None else None
 
-            # Пытаемся распарсить новое значение как JSON-литерал
-            try:
-                new_value = json.loads(new_text)
-            except Exception:
-                # Если не удалось — используем строку без дополнительной обработки
-                new_value = new_text
+            # JSON-литерал или, если не удалось, строка без дополнительной обработки
+            new_value = codec.parse_literal(new_text)
+
+            # Значение не изменилось (например, "abc" вместо abc): текст не трогаем
+            leaf = nodes.leaf(node) if node is not None else None
+            if (leaf is not None and not isinstance(new_value, (dict, list))
+                    and leaf.value_hash == leaf_hash(new_value)):
+                self.tree_widget.update_leaf(node, new_value)
+                self.info_label.setText("Значение не изменилось")
+                return
 
             # Устанавливаем новое значение по пути
             self._set_by_path(data, path, new_value)
+            # Лист меняется в дереве на месте, хэши сбрасываются у предков:
+            # проверка после правки сравнит хэши и не станет перестраивать дерево
+            if node is not None:
+                self.tree_widget.update_leaf(node, new_value)
 
             # Обновляем текст редактора (форматируем красиво)
-            new_text_repr = json.dumps(data, indent=2, ensure_ascii=False)
+            new_text_repr = self._dump_document(data)
             self.text_edit.setPlainText(new_text_repr)
+            self.current_document.cache_parsed(data)
             self.is_modified = True
             self.update_title()
-            self.info_label.setText(f"Значение обновлено: {path}")
+            self.info_label.setText(f"Значение обновлено: {to_jsonpath(path)}")
         except Exception as e:
             QMessageBox.warning(self, "Ошибка обновления", f"Не удалось обновить значение: {str(e)}")
-    
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        # Фиксируем время от старта до первой отрисовки окна
+        if getattr(self, 'first_paint_time', None) is None:
+            self.first_paint_time = time.perf_counter() - STARTUP_STARTED
+            self.info_label.setText(f"Готово (запуск: {self.first_paint_time:.2f} с)")
+
     def update_title(self):
         title = "JSON-Блокнот Pro"
         if self.current_file:
@@ -643,22 +1735,37 @@ class JsonEditor(QMainWindow):
         if self.is_modified:
             title += " *"
         self.setWindowTitle(title)
+
+        # Заголовок вкладки текущего документа
+        doc = getattr(self, 'current_document', None)
+        if doc is not None:
+            self._sync_current_document()
+            self.tab_widget.setTabText(self.tab_widget.indexOf(doc.page), doc.title())
     
     def closeEvent(self, event):
-        if self.is_modified:
+        # Спрашиваем о сохранении каждого измененного документа
+        self._sync_current_document()
+        for doc in list(self.documents.documents):
+            if not doc.is_modified:
+                continue
+            self._activate_document(doc)
             reply = QMessageBox.question(
                 self, "Вы изменили файл.",
                 "Хотите сохранить файлы перед изменением?",
                 QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel
             )
             if reply == QMessageBox.Yes:
-                if not self.save_file():
+                if not (self.save_file() and self.wait_for_save()):
                     event.ignore()
                     return
             elif reply == QMessageBox.Cancel:
                 event.ignore()
                 return
         
+        for doc in self.documents.documents:
+            self._cancel_schema_validation(doc, wait=True)
+            self.wait_for_save(doc)
+
         # Сохраняем настройки окна
         geometry = self.geometry()
         settings_manager.set("window_geometry", {
@@ -671,6 +1778,15 @@ class JsonEditor(QMainWindow):
         # Сохраняем размеры сплиттера
         if hasattr(self, 'splitter'):
             settings_manager.set("splitter_sizes", self.splitter.sizes())
+
+        # Записываем все накопленные изменения настроек одним обращением к диску
+        settings_manager.flush()
+
+        # Чистое завершение: журналы автосохранения больше не нужны
+        if self.autosave is not None:
+            self.autosave_timer.stop()
+            self.autosave.close()
+            self.autosave = None
         
         event.accept()
 
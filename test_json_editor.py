@@ -2,14 +2,19 @@ import pytest
 import json
 import sys
 import os
+import time
+import tempfile
 from pathlib import Path
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtCore import Qt
 from PyQt5.QtTest import QTest
+from PyQt5.QtGui import QTextCursor
 from main import JsonEditor, JsonTreeWidget
 from unittest.mock import patch
 
 os.environ["PYTEST_RUNNING"] = "1"
+# Журналы автосохранения тестовых окон не попадают в каталог данных пользователя
+JsonEditor.autosave_directory = tempfile.mkdtemp(prefix="json_editor_autosave_")
 
 @pytest.fixture(scope='session')
 def qapp():
@@ -112,6 +117,7 @@ class TestJsonEditor:
         result = editor._save_to_file(file_path)
         
         assert result is True
+        assert editor.wait_for_save()
         assert file_path.exists()
         with open(file_path, 'r') as f:
             saved_data = json.load(f)
@@ -181,6 +187,31 @@ class TestJsonEditor:
         assert editor.recent_files_menu.actions()
 
 
+    def test_recent_files_checked_in_background(self, editor, tmp_path):
+        """Пути проверяются в фоне; недоступные файлы помечаются, а не удаляются"""
+        from config.settings import settings_manager
+        present = tmp_path / "present.json"
+        present.write_text('{"a": 1}')
+        missing = tmp_path / "missing.json"
+        settings_manager.add_recent_file(str(missing))
+        settings_manager.add_recent_file(str(present))
+        cache = editor.recent_files_cache
+        with patch("main.Path.exists", side_effect=AssertionError("stat в GUI-потоке")):
+            editor.load_recent_files()
+        cache.wait(5)
+        QApplication.processEvents()
+        labels = [a.text() for a in editor.recent_files_menu.actions() if a.text()]
+        assert any(l.startswith("missing.json") and "недоступен" in l for l in labels)
+        assert any(l.startswith("present.json") and "Б" in l for l in labels)
+
+    def test_recent_file_open_timing(self, editor, temp_json_file):
+        """В меню показывается время последнего открытия файла"""
+        editor.open_recent_file(str(temp_json_file))
+        info = editor.recent_files_cache.info(str(temp_json_file))
+        assert info.open_seconds is not None and info.size == temp_json_file.stat().st_size
+        labels = [a.text() for a in editor.recent_files_menu.actions()]
+        assert any("открыт за" in l for l in labels)
+
 class TestJsonTreeWidget:
     """Тесты для виджета дерева JSON"""
     
@@ -213,6 +244,193 @@ class TestJsonTreeWidget:
         root_item = tree.topLevelItem(0)
         assert root_item.childCount() > 0
 
+    def test_items_store_node_ids(self, qapp):
+        """Элементы хранят номер узла; путь восстанавливается, ключи интернируются"""
+        tree = JsonTreeWidget()
+        tree.load_json({"rows": [{"name": "a"}, {"name": "b"}]})
+        item = tree.find_item(["rows", 1, "name"])
+        assert isinstance(item.data(0, Qt.UserRole), int)
+        assert tree.item_path(item) == ["rows", 1, "name"]
+        assert tree.nodes.leaf(tree.item_node(item)).text == '"b"'
+        first = tree.item_node(tree.find_item(["rows", 0, "name"]))
+        assert tree.nodes.key(first) is tree.nodes.key(tree.item_node(item))
+        assert tree.item_path(item.child(0)) == ["rows", 1, "name"]
+
+    def test_selection_and_edit_by_node(self, editor):
+        """Выделение и редактирование в дереве адресуют значение номером узла"""
+        editor.text_edit.setPlainText('{"a": {"x": 1}, "b": {"x": 1}}')
+        editor.validate_now()
+        item = editor.tree_widget.find_item(["b", "x"]).child(0)
+        editor.tree_widget.setCurrentItem(item)
+        editor.tree_widget.on_item_clicked(item, 0)
+        cursor = editor.text_edit.textCursor()
+        assert cursor.selectionStart() == editor.text_edit.toPlainText().rindex('"x": 1')
+        item.setText(0, "2")
+        assert json.loads(editor.text_edit.toPlainText()) == {"a": {"x": 1}, "b": {"x": 2}}
+
+    def test_subtree_hashes_follow_edits(self, qapp):
+        """Хэш поддерева совпадает с хэшем данных и сбрасывается у предков при правке"""
+        from core.node_store import content_hash, ROOT
+        tree = JsonTreeWidget()
+        data = {"rows": [{"id": 1, "v": 1.5}, {"id": 2, "v": None}], "name": "x"}
+        tree.load_json(data)
+        nodes = tree.nodes
+        nodes.reset_hashes()
+        assert nodes.subtree_hash(ROOT) == content_hash(data)
+        assert nodes.subtree_hash(tree.item_node(tree.find_item(["rows", 1]))) == content_hash(data["rows"][1])
+        first_row = nodes.subtree_hash(tree.item_node(tree.find_item(["rows", 0])))
+        assert tree.update_leaf(tree.item_node(tree.find_item(["rows", 1, "v"])), "x")
+        data["rows"][1]["v"] = "x"
+        assert nodes.subtree_hash(ROOT) == content_hash(data)
+        # Соседняя ветвь не пересчитывалась и не изменилась
+        assert nodes.subtree_hash(tree.item_node(tree.find_item(["rows", 0]))) == first_row
+        # Одинаковые данные дерево не перестраивает, раскрытие ветвей сохраняется
+        tree.find_item(["rows"]).setExpanded(False)
+        tree.load_json(data)
+        assert not tree.find_item(["rows"]).isExpanded()
+        tree.load_json({"rows": []})
+        assert tree.find_item(["rows"]).childCount() == 0
+
+    def test_level_hashes(self):
+        """Хэши верхних уровней: измененная ветвь получает новый хэш, соседняя — прежний"""
+        from core.node_store import level_hashes
+        data = {"a": [{"x": {"deep": [1]}}], "b": {"y": 2}}
+        edited = {"a": [{"x": {"deep": [1]}}], "b": {"y": 3}}
+        hashes, edited_hashes = level_hashes(data, 2), level_hashes(edited, 2)
+        assert hashes[id(data["a"][0])] == edited_hashes[id(edited["a"][0])]
+        assert hashes[id(data["b"])] != edited_hashes[id(edited["b"])]
+        assert hashes[id(data)] != edited_hashes[id(edited)]
+        assert id(data["a"][0]["x"]) not in hashes
+        first, second = {"a": 1, "b": 2}, {"b": 2, "a": 1}
+        assert level_hashes(first, 2)[id(first)] != level_hashes(second, 2)[id(second)]
+
+    def test_reordered_keys_rebuild_tree(self, editor):
+        """Перестановка ключей меняет хэш: дерево перестраивается, и выбор
+        узла выделяет его значение, а не соседнее с тем же текстом"""
+        from core.node_store import content_hash, LARGE_ARRAY
+        assert content_hash({"a": 1, "b": 2}) != content_hash({"b": 2, "a": 1})
+        rows = [{"x": i, "y": 0} for i in range(LARGE_ARRAY + 1)]
+        assert content_hash(rows) != content_hash([{"y": 0, "x": i} for i in range(LARGE_ARRAY + 1)])
+        editor.text_edit.setPlainText('{"a": {"x": 1, "y": 2}, "b": {"x": 1, "y": 3}}')
+        editor.validate_now()
+        text = '{"b": {"x": 1, "y": 3}, "a": {"x": 1, "y": 2}}'
+        editor.text_edit.setPlainText(text)
+        editor.validate_now()
+        item = editor.tree_widget.find_item(["a", "x"]).child(0)
+        editor.tree_widget.setCurrentItem(item)
+        editor.tree_widget.on_item_clicked(item, 0)
+        assert editor.text_edit.textCursor().selectionStart() == text.index('"x"', text.index('"a"'))
+
+    def test_large_array_pages(self, qapp):
+        """Переход к индексу, сортировка и фильтр работают в пределах страницы"""
+        from core.node_store import content_hash, ROOT
+        from widgets.json_tree_widget import PAGE_SIZE
+        tree = JsonTreeWidget()
+        data = {"rows": [{"id": i, "group": i % 3} for i in range(2 * PAGE_SIZE + 10)], "tail": 1}
+        tree.load_json(data)
+        rows = tree.find_item(["rows"])
+        assert rows.childCount() == 3 and tree.is_page(rows.child(2))
+        assert rows.child(2).text(0) == f"📄 [{2 * PAGE_SIZE}…{2 * PAGE_SIZE + 9}]"
+        assert not any(rows.child(i).childCount() for i in range(3))
+        target = tree.go_to_index(rows, PAGE_SIZE + 5)
+        assert tree.currentItem() is target and tree.item_path(target) == ["rows", PAGE_SIZE + 5]
+        # Создана только нужная страница
+        assert [rows.child(i).childCount() for i in range(3)] == [0, PAGE_SIZE, 0]
+        page = rows.child(1)
+        tree.sort_page(page, "group", descending=True)
+        assert tree.item_path(page.child(0)) == ["rows", PAGE_SIZE + 1]
+        assert tree.find_item(["rows", PAGE_SIZE + 5]) is target
+        assert tree.filter_page(page, '"group": 0') == sum(1 for i in range(PAGE_SIZE) if (PAGE_SIZE + i) % 3 == 0)
+        tree.reset_page(page)
+        assert tree.item_path(page.child(0)) == ["rows", PAGE_SIZE] and not page.child(1).isHidden()
+        # Хэш массива со страницами считается по данным
+        tree.nodes.reset_hashes()
+        assert tree.nodes.subtree_hash(ROOT) == content_hash(data)
+
+    def test_tree_edit_updates_leaf_in_place(self, editor):
+        """Правка в дереве меняет лист на месте и номера вхождений одинаковых значений"""
+        editor.text_edit.setPlainText('{"a": [1, 2], "b": [2, 3]}')
+        editor.validate_now()
+        tree = editor.tree_widget
+        row = tree.find_item(["b"])
+        row.setExpanded(False)
+        tree.find_item(["a", 1]).child(0).setText(0, "5")
+        editor.validate_now()
+        assert json.loads(editor.text_edit.toPlainText()) == {"a": [1, 5], "b": [2, 3]}
+        # Дерево не перестраивалось: свернутая ветвь осталась свернутой
+        assert tree.find_item(["b"]) is row and not row.isExpanded()
+        # Двойка в "b" теперь первое вхождение текста 2
+        assert tree.nodes.leaf(tree.item_node(tree.find_item(["b", 0]))).occurrence == 0
+        assert "не изменилось" not in editor.info_label.text()
+        tree.find_item(["a", 0]).child(0).setText(0, "1.0")
+        assert json.loads(editor.text_edit.toPlainText())["a"][0] == 1.0
+
+    def test_paged_element_selection_and_edit(self, editor):
+        """Элемент страницы выделяется в тексте по пути и правится без перестройки дерева"""
+        from widgets.json_tree_widget import PAGE_SIZE
+        records = [{"id": i, "name": f"n{i}"} for i in range(PAGE_SIZE + 5)]
+        editor.text_edit.setPlainText(json.dumps(records, indent=2))
+        editor.validate_now()
+        tree = editor.tree_widget
+        item = tree.reveal([PAGE_SIZE + 3, "name"])
+        tree.on_item_clicked(item, 0)
+        assert editor.text_edit.textCursor().selectedText() == f'"n{PAGE_SIZE + 3}"'
+        page = tree.topLevelItem(1)
+        item.child(0).setText(0, '"renamed"')
+        editor.validate_now()
+        assert json.loads(editor.text_edit.toPlainText())[PAGE_SIZE + 3]["name"] == "renamed"
+        assert tree.topLevelItem(1) is page and page.childCount() == 5
+
+    def test_table_model_fetch_sort_and_edit(self, qapp):
+        """Таблица массива: столбцы из выборки, подгрузка порциями, сортировка в фоне"""
+        from widgets.json_table_model import JsonArrayModel, FETCH_ROWS, VALUE_COLUMN, sample_columns
+        assert sample_columns([{"a": 1}, 2, {"b": 3, "a": 4}]) == [VALUE_COLUMN, "a", "b"]
+        rows = [{"id": i, "name": f"n{i % 7}"} for i in range(FETCH_ROWS + 5)] + [{"id": -1, "extra": [1]}, 3]
+        model = JsonArrayModel(rows)
+        # Столбцы — из равномерной выборки строк
+        assert model.columns == ["id", "name"]
+        assert model.rowCount() == FETCH_ROWS and model.canFetchMore()
+        model.fetchMore()
+        assert model.rowCount() == len(rows) and not model.canFetchMore()
+        id_column = model.columns.index("id")
+        finished = []
+        model.sorting.connect(lambda running: running or finished.append(True))
+        model.sort(id_column, Qt.AscendingOrder)
+        deadline = time.perf_counter() + 10
+        while not finished and time.perf_counter() < deadline:
+            qapp.processEvents()
+        # -1 первым, строка без ключа id — последней
+        assert model.data(model.index(0, id_column)) == "-1"
+        assert model.headerData(model.rowCount() - 1, Qt.Vertical) == str(len(rows) - 1)
+        model.sort(id_column, Qt.DescendingOrder)
+        assert model.data(model.index(1, id_column)) == str(FETCH_ROWS + 4)
+        edited = []
+        model.cellEdited.connect(lambda row, column, text: edited.append((row, column, text)))
+        assert model.setData(model.index(1, id_column), "42")
+        assert edited == [(FETCH_ROWS + 4, "id", "42")] and rows[FETCH_ROWS + 4]["id"] == 42
+        assert model.data(model.index(1, id_column), Qt.EditRole) == "42"
+        # Как при закрытии таблицы: потоки сортировки завершаются до удаления модели
+        model.stop()
+        qapp.processEvents()
+        assert model._workers == []
+
+    def test_table_view_edits_document(self, editor):
+        """Правка ячейки таблицы записывается в текст документа по пути"""
+        editor.text_edit.setPlainText('{"rows": [{"a": 1}, {"a": 2, "b": "x"}]}')
+        editor.validate_now()
+        tree = editor.tree_widget
+        node = tree.table_node(tree.find_item(["rows"]))
+        assert tree.table_node(tree.find_item(["rows", 0])) is None
+        editor.show_table_view(node)
+        dialog = editor.table_dialogs[-1]
+        model = dialog.model
+        assert model.columns == ["a", "b"] and model.data(model.index(0, 1)) == ""
+        model.setData(model.index(1, 1), '"y"')
+        assert json.loads(editor.text_edit.toPlainText()) == {"rows": [{"a": 1}, {"a": 2, "b": "y"}]}
+        model.setData(model.index(0, 1), "true")
+        assert json.loads(editor.text_edit.toPlainText())["rows"][0] == {"a": 1, "b": True}
+        dialog.close()
+
 
 class TestJsonValidation:
     """Тесты валидации JSON"""
@@ -265,6 +483,7 @@ class TestFileOperations:
         file_path = tmp_path / "roundtrip.json"
         editor.text_edit.setPlainText(json.dumps(sample_json, indent=2))
         editor._save_to_file(file_path)
+        assert editor.wait_for_save()
         
         # Создаем новый редактор и загружаем
         editor2 = JsonEditor()
@@ -312,6 +531,1358 @@ class TestEdgeCases:
         assert "✅" in editor.validation_label.text()
 
 
+def _nested(depth):
+    """Объект глубины depth без рекурсии: {"n": {"n": ... {"v": 1}}}"""
+    root = current = {}
+    for _ in range(depth):
+        current["n"] = {}
+        current = current["n"]
+    current["v"] = 1
+    return root
+
+
+class TestDeepDocuments:
+    """Обходы без рекурсии: глубина 100 тысяч и ширина миллион с ограничением времени"""
+
+    DEPTH = 100_000
+    WIDTH = 1_000_000
+
+    def test_walker(self):
+        """Обходчик проходит глубокий и широкий документ, события парные"""
+        from core.walk import walk, ENTER, LEAVE, VALUE
+        started = time.perf_counter()
+        events = [0, 0, 0]
+        max_depth = 0
+        for event, _, _, depth in walk(_nested(self.DEPTH)):
+            events[event] += 1
+            max_depth = max(max_depth, depth)
+        assert events[ENTER] == events[LEAVE] == self.DEPTH and events[VALUE] == 1
+        assert max_depth == self.DEPTH + 1
+        assert sum(1 for _ in walk(list(range(self.WIDTH)), start=10)) == self.WIDTH - 10
+        assert time.perf_counter() - started < 30
+
+    def test_exporters(self, qapp):
+        """XML и YAML без рекурсии; вывод совпадает с прежним форматом"""
+        from dialogs.export_dialog import ExportDialog
+        dialog = ExportDialog({})
+        data = {"a": [{"b": {}}, [1], 2, "<&>"], "c": {}, "d": []}
+        assert dialog.json_to_xml(data) == \
+            "<root><a><b /></a><a>[1]</a><a>2</a><a>&lt;&amp;&gt;</a><c /></root>"
+        assert dialog.json_to_yaml(data) == "a:\n  -\n    b:\n\n  -\n    - 1\n  - 2\n  - <&>\nc:\n\nd:\n"
+        started = time.perf_counter()
+        xml = dialog.json_to_xml(_nested(self.DEPTH))
+        assert xml.count("<n>") == self.DEPTH and xml.endswith("</n></root>")
+        # Отступы YAML растут с глубиной (вывод квадратичен), поэтому глубина меньше,
+        # но все равно далеко за пределом рекурсии
+        yaml = dialog.json_to_yaml(_nested(5 * sys.getrecursionlimit()))
+        assert yaml.endswith(" " * 2 * 5 * sys.getrecursionlimit() + "v: 1")
+        wide = list(range(self.WIDTH))
+        assert dialog.json_to_xml({"x": wide}).count("<x>") == self.WIDTH
+        assert dialog.json_to_yaml(wide).count("\n") == self.WIDTH - 1
+        assert time.perf_counter() - started < 30
+
+    def test_editor_validates_deep_document(self, editor):
+        """json.loads падает на такой глубине; документ разбирается лексером"""
+        from widgets.json_tree_widget import MAX_TREE_DEPTH
+        editor.text_edit.setPlainText('{"n": ' * self.DEPTH + "1" + "}" * self.DEPTH)
+        started = time.perf_counter()
+        editor.validate_now()
+        assert "✅" in editor.validation_label.text()
+        nodes = editor.tree_widget.nodes
+        assert max(nodes.depth(node) for node in range(len(nodes))) == MAX_TREE_DEPTH
+        assert time.perf_counter() - started < 30
+
+    def test_wide_tree(self, qapp):
+        """Широкий массив строится страницами; страница создается при раскрытии"""
+        from widgets.json_tree_widget import PAGE_SIZE
+        tree = JsonTreeWidget()
+        started = time.perf_counter()
+        tree.load_json([{"id": i} for i in range(100_000)])
+        assert tree.topLevelItemCount() == 100_000 // PAGE_SIZE
+        last = tree.topLevelItem(tree.topLevelItemCount() - 1)
+        assert last.childCount() == 0
+        last.setExpanded(True)
+        assert last.childCount() == PAGE_SIZE
+        assert tree.item_path(last.child(PAGE_SIZE - 1)) == [99_999]
+        # Номера вхождений внутри страниц неизвестны: выделение идет по пути
+        assert tree._find_occurrence_index_from_children(last.child(PAGE_SIZE - 1)) == -1
+        assert time.perf_counter() - started < 60
+
+
+class TestCodec:
+    """Тесты выбора библиотеки JSON: результат совпадает со стандартным json"""
+
+    TEXTS = [
+        '{"a": [1, 2.5, {"b": null}], "c": "ж\\n\\u0001", "d": true}',
+        '[NaN, Infinity, -Infinity, 1e400, 1E+400, 0.1, 1e16, 1.5e-05, 5e-324, -0.0]',
+        '[123456789012345678901234567890, -9223372036854775809, 18446744073709551615]',
+        '["\\ud800", "😀", "</script>"]',
+    ]
+
+    def _codecs(self):
+        from core import codec
+        codecs = [codec.get_codec(name) for name in codec.available_backends()]
+        if "orjson" in codec.available_backends():
+            # Быстрый разбор orjson проверяем и на версиях, где он отключен
+            import orjson
+            forced = codec._OrjsonCodec(orjson)
+            forced.safe_loads = True
+            codecs.append(forced)
+        return codecs
+
+    def test_backends_match_stdlib(self):
+        """Разбор и все виды записи совпадают с json при любой библиотеке"""
+        for backend in self._codecs():
+            for text in self.TEXTS:
+                expected = json.loads(text)
+                data = backend.loads(text)
+                assert json.dumps(data) == json.dumps(expected), backend.name
+                for options in ({"indent": 2}, {"compact": True}, {}):
+                    reference = (json.dumps(expected, separators=(',', ':'), ensure_ascii=False)
+                                 if options.get("compact") else
+                                 json.dumps(expected, indent=options.get("indent"), ensure_ascii=False))
+                    assert backend.dumps(data, **options) == reference, (backend.name, options)
+            with pytest.raises(json.JSONDecodeError) as error:
+                backend.loads('{\n  "a": }')
+            assert (error.value.lineno, error.value.colno) == (2, 8)
+
+    def test_backend_selection(self):
+        """Не установленная библиотека заменяется лучшей доступной"""
+        from core import codec
+        assert codec.available_backends()[-1] == codec.STDLIB
+        assert codec.get_codec(codec.STDLIB).name == codec.STDLIB
+        assert codec.get_codec("no-such-backend").name == codec.available_backends()[0]
+        try:
+            assert codec.set_backend(codec.STDLIB) is codec.current()
+            assert codec.loads("[1]") == [1]
+        finally:
+            codec.set_backend(codec.AUTO)
+
+    def test_editor_format_keeps_numbers(self, editor):
+        """Форматирование и минификация сохраняют NaN и запись чисел"""
+        text = ('{"nan": NaN, "big": 1e16, "small": 1e-07, "int": 123456789012345678901234567890, '
+                '"price": 1.10, "exp": 1E5, "huge": 1e400, "plain": 0.5}')
+        editor.text_edit.setPlainText(text)
+        editor.format_json()
+        formatted = editor.text_edit.toPlainText()
+        assert formatted == text.replace("{", "{\n  ").replace(", ", ",\n  ").replace("}", "\n}")
+        editor.minify_json()
+        assert editor.text_edit.toPlainText() == text.replace(", ", ",").replace(": ", ":")
+
+    def test_opened_file_format_keeps_numbers(self, editor, tmp_path):
+        """Разбор при открытии файла тоже сохраняет запись чисел"""
+        file_path = tmp_path / "numbers.json"
+        file_path.write_text('{"a": 1.10, "b": 1E5}', encoding="utf-8")
+        assert editor._load_file(str(file_path))
+        editor.format_json()
+        assert editor.text_edit.toPlainText() == '{\n  "a": 1.10,\n  "b": 1E5\n}'
+
+    def test_exact_numbers(self):
+        """Точный режим: запись чисел сохраняется, остальное — как у json"""
+        from core import codec
+        text = '[1.10, 1E5, 1e400, -0.0, 2.5, 0.1000000000000000055511, "\\u00001.5", {"k": 3.000}]'
+        for backend in self._codecs():
+            data = backend.loads(text, exact=True)
+            assert isinstance(data[0], codec.JsonNumber) and data[0] == 1.1
+            assert type(data[4]) is float
+            assert backend.dumps(data, exact=True) == text, backend.name
+            plain = backend.loads(text)
+            assert backend.dumps(plain, indent=2, exact=True) == json.dumps(plain, indent=2), backend.name
+        # Запись без рекурсии и на документах глубже предела рекурсии
+        depth = 5 * sys.getrecursionlimit()
+        assert codec.dumps_exact(_nested(depth), compact=True) == '{"n":' * depth + '{"v":1}' + "}" * depth
+
+    def test_tree_edit_keeps_other_numbers(self, editor):
+        """Правка значения в дереве не переписывает другие числа"""
+        editor.text_edit.setPlainText('{"price": 1.10, "qty": 2, "rate": 0.050}')
+        editor.auto_validate()
+        node = next(n for n in range(len(editor.tree_widget.nodes))
+                    if editor.tree_widget.nodes.key(n) == "qty")
+        editor.on_tree_item_edited(node, "3")
+        assert json.loads(editor.text_edit.toPlainText()) == {"price": 1.1, "qty": 3, "rate": 0.05}
+        assert '"price": 1.10' in editor.text_edit.toPlainText()
+        assert '"rate": 0.050' in editor.text_edit.toPlainText()
+
+
+class TestJsonDiff:
+    """Тесты структурного сравнения документов"""
+
+    LEFT = {"name": "x", "items": [{"id": 1, "v": 1}, {"id": 2, "v": 2}, {"id": 3, "v": 3}],
+            "cfg": {"a": {"deep": [1, 2, 3]}, "b": 1}, "flag": 1}
+    RIGHT = {"name": "y", "items": [{"id": 2, "v": 2}, {"id": 1, "v": 1}, {"id": 4, "v": 4}, {"id": 3, "v": 30}],
+             "cfg": {"b": 1}, "moved": {"deep": [1, 2, 3]}, "flag": True, "new": None}
+
+    def test_changes_moves_and_identity(self):
+        """Добавления, удаления, изменения, перестановки и переносы поддеревьев"""
+        from core.json_diff import diff, ADDED, CHANGED, MOVED
+        changes = [(c.kind, c.left_path, c.right_path) for c in diff(self.LEFT, self.RIGHT, "id").changes]
+        assert changes == [
+            (CHANGED, ("name",), ("name",)),
+            (MOVED, ("items", 0), ("items", 1)),
+            (ADDED, None, ("items", 2)),
+            (CHANGED, ("items", 2, "v"), ("items", 3, "v")),
+            (CHANGED, ("flag",), ("flag",)),
+            (MOVED, ("cfg", "a"), ("moved",)),
+            (ADDED, None, ("new",)),
+        ]
+        # Без ключа идентичности {"id": 3} сопоставляется по порядку с {"id": 4}
+        kinds = [c.kind for c in diff(self.LEFT["items"], self.RIGHT["items"]).changes]
+        assert kinds == [MOVED, CHANGED, CHANGED, ADDED]
+
+    def test_identical_subtrees_are_skipped(self):
+        """Равные поддеревья не обходятся; порядок ключей объекта не важен"""
+        from core.json_diff import diff
+        left = {"big": [{"id": i, "tags": ["a", "b"]} for i in range(20000)], "v": 1}
+        right = {"v": 2, "big": [{"tags": ["a", "b"], "id": i} for i in range(20000)]}
+        result = diff(left, right)
+        assert [c.left_path for c in result.changes] == [("v",)]
+        assert result.compared == 3 and result.skipped == 1
+
+    def test_deep_documents(self):
+        """Глубина 100 тысяч: хэши и пути без рекурсии и без квадратичного копирования"""
+        from core.json_diff import diff
+        depth = TestDeepDocuments.DEPTH
+        left, right = _nested(depth), _nested(depth)
+        current = right
+        while "n" in current:
+            current = current["n"]
+        current["v"] = 2
+        started = time.perf_counter()
+        result = diff(left, right)
+        assert len(result.changes) == 1 and len(result.changes[0].left_path) == depth + 1
+        assert time.perf_counter() - started < 10
+
+    def test_dialog_shows_paired_trees(self, editor, tmp_path):
+        """Диалог сравнивает текущий документ с файлом и строит парные деревья"""
+        from dialogs.diff_dialog import JsonDiffDialog
+        right = tmp_path / "right.json"
+        right.write_text(json.dumps(self.RIGHT), encoding="utf-8")
+        editor.text_edit.setPlainText(json.dumps(self.LEFT))
+        dialog = JsonDiffDialog(editor.text_edit.toPlainText, None, editor)
+        dialog.right_edit.setText(str(right))
+        dialog.identity_edit.setText("id")
+        dialog.start_diff()
+        dialog.worker.wait()
+        QApplication.processEvents()
+        assert len(dialog.result.changes) == 7
+        left_tree, right_tree = dialog.left_tree, dialog.right_tree
+        assert left_tree.topLevelItemCount() == right_tree.topLevelItemCount() == 5
+        items = left_tree.topLevelItem(1)
+        assert items.text(0) == "items" and items.childCount() == right_tree.topLevelItem(1).childCount() == 3
+        assert right_tree.topLevelItem(1).child(1).text(0).startswith("[2]")
+        assert items.child(1).text(0) == "—"
+        # Выбор строки в одном дереве выбирает парную строку в другом
+        left_tree.setCurrentItem(items.child(2))
+        assert right_tree.currentItem() is right_tree.topLevelItem(1).child(2)
+        dialog.close()
+
+
+class TestSettingsManager:
+    """Тесты пакетной записи настроек"""
+
+    @pytest.fixture
+    def manager(self, qapp, tmp_path):
+        from PyQt5.QtCore import QSettings
+        from config.settings import SettingsManager
+        manager = SettingsManager(QSettings(str(tmp_path / "settings.ini"), QSettings.IniFormat))
+        manager.flush_delay_ms = 20
+        return manager
+
+    def test_set_does_not_touch_disk(self, manager):
+        """Изменения копятся в памяти и записываются одним sync"""
+        with patch.object(manager.settings, "sync") as sync:
+            for size in range(10, 20):
+                manager.set("font_size", size)
+            manager.set("window_geometry", {"x": 1, "y": 2, "width": 300, "height": 200})
+            assert sync.call_count == 0
+            assert manager.get("font_size") == 19
+            manager.flush()
+            assert sync.call_count == 1
+        assert manager.settings.value("font_size", 0, int) == 19
+        assert manager.settings.value("window_geometry/width", 0, int) == 300
+
+    def test_flush_is_coalesced_by_timer(self, manager):
+        """Таймер записывает серию изменений один раз"""
+        with patch.object(manager.settings, "sync") as sync:
+            manager.set("text_color", "#123456")
+            manager.set("text_color", "#654321")
+            QTest.qWait(100)
+            assert sync.call_count == 1
+        assert not manager.has_pending_changes()
+
+    def test_typed_schema_roundtrip(self, manager):
+        """Значения схемы читаются с правильными типами"""
+        from PyQt5.QtCore import QSettings
+        from config.settings import SettingsManager
+        manager.set("splitter_sizes", [500, 250])
+        manager.set("recent_files", ["a.json", "b.json"])
+        manager.set("auto_validate", False)
+        manager.flush()
+        fresh = SettingsManager(QSettings(manager.settings.fileName(), QSettings.IniFormat))
+        assert fresh.get("splitter_sizes") == [500, 250]
+        assert fresh.get("recent_files") == ["a.json", "b.json"]
+        assert fresh.get("auto_validate") is False
+        assert fresh.get("validation_delay") == 500
+        # Изменение полученного списка не портит кэш
+        fresh.get("recent_files").append("c.json")
+        assert fresh.get("recent_files") == ["a.json", "b.json"]
+
+
+class TestDocumentTabs:
+    """Тесты вкладок документов и бюджета памяти"""
+
+    def test_files_open_in_separate_tabs(self, editor, tmp_path):
+        """Каждый файл открывается в своей вкладке со своим состоянием"""
+        first = tmp_path / "first.json"
+        first.write_text('{"a": 1}', encoding="utf-8")
+        second = tmp_path / "second.json"
+        second.write_text('[1, 2]', encoding="utf-8")
+        assert editor.open_recent_file(str(first))
+        assert editor.open_recent_file(str(second))
+        assert editor.tab_widget.count() == 2
+        assert editor.current_file == second
+
+        editor.text_edit.setPlainText('[1, 2, 3]')
+        assert editor.is_modified is True
+        editor.tab_widget.setCurrentIndex(0)
+        assert editor.current_file == first
+        assert editor.is_modified is False
+        assert json.loads(editor.text_edit.toPlainText()) == {"a": 1}
+        assert "*" in editor.tab_widget.tabText(1)
+
+        # Повторное открытие переключает на существующую вкладку
+        editor.open_recent_file(str(second))
+        assert editor.tab_widget.count() == 2
+        assert editor.current_file == second
+
+    def test_close_document_closes_tab(self, editor):
+        """Закрытие документа убирает вкладку, последняя вкладка очищается"""
+        editor.new_document()
+        assert editor.tab_widget.count() == 2
+        editor.close_document()
+        assert editor.tab_widget.count() == 1
+        editor.text_edit.setPlainText('{"a": 1}')
+        editor.is_modified = False
+        editor.close_document()
+        assert editor.tab_widget.count() == 1
+        assert editor.text_edit.toPlainText() == ""
+
+    def test_memory_budget_unloads_background_tabs(self, editor):
+        """Фоновые вкладки выгружаются по LRU и восстанавливаются при фокусе"""
+        editor.documents.budget_bytes = 1
+        docs = []
+        for i in range(3):
+            doc = editor.new_document()
+            editor.text_edit.setPlainText(json.dumps({"doc": i}))
+            editor.auto_validate()
+            docs.append(doc)
+        editor.tab_widget.setCurrentWidget(docs[0].page)
+        assert docs[0].tree_loaded
+        assert not docs[1].is_loaded() and not docs[2].is_loaded()
+        assert docs[2].tree_widget.topLevelItemCount() == 0
+
+        editor.tab_widget.setCurrentWidget(docs[2].page)
+        assert docs[2].tree_loaded
+        assert docs[2].tree_widget.topLevelItemCount() > 0
+        assert not docs[0].is_loaded()
+
+    def test_parse_cache_reused(self, editor, sample_json):
+        """Повторный запрос данных без изменений текста не разбирает JSON заново"""
+        editor.text_edit.setPlainText(json.dumps(sample_json))
+        editor.auto_validate()
+        with patch("main.json.loads", side_effect=AssertionError("повторный разбор")):
+            assert editor._parsed_document_data() == sample_json
+
+
+class TestStartup:
+    """Бенчмарки и проверки скорости запуска"""
+
+    def test_startup_imports_are_lazy(self, record_property):
+        """Диалоги, uic и xml.etree не импортируются при запуске (-X importtime)"""
+        import subprocess
+        env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import main"],
+            cwd=Path(__file__).resolve().parent, env=env,
+            capture_output=True, text=True, timeout=60,
+        )
+        assert result.returncode == 0, result.stderr
+        modules = {}
+        for line in result.stderr.splitlines():
+            if line.startswith("import time:") and "|" in line:
+                _, cumulative, name = line.split("|")
+                if cumulative.strip().isdigit():
+                    modules[name.strip()] = int(cumulative)
+        lazy = [m for m in modules
+                if m.startswith(("dialogs.", "xml.etree", "PyQt5.uic", "core.file_search", "core.schema", "core.atomic_save", "core.autosave", "core.file_watch", "core.json_diff", "widgets.json_table_model"))]
+        assert lazy == []
+        record_property("import_main_ms", round(modules["main"] / 1000, 1))
+
+    def test_time_to_first_paint(self, qapp, record_property):
+        """Окно создается и впервые отрисовывается быстро"""
+        started = time.perf_counter()
+        window = JsonEditor()
+        window.show()
+        deadline = started + 5
+        while getattr(window, 'first_paint_time', None) is None and time.perf_counter() < deadline:
+            qapp.processEvents()
+        elapsed = time.perf_counter() - started
+        window.close()
+        record_property("first_paint_ms", round(elapsed * 1000, 1))
+        assert window.first_paint_time is not None
+        assert elapsed < 2.0
+
+    def test_compiled_ui_matches_designer_file(self):
+        """ui/mainwindow_ui.py соответствует ui/mainwindow.ui (pyuic5)"""
+        import io
+        from PyQt5 import uic
+        ui_dir = Path(__file__).resolve().parent / "ui"
+        generated = io.StringIO()
+        with open(ui_dir / "mainwindow.ui", encoding="utf-8") as f:
+            uic.compileUi(f, generated)
+        strip = lambda text: [l for l in text.splitlines() if not l.startswith("#")]
+        compiled = (ui_dir / "mainwindow_ui.py").read_text(encoding="utf-8")
+        assert strip(generated.getvalue()) == strip(compiled)
+
+
+class TestBenchmarks:
+    """Проверка работоспособности набора бенчмарков"""
+
+    def test_benchmark_suite_runs(self, qapp):
+        """Все сценарии выполняются на маленьких документах"""
+        from benchmarks.run_benchmarks import run_benchmarks, CASES
+        from benchmarks.generators import SHAPES
+        report = run_benchmarks(sizes=["tiny"], repeat=1, log=None)
+        assert len(report["results"]) == len(CASES) * len(SHAPES)
+        assert all(r["median"] >= 0 and r["nodes"] > 0 for r in report["results"])
+        assert report["meta"]["commit"]
+
+    def test_compare_detects_regression(self):
+        """Сравнение результатов находит замедление"""
+        from benchmarks.run_benchmarks import compare
+        old = {"results": [{"case": "c", "shape": "wide", "size": "tiny", "median": 0.010}]}
+        new = {"results": [{"case": "c", "shape": "wide", "size": "tiny", "median": 0.020}]}
+        assert [r["ratio"] for r in compare(old, new)] == [2.0]
+        assert compare(old, old) == []
+
+
+class TestFindInFiles:
+    """Тесты поиска по файлам каталога"""
+
+    @pytest.fixture
+    def search_tree(self, tmp_path):
+        (tmp_path / "a.json").write_text('{"servers": [{"port": 80}, {"port": 443}]}', encoding="utf-8")
+        (tmp_path / "b.json").write_text('{\n  "name": "Port",\n  "id": 42\n}', encoding="utf-8")
+        (tmp_path / "big.json").write_text('{"port": "' + "x" * 5000 + '"}', encoding="utf-8")
+        (tmp_path / "notes.txt").write_text("port", encoding="utf-8")
+        skipped = tmp_path / "node_modules"
+        skipped.mkdir()
+        (skipped / "c.json").write_text('{"port": 1}', encoding="utf-8")
+        return tmp_path
+
+    def _run(self, root, query, **kwargs):
+        from core.file_search import DirectorySearch, SearchCache
+        kwargs.setdefault("cache", SearchCache())
+        search = DirectorySearch(str(root), query, **kwargs)
+        results = {}
+        search.run(lambda path, matches: results.__setitem__(Path(path).name, matches))
+        return search, results
+
+    def test_literal_search_with_filters(self, search_tree):
+        """Текстовый поиск учитывает маски, исключения и размер"""
+        from core.file_search import SearchQuery
+        _, results = self._run(search_tree, SearchQuery("port"),
+                               exclude=("node_modules",), max_size=1000)
+        assert set(results) == {"a.json", "b.json"}
+        assert results["b.json"][0].line == 2
+
+    def test_regex_and_key_path_search(self, search_tree):
+        """Поиск по регулярному выражению и по пути ключа"""
+        from core.file_search import SearchQuery, MODE_REGEX, MODE_KEY_PATH
+        _, results = self._run(search_tree, SearchQuery(r'"id":\s*\d+', MODE_REGEX))
+        assert set(results) == {"b.json"}
+        _, results = self._run(search_tree, SearchQuery("servers[*].port", MODE_KEY_PATH))
+        assert [m.text for m in results["a.json"]] == ["['servers', 0, 'port'] = 80",
+                                                      "['servers', 1, 'port'] = 443"]
+
+    def test_multiline_pattern_maps_to_lines(self, search_tree):
+        """Шаблон через перевод строки находится и относится к строке начала"""
+        from core.file_search import SearchQuery, MODE_REGEX
+        _, results = self._run(search_tree, SearchQuery(r'"Port",\s*"id"', MODE_REGEX))
+        assert [(m.line, m.column) for m in results["b.json"]] == [(2, 11)]
+
+    def test_dialog_keeps_search_error(self, editor, search_tree):
+        """Ошибка шаблона остается в строке состояния после завершения поиска"""
+        editor.show_find_in_files_dialog()
+        dialog = editor.find_in_files_dialog
+        dialog.dir_edit.setText(str(search_tree))
+        dialog.query_edit.setText("(")
+        dialog.mode_combo.setCurrentIndex(1)
+        dialog.start_search()
+        dialog.worker.wait()
+        QApplication.processEvents()
+        assert dialog.status_label.text().startswith("Ошибка:")
+        dialog.close()
+
+    def test_stale_worker_finish_is_ignored(self, editor, search_tree):
+        """Завершение прежнего поиска не трогает кнопки идущего нового"""
+        editor.show_find_in_files_dialog()
+        dialog = editor.find_in_files_dialog
+        dialog.dir_edit.setText(str(search_tree))
+        dialog.query_edit.setText("port")
+        dialog.start_search()
+        old = dialog.worker
+        dialog.start_search()
+        dialog.on_finished(old)
+        assert not dialog.find_button.isEnabled()
+        dialog.worker.wait()
+        QApplication.processEvents()
+        assert dialog.find_button.isEnabled()
+        dialog.close()
+
+    def test_repeated_search_uses_mtime_cache(self, search_tree):
+        """Повторный поиск по неизмененному дереву берется из кэша"""
+        from core.file_search import DirectorySearch, SearchCache, SearchQuery
+        cache = SearchCache()
+        first, _ = self._run(search_tree, SearchQuery("port"), cache=cache)
+        assert first.cache_hits == 0
+        second, results = self._run(search_tree, SearchQuery("port"), cache=cache)
+        assert second.cache_hits == second.files_scanned
+        (search_tree / "b.json").write_text('{"other": 1}', encoding="utf-8")
+        os.utime(search_tree / "b.json", ns=(0, 0))
+        third, results = self._run(search_tree, SearchQuery("port"), cache=cache)
+        assert third.cache_hits == second.files_scanned - 1
+        assert "b.json" not in results
+
+    def test_process_pool_search(self, tmp_path):
+        """Большое число файлов обрабатывается пулом процессов"""
+        from core.file_search import SearchQuery, IN_PROCESS_THRESHOLD
+        for i in range(IN_PROCESS_THRESHOLD + 2):
+            (tmp_path / f"f{i}.json").write_text(json.dumps({"value": i}), encoding="utf-8")
+        _, results = self._run(tmp_path, SearchQuery('"value": 3'), workers=2)
+        assert set(results) == {"f3.json"}
+
+    def test_dialog_streams_results(self, editor, search_tree):
+        """Диалог добавляет результаты в список по мере нахождения"""
+        editor.show_find_in_files_dialog()
+        dialog = editor.find_in_files_dialog
+        dialog.dir_edit.setText(str(search_tree))
+        dialog.query_edit.setText("port")
+        dialog.exclude_edit.setText("node_modules")
+        dialog.start_search()
+        dialog.worker.wait()
+        QApplication.processEvents()
+        assert dialog.results_tree.topLevelItemCount() == 3
+        dialog.close()
+
+
+class TestValidationScheduler:
+    """Тесты адаптивной задержки автопроверки"""
+
+    def test_delay_grows_with_measured_parse_time(self):
+        """Задержка растет вместе с ожидаемым временем проверки"""
+        from core.validation import ValidationScheduler, MAX_DELAY_MS
+        scheduler = ValidationScheduler(base_delay_ms=500)
+        assert scheduler.delay_for(1_000_000) == 500
+        scheduler.record(1_000_000, 0.4)
+        assert scheduler.delay_for(1_000) == 500
+        assert scheduler.delay_for(1_000_000) == 1200
+        assert scheduler.delay_for(100_000_000) == MAX_DELAY_MS
+
+    def test_paused_above_threshold(self):
+        """Выше порога размера автопроверка приостанавливается"""
+        from core.validation import ValidationScheduler
+        scheduler = ValidationScheduler(max_chars=1000)
+        assert scheduler.delay_for(999) is not None
+        assert scheduler.delay_for(1001) is None
+
+    def test_editor_pauses_and_validates_now(self, editor):
+        """Большой документ не проверяется автоматически, но проверяется по F5"""
+        editor.validation_scheduler.max_chars = 10
+        editor.text_edit.setPlainText('{"key": "a long enough value"}')
+        assert not editor.validation_timer.isActive()
+        assert "приостановлена" in editor.validation_label.text()
+        editor.actionValidateNow.trigger()
+        assert "✅" in editor.validation_label.text()
+        assert editor.validation_scheduler.seconds_per_char is not None
+
+    def test_only_real_parses_are_recorded(self, editor):
+        """Проверка из кэша разбора и пустой документ не попадают в среднее"""
+        scheduler = editor.validation_scheduler
+        editor.text_edit.setPlainText('{"a": [1, 2, 3]}')
+        editor.validate_now()
+        rate = scheduler.seconds_per_char
+        assert rate is not None
+        editor.validate_now()
+        editor.text_edit.setPlainText("   ")
+        editor.validate_now()
+        assert scheduler.seconds_per_char == rate
+
+    def test_editor_uses_validation_delay_setting(self, editor):
+        """Базовая задержка берется из настройки validation_delay"""
+        editor.text_edit.setPlainText('{"a": 1}')
+        assert editor.validation_timer.isActive()
+        assert editor.validation_timer.interval() >= editor.validation_scheduler.base_delay_ms
+
+
+class TestIncrementalValidation:
+    """Тесты построчной проверки синтаксиса с состоянием в блоках"""
+
+    @pytest.mark.parametrize("text", [
+        '{"a": [1, 2.5e-3, true, null], "b": {"c": "\\u00e9"}}',
+        '[1 2]', '{"a" 1}', '{"a": 1,}', '[01]', '{"a": "x\\q"}', '"open', '[1]]', '{', '  ',
+    ])
+    def test_lexer_agrees_with_json_loads(self, text):
+        """Построчная проверка согласуется с json.loads"""
+        from core.json_lexer import check_text
+        try:
+            json.loads(text)
+            valid = True
+        except ValueError:
+            valid = not text.strip()
+        assert (check_text(text) == []) == valid
+
+    def test_edit_rechecks_only_affected_lines(self, editor):
+        """После правки перепроверяются только строки до схождения состояния"""
+        data = {"items": [{"id": i, "name": f"item{i}"} for i in range(500)]}
+        editor.text_edit.setPlainText(json.dumps(data, indent=2))
+        highlighter = editor.highlighter
+        assert highlighter.syntax_errors() == []
+        checked = []
+        original = highlighter._check_block
+        highlighter._check_block = lambda text: (checked.append(text), original(text))
+        block = editor.text_edit.document().findBlockByNumber(100)
+        cursor = QTextCursor(block)
+        cursor.movePosition(QTextCursor.EndOfBlock)
+        cursor.insertText(" @")
+        assert len(checked) <= 2
+        errors = highlighter.syntax_errors()
+        assert [line for line, _ in errors] == [101]
+        editor.auto_validate()
+        assert "Line 101" in editor.validation_label.text()
+        cursor.deletePreviousChar()
+        assert highlighter.syntax_errors() == []
+
+    def test_error_line_follows_inserted_lines(self, editor):
+        """Номер строки ошибки сдвигается при вставке строк выше"""
+        editor.text_edit.setPlainText('{\n  "a": 1,\n  "b": @\n}')
+        assert [line for line, _ in editor.highlighter.syntax_errors()] == [3]
+        cursor = QTextCursor(editor.text_edit.document().findBlockByNumber(1))
+        cursor.insertText('"x": 0,\n  ')
+        assert [line for line, _ in editor.highlighter.syntax_errors()] == [4]
+
+    def test_all_errors_and_unclosed_document(self, editor):
+        """Сообщаются все ошибки, включая незакрытые скобки в конце"""
+        editor.text_edit.setPlainText('[\n  1 2,\n  @,\n  3')
+        errors = editor.highlighter.syntax_errors()
+        assert [line for line, _ in errors] == [2, 3, 4]
+        assert "конец" in errors[-1][1].message
+        editor.auto_validate()
+        assert "всего: 3" in editor.validation_label.text()
+
+
+class TestCodeFolding:
+    """Тесты индекса скобок, свертки блоков и мини-карты"""
+
+    @staticmethod
+    def _depths(text):
+        """Глубины строк (наименьшая, на конце) простым пересчетом по тексту"""
+        result, depth = [], 0
+        for line in text.split("\n"):
+            low = depth
+            for char in line:
+                if char in "[{":
+                    depth += 1
+                elif char in "]}":
+                    depth -= 1
+                    low = min(low, depth)
+            result.append((low, depth))
+        return result
+
+    def test_bracket_index_search(self):
+        """Поиск по пирамиде минимумов совпадает с перебором после сдвигов"""
+        import random
+        from core.bracket_index import BracketIndex
+        rng = random.Random(7)
+        index = BracketIndex()
+        lows, ends = [], []
+        for step in range(300):
+            line = rng.randrange(len(lows) + 1)
+            if step % 3 == 0 or not lows:
+                count = rng.randint(1, 200)
+                index.shift(line, count)
+                lows[line:line] = [0] * count
+                ends[line:line] = [0] * count
+            elif step % 3 == 1:
+                count = rng.randint(1, 100)
+                index.shift(line, -min(count, len(lows) - line))
+                del lows[line:line + count], ends[line:line + count]
+            for _ in range(20):
+                if lows:
+                    j = rng.randrange(len(lows))
+                    lows[j], ends[j] = rng.randint(0, 5), rng.randint(0, 5)
+                    index.set(j, lows[j], ends[j])
+            start, limit = rng.randrange(len(lows) + 1), rng.randint(0, 3)
+            expected = next((i for i in range(start, len(lows)) if lows[i] <= limit), None)
+            assert index.find_low(start, limit) == expected
+            expected = next((i for i in range(start - 1, -1, -1) if lows[i] <= limit), None)
+            assert index.find_low_before(start, limit) == expected
+
+    def test_highlighter_index_follows_edits(self, editor):
+        """Индекс скобок подсветки совпадает с пересчетом после правок и отмены"""
+        document = editor.text_edit.document()
+        editor.text_edit.setPlainText(json.dumps({"a": [{"b": i} for i in range(200)]}, indent=2))
+        cursor = QTextCursor(document.findBlockByNumber(10))
+        cursor.insertText('{\n"x": [1,\n2]},\n')
+        cursor = QTextCursor(document.findBlockByNumber(300))
+        cursor.movePosition(QTextCursor.Down, QTextCursor.KeepAnchor, 40)
+        cursor.removeSelectedText()
+        document.undo()
+        index = editor.highlighter.brackets
+        assert len(index) == document.blockCount()
+        assert list(zip(index.lows, index.ends)) == self._depths(document.toPlainText())
+
+    def test_fold_unfold_and_levels(self, editor):
+        """Свертка скрывает строки области, правка и курсор внутри ее разворачивают"""
+        editor.text_edit.setPlainText(json.dumps({"a": [1, {"b": 2}], "c": {"d": [3]}}, indent=2))
+        folding = editor.current_document.folding
+        document = editor.text_edit.document()
+        visible = lambda: [document.findBlockByNumber(i).isVisible() for i in range(document.blockCount())]
+        assert folding.region(1) == (2, 5)
+        assert folding.fold(1)
+        assert visible()[1:7] == [True] + [False] * 4 + [True]
+        assert folding.folded_lines() == [1]
+        # Строка без своей области сворачивает объемлющую
+        folding.unfold(1)
+        assert folding.toggle(2) and folding.folded_lines() == [1]
+        assert editor.text_edit.textCursor().blockNumber() not in range(2, 6)
+        cursor = editor.text_edit.textCursor()
+        cursor.setPosition(document.findBlockByNumber(4).position())
+        editor.text_edit.setTextCursor(cursor)
+        assert all(visible())
+        assert folding.fold_to_level(1) == 2 and folding.folded_lines() == [1, 7]
+        QTextCursor(document.findBlockByNumber(8)).insertText(" ")
+        assert folding.folded_lines() == [1]
+        assert folding.fold_to_level(0) == 1 and visible() == [True] + [False] * 11 + [True]
+        folding.unfold_all()
+        assert all(visible())
+        editor.toggle_minimap(False)
+        assert not folding.minimap.isVisibleTo(editor.text_edit)
+        editor.toggle_minimap(True)
+
+
+class TestBracketMatching:
+    """Тесты поиска парной скобки по индексу скобок"""
+
+    @staticmethod
+    def _pairs(text):
+        """Парные скобки вне строк простым проходом по тексту"""
+        stack, pairs = [], {}
+        in_string = escaped = False
+        for i, char in enumerate(text):
+            if in_string:
+                in_string = escaped or char != '"'
+                escaped = not escaped and char == "\\"
+            elif char == '"':
+                in_string = True
+            elif char in "[{":
+                stack.append(i)
+            elif char in "]}":
+                opener = stack.pop()
+                pairs[opener], pairs[i] = i, opener
+        return pairs
+
+    @pytest.mark.parametrize("indent", [2, None])
+    def test_matches_agree_with_scan(self, qapp, indent, monkeypatch):
+        """Совпадает с проходом по тексту, в том числе для длинной строки и скобок в строках"""
+        from PyQt5.QtWidgets import QTextEdit
+        import widgets.syntax_highlighter as highlighter_module
+        from widgets.bracket_matcher import BracketMatcher
+        # Минифицированная строка считается длинной: ее скобки берутся из запомненного разбора
+        monkeypatch.setattr(highlighter_module, "LONG_LINE", 50)
+        data = [{"k[": [i, {"s": "}]{", "e": []}], "n": {"x": [[i]]}} for i in range(20)]
+        text = json.dumps(data, indent=indent)
+        edit = QTextEdit()
+        highlighter = highlighter_module.JsonSyntaxHighlighter(edit.document())
+        edit.setPlainText(text)
+        matcher = BracketMatcher(highlighter)
+        expected = self._pairs(text)
+        for position in range(len(text) + 1):
+            near = [p for p in (position, position - 1) if p in expected]
+            assert matcher.match(position) == ((near[0], expected[near[0]]) if near else None)
+
+    def test_unmatched_and_jump(self, editor):
+        """Непарная скобка подсвечивается одна; переход ставит курсор к парной"""
+        editor.text_edit.setPlainText('{\n  "a": [1, 2,\n  "b": {"c": 3}\n}')
+        document = editor.text_edit.document()
+        cursor = editor.text_edit.textCursor()
+        cursor.setPosition(document.findBlockByNumber(1).position() + 7)
+        editor.text_edit.setTextCursor(cursor)
+        brackets = editor.current_document.extra_selections["brackets"]
+        assert [s.cursor.selectedText() for s in brackets] == ["["]
+        cursor.setPosition(0)
+        editor.text_edit.setTextCursor(cursor)
+        assert len(editor.current_document.extra_selections["brackets"]) == 2
+        editor.goto_matching_bracket()
+        assert editor.text_edit.textCursor().position() == len(editor.text_edit.toPlainText()) - 1
+        editor.goto_matching_bracket()
+        assert editor.text_edit.textCursor().position() == 0
+
+
+class TestBreadcrumbs:
+    """Тесты пути JSON у курсора по индексам подсветки"""
+
+    @staticmethod
+    def _leaf_paths(value, path=()):
+        if isinstance(value, dict):
+            items = value.items()
+        elif isinstance(value, list):
+            items = enumerate(value)
+        else:
+            yield list(path)
+            return
+        for key, child in items:
+            yield from TestBreadcrumbs._leaf_paths(child, path + (key,))
+
+    @pytest.mark.parametrize("indent", [2, None])
+    def test_paths_agree_with_data(self, qapp, indent, monkeypatch):
+        """Путь у каждого значения совпадает с путем в данных, в том числе
+        в длинной строке и после вставки строк выше"""
+        from PyQt5.QtWidgets import QTextEdit
+        import widgets.syntax_highlighter as highlighter_module
+        from widgets.breadcrumb_bar import PathResolver
+        from core.json_lexer import locate_path
+        monkeypatch.setattr(highlighter_module, "LONG_LINE", 50)
+        data = [{"a/b": [i, {"k,\"]": None, "e": []}], "n": {"x~": [[i, "s,"], {}]}} for i in range(12)]
+        edit = QTextEdit()
+        highlighter = highlighter_module.JsonSyntaxHighlighter(edit.document())
+        edit.setPlainText(json.dumps(data[1:], indent=indent))
+        cursor = edit.textCursor()
+        cursor.setPosition(1)
+        cursor.insertText(json.dumps(data[0], indent=indent) + ",\n")
+        text = edit.toPlainText()
+        resolver = PathResolver(highlighter)
+        for path in self._leaf_paths(data):
+            position, length = locate_path(text, path)
+            for at in (position, position + length):
+                assert resolver.resolve(at).path == path
+        # Перед открывающей скобкой — путь родителя, после запятой массива — следующий элемент
+        assert resolver.resolve(0).path == []
+        comma = text.index(",", text.index("[", 1))
+        assert resolver.resolve(comma + 1).path == [0, "a/b", 1]
+
+    def test_index_sizes_follow_document(self, qapp):
+        """Индексы скобок и разделителей хранят по записи на строку документа
+        после загрузки, вставки и удаления строк"""
+        from PyQt5.QtWidgets import QTextEdit
+        from core.bracket_index import MarkIndex
+        from widgets.syntax_highlighter import JsonSyntaxHighlighter
+        index = MarkIndex()
+        index.shift(1, 5)
+        assert len(index.lows) == len(index.ends) == 5
+        edit = QTextEdit()
+        highlighter = JsonSyntaxHighlighter(edit.document())
+
+        def sizes():
+            marks = highlighter.marks
+            return {len(marks.lows), len(marks.ends), len(highlighter.brackets), edit.document().blockCount()}
+
+        edit.setPlainText(json.dumps([{"a": [i, i]} for i in range(100)], indent=2))
+        assert len(sizes()) == 1
+        cursor = edit.textCursor()
+        cursor.setPosition(1)
+        cursor.insertText('\n  {"b": 1},\n  {"c": 2},')
+        assert len(sizes()) == 1
+        cursor.setPosition(1)
+        cursor.setPosition(edit.toPlainText().index("{", 20), QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+        assert len(sizes()) == 1
+
+    def test_formats(self):
+        """JSONPath, JSON Pointer и jq с ключами, требующими экранирования"""
+        from core.json_path import to_jsonpath, to_pointer, to_jq
+        path = ["items", 3, "a b", "x/~y", "it's"]
+        assert to_jsonpath(path) == "$.items[3]['a b']['x/~y']['it\\'s']"
+        assert to_pointer(path) == "/items/3/a b/x~1~0y/it's"
+        assert to_jq(path) == '.items[3]["a b"]["x/~y"]["it\'s"]'
+        assert (to_jq(["a b", 0]), to_jq([0, "a"])) == ('.["a b"][0]', ".[0].a")
+        assert (to_jsonpath([]), to_pointer([]), to_jq([])) == ("$", "", ".")
+
+    def test_editor_bar_follows_cursor(self, editor, qapp):
+        """Строка пути следует за курсором, копирует путь и переходит по щелчку"""
+        from core.json_path import to_pointer
+        editor.text_edit.setPlainText('{\n  "users": [\n    {"name": "a"},\n    {"name": "b"}\n  ]\n}')
+        text = editor.text_edit.toPlainText()
+        cursor = editor.text_edit.textCursor()
+        cursor.setPosition(text.index('"b"'))
+        editor.text_edit.setTextCursor(cursor)
+        qapp.processEvents()
+        bar = editor.breadcrumb_bar
+        assert bar.path == ["users", 1, "name"]
+        bar.copy_path(to_pointer)
+        assert QApplication.clipboard().text() == "/users/1/name"
+        # Щелчок по части «[1]» ставит курсор на начало элемента
+        bar._on_segment(2)
+        assert editor.text_edit.textCursor().position() == text.index('{"name": "b"}')
+
+
+class TestErrorRecovery:
+    """Тесты разбора с восстановлением после ошибок"""
+
+    def test_each_typo_reported_once(self):
+        """Пропущенные запятые, двоеточия и скобки дают по одной ошибке"""
+        from core.json_lexer import parse_tolerant
+        result = parse_tolerant('{"a" 1, "b": [1 2, 3,],\n "c": {"x": [1}, "d": tru}')
+        assert [(line, e.column) for line, e in result.errors] == [(1, 5), (1, 16), (1, 21), (2, 14), (2, 22)]
+        assert result.data == {"a": 1, "b": [1, 2, 3], "c": {"x": [1]}}
+
+    def test_valid_text_matches_json_loads(self, sample_json):
+        """Для корректного текста данные совпадают с json.loads"""
+        from core.json_lexer import parse_tolerant
+        text = json.dumps(sample_json, indent=2)
+        assert parse_tolerant(text) == (sample_json, [])
+
+    def test_editor_marks_all_errors_and_builds_partial_tree(self, editor):
+        """Все ошибки подчеркнуты, дерево строится из корректных частей"""
+        editor.text_edit.setPlainText('{\n  "a": 1\n  "b": [1, 2,],\n  "c": @\n}')
+        editor.auto_validate()
+        assert "всего: 3" in editor.validation_label.text()
+        assert len(editor.current_document.extra_selections["errors"]) == 3
+        assert editor.tree_widget.topLevelItemCount() == 2
+        editor.actionNextError.trigger()
+        assert editor.text_edit.textCursor().blockNumber() == 2
+        editor.actionNextError.trigger()
+        assert editor.text_edit.textCursor().blockNumber() == 2
+        editor.actionNextError.trigger()
+        assert editor.text_edit.textCursor().blockNumber() == 3
+        editor.text_edit.setPlainText('{"a": 1}')
+        editor.auto_validate()
+        assert editor.current_document.extra_selections["errors"] == []
+
+
+class TestInstrumentation:
+    """Тесты сбора метрик и панели «Производительность»"""
+
+    def test_disabled_timer_is_noop(self):
+        """В выключенном состоянии замеры не сохраняются"""
+        from core.instrumentation import Instrumentation
+        inst = Instrumentation()
+        with inst.timed("parse"):
+            pass
+        assert inst.histograms == {}
+
+    def test_timed_fills_histogram_and_exports(self, tmp_path):
+        """Замеры попадают в гистограмму и экспортируются в JSON"""
+        from core.instrumentation import Instrumentation
+        inst = Instrumentation()
+        inst.enabled = True
+        for _ in range(3):
+            with inst.timed("parse"):
+                pass
+        inst.record("save", 0.003)
+        assert inst.histograms["parse"].count == 3
+        assert inst.last_operation == "save"
+        out = tmp_path / "perf.json"
+        inst.export_json(str(out))
+        report = json.loads(out.read_text(encoding="utf-8"))
+        assert report["operations"]["save"]["histogram_ms"]["<=5"] == 1
+        assert report["operations"]["parse"]["count"] == 3
+
+    def test_peak_rss_in_kilobytes(self, monkeypatch):
+        """Пиковый RSS в килобайтах и в macOS, где ru_maxrss — в байтах"""
+        import core.instrumentation as module
+        if module.resource is None:
+            pytest.skip("модуль resource недоступен")
+        usage = type("Usage", (), {"ru_maxrss": 2048 * 1024})()
+        monkeypatch.setattr(module.resource, "getrusage", lambda who: usage)
+        inst = module.Instrumentation()
+        monkeypatch.setattr(module.sys, "platform", "darwin")
+        assert inst.peak_memory_kb() == 2048
+        monkeypatch.setattr(module.sys, "platform", "linux")
+        assert inst.peak_memory_kb() == 2048 * 1024
+
+    def test_editor_operations_are_timed(self, editor, sample_json):
+        """Основные операции редактора замеряются при включенном сборе"""
+        from core.instrumentation import instrumentation
+        editor.on_instrumentation_toggled(True)
+        try:
+            instrumentation.reset()
+            editor.text_edit.setPlainText(json.dumps(sample_json))
+            editor.format_json()
+            editor.auto_validate()
+            assert {"parse", "format", "tree.build"} <= set(instrumentation.histograms)
+            editor.update_perf_label()
+            assert "мс" in editor.perf_label.text()
+        finally:
+            editor.on_instrumentation_toggled(False)
+        assert not instrumentation.enabled
+
+    def test_performance_panel_shows_operations(self, editor):
+        """Панель показывает таблицу операций"""
+        from core.instrumentation import instrumentation
+        editor.toggle_performance_panel(True)
+        panel = editor.performance_panel
+        panel.enabled_check.setChecked(True)
+        try:
+            instrumentation.record("parse", 0.002)
+            panel.refresh()
+            names = [panel.table.item(r, 0).text() for r in range(panel.table.rowCount())]
+            assert "parse" in names
+        finally:
+            panel.enabled_check.setChecked(False)
+            instrumentation.reset()
+
+
+class TestAtomicSave:
+    """Тесты атомарного фонового сохранения"""
+
+    def test_atomic_write_replaces_file(self, tmp_path):
+        """Текст пишется частями во временный файл и заменяет прежний"""
+        from core.atomic_save import atomic_write_text
+        path = tmp_path / "data.json"
+        path.write_text("old", encoding="utf-8")
+        calls = []
+        atomic_write_text(path, '{"a": "é"}', lambda done, total: calls.append((done, total)), chunk_chars=4)
+        assert path.read_text(encoding="utf-8") == '{"a": "é"}'
+        assert calls[-1] == (10, 10) and len(calls) == 3
+        assert list(tmp_path.iterdir()) == [path]
+
+    def test_failed_write_keeps_original(self, tmp_path):
+        """Сбой посреди записи не портит исходный файл и не оставляет временных"""
+        from core.atomic_save import atomic_write_text
+        path = tmp_path / "data.json"
+        path.write_text("original", encoding="utf-8")
+
+        def crash(done, total):
+            raise OSError("disk full")
+
+        with pytest.raises(OSError):
+            atomic_write_text(path, "x" * 100, crash, chunk_chars=10)
+        assert path.read_text(encoding="utf-8") == "original"
+        assert list(tmp_path.iterdir()) == [path]
+
+    def test_save_reuses_validation_and_keeps_later_edits(self, editor, sample_json, tmp_path):
+        """Сохранение берет результат проверки из кэша; правки во время сохранения не теряются"""
+        editor.text_edit.setPlainText(json.dumps(sample_json))
+        editor.auto_validate()
+        file_path = tmp_path / "out.json"
+        with patch("main.json.loads", side_effect=AssertionError("повторный разбор")):
+            assert editor._save_to_file(file_path)
+        editor.text_edit.insertPlainText(" ")
+        assert editor.wait_for_save()
+        assert json.loads(file_path.read_text(encoding="utf-8")) == sample_json
+        assert editor.current_file == file_path
+        assert editor.is_modified is True
+        assert editor.save_progress.isHidden()
+
+
+class TestAutosave:
+    """Тесты журнала автосохранения и восстановления после сбоя"""
+
+    @staticmethod
+    def _simulate_crash(session):
+        """Блокировка сессии остается на диске от несуществующего процесса"""
+        from PyQt5.QtCore import QSysInfo
+        session.lock.unlock()
+        with open(session.lock_path, "w") as f:
+            f.write(f"999999999\nJsonEditor\n{QSysInfo.machineHostName()}\n")
+
+    def test_journal_records_edits_and_replays(self, qapp, tmp_path):
+        """В журнал пишутся только правки; восстановленный текст совпадает"""
+        from PyQt5.QtGui import QTextDocument
+        from core.autosave import AutosaveSession, RecoveredDocument
+        document = QTextDocument()
+        document.setPlainText('{\n  "a": 1\n}')
+        session = AutosaveSession(str(tmp_path))
+        journal = session.journal_for(document)
+        assert journal.needs_snapshot  # несохраненный текст без файла: нужен снимок
+        session.flush()
+        journal.snapshot_worker.wait()
+        qapp.processEvents()
+        cursor = QTextCursor(document)
+        cursor.setPosition(11)
+        for ch in ',\n  "b": "я"':
+            cursor.insertText(ch)
+        cursor.setPosition(2)
+        cursor.setPosition(4, QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+        assert len(journal.pending) == 2  # набор подряд объединяется в одну правку
+        session.flush()
+        journal_file = tmp_path / f"{journal.name}.{journal.generation}.journal"
+        assert journal_file.stat().st_size < 200
+        restored = QTextDocument()
+        assert RecoveredDocument(str(tmp_path), journal.name).replay(restored)
+        assert restored.toPlainText() == document.toPlainText()
+        session.close()
+        assert list(tmp_path.iterdir()) == []
+
+    def test_compaction_starts_new_generation(self, qapp, tmp_path, monkeypatch):
+        """Разросшийся журнал сжимается в снимок, старые поколения удаляются"""
+        import core.autosave as autosave
+        from PyQt5.QtGui import QTextDocument
+        monkeypatch.setattr(autosave, "COMPACT_MIN_BYTES", 50)
+        document = QTextDocument()
+        session = autosave.AutosaveSession(str(tmp_path))
+        journal = session.journal_for(document)
+        cursor = QTextCursor(document)
+        for i in range(20):
+            cursor.insertText(f'"{i}",')
+            session.flush()
+        if journal.snapshot_worker is not None:
+            journal.snapshot_worker.wait()
+        qapp.processEvents()
+        assert journal.generation > 2
+        generations = {p.name.split(".")[1] for p in tmp_path.glob(f"{journal.name}.*")}
+        assert len(generations) <= 2
+        restored = QTextDocument()
+        assert autosave.RecoveredDocument(str(tmp_path), journal.name).replay(restored)
+        assert restored.toPlainText() == document.toPlainText()
+        session.close()
+
+    def test_editor_restores_after_crash(self, qapp, tmp_path, temp_json_file):
+        """После аварийного завершения следующий запуск восстанавливает правки"""
+        from PyQt5.QtWidgets import QMessageBox
+        window = JsonEditor()
+        window.autosave_directory = str(tmp_path)
+        window.start_autosave()
+        window._load_file(str(temp_json_file))
+        window.text_edit.moveCursor(QTextCursor.End)
+        window.text_edit.insertPlainText("\n")
+        window.autosave_now()
+        expected = window.text_edit.toPlainText()
+        self._simulate_crash(window.autosave)
+        window.autosave = None
+        window.close()
+
+        restored = JsonEditor()
+        restored.autosave_directory = str(tmp_path)
+        with patch("PyQt5.QtWidgets.QMessageBox.question", return_value=QMessageBox.Yes):
+            restored.start_autosave()
+        assert restored.text_edit.toPlainText() == expected
+        assert restored.current_file == temp_json_file
+        assert restored.is_modified
+        assert restored.autosave.orphaned_documents() == []
+        restored.close()
+
+
+class TestFileWatch:
+    """Тесты отслеживания изменений файла другими программами"""
+
+    def test_append_modify_delete(self, qapp, tmp_path):
+        """Дозапись отдает только новые законченные строки; перезапись и удаление распознаются"""
+        from core.file_watch import FileWatcher, APPENDED, MODIFIED, DELETED
+        path = tmp_path / "log.jsonl"
+        path.write_bytes(b'{"a": 1}\n')
+        watcher = FileWatcher()
+        watcher.watch(path)
+        assert watcher.check(path) is None
+        with open(path, "ab") as f:
+            f.write(b'{"a": 2}\r\n{"a": ')
+        change = watcher.check(path)
+        assert (change.kind, change.text) == (APPENDED, '{"a": 2}\n')
+        with open(path, "ab") as f:
+            f.write(b'3}\n')
+        assert watcher.check(path).text == '{"a": 3}\n'
+        path.write_bytes(b'{"b": 1}\n{"b": 2}\n{"b": 3}\n{"b": 4}\n')
+        assert watcher.check(path).kind == MODIFIED
+        path.unlink()
+        assert watcher.check(path).kind == DELETED
+        assert watcher.check(path) is None
+
+    def test_json_lines_tail_is_appended_to_text_and_tree(self, editor, tmp_path):
+        """Новые записи JSON Lines добавляются в конец текста и дерева без перезагрузки"""
+        path = tmp_path / "events.ndjson"
+        path.write_text('{"id": 1}\n{"id": 2}\n', encoding="utf-8")
+        assert editor._load_file(str(path))
+        editor.auto_validate()
+        assert editor.tree_widget.topLevelItemCount() == 2
+        first_item = editor.tree_widget.topLevelItem(0)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"id": 3}\n')
+        editor.file_watcher._emit_change(str(path))
+        assert editor.text_edit.toPlainText().endswith('{"id": 3}\n')
+        assert editor.tree_widget.topLevelItemCount() == 3
+        assert editor.tree_widget.topLevelItem(0) is first_item
+        assert editor._parsed_document_data() == [{"id": 1}, {"id": 2}, {"id": 3}]
+        assert editor.is_modified is False
+        assert editor.highlighter.syntax_errors() == []
+
+    def test_rewrite_offers_reload(self, editor, temp_json_file):
+        """Перезапись файла предлагает перезагрузку; в режиме слежения — без вопроса"""
+        from PyQt5.QtWidgets import QMessageBox
+        assert editor._load_file(str(temp_json_file))
+        temp_json_file.write_text('{"changed": true}', encoding="utf-8")
+        with patch("PyQt5.QtWidgets.QMessageBox.question", return_value=QMessageBox.No) as question:
+            editor.file_watcher._emit_change(str(temp_json_file))
+        assert question.called
+        assert "changed" not in editor.text_edit.toPlainText()
+        editor.toggle_follow(True)
+        assert editor.actionFollow.isChecked()
+        temp_json_file.write_text('{"changed": 2}', encoding="utf-8")
+        editor.file_watcher._emit_change(str(temp_json_file))
+        assert editor.text_edit.toPlainText() == '{"changed": 2}'
+        assert editor.is_modified is False
+
+    def test_changes_reported_after_save(self, editor, temp_json_file):
+        """После собственного сохранения внешние изменения снова замечаются"""
+        from core.file_watch import MODIFIED
+        assert editor._load_file(str(temp_json_file))
+        assert editor._save_to_file(temp_json_file) and editor.wait_for_save()
+        assert editor.file_watcher.check(temp_json_file) is None
+        temp_json_file.write_text('{"changed by": "another program"}', encoding="utf-8")
+        assert editor.file_watcher.check(temp_json_file).kind == MODIFIED
+
+
+class TestSchema:
+    """Тесты проверки по JSON Schema"""
+
+    SCHEMA = {
+        "type": "object",
+        "required": ["id", "tags"],
+        "properties": {
+            "id": {"type": "integer", "minimum": 1},
+            "tags": {"type": "array", "items": {"$ref": "#/$defs/tag"}, "uniqueItems": True},
+            "kind": {"enum": ["a", "b"]},
+        },
+        "additionalProperties": False,
+        "$defs": {"tag": {"type": "string", "minLength": 2}},
+    }
+
+    def test_violations_have_paths_and_keywords(self):
+        """Нарушения содержат путь, ключевое слово и сообщение"""
+        from core.schema import CompiledSchema
+        schema = CompiledSchema(self.SCHEMA)
+        violations = schema.validate({"id": True, "tags": ["ok", "x", "ok"], "extra": 1})
+        assert {(v.path, v.keyword) for v in violations} == {
+            (("id",), "type"), (("tags", 1), "minLength"),
+            (("tags", 2), "uniqueItems"), (("extra",), "additionalProperties"),
+        }
+        assert schema.validate({"id": 2.0, "tags": []}) == []
+
+    def test_combinators_and_conditionals(self):
+        """anyOf/oneOf/not и if/then/else"""
+        from core.schema import CompiledSchema
+        schema = CompiledSchema({
+            "oneOf": [{"type": "integer"}, {"type": "string"}],
+            "not": {"const": 13},
+            "if": {"type": "string"}, "then": {"pattern": "^x"}, "else": {"maximum": 100},
+        })
+        assert schema.validate(5) == []
+        assert schema.validate("xy") == []
+        assert [v.keyword for v in schema.validate(13)] == ["not"]
+        assert [v.keyword for v in schema.validate("y")] == ["pattern"]
+        assert [v.keyword for v in schema.validate(500)] == ["maximum"]
+        assert [v.keyword for v in schema.validate(1.5)] == ["oneOf"]
+
+    def test_unchanged_subtrees_are_reused(self):
+        """Повторная проверка берет результаты неизмененных ветвей из памяти"""
+        from core.schema import CompiledSchema
+        schema = CompiledSchema({"properties": {"a": {"items": {"type": "integer"}}, "b": {"type": "array"}}})
+        data = {"a": [1, "x"], "b": list(range(1000))}
+        first = schema.validate(data)
+        data["c"] = 1
+        assert schema.validate(data) == first
+        assert schema.last_reused == 2
+        data["a"][1] = 2
+        assert schema.validate(data) == []
+
+    def test_deep_document_and_cancellation(self):
+        """Обход итеративный, проверку можно отменить"""
+        from core.schema import CompiledSchema
+        data = 0
+        for _ in range(20000):
+            data = [data]
+        schema = CompiledSchema({"items": {"$ref": "#"}, "type": ["array", "integer"]})
+        assert schema.validate(data) == []
+        assert schema.validate(data, lambda: True, reuse=False) is None
+
+    def test_cache_and_associations(self, tmp_path):
+        """Схема перекомпилируется только при изменении файла; точный путь важнее шаблона"""
+        from core.schema import SchemaCache, find_schema
+        path = tmp_path / "schema.json"
+        path.write_text(json.dumps({"type": "object"}), encoding="utf-8")
+        cache = SchemaCache()
+        assert cache.get(str(path)) is cache.get(str(path))
+        first = cache.get(str(path))
+        path.write_text(json.dumps({"type": "array"}), encoding="utf-8")
+        os.utime(path, ns=(time.time_ns() + 10 ** 9, time.time_ns() + 10 ** 9))
+        assert cache.get(str(path)) is not first
+        data_file = tmp_path / "app.config.json"
+        associations = [("*.json", "generic.json"), (str(data_file), "exact.json")]
+        assert find_schema(data_file, associations) == "exact.json"
+        assert find_schema(tmp_path / "other.json", associations) == "generic.json"
+        assert find_schema(tmp_path / "other.yaml", associations) is None
+
+    def test_locate_paths(self):
+        """Позиции значений находятся одним проходом по тексту"""
+        from core.json_lexer import locate_paths
+        text = '{\n  "a": [1, {"b": "xyz"}],\n  "c": {}\n}'
+        assert locate_paths(text, [("a", 1, "b"), ("c",), ("missing",)]) == {
+            ("a", 1, "b"): (2, 17, 5), ("c",): (3, 7, 1),
+        }
+
+    def test_locate_path(self):
+        """Позиция одного пути находится пропуском соседних значений"""
+        from core.json_lexer import locate_path
+        text = '{\n  "a": [1, {"b": "xyz"}],\n  "c": {}\n}'
+        assert locate_path(text, ("a", 1, "b")) == (text.index('"xyz"'), 5)
+        assert locate_path(text, ("c",)) == (text.index("{}"), 1)
+        assert locate_path(text, ("a", 2)) is None and locate_path(text, ("missing",)) is None
+
+    def test_editor_marks_violations(self, editor, tmp_path):
+        """Нарушения схемы подчеркиваются и отмечаются в дереве в фоне"""
+        from config.settings import settings_manager
+        schema_path = tmp_path / "schema.json"
+        schema_path.write_text(json.dumps(self.SCHEMA), encoding="utf-8")
+        data_path = tmp_path / "data.json"
+        data_path.write_text('{\n  "id": 0,\n  "tags": ["ok"]\n}', encoding="utf-8")
+        previous = settings_manager.get("schema_associations")
+        settings_manager.set("schema_associations", json.dumps([["data.json", str(schema_path)]]))
+        try:
+            assert editor._load_file(str(data_path))
+            editor.validate_now()
+            assert editor.wait_for_schema_validation()
+            assert "1 нарушений" in editor.validation_label.text()
+            selection = editor.current_document.extra_selections["schema"][0]
+            assert selection.cursor.blockNumber() == 1
+            assert editor.tree_widget.find_item(["id"]).toolTip(0)
+            editor.text_edit.setPlainText('{"id": 3, "tags": ["ok"]}')
+            editor.validate_now()
+            assert editor.wait_for_schema_validation()
+            assert editor.current_document.extra_selections["schema"] == []
+            assert "схеме" in editor.validation_label.text()
+        finally:
+            settings_manager.set("schema_associations", previous)
+
+    def test_editor_deep_document(self, editor, tmp_path):
+        """Документ глубже предела рекурсии проверяется; поток, завершившийся
+        без результата, не остается у документа после удаления"""
+        from PyQt5.QtCore import QEvent
+        from config.settings import settings_manager
+        schema_path = tmp_path / "schema.json"
+        schema_path.write_text(json.dumps({"items": {"$ref": "#"}, "type": ["array", "integer"]}),
+                               encoding="utf-8")
+        data_path = tmp_path / "data.json"
+        depth = 2 * sys.getrecursionlimit()
+        data_path.write_text("[" * depth + '"x"' + "]" * depth, encoding="utf-8")
+        previous = settings_manager.get("schema_associations")
+        settings_manager.set("schema_associations", json.dumps([["data.json", str(schema_path)]]))
+        try:
+            assert editor._load_file(str(data_path))
+            editor.validate_now()
+            assert editor.wait_for_schema_validation()
+            assert "1 нарушений" in editor.validation_label.text()
+            doc = editor.current_document
+            editor.validate_now()
+            doc.schema_worker.cancel()
+            assert editor.wait_for_schema_validation()
+            QApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+            assert doc.schema_worker is None
+            editor._cancel_schema_validation(doc, wait=True)
+        finally:
+            settings_manager.set("schema_associations", previous)
+
+
 # Запуск тестов
 if __name__ == '__main__':
     pytest.main([__file__, '-v', '--tb=short'])
\ No newline at end of file
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'ui/mainwindow.ui'
+#
+# Created by: PyQt5 UI code generator 5.15.11
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic5 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+class Ui_MainWindow(object):
+    def setupUi(self, MainWindow):
+        MainWindow.setObjectName("MainWindow")
+        MainWindow.resize(1288, 751)
+        self.centralwidget = QtWidgets.QWidget(MainWindow)
+        self.centralwidget.setObjectName("centralwidget")
+        self.verticalLayout = QtWidgets.QVBoxLayout(self.centralwidget)
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.controls_layout = QtWidgets.QHBoxLayout()
+        self.controls_layout.setSizeConstraint(QtWidgets.QLayout.SetMaximumSize)
+        self.controls_layout.setObjectName("controls_layout")
+        self.close_doc_btn = QtWidgets.QPushButton(self.centralwidget)
+        self.close_doc_btn.setObjectName("close_doc_btn")
+        self.controls_layout.addWidget(self.close_doc_btn)
+        self.label_font = QtWidgets.QLabel(self.centralwidget)
+        self.label_font.setObjectName("label_font")
+        self.controls_layout.addWidget(self.label_font, 0, QtCore.Qt.AlignRight)
+        self.font_combo = QtWidgets.QFontComboBox(self.centralwidget)
+        font = QtGui.QFont()
+        font.setPointSize(8)
+        self.font_combo.setFont(font)
+        self.font_combo.setObjectName("font_combo")
+        self.controls_layout.addWidget(self.font_combo, 0, QtCore.Qt.AlignRight)
+        self.label_size = QtWidgets.QLabel(self.centralwidget)
+        self.label_size.setObjectName("label_size")
+        self.controls_layout.addWidget(self.label_size, 0, QtCore.Qt.AlignRight)
+        self.font_size = QtWidgets.QSpinBox(self.centralwidget)
+        font = QtGui.QFont()
+        font.setPointSize(8)
+        self.font_size.setFont(font)
+        self.font_size.setMinimum(6)
+        self.font_size.setMaximum(72)
+        self.font_size.setProperty("value", 12)
+        self.font_size.setObjectName("font_size")
+        self.controls_layout.addWidget(self.font_size)
+        self.text_color_btn = QtWidgets.QPushButton(self.centralwidget)
+        self.text_color_btn.setObjectName("text_color_btn")
+        self.controls_layout.addWidget(self.text_color_btn, 0, QtCore.Qt.AlignTop)
+        self.bg_color_btn = QtWidgets.QPushButton(self.centralwidget)
+        self.bg_color_btn.setObjectName("bg_color_btn")
+        self.controls_layout.addWidget(self.bg_color_btn)
+        spacerItem = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.controls_layout.addItem(spacerItem)
+        self.verticalLayout.addLayout(self.controls_layout)
+        self.tab_widget = QtWidgets.QTabWidget(self.centralwidget)
+        self.tab_widget.setObjectName("tab_widget")
+        self.editor_tab = QtWidgets.QWidget()
+        self.editor_tab.setObjectName("editor_tab")
+        self.editor_layout = QtWidgets.QHBoxLayout(self.editor_tab)
+        self.editor_layout.setObjectName("editor_layout")
+        self.splitter = QtWidgets.QSplitter(self.editor_tab)
+        self.splitter.setOrientation(QtCore.Qt.Horizontal)
+        self.splitter.setObjectName("splitter")
+        self.text_edit = QtWidgets.QTextEdit(self.splitter)
+        self.text_edit.setObjectName("text_edit")
+        self.tree_widget = QtWidgets.QTreeWidget(self.splitter)
+        self.tree_widget.setObjectName("tree_widget")
+        self.editor_layout.addWidget(self.splitter)
+        self.tab_widget.addTab(self.editor_tab, "")
+        self.verticalLayout.addWidget(self.tab_widget)
+        MainWindow.setCentralWidget(self.centralwidget)
+        self.mainToolBar = QtWidgets.QToolBar(MainWindow)
+        self.mainToolBar.setMovable(False)
+        self.mainToolBar.setObjectName("mainToolBar")
+        MainWindow.addToolBar(QtCore.Qt.TopToolBarArea, self.mainToolBar)
+        self.statusbar = QtWidgets.QStatusBar(MainWindow)
+        self.statusbar.setObjectName("statusbar")
+        MainWindow.setStatusBar(self.statusbar)
+        self.menubar = QtWidgets.QMenuBar(MainWindow)
+        self.menubar.setGeometry(QtCore.QRect(0, 0, 1288, 25))
+        self.menubar.setObjectName("menubar")
+        self.menuFile = QtWidgets.QMenu(self.menubar)
+        self.menuFile.setObjectName("menuFile")
+        self.menuRecentFiles = QtWidgets.QMenu(self.menuFile)
+        self.menuRecentFiles.setObjectName("menuRecentFiles")
+        self.menuTools = QtWidgets.QMenu(self.menubar)
+        self.menuTools.setObjectName("menuTools")
+        self.menuView = QtWidgets.QMenu(self.menubar)
+        self.menuView.setObjectName("menuView")
+        self.menuHelp = QtWidgets.QMenu(self.menubar)
+        self.menuHelp.setObjectName("menuHelp")
+        MainWindow.setMenuBar(self.menubar)
+        self.actionNew = QtWidgets.QAction(MainWindow)
+        self.actionNew.setObjectName("actionNew")
+        self.actionOpen = QtWidgets.QAction(MainWindow)
+        self.actionOpen.setObjectName("actionOpen")
+        self.actionSave = QtWidgets.QAction(MainWindow)
+        self.actionSave.setObjectName("actionSave")
+        self.actionSaveAs = QtWidgets.QAction(MainWindow)
+        self.actionSaveAs.setObjectName("actionSaveAs")
+        self.actionExit = QtWidgets.QAction(MainWindow)
+        self.actionExit.setObjectName("actionExit")
+        self.actionFind = QtWidgets.QAction(MainWindow)
+        self.actionFind.setObjectName("actionFind")
+        self.actionFindInFiles = QtWidgets.QAction(MainWindow)
+        self.actionFindInFiles.setObjectName("actionFindInFiles")
+        self.actionValidateNow = QtWidgets.QAction(MainWindow)
+        self.actionValidateNow.setObjectName("actionValidateNow")
+        self.actionNextError = QtWidgets.QAction(MainWindow)
+        self.actionNextError.setObjectName("actionNextError")
+        self.actionMatchBracket = QtWidgets.QAction(MainWindow)
+        self.actionMatchBracket.setObjectName("actionMatchBracket")
+        self.actionSchemas = QtWidgets.QAction(MainWindow)
+        self.actionSchemas.setObjectName("actionSchemas")
+        self.actionCompare = QtWidgets.QAction(MainWindow)
+        self.actionCompare.setObjectName("actionCompare")
+        self.actionFollow = QtWidgets.QAction(MainWindow)
+        self.actionFollow.setCheckable(True)
+        self.actionFollow.setObjectName("actionFollow")
+        self.actionToggleFold = QtWidgets.QAction(MainWindow)
+        self.actionToggleFold.setObjectName("actionToggleFold")
+        self.actionFoldToLevel = QtWidgets.QAction(MainWindow)
+        self.actionFoldToLevel.setObjectName("actionFoldToLevel")
+        self.actionUnfoldAll = QtWidgets.QAction(MainWindow)
+        self.actionUnfoldAll.setObjectName("actionUnfoldAll")
+        self.actionMinimap = QtWidgets.QAction(MainWindow)
+        self.actionMinimap.setCheckable(True)
+        self.actionMinimap.setObjectName("actionMinimap")
+        self.actionExport = QtWidgets.QAction(MainWindow)
+        self.actionExport.setObjectName("actionExport")
+        self.actionPerformance = QtWidgets.QAction(MainWindow)
+        self.actionPerformance.setCheckable(True)
+        self.actionPerformance.setObjectName("actionPerformance")
+        self.actionAbout = QtWidgets.QAction(MainWindow)
+        self.actionAbout.setObjectName("actionAbout")
+        self.actionFormat = QtWidgets.QAction(MainWindow)
+        self.actionFormat.setObjectName("actionFormat")
+        self.actionMinify = QtWidgets.QAction(MainWindow)
+        self.actionMinify.setObjectName("actionMinify")
+        self.actionValidate = QtWidgets.QAction(MainWindow)
+        self.actionValidate.setObjectName("actionValidate")
+        self.mainToolBar.addAction(self.actionFormat)
+        self.mainToolBar.addAction(self.actionMinify)
+        self.mainToolBar.addAction(self.actionValidate)
+        self.menuFile.addAction(self.actionNew)
+        self.menuFile.addAction(self.actionOpen)
+        self.menuFile.addAction(self.actionSave)
+        self.menuFile.addAction(self.actionSaveAs)
+        self.menuFile.addSeparator()
+        self.menuFile.addAction(self.menuRecentFiles.menuAction())
+        self.menuFile.addSeparator()
+        self.menuFile.addAction(self.actionExit)
+        self.menuTools.addAction(self.actionFind)
+        self.menuTools.addAction(self.actionFindInFiles)
+        self.menuTools.addAction(self.actionValidateNow)
+        self.menuTools.addAction(self.actionNextError)
+        self.menuTools.addAction(self.actionMatchBracket)
+        self.menuTools.addAction(self.actionSchemas)
+        self.menuTools.addAction(self.actionCompare)
+        self.menuTools.addAction(self.actionFollow)
+        self.menuTools.addSeparator()
+        self.menuTools.addAction(self.actionExport)
+        self.menuTools.addSeparator()
+        self.menuTools.addAction(self.actionPerformance)
+        self.menuView.addAction(self.actionToggleFold)
+        self.menuView.addAction(self.actionFoldToLevel)
+        self.menuView.addAction(self.actionUnfoldAll)
+        self.menuView.addSeparator()
+        self.menuView.addAction(self.actionMinimap)
+        self.menuHelp.addAction(self.actionAbout)
+        self.menubar.addAction(self.menuFile.menuAction())
+        self.menubar.addAction(self.menuView.menuAction())
+        self.menubar.addAction(self.menuTools.menuAction())
+        self.menubar.addAction(self.menuHelp.menuAction())
+
+        self.retranslateUi(MainWindow)
+        self.tab_widget.setCurrentIndex(0)
+        QtCore.QMetaObject.connectSlotsByName(MainWindow)
+
+    def retranslateUi(self, MainWindow):
+        _translate = QtCore.QCoreApplication.translate
+        MainWindow.setWindowTitle(_translate("MainWindow", "JSON-Блокнот Pro"))
+        self.close_doc_btn.setText(_translate("MainWindow", "❌ Закрыть документ"))
+        self.label_font.setText(_translate("MainWindow", "Шрифт:"))
+        self.label_size.setText(_translate("MainWindow", "Размер:"))
+        self.text_color_btn.setText(_translate("MainWindow", "🎨 Цвет текста"))
+        self.bg_color_btn.setText(_translate("MainWindow", "🖌️ Цвет фона"))
+        self.tree_widget.headerItem().setText(0, _translate("MainWindow", "Структура JSON"))
+        self.tab_widget.setTabText(self.tab_widget.indexOf(self.editor_tab), _translate("MainWindow", "📝 Редактор"))
+        self.mainToolBar.setWindowTitle(_translate("MainWindow", "Панель инструментов"))
+        self.menuFile.setTitle(_translate("MainWindow", "Файл"))
+        self.menuRecentFiles.setTitle(_translate("MainWindow", "Недавние файлы"))
+        self.menuTools.setTitle(_translate("MainWindow", "Инструменты"))
+        self.menuView.setTitle(_translate("MainWindow", "Вид"))
+        self.menuHelp.setTitle(_translate("MainWindow", "Справка"))
+        self.actionNew.setText(_translate("MainWindow", "Новый"))
+        self.actionNew.setShortcut(_translate("MainWindow", "Ctrl+N"))
+        self.actionOpen.setText(_translate("MainWindow", "Открыть"))
+        self.actionOpen.setShortcut(_translate("MainWindow", "Ctrl+O"))
+        self.actionSave.setText(_translate("MainWindow", "Сохранить"))
+        self.actionSave.setShortcut(_translate("MainWindow", "Ctrl+S"))
+        self.actionSaveAs.setText(_translate("MainWindow", "Сохранить как"))
+        self.actionSaveAs.setShortcut(_translate("MainWindow", "Ctrl+Shift+S"))
+        self.actionExit.setText(_translate("MainWindow", "Выход"))
+        self.actionExit.setShortcut(_translate("MainWindow", "Ctrl+Q"))
+        self.actionFind.setText(_translate("MainWindow", "Найти"))
+        self.actionFind.setShortcut(_translate("MainWindow", "Ctrl+F"))
+        self.actionFindInFiles.setText(_translate("MainWindow", "Найти в файлах"))
+        self.actionFindInFiles.setShortcut(_translate("MainWindow", "Ctrl+Shift+H"))
+        self.actionValidateNow.setText(_translate("MainWindow", "Проверить сейчас"))
+        self.actionValidateNow.setShortcut(_translate("MainWindow", "F5"))
+        self.actionNextError.setText(_translate("MainWindow", "Следующая ошибка"))
+        self.actionNextError.setShortcut(_translate("MainWindow", "F8"))
+        self.actionMatchBracket.setText(_translate("MainWindow", "Перейти к парной скобке"))
+        self.actionMatchBracket.setShortcut(_translate("MainWindow", "Ctrl+Shift+\\"))
+        self.actionSchemas.setText(_translate("MainWindow", "Схемы JSON..."))
+        self.actionCompare.setText(_translate("MainWindow", "Сравнить JSON..."))
+        self.actionFollow.setText(_translate("MainWindow", "Следить за файлом (tail -f)"))
+        self.actionToggleFold.setText(_translate("MainWindow", "Свернуть/развернуть блок"))
+        self.actionToggleFold.setShortcut(_translate("MainWindow", "Ctrl+Shift+["))
+        self.actionFoldToLevel.setText(_translate("MainWindow", "Свернуть до уровня..."))
+        self.actionUnfoldAll.setText(_translate("MainWindow", "Развернуть все"))
+        self.actionUnfoldAll.setShortcut(_translate("MainWindow", "Ctrl+Shift+]"))
+        self.actionMinimap.setText(_translate("MainWindow", "Мини-карта"))
+        self.actionExport.setText(_translate("MainWindow", "Экспорт"))
+        self.actionPerformance.setText(_translate("MainWindow", "Производительность"))
+        self.actionAbout.setText(_translate("MainWindow", "О программе"))
+        self.actionFormat.setText(_translate("MainWindow", "✨ Форматировать JSON"))
+        self.actionMinify.setText(_translate("MainWindow", "📦 Компактный вид"))
+        self.actionValidate.setText(_translate("MainWindow", "✔️ Проверить"))
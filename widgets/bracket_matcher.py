@@ -0,0 +1,75 @@
+"""
+Модуль поиска парной скобки в редакторе
+
+Текст документа не копируется: символы у курсора читаются по одному, строка
+курсора разбирается лексером подсветки (скобки в строках JSON не считаются),
+а строка с парной скобкой находится по индексу скобок подсветки за
+O(log n). Скобки длинных строк (минифицированные файлы) подсветка запоминает
+при проверке, поэтому движение курсора по такой строке тоже стоит O(log n).
+"""
+from typing import Optional, Tuple
+
+from PyQt5.QtGui import QTextBlock
+
+from core.bracket_index import LinePairs
+
+_MATCHING = {"{": "}", "[": "]", "}": "{", "]": "["}
+
+
+class BracketMatcher:
+    """Парная скобка для скобки у позиции курсора"""
+
+    def __init__(self, highlighter):
+        self.highlighter = highlighter
+
+    def match(self, position: int) -> Optional[Tuple[int, Optional[int]]]:
+        """Скобка рядом с position (сначала справа, потом слева) и парная ей:
+        (позиция скобки, позиция парной или None, если пары нет). None — рядом
+        нет скобки вне строк JSON или проверка синтаксиса еще не выполнена"""
+        document = self.highlighter.document()
+        if document is None or not self.highlighter.is_checked():
+            return None
+        block = document.findBlock(position)
+        pairs = None
+        for at in (position, position - 1):
+            if at < block.position() or document.characterAt(at) not in _MATCHING:
+                continue
+            if pairs is None:
+                pairs = self.highlighter.line_pairs(block)
+            i = pairs.find(at - block.position())
+            if i is not None:
+                return at, self._find_pair(block, pairs, i)
+        return None
+
+    def _find_pair(self, block: QTextBlock, pairs: LinePairs, i: int) -> Optional[int]:
+        """Позиция скобки, парной i-й скобке строки block"""
+        level = pairs.level(i)
+        bracket = pairs.brackets[i]
+        index = self.highlighter.brackets
+        line = block.blockNumber()
+        document = block.document()
+        if pairs.is_open(i):
+            # Первая следующая скобка уровня не выше — закрывающая эту пару
+            j = pairs.first_at_most(i + 1, level)
+            if j is None:
+                # Строка, где глубина опускается ниже уровня пары
+                line = index.find_low(line + 1, level - 1)
+                if line is None:
+                    return None
+                block = document.findBlockByNumber(line)
+                pairs = self.highlighter.line_pairs(block)
+                j = pairs.first_at_most(0, level)
+        else:
+            # Последняя предыдущая скобка уровня не выше — открывающая эту пару
+            j = pairs.last_at_most(i, level)
+            if j is None:
+                line = index.find_low_before(line, level - 1)
+                if line is None:
+                    return None
+                block = document.findBlockByNumber(line)
+                pairs = self.highlighter.line_pairs(block)
+                j = pairs.last_at_most(len(pairs), level)
+        # Другой уровень или вид скобки — пара закрыта с ошибкой
+        if j is None or pairs.level(j) != level or pairs.brackets[j] != _MATCHING[bracket]:
+            return None
+        return block.position() + pairs.columns[j]
@@ -0,0 +1,242 @@
+"""
+Модуль строки пути JSON у курсора («хлебные крошки»)
+
+Путь находится без разбора текста. Скобки, охватывающие курсор, ищутся по
+индексу скобок подсветки: одна на уровень, O(log n) каждая. Ключ члена
+объекта — последний ключ уровня объекта перед позицией. Номер элемента
+массива — число запятых его уровня между скобкой и позицией; его считает
+индекс разделителей подсветки. Итого O(глубины · log n) на движение
+курсора при любом размере документа.
+"""
+import json
+from bisect import bisect_left
+from typing import List, NamedTuple, Optional
+
+from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtGui import QTextBlock
+from PyQt5.QtWidgets import QApplication, QHBoxLayout, QLabel, QMenu, QToolButton, QWidget
+
+from core.json_path import FORMATS, PathPart, to_jsonpath
+
+# Сколько последних частей пути показывать; остальные сворачиваются в «…»
+MAX_SEGMENTS = 8
+# Наибольшая длина подписи части пути, символов
+MAX_SEGMENT_TEXT = 40
+
+
+class CursorPath(NamedTuple):
+    """Путь JSON у позиции: path — ключи и номера от корня, positions — начала
+    значений для перехода: positions[0] — корень, positions[i + 1] — path[:i + 1]"""
+    path: List[PathPart]
+    positions: List[int]
+
+
+class PathResolver:
+    """Путь JSON у позиции текста по индексам подсветки"""
+
+    def __init__(self, highlighter):
+        self.highlighter = highlighter
+
+    def resolve(self, position: int) -> Optional[CursorPath]:
+        """Путь значения, в котором стоит позиция. None — проверка синтаксиса
+        еще не выполнена или скобки вокруг позиции закрыты с ошибкой"""
+        highlighter = self.highlighter
+        document = highlighter.document()
+        if document is None or not highlighter.is_checked():
+            return None
+        cursor_block = block = document.findBlock(position)
+        column = position - block.position()
+        pairs = highlighter.line_pairs(block)
+        stop = bisect_left(pairs.columns, column)
+        if stop:
+            depth = pairs.level(stop - 1) - (not pairs.is_open(stop - 1))
+        else:
+            depth = highlighter.brackets.start_depth(block.blockNumber())
+
+        # Открывающие скобки вокруг позиции, от внешней к внутренней: (строка, колонка, скобка)
+        openers = []
+        for level in range(depth, 0, -1):
+            j = pairs.last_at_most(stop, level)
+            if j is None:
+                line = highlighter.brackets.find_low_before(block.blockNumber(), level - 1)
+                if line is None:
+                    return None
+                block = document.findBlockByNumber(line)
+                pairs = highlighter.line_pairs(block)
+                j = pairs.last_at_most(len(pairs), level)
+            if j is None or not pairs.is_open(j) or pairs.level(j) != level:
+                return None
+            openers.append((block, pairs.columns[j], pairs.brackets[j]))
+            stop = j
+        openers.reverse()
+
+        path, positions = [], [openers[0][0].position() + openers[0][1] if openers else position]
+        if highlighter.json_lines:
+            # Номер записи — число начал записей в строках выше
+            first = openers[0][0] if openers else cursor_block
+            marks = highlighter.line_marks(first)
+            if not len(marks) or marks.level(0) != 0:
+                return CursorPath([], [position])
+            path.append(highlighter.marks.count_at(0, first.blockNumber(), 0))
+            positions = [positions[0], first.position() + marks.columns[0]]
+
+        for k, (block, column_open, bracket) in enumerate(openers):
+            inner = k + 1 == len(openers)
+            target, column_target = (cursor_block, column) if inner else openers[k + 1][:2]
+            child = target.position() + column_target
+            if bracket == "[":
+                path.append(self._count(block, column_open, target, column_target, k + 1))
+                positions.append(child)
+                continue
+            key = self._key(block, column_open, target, column_target, k + 1, inner)
+            if key is None:
+                # Позиция между членами объекта
+                break
+            path.append(key[0])
+            positions.append(key[1] if inner else child)
+        return CursorPath(path, positions)
+
+    def _count(self, first: QTextBlock, start_column: int, last: QTextBlock,
+               stop_column: int, level: int) -> int:
+        """Число запятых уровня level между двумя позициями"""
+        highlighter = self.highlighter
+        marks = highlighter.line_marks(first)
+        start = marks.after(start_column)
+        if first == last:
+            return marks.count_at(start, marks.before(stop_column), level)
+        total = marks.count_at(start, len(marks), level)
+        total += highlighter.marks.count_at(first.blockNumber() + 1, last.blockNumber(), level)
+        marks = highlighter.line_marks(last)
+        return total + marks.count_at(0, marks.before(stop_column), level)
+
+    def _key(self, first: QTextBlock, start_column: int, last: QTextBlock,
+             stop_column: int, level: int, inclusive: bool) -> Optional[tuple]:
+        """Последний ключ уровня level между двумя позициями: (ключ, позиция).
+        inclusive — ключ может начинаться в самой конечной позиции.
+        None — последним стоит запятая (или ничего)"""
+        highlighter = self.highlighter
+        block = last
+        marks = highlighter.line_marks(block)
+        stop = marks.before(stop_column)
+        if inclusive and stop < len(marks) and marks.columns[stop] == stop_column and marks.is_key(stop):
+            stop += 1
+        i = marks.last_at_most(stop, level)
+        start = marks.after(start_column) if first == last else 0
+        if (i is None or i < start) and first != last:
+            line = highlighter.marks.find_low_before(last.blockNumber(), level)
+            block = first
+            if line is not None and line > first.blockNumber():
+                block = block.document().findBlockByNumber(line)
+            marks = highlighter.line_marks(block)
+            i = marks.last_at_most(len(marks), level)
+            start = marks.after(start_column) if block == first else 0
+        if i is None or i < start or not marks.is_key(i):
+            return None
+        position = block.position() + marks.columns[i]
+        return _read_key(block.document(), position), position
+
+
+def _read_key(document, position: int) -> str:
+    """Строка JSON, начинающаяся в position (кавычка), без копирования строки текста"""
+    chars = ['"']
+    escaped = False
+    position += 1
+    while position < document.characterCount():
+        char = document.characterAt(position)
+        chars.append(char)
+        position += 1
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == '"':
+            break
+    token = "".join(chars)
+    try:
+        return json.loads(token)
+    except ValueError:
+        return token[1:-1]
+
+
+class BreadcrumbBar(QWidget):
+    """Строка пути: части кликабельны (переход к значению), путь копируется
+    в нотациях JSONPath, JSON Pointer и jq"""
+
+    # Позиция в тексте, к которой перейти
+    segmentClicked = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.path: Optional[List[PathPart]] = None
+        self.positions: List[int] = []
+        self._layout = QHBoxLayout(self)
+        self._layout.setContentsMargins(2, 0, 2, 0)
+        self._layout.setSpacing(0)
+        self._segments = QHBoxLayout()
+        self._segments.setSpacing(0)
+        self._layout.addLayout(self._segments)
+        self._layout.addStretch(1)
+
+        self.copy_button = QToolButton(self)
+        self.copy_button.setText("Копировать путь")
+        self.copy_button.setToolTip("Копировать путь как JSONPath")
+        self.copy_button.setPopupMode(QToolButton.MenuButtonPopup)
+        self.copy_button.clicked.connect(lambda: self.copy_path(to_jsonpath))
+        menu = QMenu(self.copy_button)
+        for name, formatter in FORMATS:
+            menu.addAction(name, lambda formatter=formatter: self.copy_path(formatter))
+        self.copy_button.setMenu(menu)
+        self._layout.addWidget(self.copy_button)
+        self.set_path(None)
+
+    def set_path(self, found: Optional[CursorPath]):
+        """Показывает путь (None — путь неизвестен)"""
+        path = found.path if found is not None else None
+        self.positions = found.positions if found is not None else []
+        self.copy_button.setEnabled(path is not None)
+        if path == self.path and self._segments.count():
+            return
+        self.path = path
+        while self._segments.count():
+            widget = self._segments.takeAt(0).widget()
+            if widget is not None:
+                widget.deleteLater()
+        if path is None:
+            self._segments.addWidget(QLabel("—", self))
+            return
+        self._add_segment("$", 0)
+        first = max(0, len(path) - MAX_SEGMENTS)
+        if first:
+            self._add_separator()
+            self._segments.addWidget(QLabel("…", self))
+        for i in range(first, len(path)):
+            self._add_separator()
+            part = path[i]
+            text = f"[{part}]" if isinstance(part, int) else part
+            if len(text) > MAX_SEGMENT_TEXT:
+                text = text[:MAX_SEGMENT_TEXT - 1] + "…"
+            self._add_segment(text, i + 1)
+
+    def _add_segment(self, text: str, index: int):
+        button = QToolButton(self)
+        button.setAutoRaise(True)
+        button.setText(text.replace("&", "&&"))
+        button.clicked.connect(lambda: self._on_segment(index))
+        self._segments.addWidget(button)
+
+    def _add_separator(self):
+        self._segments.addWidget(QLabel("›", self))
+
+    def _on_segment(self, index: int):
+        if index < len(self.positions):
+            self.segmentClicked.emit(self.positions[index])
+
+    def formatted(self, formatter) -> Optional[str]:
+        """Текущий путь в нотации formatter (функция из core.json_path)"""
+        return formatter(self.path) if self.path is not None else None
+
+    def copy_path(self, formatter):
+        """Копирует текущий путь в буфер обмена"""
+        text = self.formatted(formatter)
+        if text is not None:
+            QApplication.clipboard().setText(text)
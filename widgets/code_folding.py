@@ -0,0 +1,383 @@
+"""
+Модуль свертки объектов и массивов в редакторе
+
+Области свертки берутся из индекса скобок подсветки (BracketIndex): он
+заполняется в том же проходе, что и построчная проверка синтаксиса, поэтому
+ни свертка, ни поля рядом с текстом не просматривают документ. Свернутые
+строки скрываются (QTextBlock.setVisible), текст документа не меняется.
+
+Слева от текста — поле с маркерами областей (▾ — развернута, ▸ — свернута),
+справа — мини-карта: профиль глубины вложенности всего документа и рамка
+видимой части. Обе рисуются только по индексу: O(высоты виджета).
+"""
+from typing import Iterator, Optional, Tuple
+
+from PyQt5.QtCore import QEvent, QObject, QPoint, QLineF, QRectF, Qt
+from PyQt5.QtGui import QColor, QPainter, QTextCursor
+from PyQt5.QtWidgets import QWidget
+
+from core.bracket_index import BracketIndex
+
+# Ширина мини-карты и шаг глубины на ней, пиксели
+MINIMAP_WIDTH = 64
+MINIMAP_DEPTH_STEP = 3
+# Высота строки мини-карты для коротких документов, пиксели
+MINIMAP_MAX_ROW = 3.0
+# С какого числа строк со сменой видимости документ размечается заново целиком
+# (лениво, по таймеру), а не вызовом markContentsDirty: частичная разметка
+# Qt 5 синхронна, а когда текст ниже диапазона уходит за QFIXED_MAX пикселей
+# (около 400 тысяч строк), растягивается на минуты
+FULL_LAYOUT_LINES = 20_000
+
+
+class FoldGutter(QWidget):
+    """Поле маркеров свертки слева от текста"""
+
+    def __init__(self, folding: "CodeFolding"):
+        super().__init__(folding.text_edit)
+        self.folding = folding
+
+    def preferred_width(self) -> int:
+        return self.fontMetrics().horizontalAdvance("▾") + 8
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(event.rect(), self.palette().window())
+        index = self.folding.index
+        painter.setPen(self.palette().windowText().color())
+        for line, top, height in self.folding.visible_lines():
+            if line < len(index) and index.opens(line):
+                marker = "▸" if self.folding.is_folded(line) else "▾"
+                painter.drawText(QRectF(0, top, self.width(), height), Qt.AlignHCenter | Qt.AlignTop, marker)
+
+    def mousePressEvent(self, event):
+        line = self.folding.line_at(event.pos().y())
+        if line is not None:
+            self.folding.toggle(line)
+
+
+class Minimap(QWidget):
+    """Профиль глубины вложенности документа с рамкой видимой части"""
+
+    def __init__(self, folding: "CodeFolding"):
+        super().__init__(folding.text_edit)
+        self.folding = folding
+        self.setCursor(Qt.PointingHandCursor)
+
+    def _scale(self) -> float:
+        """Высота одной строки документа на карте"""
+        count = max(len(self.folding.index), 1)
+        return min(MINIMAP_MAX_ROW, self.height() / count)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.palette().base().color().darker(105))
+        index = self.folding.index
+        count = len(index)
+        if not count:
+            return
+        scale = self._scale()
+        ends = index.ends
+        width = self.width() - 2
+        lines = []
+        for y in range(min(self.height(), int(count * scale) + 1)):
+            depth = ends[min(count - 1, int(y / scale))]
+            if depth:
+                lines.append(QLineF(1, y + 0.5, 1 + min(depth * MINIMAP_DEPTH_STEP, width), y + 0.5))
+        painter.setPen(QColor("#7f8c9d"))
+        painter.drawLines(lines)
+        visible = list(self.folding.visible_lines())
+        if visible:
+            first, last = visible[0][0], visible[-1][0]
+            painter.fillRect(QRectF(0, first * scale, self.width(), max((last - first + 1) * scale, 2)),
+                             QColor(52, 152, 219, 60))
+
+    def mousePressEvent(self, event):
+        self._scroll(event.pos().y())
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.LeftButton:
+            self._scroll(event.pos().y())
+
+    def _scroll(self, y: int):
+        count = len(self.folding.index)
+        if count:
+            self.folding.scroll_to_line(min(count - 1, max(0, int(y / self._scale()))))
+
+
+class CodeFolding(QObject):
+    """Свертка областей текста редактора по индексу скобок подсветки"""
+
+    def __init__(self, text_edit, highlighter, parent=None):
+        super().__init__(parent or text_edit)
+        self.text_edit = text_edit
+        self.highlighter = highlighter
+        # Курсоры строк, с которых начинаются свернутые области
+        self._folds = []
+        self._revision = text_edit.document().revision()
+        self.gutter = FoldGutter(self)
+        self.minimap = Minimap(self)
+        self.minimap.hide()
+        text_edit.installEventFilter(self)
+        text_edit.verticalScrollBar().valueChanged.connect(self._repaint)
+        text_edit.document().contentsChange.connect(self._on_contents_change)
+        text_edit.document().contentsChanged.connect(self._repaint)
+        text_edit.cursorPositionChanged.connect(self._reveal_cursor)
+        self._place()
+
+    @property
+    def index(self) -> BracketIndex:
+        return self.highlighter.brackets
+
+    # --- области ---
+    def is_folded(self, line: int) -> bool:
+        block = self.text_edit.document().findBlockByNumber(line + 1)
+        return block.isValid() and not block.isVisible()
+
+    def region(self, line: int) -> Optional[Tuple[int, int]]:
+        """Скрываемые строки области, которую открывает line (первая, последняя)"""
+        index = self.index
+        if not self.highlighter.is_checked() or line >= len(index) or not index.opens(line):
+            return None
+        end = index.region_end(line)
+        last = (len(index) if end is None else end) - 1
+        return (line + 1, last) if last > line else None
+
+    def enclosing(self, line: int) -> Optional[int]:
+        """Строка, открывающая ближайшую область, внутри которой находится line"""
+        index = self.index
+        if not self.highlighter.is_checked() or line >= len(index):
+            return None
+        depth = index.start_depth(line)
+        return index.find_low_before(line, depth - 1) if depth else None
+
+    def fold(self, line: int) -> bool:
+        """Сворачивает область строки line; False, если сворачивать нечего"""
+        span = self.region(line)
+        if span is None or self.is_folded(line):
+            return False
+        self._hide(*span)
+        self._folds.append(QTextCursor(self.text_edit.document().findBlockByNumber(line)))
+        self._after_change()
+        return True
+
+    def unfold(self, line: int) -> bool:
+        """Показывает скрытые строки после line (вместе с вложенными свертками)"""
+        span = self._show(line)
+        if span is None:
+            return False
+        self._mark_dirty(*span)
+        self._after_change()
+        return True
+
+    def _show(self, line: int) -> Optional[Tuple[int, int, int]]:
+        """Делает видимыми скрытые строки после line: (позиция начала и конца
+        показанного текста, число строк) или None, если скрытых строк там нет"""
+        document = self.text_edit.document()
+        block = document.findBlockByNumber(line + 1)
+        if not block.isValid() or block.isVisible():
+            return None
+        start = block.position()
+        count = 0
+        while block.isValid() and not block.isVisible():
+            block.setVisible(True)
+            block = block.next()
+            count += 1
+        return start, block.position() if block.isValid() else document.characterCount(), count
+
+    def toggle(self, line: Optional[int] = None) -> bool:
+        """Сворачивает или разворачивает область строки (по умолчанию — строки
+        курсора); если строка области не открывает, сворачивает объемлющую"""
+        if line is None:
+            line = self.text_edit.textCursor().blockNumber()
+        if self.is_folded(line):
+            return self.unfold(line)
+        if self.region(line) is None:
+            line = self.enclosing(line)
+            if line is None:
+                return False
+        return self.fold(line)
+
+    def fold_to_level(self, level: int) -> int:
+        """Сворачивает все области глубже level (0 — свернуть корень);
+        возвращает число свернутых областей"""
+        self.unfold_all()
+        if not self.highlighter.is_checked():
+            return 0
+        index = self.index
+        document = self.text_edit.document()
+        folded = hidden = 0
+        first = last = None
+        line = 0
+        for start in index.region_starts(level + 1):
+            if start < line:
+                # Внутри только что свернутой области
+                continue
+            span = self.region(start)
+            if span is None:
+                continue
+            self._hide(*span, mark=False)
+            self._folds.append(QTextCursor(document.findBlockByNumber(start)))
+            first = span[0] if first is None else first
+            last = span[1]
+            line = span[1] + 1
+            folded += 1
+            hidden += span[1] - span[0] + 1
+        if folded:
+            end_block = document.findBlockByNumber(last)
+            self._mark_dirty(document.findBlockByNumber(first).position(),
+                             end_block.position() + end_block.length(), hidden)
+            self._after_change()
+        return folded
+
+    def unfold_all(self):
+        """Разворачивает все свертки; разметка пересчитывается один раз"""
+        folds, self._folds = self._folds, []
+        start = end = None
+        shown = 0
+        for cursor in folds:
+            span = self._show(cursor.blockNumber())
+            if span is not None:
+                start = span[0] if start is None else min(start, span[0])
+                end = span[1] if end is None else max(end, span[1])
+                shown += span[2]
+        if start is not None:
+            self._mark_dirty(start, end, shown)
+            self._repaint()
+
+    def folded_lines(self):
+        """Строки, с которых начинаются свернутые области"""
+        return sorted({c.blockNumber() for c in self._folds if self.is_folded(c.blockNumber())})
+
+    def _hide(self, first: int, last: int, mark: bool = True):
+        document = self.text_edit.document()
+        block = document.findBlockByNumber(first)
+        start = block.position()
+        for _ in range(last - first + 1):
+            block.setVisible(False)
+            block = block.next()
+        if mark:
+            self._mark_dirty(start, block.position() if block.isValid() else document.characterCount(),
+                             last - first + 1)
+        cursor = self.text_edit.textCursor()
+        if not cursor.block().isVisible():
+            # Курсор уходит на конец строки, открывающей область
+            cursor.setPosition(document.findBlockByNumber(first - 1).position())
+            cursor.movePosition(QTextCursor.EndOfBlock)
+            self.text_edit.setTextCursor(cursor)
+
+    def _mark_dirty(self, start: int, end: int, lines: int):
+        """Пересчитывает разметку после смены видимости lines строк в [start, end)"""
+        # Изменение видимости строк — не правка текста: ревизия документа прежняя
+        document = self.text_edit.document()
+        if lines < FULL_LAYOUT_LINES:
+            document.markContentsDirty(start, end - start)
+        else:
+            # Тот же размер страницы запускает полную ленивую разметку
+            document.setPageSize(document.pageSize())
+
+    def _after_change(self):
+        self._folds = [c for c in self._folds if self.is_folded(c.blockNumber())]
+        self._repaint()
+
+    # --- правки и курсор ---
+    def _on_contents_change(self, position: int, removed: int, added: int):
+        """Правка внутри свернутой области или в ее первой строке разворачивает ее"""
+        document = self.text_edit.document()
+        revision = document.revision()
+        if revision == self._revision or not self._folds:
+            # Подсветка и сама свертка меняют только оформление
+            self._revision = revision
+            return
+        self._revision = revision
+        block = document.findBlock(position)
+        last = document.findBlock(position + added)
+        while block.isValid():
+            self._reveal_block(block)
+            if block == last:
+                break
+            block = block.next()
+
+    def _reveal_cursor(self):
+        self._reveal_block(self.text_edit.textCursor().block())
+
+    def _reveal_block(self, block):
+        """Разворачивает свертку, которая скрывает block или начинается на нем"""
+        if not self._folds:
+            return
+        if block.isVisible():
+            following = block.next()
+            if following.isValid() and not following.isVisible():
+                self.unfold(block.blockNumber())
+            return
+        while block.isValid() and not block.isVisible():
+            block = block.previous()
+        if block.isValid():
+            self.unfold(block.blockNumber())
+
+    # --- отображение ---
+    def visible_lines(self) -> Iterator[Tuple[int, float, float]]:
+        """Видимые в окне строки: (номер, верх в окне, высота). Скрытые строки
+        свернутых областей пропускаются переходом по индексу, а не по одной"""
+        edit = self.text_edit
+        document = edit.document()
+        layout = document.documentLayout()
+        offset = edit.verticalScrollBar().value()
+        height = edit.viewport().height()
+        block = edit.cursorForPosition(QPoint(0, 0)).block()
+        while block.isValid():
+            if not block.isVisible():
+                line = block.blockNumber()
+                while block.isValid() and not block.isVisible():
+                    block = block.previous()
+                end = self.index.region_end(block.blockNumber()) if block.isValid() else None
+                block = document.findBlockByNumber(end if end is not None and end > line else line + 1)
+                while block.isValid() and not block.isVisible():
+                    block = block.next()
+                continue
+            rect = layout.blockBoundingRect(block)
+            top = rect.top() - offset
+            if top > height:
+                break
+            yield block.blockNumber(), top, rect.height()
+            block = block.next()
+
+    def line_at(self, y: int) -> Optional[int]:
+        block = self.text_edit.cursorForPosition(QPoint(0, y)).block()
+        return block.blockNumber() if block.isValid() else None
+
+    def scroll_to_line(self, line: int):
+        """Прокручивает редактор так, чтобы строка line (или свертка с ней) была вверху трети окна"""
+        edit = self.text_edit
+        block = edit.document().findBlockByNumber(line)
+        while block.isValid() and not block.isVisible():
+            block = block.previous()
+        if not block.isValid():
+            return
+        top = edit.document().documentLayout().blockBoundingRect(block).top()
+        edit.verticalScrollBar().setValue(int(top - edit.viewport().height() / 3))
+
+    def set_minimap_visible(self, visible: bool):
+        self.minimap.setVisible(visible)
+        self._place()
+
+    def _place(self):
+        """Отводит поля под маркеры и мини-карту и размещает их рядом с текстом"""
+        edit = self.text_edit
+        gutter_width = self.gutter.preferred_width()
+        minimap_width = MINIMAP_WIDTH if self.minimap.isVisibleTo(edit) else 0
+        edit.setViewportMargins(gutter_width, 0, minimap_width, 0)
+        viewport = edit.viewport().geometry()
+        self.gutter.setGeometry(viewport.left() - gutter_width, viewport.top(), gutter_width, viewport.height())
+        self.minimap.setGeometry(viewport.right() + 1, viewport.top(), minimap_width, viewport.height())
+
+    def _repaint(self, *args):
+        self.gutter.update()
+        if self.minimap.isVisible():
+            self.minimap.update()
+
+    def eventFilter(self, watched, event):
+        if watched is self.text_edit and event.type() in (QEvent.Resize, QEvent.FontChange):
+            self.gutter.setFont(self.text_edit.font())
+            self._place()
+        return False
@@ -0,0 +1,140 @@
+"""
+Модуль вкладок документов: состояние каждого открытого файла и бюджет памяти
+
+Каждая вкладка хранит свой текст (QTextDocument со своим стеком отмены),
+кэш разбора и дерево. Разобранные данные фоновых вкладок выгружаются по
+принципу LRU, когда суммарная оценка памяти превышает бюджет, и строятся
+заново при возврате на вкладку.
+"""
+import itertools
+from pathlib import Path
+from typing import List, Optional
+
+# Оценка памяти разобранного документа (объекты Python + элементы дерева)
+# в байтах на один символ исходного текста
+PARSED_BYTES_PER_CHAR = 12
+
+
+class Document:
+    """Состояние одной вкладки редактора"""
+
+    def __init__(self, page, splitter, text_edit, tree_widget, highlighter=None):
+        self.page = page
+        self.splitter = splitter
+        self.text_edit = text_edit
+        self.tree_widget = tree_widget
+        self.highlighter = highlighter
+        # Свертка блоков и мини-карта (widgets.code_folding.CodeFolding)
+        self.folding = None
+        # Поиск парной скобки (widgets.bracket_matcher.BracketMatcher)
+        self.bracket_matcher = None
+        # Путь JSON у курсора (widgets.breadcrumb_bar.PathResolver)
+        self.path_resolver = None
+        self.file_path: Optional[Path] = None
+        self.is_modified = False
+        # Кэш последнего успешного разбора и ревизия документа, к которой он относится
+        self.parsed_data = None
+        self.parsed_revision = -1
+        # Построено ли дерево для текущего текста
+        self.tree_loaded = False
+        self.last_access = 0
+        # Дополнительные выделения редактора по видам (ошибки, скобки и т.п.)
+        self.extra_selections = {}
+        # Фоновая проверка по схеме и ее последние результаты: [(нарушение, позиция)]
+        self.schema_worker = None
+        self.schema_results = []
+        # Журнал автосохранения (core.autosave.DocumentJournal)
+        self.journal = None
+        # Документ JSON Lines (запись на строку) и режим слежения за файлом
+        self.json_lines = False
+        self.follow = False
+        self.reload_prompt_open = False
+        # Фоновое сохранение и ошибка последнего сохранения
+        self.save_worker = None
+        self.last_save_error: Optional[str] = None
+
+    def title(self) -> str:
+        """Заголовок вкладки"""
+        name = self.file_path.name if self.file_path else "Без имени"
+        return f"{name} *" if self.is_modified else name
+
+    def is_loaded(self) -> bool:
+        return self.tree_loaded or self.parsed_data is not None
+
+    def estimated_memory(self) -> int:
+        """Оценка памяти, занимаемой разобранным деревом (0, если выгружено)"""
+        if not self.is_loaded():
+            return 0
+        return self.text_edit.document().characterCount() * PARSED_BYTES_PER_CHAR
+
+    def cache_parsed(self, data):
+        """Запоминает результат разбора для текущей ревизии текста"""
+        self.parsed_data = data
+        self.parsed_revision = self.text_edit.document().revision()
+
+    def cached_parse(self):
+        """Возвращает (True, данные), если кэш соответствует текущему тексту"""
+        if self.parsed_data is not None and self.parsed_revision == self.text_edit.document().revision():
+            return True, self.parsed_data
+        return False, None
+
+    def unload(self):
+        """Выгружает дерево и кэш разбора; текст и история отмены остаются"""
+        if self.tree_widget is not None:
+            self.tree_widget.clear()
+        self.parsed_data = None
+        self.parsed_revision = -1
+        self.tree_loaded = False
+
+
+class DocumentManager:
+    """Список открытых документов и LRU-выгрузка в рамках бюджета памяти"""
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self.documents: List[Document] = []
+        self._clock = itertools.count(1)
+
+    def add(self, doc: Document):
+        self.documents.append(doc)
+        self.touch(doc)
+
+    def remove(self, doc: Document):
+        if doc in self.documents:
+            self.documents.remove(doc)
+
+    def touch(self, doc: Document):
+        """Отмечает документ как последний использованный"""
+        doc.last_access = next(self._clock)
+
+    def find_by_page(self, page) -> Optional[Document]:
+        for doc in self.documents:
+            if doc.page is page:
+                return doc
+        return None
+
+    def find_by_path(self, path: Path) -> Optional[Document]:
+        path = Path(path).resolve()
+        for doc in self.documents:
+            if doc.file_path is not None and doc.file_path.resolve() == path:
+                return doc
+        return None
+
+    def loaded_memory(self) -> int:
+        return sum(doc.estimated_memory() for doc in self.documents)
+
+    def enforce_budget(self, active: Optional[Document]) -> List[Document]:
+        """Выгружает самые давние фоновые документы, пока не уложимся в бюджет"""
+        unloaded = []
+        total = self.loaded_memory()
+        candidates = sorted(
+            (doc for doc in self.documents if doc is not active and doc.is_loaded()),
+            key=lambda doc: doc.last_access,
+        )
+        for doc in candidates:
+            if total <= self.budget_bytes:
+                break
+            total -= doc.estimated_memory()
+            doc.unload()
+            unloaded.append(doc)
+        return unloaded
@@ -0,0 +1,248 @@
+"""
+Модуль табличной модели массива JSON
+
+Модель не хранит ячеек: текст ячейки строится из элемента массива при
+запросе представления, поэтому таблица на 10 миллионов строк занимает
+память только под сам массив и индекс сортировки. Строки подгружаются
+порциями (fetchMore) по мере прокрутки. Сортировка по столбцу считается в
+фоновом потоке и хранится перестановкой номеров строк в array; индекс
+столбца запоминается, обратный порядок — тот же индекс, прочитанный с конца.
+"""
+from array import array
+from typing import Dict, List, Optional
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, QThread, Qt, pyqtSignal
+
+from core import codec
+from widgets.json_tree_widget import value_sort_key
+
+# Сколько строк добавляет один fetchMore
+FETCH_ROWS = 10_000
+# Сколько элементов просматривается, чтобы собрать столбцы
+SAMPLE_ROWS = 1000
+# Длина текста ячейки
+CELL_LENGTH = 200
+# Как часто поток сортировки проверяет отмену (в строках)
+CANCEL_CHECK_INTERVAL = 100_000
+
+# Столбец «сам элемент» для массивов, где есть не только объекты
+VALUE_COLUMN = None
+
+_MISSING = object()
+# Ранги value_sort_key, которые сортируются особо, и ранг отсутствующих значений
+_NULL_RANK = 3
+_CONTAINER_RANK = 4
+_MISSING_RANK = 5
+
+
+def sample_columns(rows: list, sample: int = SAMPLE_ROWS) -> list:
+    """Ключи объектов из равномерной выборки строк в порядке появления;
+    VALUE_COLUMN первым, если в выборке есть не объекты"""
+    step = max(1, len(rows) // sample)
+    keys = {}
+    plain = False
+    for i in range(0, len(rows), step):
+        row = rows[i]
+        if isinstance(row, dict):
+            keys.update(dict.fromkeys(row))
+        else:
+            plain = True
+    return ([VALUE_COLUMN] if plain or not keys else []) + list(keys)
+
+
+def cell_value(row, column):
+    """Значение ячейки; _MISSING, если у элемента нет такого ключа"""
+    if column is VALUE_COLUMN:
+        return row
+    if isinstance(row, dict):
+        return row.get(column, _MISSING)
+    return _MISSING
+
+
+def cell_text(value) -> str:
+    """Текст ячейки: строки без кавычек, контейнеры — только размер"""
+    if value is _MISSING:
+        return ""
+    if isinstance(value, dict):
+        return f"{{…}} ключей: {len(value)}"
+    if isinstance(value, list):
+        return f"[…] элементов: {len(value)}"
+    text = value if isinstance(value, str) else codec.dumps(value, exact=True)
+    if len(text) > CELL_LENGTH:
+        text = text[:CELL_LENGTH - 3] + "..."
+    return text
+
+
+class SortWorker(QThread):
+    """Строит индекс сортировки столбца: перестановку номеров строк"""
+
+    # (столбец, array номеров строк по возрастанию)
+    indexed = pyqtSignal(int, object)
+
+    def __init__(self, rows: list, column: int, key, parent=None):
+        super().__init__(parent)
+        self.rows = rows
+        self.column = column
+        self.key = key
+
+    def run(self):
+        rows, key = self.rows, self.key
+        values = []
+        # Номера строк по рангу типа (value_sort_key) и отсутствующие значения
+        # последними: внутри ранга значения сравнимы без ключей-кортежей
+        buckets = [[] for _ in range(_MISSING_RANK + 1)]
+        for i, row in enumerate(rows):
+            if i % CANCEL_CHECK_INTERVAL == 0 and self.isInterruptionRequested():
+                return
+            value = cell_value(row, key)
+            values.append(value)
+            buckets[_MISSING_RANK if value is _MISSING else value_sort_key(value)[0]].append(i)
+        order = array("q")
+        for rank, bucket in enumerate(buckets):
+            if self.isInterruptionRequested():
+                return
+            if rank == _CONTAINER_RANK:
+                bucket.sort(key=lambda i: len(values[i]))
+            elif rank not in (_NULL_RANK, _MISSING_RANK):
+                bucket.sort(key=values.__getitem__)
+            order.extend(bucket)
+        self.indexed.emit(self.column, order)
+
+
+class JsonArrayModel(QAbstractTableModel):
+    """Массив JSON как таблица: строка — элемент, столбец — ключ объекта"""
+
+    # Правка ячейки: (номер элемента в массиве, ключ или VALUE_COLUMN, текст)
+    cellEdited = pyqtSignal(int, object, str)
+    # Сортировка запущена (True) или завершена (False)
+    sorting = pyqtSignal(bool)
+
+    def __init__(self, rows: list, columns: Optional[list] = None, parent=None):
+        super().__init__(parent)
+        self.rows = rows
+        self.columns = sample_columns(rows) if columns is None else columns
+        self._fetched = min(len(rows), FETCH_ROWS)
+        # Индексы сортировки по столбцам; текущий порядок — (индекс, по убыванию)
+        self._indexes: Dict[int, array] = {}
+        self._order: Optional[array] = None
+        self._descending = False
+        self._pending = -1
+        self._workers: List[SortWorker] = []
+
+    # --- размеры и подгрузка ---
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._fetched
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.columns)
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and self._fetched < len(self.rows)
+
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(FETCH_ROWS, len(self.rows) - self._fetched)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._fetched, self._fetched + count - 1)
+        self._fetched += count
+        self.endInsertRows()
+
+    def source_row(self, row: int) -> int:
+        """Номер элемента массива для строки таблицы с учетом сортировки"""
+        if self._order is None:
+            return row
+        return self._order[len(self._order) - 1 - row] if self._descending else self._order[row]
+
+    # --- данные ---
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role not in (Qt.DisplayRole, Qt.EditRole, Qt.ToolTipRole):
+            return None
+        value = cell_value(self.rows[self.source_row(index.row())], self.columns[index.column()])
+        if role == Qt.EditRole:
+            return "" if value is _MISSING else codec.dumps(value, exact=True)
+        return cell_text(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Vertical:
+            # Индекс элемента в массиве, а не номер строки после сортировки
+            return str(self.source_row(section))
+        column = self.columns[section]
+        return "[значение]" if column is VALUE_COLUMN else str(column)
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if not index.isValid():
+            return flags
+        column = self.columns[index.column()]
+        row = self.rows[self.source_row(index.row())]
+        if column is VALUE_COLUMN or isinstance(row, dict):
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        """Записывает значение в элемент и сообщает о правке (путь строит владелец)"""
+        if role != Qt.EditRole or not index.isValid():
+            return False
+        row = self.source_row(index.row())
+        column = self.columns[index.column()]
+        new_value = codec.parse_literal(value)
+        if column is VALUE_COLUMN:
+            self.rows[row] = new_value
+        elif isinstance(self.rows[row], dict):
+            self.rows[row][column] = new_value
+        else:
+            return False
+        # Индекс этого столбца устарел; текущий порядок строк сохраняется
+        self._indexes.pop(index.column(), None)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        self.cellEdited.emit(row, column, value)
+        return True
+
+    # --- сортировка ---
+    def sort(self, column: int, order=Qt.AscendingOrder):
+        """Сортировка по столбцу; индекс столбца строится в фоне один раз"""
+        descending = order == Qt.DescendingOrder
+        if column < 0 or column in self._indexes:
+            if self._pending >= 0:
+                self._pending = -1
+                self.sorting.emit(False)
+            self._apply(self._indexes[column] if column >= 0 else None, descending)
+            return
+        self._pending = column
+        self._descending = descending
+        worker = SortWorker(self.rows, column, self.columns[column], self)
+        worker.indexed.connect(self._on_indexed)
+        worker.finished.connect(lambda: self._workers.remove(worker))
+        self._workers.append(worker)
+        self.sorting.emit(True)
+        worker.start()
+
+    def _on_indexed(self, column: int, order):
+        self._indexes[column] = order
+        # Результат устаревшего запроса только запоминается
+        if column == self._pending:
+            self._pending = -1
+            self._apply(order, self._descending)
+            self.sorting.emit(False)
+
+    def _apply(self, order, descending: bool):
+        self.beginResetModel()
+        self._order = order
+        self._descending = descending
+        self.endResetModel()
+
+    def invalidate_sort(self):
+        """Данные изменились: индексы сортировки больше не верны"""
+        self._indexes = {}
+        self._pending = -1
+        self._apply(None, False)
+
+    def stop(self):
+        """Останавливает фоновые сортировки (при закрытии таблицы)"""
+        for worker in list(self._workers):
+            worker.requestInterruption()
+            worker.wait()
@@ -1,20 +1,54 @@
 """
 Модуль виджета дерева для визуализации JSON структуры
 """
-from PyQt5.QtWidgets import QTreeWidget, QTreeWidgetItem
+from PyQt5.QtWidgets import QTreeWidget, QTreeWidgetItem, QMenu, QInputDialog
 from PyQt5.QtCore import pyqtSignal, Qt
 import json
+from collections import deque
 from pathlib import Path
-from PyQt5.QtGui import QIcon
+from typing import Optional
+from PyQt5.QtGui import QIcon, QBrush, QColor
+
+from core import codec
+from core.instrumentation import instrumentation
+from core.node_store import (
+    NodeStore, ROOT, SCALAR, OBJECT, ARRAY, OPAQUE, LARGE_ARRAY, leaf_hash, content_hash
+)
+from core.walk import walk, ENTER, LEAVE
+
+# Предельная глубина дерева: Qt раскрывает и удаляет элементы рекурсивно,
+# поэтому более глубокие контейнеры показываются одним элементом-заглушкой
+MAX_TREE_DEPTH = 1000
+# Массивы длиннее PAGE_SIZE показываются страницами [0…999], [1000…1999], ...;
+# элементы страницы создаются при ее раскрытии. Порог совпадает с тем, с
+# которого хэш массива считается канонической записью
+PAGE_SIZE = LARGE_ARRAY
+# Роль элемента-страницы: индекс первого элемента страницы
+PAGE_ROLE = Qt.UserRole + 1
+
+
+def value_sort_key(value):
+    """Ключ сортировки значений разных типов: числа, строки, логические, null, контейнеры"""
+    if isinstance(value, bool):
+        return (2, value)
+    if isinstance(value, (int, float)):
+        return (0, value)
+    if isinstance(value, str):
+        return (1, value)
+    if value is None:
+        return (3, 0)
+    return (4, len(value))
 
 
 class JsonTreeWidget(QTreeWidget):
     """Виджет дерева для визуализации структуры JSON"""
 
-    # Эмитируем путь как список ключей/индексов и индекс вхождения
-    itemSelected = pyqtSignal(list, int)
-    # Сигнал при редактировании значения: (path, new_text)
-    itemEdited = pyqtSignal(list, str)
+    # Эмитируем номер узла (путь — через nodes.path) и индекс вхождения
+    itemSelected = pyqtSignal(int, int)
+    # Сигнал при редактировании значения: (node, new_text)
+    itemEdited = pyqtSignal(int, str)
+    # Запрос табличного просмотра массива: номер узла массива (ROOT — корень)
+    tableRequested = pyqtSignal(int)
 
     def __init__(self):
         super().__init__()
@@ -22,10 +56,24 @@ class JsonTreeWidget(QTreeWidget):
         # Обработчики событий
         self.itemClicked.connect(self.on_item_clicked)
         self.itemChanged.connect(self.on_item_changed)
+        self.itemExpanded.connect(self.fill_page)
+        self.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.customContextMenuRequested.connect(self.show_context_menu)
         # Вспомогательная карта для подсчета вхождений представлений значений
         self._repr_counts = {}
         # Подсчет по паре ключ-значение (для объектов), чтобы различать одинаковые значения в разных ключах
         self._kv_repr_counts = {}
+        # Элементы, отмеченные нарушениями схемы
+        self._marked_items = []
+        # Узлы документа; элемент дерева хранит в UserRole только номер узла
+        self.nodes = NodeStore()
+        # Массивы, показанные страницами: номер узла -> список
+        self._arrays = {}
+        # Страницы, созданные текущей операцией (их свернуть после expandAll)
+        self._new_pages = []
+        # Номера вхождений точны, пока в документе не встретился массив со
+        # страницами: значения его элементов не перебираются при построении
+        self._exact_counts = True
 
     def _get_type_emoji(self, value) -> str:
         """Возвращает эмодзи в зависимости от типа значения"""
@@ -43,43 +91,160 @@ class JsonTreeWidget(QTreeWidget):
             return "❓"  # None
         return "📄"  # Прочее
 
+    def clear(self):
+        """Очищает дерево вместе со списком отмеченных элементов и узлами"""
+        self._marked_items = []
+        self.nodes.clear()
+        self._arrays = {}
+        self._exact_counts = True
+        super().clear()
+
     def load_json(self, data):
-        """Загружает JSON данные в дерево"""
+        """Загружает JSON данные в дерево. Если хэш содержимого совпадает с
+        показанным деревом (форматирование, повторное открытие, правка в дереве),
+        дерево не перестраивается и сохраняет раскрытые ветви и выделение."""
+        kind = OBJECT if isinstance(data, dict) else ARRAY if isinstance(data, list) else None
+        data_hash = None
+        if kind is not None:
+            with instrumentation.timed("tree.hash"):
+                data_hash = content_hash(data)
+            if self.nodes.root_kind is not None and self.nodes.subtree_hash(ROOT) == data_hash:
+                self._rebind(data)
+                return
         # Блокируем сигналы на время построения, чтобы избежать ложных срабатываний
         self.blockSignals(True)
         try:
-            self.clear()
-            self._repr_counts = {}
-            self._kv_repr_counts = {}
-            if isinstance(data, dict):
-                self.add_dict_items(self.invisibleRootItem(), data, [])
-            elif isinstance(data, list):
-                self.add_list_items(self.invisibleRootItem(), data, [])
-            self.expandAll()
+            with instrumentation.timed("tree.build"):
+                self.clear()
+                self._repr_counts = {}
+                self._kv_repr_counts = {}
+                self.nodes.root_kind = kind
+                if kind == OBJECT:
+                    self.add_dict_items(self.invisibleRootItem(), data, ROOT)
+                elif kind == ARRAY and len(data) > PAGE_SIZE:
+                    self.nodes.set_opaque(ROOT, data)
+                    self._add_pages(self.invisibleRootItem(), ROOT, data)
+                elif kind == ARRAY:
+                    self.add_list_items(self.invisibleRootItem(), data, ROOT)
+                if data_hash is not None:
+                    self.nodes.set_root_hash(data_hash)
+                self.expandAll()
+                self._collapse_new_pages()
         finally:
             self.blockSignals(False)
 
-    def add_dict_items(self, parent, data, path):
+    def _rebind(self, data):
+        """Дерево не перестраивалось: OPAQUE-узлы и страницы переводятся на
+        равные значения из нового разбора, который будут менять правки"""
+        nodes = self.nodes
+        for node in nodes.opaque_nodes():
+            value = data
+            for part in nodes.path(node):
+                value = value[part]
+            nodes.set_opaque(node, value)
+            if node in self._arrays:
+                self._arrays[node] = value
+
+    def add_dict_items(self, parent, data, parent_node):
         """Добавляет элементы словаря в дереве"""
-        for key, value in data.items():
-            item = QTreeWidgetItem(parent)
+        self._add_children(parent, data, parent_node)
+
+    def append_records(self, data, start: int):
+        """Добавляет в дерево корневого списка элементы начиная с индекса start"""
+        if ROOT not in self._arrays and len(data) > PAGE_SIZE:
+            # Список перерос порог: один раз перестраивается страницами
+            self.load_json(data)
+            return
+        self.blockSignals(True)
+        try:
+            with instrumentation.timed("tree.append"):
+                first = self.topLevelItemCount()
+                if ROOT in self._arrays:
+                    self._append_pages(data, start)
+                else:
+                    self.add_list_items(self.invisibleRootItem(), data, ROOT, start)
+                for i in range(first, self.topLevelItemCount()):
+                    self.expandRecursively(self.indexFromItem(self.topLevelItem(i)))
+                self._collapse_new_pages()
+        finally:
+            self.blockSignals(False)
+
+    def _append_pages(self, data, start: int):
+        """Дописанные элементы корневого списка со страницами: последняя
+        страница дополняется, остальные элементы получают новые страницы"""
+        self.nodes.set_opaque(ROOT, data)
+        self.nodes.invalidate(ROOT)
+        self._arrays[ROOT] = data
+        pages = self.topLevelItemCount()
+        last = self.topLevelItem(pages - 1)
+        last_start = last.data(0, PAGE_ROLE)
+        if last.childCount():
+            self._add_children(last, data, ROOT, start, min(last_start + PAGE_SIZE, len(data)))
+        last.setText(0, self._page_title(last_start, len(data)))
+        self._add_pages(self.invisibleRootItem(), ROOT, data, pages)
+
+    def add_list_items(self, parent, data, parent_node, start: int = 0):
+        """Добавляет элементы списка в дереве"""
+        self._add_children(parent, data, parent_node, start)
+
+    def _add_children(self, parent, data, parent_node, start: int = 0, stop=None):
+        """Строит поддерево без рекурсии: стек элементов повторяет стек обхода.
+        Элементы первого уровня создаются отдельно от дерева и добавляются
+        одним вызовом: вставка в видимое дерево по одному элементу намного дороже."""
+        nodes = self.nodes
+        top_items = []
+        # (элемент дерева, номер узла) текущего контейнера; None — еще не в дереве
+        stack = [(None, parent_node)]
+
+        def descend(parent, value):
+            if isinstance(value, list):
+                return len(value) <= PAGE_SIZE and len(stack) < MAX_TREE_DEPTH
+            return isinstance(value, dict) and len(stack) < MAX_TREE_DEPTH
+
+        for event, key, value, _ in walk(data, start, descend, stop):
+            if event == LEAVE:
+                stack.pop()
+                continue
+            parent_item, parent_node = stack[-1]
+            if parent_item is None:
+                item = QTreeWidgetItem()
+                top_items.append(item)
+            else:
+                item = QTreeWidgetItem(parent_item)
             emoji = self._get_type_emoji(value)
-            item.setText(0, f"🔑 {key} {emoji}")
-            current_path = path + [key]
-            item.setData(0, Qt.UserRole, current_path)
-
-            if isinstance(value, dict):
-                self.add_dict_items(item, value, current_path)
-            elif isinstance(value, list):
-                self.add_list_items(item, value, current_path)
+            in_list = isinstance(key, int)
+            item.setText(0, f"📌 [{key}] {emoji}" if in_list else f"🔑 {key} {emoji}")
+            if event == ENTER:
+                node = nodes.add(parent_node, key, OBJECT if isinstance(value, dict) else ARRAY)
+                item.setData(0, Qt.UserRole, node)
+                stack.append((item, node))
+                continue
+
+            if isinstance(value, (dict, list)):
+                node = nodes.add(parent_node, key, OPAQUE)
+                nodes.set_opaque(node, value)
+                item.setData(0, Qt.UserRole, node)
+                if len(stack) < MAX_TREE_DEPTH:
+                    self._add_pages(item, node, value)
+                else:
+                    child = QTreeWidgetItem(item)
+                    child.setText(0, f"… глубже {MAX_TREE_DEPTH} уровней не показано")
+                continue
+            child = QTreeWidgetItem(item)
+            node = nodes.add(parent_node, key, SCALAR)
+            item.setData(0, Qt.UserRole, node)
+            # Отображаем значение (чтобы редактировать без диалогов)
+            # Точная запись, чтобы выбор в дереве находил 1.10 в тексте
+            repr_text = codec.dumps(value, exact=True)
+            child.setData(0, Qt.UserRole, node)
+            # Делаем элемент редактируемым
+            child.setFlags(child.flags() | Qt.ItemIsEditable)
+            if in_list:
+                child.setText(0, f"{emoji} {repr_text}")
+                cnt = self._repr_counts.get(repr_text, 0)
+                self._repr_counts[repr_text] = cnt + 1
             else:
-                child = QTreeWidgetItem(item)
-                # Отображаем значение (чтобы редактировать без диалогов)
-                repr_text = json.dumps(value, ensure_ascii=False)
                 child.setText(0, repr_text)
-                child.setData(0, Qt.UserRole, current_path)
-                # Делаем элемент редактируемым
-                child.setFlags(child.flags() | Qt.ItemIsEditable)
                 # Иконка для значения
                 val_icon = self._get_icon('value')
                 if val_icon:
@@ -87,83 +252,354 @@ class JsonTreeWidget(QTreeWidget):
                 # Считаем вхождение для пары ключ-значение
                 key_literal = json.dumps(key, ensure_ascii=False)
                 kv_key = f"{key_literal}:{repr_text}"
-                kv_cnt = self._kv_repr_counts.get(kv_key, 0)
-                self._kv_repr_counts[kv_key] = kv_cnt + 1
-                child.setData(0, Qt.UserRole + 1, kv_cnt)
-                # Сохраняем отдельно value и имя ключа, чтобы строить поиск с контекстом
-                child.setData(0, Qt.UserRole + 2, repr_text)  # value repr
-                child.setData(0, Qt.UserRole + 3, key)        # key name
-                child.setData(0, Qt.UserRole + 4, tuple(path))  # путь контейнера (родителя)
-
-    def add_list_items(self, parent, data, path):
-        """Добавляет элементы списка в дереве"""
-        for i, value in enumerate(data):
-            item = QTreeWidgetItem(parent)
-            emoji = self._get_type_emoji(value)
-            item.setText(0, f"📌 [{i}] {emoji}")
-            current_path = path + [i]
-            item.setData(0, Qt.UserRole, current_path)
-
-            if isinstance(value, dict):
-                self.add_dict_items(item, value, current_path)
-            elif isinstance(value, list):
-                self.add_list_items(item, value, current_path)
-            else:
-                child = QTreeWidgetItem(item)
-                repr_text = json.dumps(value, ensure_ascii=False)
-                emoji = self._get_type_emoji(value)
-                child.setText(0, f"{emoji} {repr_text}")
-                child.setData(0, Qt.UserRole, current_path)
-                child.setFlags(child.flags() | Qt.ItemIsEditable)
-                cnt = self._repr_counts.get(repr_text, 0)
-                self._repr_counts[repr_text] = cnt + 1
-                child.setData(0, Qt.UserRole + 1, cnt)
-                child.setData(0, Qt.UserRole + 2, repr_text)
-                child.setData(0, Qt.UserRole + 3, None)       # у списка нет имени ключа
-                child.setData(0, Qt.UserRole + 4, tuple(path)) # путь контейнера (родительский список)
+                cnt = self._kv_repr_counts.get(kv_key, 0)
+                self._kv_repr_counts[kv_key] = cnt + 1
+            nodes.set_leaf(node, repr_text, cnt if self._exact_counts else -1, leaf_hash(value))
+        parent.addChildren(top_items)
+
+    # --- страницы больших массивов ---
+    def _page_title(self, start: int, length: int) -> str:
+        return f"📄 [{start}…{min(start + PAGE_SIZE, length) - 1}]"
+
+    def _add_pages(self, parent, node, value, first_page: int = 0):
+        """Элементы-страницы массива начиная со страницы first_page. Страница
+        хранит номер узла массива и индекс первого элемента; элементы
+        создаются при раскрытии (fill_page)"""
+        self._arrays[node] = value
+        self._exact_counts = False
+        pages = []
+        for start in range(first_page * PAGE_SIZE, len(value), PAGE_SIZE):
+            page = QTreeWidgetItem()
+            page.setText(0, self._page_title(start, len(value)))
+            page.setData(0, Qt.UserRole, node)
+            page.setData(0, PAGE_ROLE, start)
+            page.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator)
+            pages.append(page)
+        parent.addChildren(pages)
+        self._new_pages.extend(pages)
+
+    def _collapse_new_pages(self):
+        """expandAll раскрывает и пустые страницы; их содержимое создается
+        только при раскрытии пользователем"""
+        for page in self._new_pages:
+            page.setExpanded(False)
+        self._new_pages = []
+
+    def is_page(self, item) -> bool:
+        return item is not None and item.data(0, PAGE_ROLE) is not None
+
+    def fill_page(self, page):
+        """Создает элементы страницы (при первом раскрытии) — O(размера страницы)"""
+        if not self.is_page(page) or page.childCount():
+            return
+        node = page.data(0, Qt.UserRole)
+        value = self._arrays[node]
+        start = page.data(0, PAGE_ROLE)
+        blocked = self.blockSignals(True)
+        try:
+            with instrumentation.timed("tree.page"):
+                self._add_children(page, value, node, start, min(start + PAGE_SIZE, len(value)))
+                page.setChildIndicatorPolicy(QTreeWidgetItem.DontShowIndicatorWhenChildless)
+                self.expandRecursively(self.indexFromItem(page))
+                self._collapse_new_pages()
+        finally:
+            self.blockSignals(blocked)
+
+    def array_length(self, item) -> Optional[int]:
+        """Длина массива элемента (или массива страницы); None, если это не массив"""
+        node = self.item_node(item)
+        if node in self._arrays:
+            return len(self._arrays[node])
+        if node != ROOT and self.nodes.kind(node) == ARRAY:
+            return item.childCount()
+        return None
+
+    def reveal(self, path):
+        """Находит элемент по пути (создавая нужную страницу), раскрывает
+        предков, выделяет и прокручивает к нему; None, если пути нет"""
+        item = self.find_item(path)
+        if item is None:
+            return None
+        parent = item.parent()
+        while parent is not None:
+            parent.setExpanded(True)
+            parent = parent.parent()
+        self.setCurrentItem(item)
+        self.scrollToItem(item)
+        return item
+
+    def go_to_index(self, item, index: int):
+        """Переход к элементу index массива элемента item (или страницы)"""
+        target = self.reveal(self.nodes.path(self.item_node(item)) + [index])
+        if target is not None:
+            self.on_item_clicked(target, 0)
+        return target
+
+    def _page_elements(self, page):
+        """Пары (элемент дерева, значение) страницы"""
+        self.fill_page(page)
+        value = self._arrays[page.data(0, Qt.UserRole)]
+        nodes = self.nodes
+        return [(page.child(i), value[nodes.key(page.child(i).data(0, Qt.UserRole))])
+                for i in range(page.childCount())]
+
+    def sort_page(self, page, key: Optional[str] = None, descending: bool = False):
+        """Сортирует элементы страницы по значению или по ключу объекта.
+        Меняется только порядок в дереве: индексы и данные остаются прежними."""
+        if key:
+            def element_key(pair):
+                value = pair[1]
+                if isinstance(value, dict) and key in value:
+                    return (0, value_sort_key(value[key]))
+                # Элементы без ключа — в конце
+                return (1, (0, 0))
+        else:
+            def element_key(pair):
+                return value_sort_key(pair[1])
+        elements = self._page_elements(page)
+        try:
+            elements.sort(key=element_key, reverse=descending)
+        except TypeError:
+            # Несравнимые значения внутри одного типа не встречаются в JSON,
+            # кроме NaN; оставляем порядок как есть
+            return
+        self._reorder(page, [item for item, _ in elements])
+
+    def reset_page(self, page):
+        """Возвращает порядок элементов страницы по индексам и снимает фильтр"""
+        elements = self._page_elements(page)
+        elements.sort(key=lambda pair: self.nodes.key(pair[0].data(0, Qt.UserRole)))
+        for item, _ in elements:
+            item.setHidden(False)
+        self._reorder(page, [item for item, _ in elements])
+        page.setText(0, self._page_title(page.data(0, PAGE_ROLE), len(self._arrays[page.data(0, Qt.UserRole)])))
+
+    def filter_page(self, page, text: str) -> int:
+        """Скрывает элементы страницы, в записи которых нет text (без учета
+        регистра); возвращает число показанных"""
+        needle = text.casefold()
+        shown = 0
+        for item, value in self._page_elements(page):
+            visible = not needle or needle in codec.dumps(value, exact=True).casefold()
+            item.setHidden(not visible)
+            shown += visible
+        title = self._page_title(page.data(0, PAGE_ROLE), len(self._arrays[page.data(0, Qt.UserRole)]))
+        page.setText(0, f"{title} — показано {shown}" if needle else title)
+        return shown
+
+    def _reorder(self, page, items):
+        blocked = self.blockSignals(True)
+        try:
+            page.takeChildren()
+            page.addChildren(items)
+            self.expandRecursively(self.indexFromItem(page))
+            self._collapse_new_pages()
+        finally:
+            self.blockSignals(blocked)
+
+    def show_context_menu(self, pos):
+        """Контекстное меню: переход к индексу массива, сортировка и фильтр страницы"""
+        item = self.itemAt(pos)
+        if item is None:
+            return
+        menu = QMenu(self)
+        length = self.array_length(item)
+        if length:
+            menu.addAction("Перейти к индексу...", lambda: self._ask_index(item, length))
+        if self.is_page(item):
+            menu.addAction("Сортировать страницу...", lambda: self._ask_sort(item))
+            menu.addAction("Фильтр страницы...", lambda: self._ask_filter(item))
+            menu.addAction("Сбросить сортировку и фильтр", lambda: self.reset_page(item))
+        table_node = self.table_node(item)
+        if table_node is not None:
+            menu.addAction("Показать таблицей", lambda: self.tableRequested.emit(table_node))
+        if not menu.isEmpty():
+            menu.exec_(self.viewport().mapToGlobal(pos))
+
+    def table_node(self, item) -> Optional[int]:
+        """Массив для табличного просмотра: массив элемента (или страницы), а для
+        элемента верхнего уровня корневого массива — корень; None, если массива нет"""
+        node = self.item_node(item)
+        if node in self._arrays or (node != ROOT and self.nodes.kind(node) == ARRAY):
+            return node
+        root_array = ROOT in self._arrays or self.nodes.root_kind == ARRAY
+        if root_array and node != ROOT and self.nodes.parent(node) == ROOT:
+            return ROOT
+        return None
+
+    def _ask_index(self, item, length: int):
+        index, ok = QInputDialog.getInt(self, "Перейти к индексу", f"Индекс (0–{length - 1}):",
+                                        0, 0, length - 1)
+        if ok:
+            self.go_to_index(item, index)
+
+    def _ask_sort(self, page):
+        key, ok = QInputDialog.getText(
+            self, "Сортировать страницу",
+            "Ключ объекта (пусто — по значению; «-» в начале — по убыванию):")
+        if ok:
+            key = key.strip()
+            descending = key.startswith("-")
+            self.sort_page(page, key.lstrip("-") or None, descending)
+
+    def _ask_filter(self, page):
+        text, ok = QInputDialog.getText(self, "Фильтр страницы", "Показывать элементы, содержащие:")
+        if ok:
+            self.filter_page(page, text)
+
+    def update_leaf(self, node: int, value) -> bool:
+        """Меняет скалярное значение листа в дереве и в узлах без перестройки:
+        хэши сбрасываются только у предков. False, если узел не лист или
+        значение — контейнер (дерево перестроится при следующей загрузке)."""
+        leaf = self.nodes.leaf(node)
+        if leaf is None or isinstance(value, (dict, list)):
+            return False
+        item = self.find_item(self.nodes.path(node))
+        if item is None or item.childCount() != 1:
+            return False
+        key = self.nodes.key(node)
+        in_list = isinstance(key, int)
+        emoji = self._get_type_emoji(value)
+        repr_text = codec.dumps(value, exact=True)
+        self.blockSignals(True)
+        try:
+            item.setText(0, f"📌 [{key}] {emoji}" if in_list else f"🔑 {key} {emoji}")
+            item.child(0).setText(0, f"{emoji} {repr_text}" if in_list else repr_text)
+        finally:
+            self.blockSignals(False)
+        old_text = leaf.text
+        old_key = self._count_key(key, old_text)
+        self.nodes.update_leaf(node, repr_text, leaf_hash(value))
+        new_key = self._count_key(key, repr_text)
+        if old_key != new_key:
+            self._recount_occurrences({old_key, new_key}, {old_text, repr_text})
+        return True
+
+    def _count_key(self, key, repr_text: str):
+        """Счетчик и ключ подсчета вхождений листа: текст значения в массиве,
+        пара ключ-значение в объекте"""
+        if isinstance(key, int):
+            return (False, repr_text)
+        return (True, f"{json.dumps(key, ensure_ascii=False)}:{repr_text}")
+
+    def _recount_occurrences(self, count_keys: set, texts: set):
+        """Пересчитывает номера вхождений листов с указанными ключами подсчета
+        (остальные листы правка не затрагивает); texts — тексты этих листов"""
+        for in_object, count_key in count_keys:
+            counts = self._kv_repr_counts if in_object else self._repr_counts
+            counts.pop(count_key, None)
+        nodes = self.nodes
+        for node, leaf in nodes.leaves():
+            # Дешевая проверка текста отсекает почти все листы; номера после
+            # массива со страницами неизвестны (-1) и не пересчитываются
+            if leaf.text not in texts or leaf.occurrence < 0:
+                continue
+            full_key = self._count_key(nodes.key(node), leaf.text)
+            if full_key not in count_keys:
+                continue
+            counts = self._kv_repr_counts if full_key[0] else self._repr_counts
+            leaf.occurrence = counts.get(full_key[1], 0)
+            counts[full_key[1]] = leaf.occurrence + 1
+
+    def item_node(self, item) -> int:
+        """Номер узла элемента дерева (ROOT для корня)"""
+        node = item.data(0, Qt.UserRole)
+        return ROOT if node is None else node
+
+    def item_path(self, item) -> list:
+        """Путь элемента дерева, восстановленный по узлам"""
+        return self.nodes.path(self.item_node(item))
 
     def on_item_clicked(self, item, column):
         """Обработчик клика по элементу дерева"""
-        data = item.data(0, Qt.UserRole)
-        if data is None:
+        node = item.data(0, Qt.UserRole)
+        if node is None or self.is_page(item):
             return
-        path = data
-        # Получаем индекс вхождения, если есть
-        idx = item.data(0, Qt.UserRole + 1)
+        # Индекс вхождения листа или его первого листового потомка
+        idx = self._find_occurrence_index_from_children(item)
         if idx is None:
-            # Пытаемся взять индекс из первого листового потомка
-            idx = self._find_occurrence_index_from_children(item)
-            if idx is None:
-                idx = 0
-        self.itemSelected.emit(path, int(idx))
+            idx = 0
+        self.itemSelected.emit(node, idx)
 
     def on_item_changed(self, item, column):
         """Обработчик изменения текста элемента дерева"""
-        path = item.data(0, Qt.UserRole)
-        if path is None:
+        node = item.data(0, Qt.UserRole)
+        if node is None:
             return
 
         text = item.text(0)
         new_text = text
 
-        self.itemEdited.emit(path, new_text)
+        self.itemEdited.emit(node, new_text)
 
     def _find_occurrence_index_from_children(self, item):
         """Ищет у потомков первый сохраненный индекс вхождения значения в тексте.
         Возвращает int или None, если не найдено."""
         # Поиск в ширину, чтобы ближние потомки имели приоритет
-        queue = [item]
+        queue = deque([item])
         while queue:
-            current = queue.pop(0)
+            current = queue.popleft()
             # Проверяем самого current, вдруг это лист
-            idx = current.data(0, Qt.UserRole + 1)
-            if idx is not None:
-                return int(idx)
+            node = current.data(0, Qt.UserRole)
+            leaf = self.nodes.leaf(node) if node is not None else None
+            if leaf is not None:
+                return leaf.occurrence
             # Добавляем детей в очередь
             for i in range(current.childCount()):
                 queue.append(current.child(i))
         return None
 
+    def find_item(self, path):
+        """Находит элемент дерева по пути (ключи и индексы); None, если его нет"""
+        if not path:
+            return None
+        nodes = self.nodes
+        item = self.invisibleRootItem()
+        for part in path:
+            first = item.child(0)
+            if self.is_page(first):
+                # Массив со страницами: страница находится по индексу, элемент
+                # обычно стоит на своем месте (если страницу не сортировали)
+                if not isinstance(part, int) or not 0 <= part < len(self._arrays[self.item_node(first)]):
+                    return None
+                item = item.child(part // PAGE_SIZE)
+                self.fill_page(item)
+                child = item.child(part % PAGE_SIZE)
+                if child is not None and nodes.key(child.data(0, Qt.UserRole)) == part:
+                    item = child
+                    continue
+            for i in range(item.childCount()):
+                # Подпись «глубже … не показано» узла не имеет
+                node = item.child(i).data(0, Qt.UserRole)
+                if node is not None and nodes.key(node) == part:
+                    item = item.child(i)
+                    break
+            else:
+                return None
+        return item
+
+    def mark_violations(self, violations):
+        """Отмечает цветом и подсказкой элементы с нарушениями схемы.
+        violations — список (путь, сообщение); пустой список снимает отметки."""
+        self.blockSignals(True)
+        try:
+            for item in self._marked_items:
+                item.setData(0, Qt.ForegroundRole, None)
+                item.setToolTip(0, "")
+            self._marked_items = []
+            messages = {}
+            for path, message in violations:
+                item = self.find_item(path)
+                if item is not None:
+                    messages.setdefault(tuple(path), (item, []))[1].append(message)
+            brush = QBrush(QColor("#d35400"))
+            for item, item_messages in messages.values():
+                item.setData(0, Qt.ForegroundRole, brush)
+                item.setToolTip(0, "\n".join(item_messages))
+                self._marked_items.append(item)
+        finally:
+            self.blockSignals(False)
+
     def _get_icon(self, name: str):
         # Иконки можно подключить позже; пока возвращаем None
         try:
@@ -0,0 +1,126 @@
+"""
+Модуль панели «Производительность»: последние замеры операций и пик памяти
+"""
+from PyQt5.QtWidgets import (
+    QDockWidget, QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
+    QLabel, QPushButton, QCheckBox, QFileDialog, QHeaderView
+)
+from PyQt5.QtCore import Qt, QTimer
+
+from core.instrumentation import instrumentation
+
+
+class PerformancePanel(QDockWidget):
+    """Док-панель с метриками операций и переключателями профилирования"""
+
+    COLUMNS = ["Операция", "Последняя, мс", "Среднее, мс", "Макс, мс", "Вызовов"]
+
+    def __init__(self, parent=None):
+        super().__init__("Производительность", parent)
+        self.setObjectName("performance_dock")
+        self.init_ui()
+        # Обновляем таблицу, пока панель видна
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.visibilityChanged.connect(self.on_visibility_changed)
+
+    def init_ui(self):
+        container = QWidget()
+        layout = QVBoxLayout(container)
+
+        # --- Переключатели ---
+        toggles = QHBoxLayout()
+        self.enabled_check = QCheckBox("Сбор метрик")
+        self.enabled_check.setChecked(instrumentation.enabled)
+        self.enabled_check.toggled.connect(self.set_enabled)
+        toggles.addWidget(self.enabled_check)
+
+        self.profile_check = QCheckBox("cProfile")
+        self.profile_check.toggled.connect(self.toggle_profiling)
+        toggles.addWidget(self.profile_check)
+
+        self.memory_check = QCheckBox("tracemalloc")
+        self.memory_check.toggled.connect(self.toggle_memory_tracing)
+        toggles.addWidget(self.memory_check)
+        toggles.addStretch()
+        layout.addLayout(toggles)
+
+        # --- Таблица операций ---
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        self.memory_label = QLabel()
+        layout.addWidget(self.memory_label)
+
+        # --- Кнопки ---
+        buttons = QHBoxLayout()
+        reset_button = QPushButton("Сбросить")
+        reset_button.clicked.connect(self.reset)
+        buttons.addWidget(reset_button)
+        export_button = QPushButton("Экспорт JSON...")
+        export_button.clicked.connect(self.export_json)
+        buttons.addWidget(export_button)
+        layout.addLayout(buttons)
+
+        self.setWidget(container)
+
+    def on_visibility_changed(self, visible: bool):
+        if visible:
+            self.refresh()
+            self.refresh_timer.start(1000)
+        else:
+            self.refresh_timer.stop()
+
+    def set_enabled(self, enabled: bool):
+        instrumentation.enabled = enabled
+        if self.parent() is not None and hasattr(self.parent(), 'on_instrumentation_toggled'):
+            self.parent().on_instrumentation_toggled(enabled)
+
+    def toggle_profiling(self, enabled: bool):
+        if enabled:
+            instrumentation.start_profiling()
+        else:
+            instrumentation.stop_profiling()
+
+    def toggle_memory_tracing(self, enabled: bool):
+        if enabled:
+            instrumentation.start_memory_tracing()
+        else:
+            instrumentation.stop_memory_tracing()
+        self.refresh()
+
+    def reset(self):
+        instrumentation.reset()
+        self.refresh()
+
+    def refresh(self):
+        """Перерисовывает таблицу по текущим метрикам"""
+        histograms = sorted(instrumentation.histograms.items())
+        self.table.setRowCount(len(histograms))
+        for row, (name, h) in enumerate(histograms):
+            values = [name, f"{h.last * 1000:.2f}", f"{h.mean * 1000:.2f}",
+                      f"{h.max * 1000:.2f}", str(h.count)]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+        peak = instrumentation.peak_memory_kb()
+        source = "tracemalloc" if instrumentation.is_tracing_memory() else "RSS"
+        self.memory_label.setText(
+            f"Пик памяти ({source}): {peak / 1024:.1f} МБ" if peak is not None else "Пик памяти: н/д"
+        )
+
+    def export_json(self):
+        """Сохраняет метрики в файл для отчета об ошибке"""
+        if instrumentation.is_profiling():
+            self.profile_check.setChecked(False)
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Экспорт метрик", "performance.json", "JSON Files (*.json)"
+        )
+        if file_path:
+            instrumentation.export_json(file_path)
@@ -1,16 +1,58 @@
 """
 Модуль подсветки синтаксиса JSON
+
+Вместе с подсветкой выполняется построчная проверка синтаксиса: состояние
+лексера хранится в состоянии блока, а QSyntaxHighlighter сам перепроверяет
+после правки только строки до совпадения состояния с прежним. В том же
+проходе заполняются индекс скобок (глубины строк) для свертки и переходов
+и индекс разделителей (запятые и ключи) для пути JSON у курсора.
 """
 import re
-from PyQt5.QtGui import QFont, QColor, QTextCharFormat, QSyntaxHighlighter
+from typing import List, Optional, Tuple
+from PyQt5.QtGui import (
+    QFont, QColor, QTextBlock, QTextCharFormat, QSyntaxHighlighter, QTextBlockUserData, QTextCursor
+)
 from PyQt5.QtCore import QObject
 
+from core.bracket_index import NO_MARK, BracketIndex, LineMarks, LinePairs, MarkIndex
+from core.instrumentation import instrumentation
+from core.json_lexer import LineLexer, LineError, START_STATE, EXPECT_END
+
+# Строки длиннее этого числа символов (минифицированные файлы): их скобки и
+# разделители запоминаются при проверке, и поиск парной скобки и пути у
+# курсора не разбирает строку заново
+LONG_LINE = 10_000
+# Сколько длинных строк помнить
+LONG_LINE_CACHE = 4
+
+
+class BlockErrors(QTextBlockUserData):
+    """Ошибки синтаксиса одного блока; курсор следит за номером строки при правках"""
+
+    def __init__(self, errors: List[LineError], cursor: QTextCursor):
+        super().__init__()
+        self.errors = errors
+        self.cursor = cursor
+
 
 class JsonSyntaxHighlighter(QSyntaxHighlighter):
     """Подсветка синтаксиса JSON"""
     
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.lexer = LineLexer()
+        # Блоки, в которых при последней проверке были ошибки (устаревшие отсеиваются)
+        self._error_blocks: List[BlockErrors] = []
+        self._prune_limit = 256
+        # Режим JSON Lines: каждая строка — отдельная запись
+        self.json_lines = False
+        # Глубины скобок по строкам; сдвигаются при вставке и удалении строк
+        self.brackets = BracketIndex()
+        # Запятые и ключи по строкам; сдвигаются вместе с глубинами
+        self.marks = MarkIndex()
+        # Последние проверенные длинные строки: [курсор строки, ревизия блока, LinePairs, LineMarks]
+        self._long_lines = []
+        self._document = self.document()
         self.setup_rules()
     
     def setup_rules(self):
@@ -44,6 +86,143 @@ class JsonSyntaxHighlighter(QSyntaxHighlighter):
     
     def highlightBlock(self, text):
         """Выполняет подсветку блока текста"""
+        with instrumentation.timed("highlight.block"):
+            self._highlight(text)
+            self._check_block(text)
+
+    def set_json_lines(self, enabled: bool):
+        """Включает режим JSON Lines и перепроверяет документ"""
+        if self.json_lines != enabled:
+            self.json_lines = enabled
+            self.rehighlight()
+
+    def _start_state(self, previous: int, text: str) -> int:
+        """Состояние лексера в начале строки по состоянию предыдущего блока"""
+        if previous < 0:
+            return START_STATE
+        if self.json_lines and previous == EXPECT_END and text.strip():
+            # JSON Lines: непустая строка после законченного значения — новая запись
+            return START_STATE
+        return previous
+
+    def _check_block(self, text):
+        """Проверяет синтаксис строки, продолжая состояние предыдущего блока"""
+        previous = self._start_state(self.previousBlockState(), text)
+        # Скобки строки нужны, если в ней есть закрывающие или она длинная
+        long_line = len(text) > LONG_LINE
+        pairs = [] if long_line or "}" in text or "]" in text else None
+        marks = self._line_marks(previous, text)
+        state, errors = self.lexer.lex(text, previous, pairs=pairs, marks=marks)
+        self.setCurrentBlockState(state)
+        depth_of = self.lexer.depth_of
+        # Наименьшая глубина строки: закрывающая скобка уровня n оставляет n - 1
+        low = depth_of(previous)
+        if pairs:
+            for column, level in pairs:
+                if level <= low and text[column] in "]}":
+                    low = level - 1
+        line = self.currentBlock().blockNumber()
+        brackets = self.brackets
+        delta = self._document.blockCount() - len(brackets)
+        if delta:
+            # Строки вставлены или удалены: перепроверка после правки начинается
+            # с ее первой строки, следом за ней и сдвигаем глубины
+            brackets.shift(line + 1, delta)
+            self.marks.shift(line + 1, delta)
+        brackets.set(line, low, depth_of(state))
+        if marks:
+            levels = [level for _, level in marks]
+            low = min(levels)
+            self.marks.set(line, low, levels.count(low))
+        else:
+            self.marks.set(line, NO_MARK, 0)
+        if long_line:
+            self._remember(self.currentBlock(), LinePairs(text, pairs), LineMarks(text, marks))
+        if not errors:
+            # Данные блока — только записи ошибок; без них проверять нечего
+            if self._error_blocks and self.currentBlockUserData() is not None:
+                self.setCurrentBlockUserData(None)
+            return
+        entry = BlockErrors(errors, QTextCursor(self.currentBlock()))
+        self.setCurrentBlockUserData(entry)
+        self._error_blocks.append(entry)
+        if len(self._error_blocks) > self._prune_limit:
+            self._live_error_blocks()
+            self._prune_limit = max(256, 2 * len(self._error_blocks))
+
+    def _live_error_blocks(self) -> List[BlockErrors]:
+        """Отбрасывает записи блоков, которые удалены или перепроверены"""
+        live = []
+        for entry in self._error_blocks:
+            block = entry.cursor.block()
+            if block.isValid() and block.userData() is entry:
+                live.append(entry)
+        self._error_blocks = live
+        return live
+
+    def _line_marks(self, previous: int, text: str) -> list:
+        """Список для разделителей строки. В JSON Lines начало записи отмечается
+        разделителем уровня 0: номер записи — их число в строках выше"""
+        if self.json_lines and previous == START_STATE and text.strip():
+            return [(len(text) - len(text.lstrip()), 0)]
+        return []
+
+    def line_pairs(self, block: QTextBlock) -> LinePairs:
+        """Парные скобки строки; длинные строки не разбираются повторно до правки"""
+        return self._line_structure(block)[0]
+
+    def line_marks(self, block: QTextBlock) -> LineMarks:
+        """Запятые и ключи строки; длинные строки не разбираются повторно до правки"""
+        return self._line_structure(block)[1]
+
+    def _line_structure(self, block: QTextBlock) -> Tuple[LinePairs, LineMarks]:
+        if block.length() > LONG_LINE:
+            for cursor, revision, pairs, marks in self._long_lines:
+                if cursor.block() == block and revision == block.revision():
+                    return pairs, marks
+        text = block.text()
+        previous = self._start_state(block.previous().userState(), text)
+        pairs, marks = [], self._line_marks(previous, text)
+        self.lexer.lex(text, previous, pairs=pairs, marks=marks)
+        pairs, marks = LinePairs(text, pairs), LineMarks(text, marks)
+        if len(text) > LONG_LINE:
+            self._remember(block, pairs, marks)
+        return pairs, marks
+
+    def _remember(self, block: QTextBlock, pairs: LinePairs, marks: LineMarks):
+        # Курсор следует за строкой при правках выше нее
+        self._long_lines = [entry for entry in self._long_lines if entry[0].block() != block]
+        self._long_lines.insert(0, [QTextCursor(block), block.revision(), pairs, marks])
+        del self._long_lines[LONG_LINE_CACHE:]
+
+    def is_checked(self) -> bool:
+        """Проверены ли все блоки документа (до первой подсветки состояние неизвестно)"""
+        document = self.document()
+        return document is not None and document.lastBlock().userState() >= 0
+
+    def is_blank(self) -> bool:
+        """Документ не содержит ничего, кроме пробелов"""
+        return self.is_checked() and self.document().lastBlock().userState() == START_STATE \
+            and not self._live_error_blocks()
+
+    def syntax_errors(self) -> Optional[List[Tuple[int, LineError]]]:
+        """Все ошибки документа: (номер строки с 1, ошибка); None, если проверка не выполнена.
+        Стоимость пропорциональна числу ошибок, а не размеру документа."""
+        if not self.is_checked():
+            return None
+        found = [
+            (entry.cursor.blockNumber() + 1, error)
+            for entry in self._live_error_blocks()
+            for error in entry.errors
+        ]
+        found.sort(key=lambda item: (item[0], item[1].column))
+        last_block = self.document().lastBlock()
+        message = self.lexer.end_error(last_block.userState())
+        if message:
+            found.append((last_block.blockNumber() + 1, LineError(last_block.length() - 1, 0, message)))
+        return found
+
+    def _highlight(self, text):
         # Ключи JSON
         for match in re.finditer(r'"([^"]+)"\s*:', text):
             self.setFormat(match.start(), match.end() - match.start(), self.key_format)